@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'AgriGuide.settings')
+# Read by the settings, which keep no persistent database connections under ASGI
+os.environ.setdefault('SERVER_INTERFACE', 'asgi')
 
 application = get_asgi_application()
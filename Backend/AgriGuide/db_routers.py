@@ -0,0 +1,166 @@
+"""
+Read-replica routing.
+
+When DATABASES has a 'replica' alias, ReplicaRouter sends reads that can
+tolerate a little replication lag to it, and every write goes to 'default':
+
+- GET/HEAD/OPTIONS requests read the catalog tables (CATALOG_MODELS: crops,
+  schemes, loans, technologies, soils, ...) from the replica.
+- Views decorated with @replica_reads read every table from the replica.
+  These are the recommendation views, which are read-only computations even
+  when they are POSTed a JSON body.
+- Everything else reads from 'default': other requests, management commands
+  and the shell.
+
+Reads come back to 'default' for read-your-writes:
+
+- After the first write of a request, the rest of that request reads from
+  'default'. This covers the dashboard worker threads too. Django also asks
+  where to write when a related object is assigned to an unsaved instance, so
+  read-only code sets foreign keys of such instances by id.
+- A request that wrote gets a short-lived cookie (REPLICA_PIN_COOKIE). Its
+  client reads from 'default' until the cookie expires after
+  REPLICA_PIN_SECONDS. A farmer who just saved their profile therefore sees
+  the new profile on the next screen, even if the replica has not caught up.
+
+ReplicaPinMiddleware keeps the routing state of each request. The state lives
+in a context variable, so threads that run with a copy of the request's
+context (see main_app.dashboard) share it.
+
+Locally the replica is a second SQLite connection (see settings). In tests
+it mirrors 'default'.
+"""
+import contextvars
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.db import connections
+
+REPLICA = 'replica'
+REPLICA_PIN_COOKIE = 'db_primary_pin'
+
+# Tables read from the replica by every safe request; they change through the
+# admin only. CatalogVersion goes with them so a conditional GET never pairs
+# a new version with data the replica has not received yet.
+CATALOG_MODELS = {
+    'main_app.district', 'main_app.district_soils', 'main_app.crop', 'main_app.crop_soils',
+    'main_app.cropeconomics', 'main_app.soilcropcompatibility', 'main_app.technology',
+    'main_app.governmentscheme', 'main_app.loanoption', 'main_app.organicpractice',
+    'main_app.organicpractice_soils', 'main_app.pestdisease', 'main_app.fertilizerrecommendation',
+    'main_app.irrigationrequirement', 'main_app.soiltype', 'main_app.soiltypesynonym',
+    'main_app.catalogversion', 'myapp.governmentscheme', 'myapp.loanscheme',
+}
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class RoutingState:
+    """Where the reads of one request go"""
+
+    def __init__(self, catalog_reads=False, pinned=False):
+        # Catalog tables may be read from the replica
+        self.catalog_reads = catalog_reads
+        # Every table may be read from the replica (@replica_reads)
+        self.all_reads = False
+        # The client wrote recently (pin cookie)
+        self.pinned = pinned
+        # This request has written
+        self.written = False
+
+    def read_alias(self, model):
+        if self.pinned or self.written:
+            return None
+        if self.all_reads or (self.catalog_reads and model._meta.label_lower in CATALOG_MODELS):
+            return REPLICA
+        return None
+
+
+_state = contextvars.ContextVar('db_routing_state', default=None)
+
+
+def has_replica():
+    return REPLICA in connections.settings
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or not has_replica():
+            return None
+        return state.read_alias(model)
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.written = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same rows as 'default'
+        if {obj1._state.db, obj2._state.db} <= {'default', REPLICA}:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica gets its schema through replication
+        return db != REPLICA
+
+
+@contextmanager
+def routing(state):
+    """Route the reads of the block with state"""
+    token = _state.set(state)
+    try:
+        yield state
+    finally:
+        _state.reset(token)
+
+
+def pin_to_primary():
+    """
+    Read the rest of this request from 'default', as after its first write.
+    For code about to write back what it reads, which must not read stale
+    rows from a lagging replica.
+    """
+    state = _state.get()
+    if state is not None:
+        state.written = True
+
+
+def replica_reads(view):
+    """Read every table from the replica in a read-only view (unless the client is pinned to 'default')"""
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        state = _state.get()
+        if state is None:
+            return view(request, *args, **kwargs)
+        all_reads, state.all_reads = state.all_reads, True
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            state.all_reads = all_reads
+
+    return wrapper
+
+
+class ReplicaPinMiddleware:
+    """Keeps the routing state of each request and pins clients that wrote to 'default'"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = RoutingState(
+            catalog_reads=request.method in SAFE_METHODS,
+            pinned=REPLICA_PIN_COOKIE in request.COOKIES,
+        )
+        with routing(state):
+            response = self.get_response(request)
+        if state.written:
+            response.set_cookie(
+                REPLICA_PIN_COOKIE, '1', max_age=settings.REPLICA_PIN_SECONDS, httponly=True, samesite='Lax'
+            )
+        return response
@@ -0,0 +1,86 @@
+"""
+MessagePack content negotiation for the JSON APIs.
+
+Views build JSON responses as usual. When the client prefers
+application/msgpack in its Accept header, MessagePackMiddleware re-encodes the
+payload of a JSON response as MessagePack. Every JSON response gets
+Vary: Accept so caches keep the two encodings apart.
+
+Our payloads are mostly text, so MessagePack saves only 3-15% uncompressed
+and is about the same size once gzipped (benchmark_msgpack_payloads.py). It
+pays off mainly for clients that cannot use gzip.
+
+DRF views negotiate the format themselves through
+AgriGuide.renderers.MessagePackRenderer; their responses already have the
+MessagePack content type and pass through unchanged.
+"""
+import json
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.utils.cache import patch_vary_headers
+
+from .renderers import MSGPACK_CONTENT_TYPE, msgpack_dumps
+
+JSON_CONTENT_TYPE = 'application/json'
+MSGPACK_CONTENT_TYPES = {MSGPACK_CONTENT_TYPE, 'application/x-msgpack'}
+
+
+def media_type(response):
+    return response.get('Content-Type', '').split(';')[0].strip().lower()
+
+
+def quality(accepted_type):
+    try:
+        return float(accepted_type.params.get('q', 1))
+    except ValueError:
+        return 0.0
+
+
+def prefers_msgpack(request):
+    """Whether Accept asks for MessagePack explicitly and ranks it no lower than JSON"""
+    msgpack_q = json_q = 0.0
+    for accepted in request.accepted_types:
+        full_type = f'{accepted.main_type}/{accepted.sub_type}'.lower()
+        if full_type in MSGPACK_CONTENT_TYPES:
+            msgpack_q = max(msgpack_q, quality(accepted))
+        elif full_type == JSON_CONTENT_TYPE:
+            json_q = max(json_q, quality(accepted))
+    return msgpack_q > 0 and msgpack_q >= json_q
+
+
+def encode_msgpack(response):
+    data = getattr(response, 'data', None)
+    if data is None:
+        data = json.loads(response.content)
+    response.content = msgpack_dumps(data)
+    response['Content-Type'] = MSGPACK_CONTENT_TYPE
+    if response.has_header('Content-Length'):
+        response['Content-Length'] = str(len(response.content))
+
+
+class MessagePackMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.process_response(request, await self.get_response(request))
+
+    def process_response(self, request, response):
+        content_type = media_type(response)
+        if content_type not in MSGPACK_CONTENT_TYPES and content_type != JSON_CONTENT_TYPE:
+            return response
+        patch_vary_headers(response, ('Accept',))
+        if (content_type == JSON_CONTENT_TYPE and not response.streaming and response.content
+                and prefers_msgpack(request)):
+            encode_msgpack(response)
+        return response
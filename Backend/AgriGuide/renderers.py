@@ -0,0 +1,120 @@
+"""
+Fast JSON rendering shared by every API in the project.
+
+Responses are serialized with orjson when it is installed and with the
+standard library otherwise. Both paths render Decimal values as numbers and
+datetimes, dates, UUIDs and dataclass instances directly, so views can return
+model values without converting them to strings first.
+
+Clients that send Accept: application/msgpack get the same payload encoded
+as MessagePack instead (see AgriGuide.middleware), with the same conversions.
+"""
+import dataclasses
+import decimal
+import json
+
+import msgpack
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, JsonResponse
+from django.utils.encoding import force_str
+from django.utils.functional import Promise
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def default(obj):
+    """Types that orjson (or the stdlib encoder) does not know about"""
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, Promise):
+        return force_str(obj)
+    if hasattr(obj, 'tolist'):
+        # NumPy scalars and arrays
+        return obj.tolist()
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+class FastJSONEncoder(DjangoJSONEncoder):
+    """Standard library fallback with the same output as the orjson path"""
+
+    def default(self, obj):
+        if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+            return dataclasses.asdict(obj)
+        try:
+            return default(obj)
+        except TypeError:
+            return super().default(obj)
+
+
+if orjson is not None:
+    ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_UTC_Z
+
+    def dumps(data):
+        return orjson.dumps(data, default=default, option=ORJSON_OPTIONS)
+else:
+    def dumps(data):
+        return json.dumps(data, cls=FastJSONEncoder, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+MSGPACK_CONTENT_TYPE = 'application/msgpack'
+
+_msgpack_encoder = FastJSONEncoder()
+
+
+def msgpack_dumps(data):
+    """MessagePack encoding of data, converting values the same way as dumps()"""
+    return msgpack.packb(data, default=_msgpack_encoder.default, use_bin_type=True)
+
+
+class FastJsonResponse(JsonResponse):
+    """Drop-in replacement for django.http.JsonResponse"""
+
+    def __init__(self, data, encoder=None, safe=True, json_dumps_params=None, **kwargs):
+        if safe and not isinstance(data, dict):
+            raise TypeError(
+                'In order to allow non-dict objects to be serialized set the '
+                'safe parameter to False.'
+            )
+        kwargs.setdefault('content_type', 'application/json')
+        if encoder is not None or json_dumps_params:
+            # Callers asking for a specific encoder or formatting get the stdlib path
+            content = json.dumps(data, cls=encoder or FastJSONEncoder, **(json_dumps_params or {}))
+        else:
+            content = dumps(data)
+        HttpResponse.__init__(self, content=content, **kwargs)
+        # Kept so the response can be re-encoded as MessagePack without parsing it again
+        self.data = data
+
+
+class FastJSONRenderer(JSONRenderer):
+    """DRF renderer using the same serializer as FastJsonResponse"""
+
+    encoder_class = FastJSONEncoder
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        # Indented output for the browsable API keeps DRF's own renderer
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
+
+
+class MessagePackRenderer(BaseRenderer):
+    """DRF renderer for Accept: application/msgpack"""
+
+    media_type = MSGPACK_CONTENT_TYPE
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack_dumps(data)
@@ -11,7 +11,11 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
 from pathlib import Path
+import importlib.util
 import os
+
+from django.core.exceptions import ImproperlyConfigured
+
 # Remove dotenv import and loading
 # from dotenv import load_dotenv
 # load_dotenv()
@@ -65,7 +69,9 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
+    'AgriGuide.middleware.MessagePackMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'AgriGuide.db_routers.ReplicaPinMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -124,6 +130,13 @@ CORS_ALLOW_HEADERS = [
     'x-requested-with',
 ]
 
+# Pagination headers of the admin list endpoints, readable from the browser
+CORS_EXPOSE_HEADERS = [
+    'link',
+    'x-next-cursor',
+    'x-total-count',
+]
+
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
@@ -133,29 +146,109 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'AgriGuide.renderers.FastJSONRenderer',
+        'AgriGuide.renderers.MessagePackRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
 }
 
 # Add this to ensure CORS works properly with credentials
 CORS_ALLOW_CREDENTIALS = True
 
 # Database Configuration
-# Use SQLite for development, PostgreSQL for production
-if DEBUG:
+# SQLite for development, PostgreSQL for production. Setting DATABASE_HOST
+# selects PostgreSQL in development too, e.g. for benchmark_db_connections.py.
+if DEBUG and not os.environ.get('DATABASE_HOST'):
     DATABASES = {
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
             'NAME': BASE_DIR / 'db.sqlite3',
-        }
+            'OPTIONS': {
+                # SQLite ignores select_for_update. Taking the write lock when
+                # the transaction starts makes concurrent profile saves wait
+                # their turn instead of failing with "database is locked".
+                'transaction_mode': 'IMMEDIATE',
+                'timeout': 20,
+            },
+        },
+        # Catalog reads and recommendations (AgriGuide.db_routers). A second
+        # connection to db.sqlite3 is a replica without lag; point
+        # SQLITE_REPLICA_PATH at a copy made with sqlite3's .backup to try lag.
+        'replica': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('SQLITE_REPLICA_PATH', BASE_DIR / 'db.sqlite3'),
+            'OPTIONS': {'timeout': 20},
+            'TEST': {'MIRROR': 'default'},
+        },
     }
 else:
     DATABASES = {
         'default': {
             'ENGINE': 'django.db.backends.postgresql',
-            'NAME': 'your_db_name',  # Replace with actual DB name
-            'USER': 'your_db_user',  # Replace with actual DB user
-            'PASSWORD': 'your_db_password',  # Replace with actual DB password
-            'HOST': 'localhost',
-            'PORT': '5432',
+            'NAME': os.environ.get('DATABASE_NAME', 'agriguide'),
+            'USER': os.environ.get('DATABASE_USER', 'agriguide'),
+            'PASSWORD': os.environ.get('DATABASE_PASSWORD', ''),
+            'HOST': os.environ.get('DATABASE_HOST', 'localhost'),
+            'PORT': os.environ.get('DATABASE_PORT', '5432'),
+            # Under WSGI, keep each worker thread's connection open for
+            # CONN_MAX_AGE seconds instead of connecting on every request, and
+            # check that it is still usable before a request reuses it. Under
+            # ASGI (asgi.py sets SERVER_INTERFACE) requests do not keep to one
+            # thread, so connections are not reused; use DATABASE_POOL there.
+            'CONN_MAX_AGE': int(os.environ.get(
+                'DATABASE_CONN_MAX_AGE', 0 if os.environ.get('SERVER_INTERFACE') == 'asgi' else 60)),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'connect_timeout': int(os.environ.get('DATABASE_CONNECT_TIMEOUT', 5)),
+            },
+        }
+    }
+    if os.environ.get('DATABASE_SSLMODE'):
+        DATABASES['default']['OPTIONS']['sslmode'] = os.environ['DATABASE_SSLMODE']
+    if os.environ.get('DATABASE_POOL', '').lower() in ('1', 'true', 'yes'):
+        # Share a psycopg connection pool between the threads of a worker
+        # (needs psycopg 3 with pool support, as in requirements.txt).
+        # Pooled connections go back to the pool after every request, which
+        # replaces CONN_MAX_AGE.
+        if importlib.util.find_spec('psycopg_pool') is None:
+            raise ImproperlyConfigured('DATABASE_POOL needs psycopg 3 with pool support: pip install "psycopg[binary,pool]"')
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.environ.get('DATABASE_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.environ.get('DATABASE_POOL_MAX_SIZE', 10)),
+            # Seconds a request waits for a free connection
+            'timeout': int(os.environ.get('DATABASE_POOL_TIMEOUT', 10)),
+        }
+    if os.environ.get('DATABASE_REPLICA_HOST'):
+        DATABASES['replica'] = {
+            **DATABASES['default'],
+            'HOST': os.environ['DATABASE_REPLICA_HOST'],
+            'OPTIONS': {**DATABASES['default']['OPTIONS']},
+            'TEST': {'MIRROR': 'default'},
+        }
+
+DATABASE_ROUTERS = ['AgriGuide.db_routers.ReplicaRouter']
+# Seconds a client that wrote keeps reading from the primary database
+REPLICA_PIN_SECONDS = int(os.environ.get('REPLICA_PIN_SECONDS', 5))
+
+# Cache
+# The weather cache, catalog versions, admin list counts and dashboard
+# sections are only as shared as this cache. Setting REDIS_URL (e.g.
+# redis://localhost:6379/0) shares it between every process, which production
+# needs; without it each process keeps its own local-memory cache, which
+# prefetch_weather refuses to fill.
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
         }
     }
 
@@ -194,6 +287,12 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Uploaded files (profile images). The default storage keeps them on the
+# local filesystem under MEDIA_ROOT; myapp serves the profile images itself
+# to their owner, with cache headers (see myapp.profile_images).
+MEDIA_URL = '/media/'
+MEDIA_ROOT = os.environ.get('MEDIA_ROOT', BASE_DIR / 'media')
+
 # Email Configuration
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = 'smtp.gmail.com'
@@ -259,3 +358,14 @@ os.makedirs(os.path.join(BASE_DIR, 'logs'), exist_ok=True)
 
 # Frontend URL for password reset links
 FRONTEND_URL = 'http://localhost:5174'
+
+# OpenWeather proxy. WEATHER_API_BASE_URL can point at a local stub server
+# for tests and benchmarks.
+WEATHER_API_BASE_URL = os.environ.get('WEATHER_API_BASE_URL', 'https://api.openweathermap.org/data/2.5')
+WEATHER_API_KEY = os.environ.get('WEATHER_API_KEY', 'bc9254afa9db3515eab55abb72088120')
+WEATHER_FORECAST_API_KEY = os.environ.get('WEATHER_FORECAST_API_KEY', '08fdd254cb046013cd79b0c67a7a485d')
+WEATHER_CONNECT_TIMEOUT = float(os.environ.get('WEATHER_CONNECT_TIMEOUT', 3))
+WEATHER_READ_TIMEOUT = float(os.environ.get('WEATHER_READ_TIMEOUT', 5))
+# Upper bound on concurrent upstream requests per process; requests beyond it
+# wait up to WEATHER_CONNECT_TIMEOUT for a free connection
+WEATHER_MAX_CONNECTIONS = int(os.environ.get('WEATHER_MAX_CONNECTIONS', 20))
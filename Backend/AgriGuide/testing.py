@@ -0,0 +1,21 @@
+from django.db import connections
+from django.test import TestCase
+
+from .db_routers import REPLICA
+
+
+class ReplicaTestCase(TestCase):
+    """
+    TestCase for code that reads from the replica. The replica alias is a test
+    mirror of 'default', but a mirror is a separate connection and would not
+    see the rows of the test's open transaction, so here it shares the
+    'default' connection. Check where reads go with queryset.db.
+    """
+    databases = {'default', REPLICA}
+
+    @classmethod
+    def setUpClass(cls):
+        replica = connections[REPLICA]
+        connections[REPLICA] = connections['default']
+        cls.addClassCleanup(connections.__setitem__, REPLICA, replica)
+        super().setUpClass()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+"""
+Compare requests/s against PostgreSQL with a new connection per request,
+persistent connections (CONN_MAX_AGE with health checks) and a psycopg pool.
+
+Usage: DATABASE_HOST=localhost DATABASE_NAME=... DATABASE_USER=... DATABASE_PASSWORD=... \\
+       python benchmark_db_connections.py [--requests N] [--workers N] [--path URL]
+
+The database must be migrated (python manage.py migrate with the same
+environment). Each mode runs in its own process because the settings are read
+once at startup. --workers threads play the threads of a WSGI worker (e.g.
+gunicorn --threads): each one keeps handling requests, so it can keep its
+connection between them. Requests go through Django's WSGI handler, including
+the request_started/finished signals that open and close the connections.
+The pool mode needs psycopg 3 with pool support, as in requirements.txt, and
+is skipped without it.
+"""
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+MODES = {
+    'per request': {'DATABASE_CONN_MAX_AGE': '0', 'DATABASE_POOL': ''},
+    'persistent': {'DATABASE_CONN_MAX_AGE': '60', 'DATABASE_POOL': ''},
+    'pool': {'DATABASE_POOL': '1'},
+}
+
+
+def run_mode(args):
+    """Serve args.requests requests in this process and print the result as JSON"""
+    import django
+
+    # Set up Django environment
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'AgriGuide.settings')
+    django.setup()
+
+    from wsgiref.util import setup_testing_defaults
+
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.db import connection
+    from django.db.backends.signals import connection_created
+
+    if connection.vendor != 'postgresql':
+        sys.exit('Set DATABASE_HOST (and DATABASE_NAME, DATABASE_USER, DATABASE_PASSWORD) to a PostgreSQL server')
+
+    opened = []
+    connection_created.connect(lambda sender, **kwargs: opened.append(1), weak=False)
+    handler = WSGIHandler()
+    path, _, query = args.path.partition('?')
+
+    def request(_):
+        environ = {'PATH_INFO': path, 'QUERY_STRING': query, 'REQUEST_METHOD': 'GET', 'wsgi.input': io.BytesIO()}
+        setup_testing_defaults(environ)
+        statuses = []
+        response = handler(environ, lambda status, headers, exc_info=None: statuses.append(status))
+        b''.join(response)
+        response.close()  # sends request_finished, which closes or keeps the connection
+        return statuses[0].startswith('200')
+
+    # Warm up: import the views, fill the caches, open the pool
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        list(pool.map(request, range(args.workers)))
+    opened.clear()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        ok = sum(pool.map(request, range(args.requests)))
+    elapsed = time.perf_counter() - start
+    print(json.dumps({'elapsed': elapsed, 'ok': ok, 'connections': len(opened)}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--path', default='/api/admin/crops/?limit=10')
+    parser.add_argument('--mode', choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        run_mode(args)
+        return 0
+
+    print(f"{args.requests} GET {args.path} from {args.workers} worker threads\n")
+    for mode, env in MODES.items():
+        command = [sys.executable, __file__, '--mode', mode, '--requests', str(args.requests),
+                   '--workers', str(args.workers), '--path', args.path]
+        result = subprocess.run(command, env={**os.environ, **env}, capture_output=True, text=True)
+        if result.returncode != 0:
+            reason = (result.stderr.strip().splitlines() or ['failed'])[-1]
+            print(f"  {mode:<14}skipped: {reason}")
+            continue
+        stats = json.loads(result.stdout.strip().splitlines()[-1])
+        print(f"  {mode:<14}{stats['elapsed']:8.2f} s  {stats['ok'] / stats['elapsed']:8.1f} requests/s  "
+              f"{stats['connections']:6d} connections opened  {args.requests - stats['ok']} failed")
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
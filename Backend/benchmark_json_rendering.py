@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+"""
+Compare JSON rendering throughput of Django's JsonResponse with the project's
+FastJsonResponse on the scheme and loan list payloads.
+
+Usage: python benchmark_json_rendering.py [--copies N] [--repeat N]
+
+--copies repeats the catalog rows to simulate a larger catalog.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+import django
+
+# Set up Django environment
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'AgriGuide.settings')
+django.setup()
+
+from django.forms import model_to_dict
+from django.http import JsonResponse
+
+from AgriGuide import renderers
+from AgriGuide.renderers import FastJSONEncoder, FastJsonResponse
+from main_app.models import GovernmentScheme, LoanOption
+from myapp.models import LoanScheme
+
+
+def scheme_payload(copies):
+    """Same shape as govt_schemes_api: a list of model dicts"""
+    schemes = [model_to_dict(scheme) for scheme in GovernmentScheme.objects.all()]
+    return {'success': True, 'schemes': schemes * copies}
+
+
+def loan_payload(copies):
+    """Loan options and bank loan schemes with their Decimal amounts and rates"""
+    loans = [
+        {
+            'id': loan.id,
+            'name': loan.name,
+            'provider': loan.provider,
+            'loan_type': loan.loan_type,
+            'interest_rate': loan.interest_rate,
+            'max_amount': loan.max_amount,
+            'tenure': loan.tenure,
+            'eligibility': loan.eligibility,
+            'documents_required': loan.documents_required,
+            'special_features': loan.special_features,
+        }
+        for loan in LoanOption.objects.all()
+    ]
+    schemes = [
+        {
+            'id': scheme.scheme_id,
+            'name': scheme.scheme_name,
+            'bank': scheme.bank_name,
+            'description': scheme.description,
+            'loanType': scheme.loan_type,
+            'interestRateMin': scheme.interest_rate_min,
+            'interestRateMax': scheme.interest_rate_max,
+            'maxLoanAmount': scheme.loan_limit_max,
+            'repaymentTermMonths': scheme.repayment_term_months,
+        }
+        for scheme in LoanScheme.objects.all()
+    ]
+    return {'loans': loans * copies, 'schemes': schemes * copies}
+
+
+def stdlib_fallback_response(data):
+    """FastJsonResponse as it renders when orjson is not installed"""
+    return FastJsonResponse(data, encoder=FastJSONEncoder)
+
+
+def measure(render, data, repeat):
+    render(data)  # warm up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        content = render(data).content
+    elapsed = time.perf_counter() - start
+    return elapsed / repeat, len(content)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--copies', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    renderers_to_compare = [
+        ('JsonResponse (stdlib)', JsonResponse),
+        ('FastJsonResponse (stdlib fallback)', stdlib_fallback_response),
+    ]
+    if renderers.orjson is not None:
+        renderers_to_compare.append(('FastJsonResponse (orjson)', FastJsonResponse))
+    else:
+        print("orjson is not installed; only the stdlib paths are measured\n")
+
+    for name, data in [('Scheme list', scheme_payload(args.copies)), ('Loan list', loan_payload(args.copies))]:
+        rows = sum(len(value) for value in data.values() if isinstance(value, list))
+        print(f"{name}: {rows} rows, {args.repeat} renders each")
+        baseline = None
+        for label, render in renderers_to_compare:
+            seconds, size = measure(render, data, args.repeat)
+            baseline = baseline or seconds
+            print(f"  {label:<36} {seconds * 1000:8.3f} ms/response  "
+                  f"{1 / seconds:10.1f} responses/s  {size / 1024:8.1f} KiB  x{baseline / seconds:.2f}")
+        print()
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+"""
+Compare latency and peak memory of the scheme and loan listings with whole
+rows and with only the columns the admin dashboard shows.
+
+Usage: python benchmark_list_projections.py [--copies N] [--limit N] [--repeat N]
+
+The catalog is padded with --copies copies of every scheme and loan inside a
+transaction that is rolled back afterwards, so the database is left as it
+was. "whole rows" is each listing as it was read before ?fields= existed;
+"projected" asks for the dashboard columns, which leaves the long text
+columns unread. The engine scan compares loading every scheme to reading the
+district column alone, as the scheme engine now does. Peak memory is traced
+with tracemalloc over one request, so it covers the rows, the serialized
+dicts and the encoded response.
+"""
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+
+import django
+
+# Set up Django environment
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'AgriGuide.settings')
+django.setup()
+
+from django.core.cache import cache
+from django.db import transaction
+from django.test import Client
+
+from main_app.models import GovernmentScheme, LoanOption
+
+LISTINGS = [
+    ('Scheme list (admin)', '/api/admin/schemes/', 'id,name,implementing_agency,district_availability'),
+    ('Loan list (admin)', '/api/admin/loans/', 'id,name,provider,interest_rate,loan_type'),
+]
+
+
+def pad_catalog(copies):
+    for model in (GovernmentScheme, LoanOption):
+        rows = list(model.objects.all())
+        for row in rows:
+            row.pk = None
+        model.objects.bulk_create(rows * copies)
+
+
+def measure(run, repeat):
+    """(mean seconds, peak bytes) of run()"""
+    run()  # warm up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        run()
+    elapsed = (time.perf_counter() - start) / repeat
+
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def compare(name, before, after, repeat):
+    print(name)
+    base_seconds = base_peak = None
+    for label, run in [('whole rows', before), ('projected', after)]:
+        seconds, peak = measure(run, repeat)
+        base_seconds = base_seconds or seconds
+        base_peak = base_peak or peak
+        print(f"  {label:<14}{seconds * 1e3:9.2f} ms{peak / 1024:10.1f} KiB peak"
+              f"  ({seconds / base_seconds:.0%} / {peak / base_peak:.0%})")
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--copies', type=int, default=10)
+    parser.add_argument('--limit', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    client = Client(HTTP_HOST='localhost')
+
+    def get(url, **params):
+        def run():
+            response = client.get(url, {'limit': args.limit, **params})
+            assert response.status_code == 200, response.content
+            return response.content
+        return run
+
+    with transaction.atomic():
+        pad_catalog(args.copies)
+        cache.clear()  # the cached counts are of the unpadded catalog
+        print(f"{GovernmentScheme.objects.count()} schemes, {LoanOption.objects.count()} loans, "
+              f"{args.limit} rows per page\n")
+
+        for name, url, fields in LISTINGS:
+            compare(name, get(url), get(url, fields=fields), args.repeat)
+
+        compare(
+            'Scheme engine district scan',
+            lambda: [scheme.district_availability for scheme in GovernmentScheme.objects.all()],
+            lambda: list(GovernmentScheme.objects.values_list('pk', 'district_availability')),
+            args.repeat,
+        )
+        transaction.set_rollback(True)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
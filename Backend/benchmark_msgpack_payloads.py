@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+"""
+Compare payload size and encode time of JSON and MessagePack for the
+recommendation and scheme list responses.
+
+Usage: python benchmark_msgpack_payloads.py [--repeat N]
+
+The recommendation payloads are built for a sample farmer created inside a
+transaction that is rolled back afterwards, so the database is left as it
+was. Sizes are given raw and gzip-compressed, since most clients negotiate
+gzip as well.
+"""
+import os
+import sys
+import gzip
+import json
+import time
+import argparse
+import contextlib
+
+import django
+
+# Set up Django environment
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'AgriGuide.settings')
+django.setup()
+
+from django.db import transaction
+from django.test import Client
+
+from AgriGuide.renderers import dumps, msgpack_dumps
+from main_app.models import FarmDetail, FarmerInterest, FarmerProfile, FinancialInfo
+
+
+def sample_farmer():
+    farmer = FarmerProfile.objects.create(first_name='Ravi', last_name='Gowda', district='Belagavi')
+    FarmDetail.objects.create(
+        farmer=farmer, farm_size=2.5, soil_type='Black', irrigation_sources='Borewell',
+        nitrogen_value=280, phosphorus_value=25, potassium_value=300, ph_value=7.2
+    )
+    FarmerInterest.objects.create(farmer=farmer, challenges='Water scarcity, Credit access, Market access')
+    FinancialInfo.objects.create(farmer=farmer, annual_income='1l_3l')
+    return farmer
+
+
+def payloads():
+    """(name, data) of each response, decoded from its JSON"""
+    client = Client(HTTP_HOST='localhost')
+    results = []
+    with transaction.atomic():
+        farmer = sample_farmer()
+        urls = [
+            ('Farmer dashboard', f'/api/farmer/{farmer.id}/dashboard/'),
+            ('Scheme recommendations', f'/api/farmer/{farmer.id}/recommendations/schemes/'),
+            ('Loan recommendations', f'/api/farmer/{farmer.id}/recommendations/loans/'),
+            ('Scheme list (govt-schemes)', '/api/govt-schemes/'),
+            ('Scheme list (admin)', '/api/admin/schemes/'),
+            ('Bank loan schemes', '/api/bank-schemes/'),
+        ]
+        for name, url in urls:
+            # The recommendation engines print their scoring as they go
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                response = client.get(url)
+            if response.status_code == 200:
+                results.append((name, json.loads(response.content)))
+            else:
+                print(f"Skipping {name}: {url} answered {response.status_code}")
+        transaction.set_rollback(True)
+    return results
+
+
+def measure(encode, data, repeat):
+    encode(data)  # warm up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        content = encode(data)
+    elapsed = time.perf_counter() - start
+    return elapsed / repeat, len(content), len(gzip.compress(content))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=500)
+    args = parser.parse_args()
+
+    print(f"{'':<28}{'':>10}{'encode':>12}{'size':>12}{'gzipped':>12}")
+    for name, data in payloads():
+        print(name)
+        json_size = json_gzipped = None
+        for label, encode in [('JSON', dumps), ('MessagePack', msgpack_dumps)]:
+            seconds, size, gzipped = measure(encode, data, args.repeat)
+            json_size = json_size or size
+            json_gzipped = json_gzipped or gzipped
+            print(f"  {label:<26}{'':>10}{seconds * 1e6:9.1f} us{size / 1024:9.1f} KiB{gzipped / 1024:9.1f} KiB"
+                  f"  ({size / json_size:.0%} / {gzipped / json_gzipped:.0%} of JSON)")
+        print()
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,173 @@
+#!/usr/bin/env python
+"""
+Measure save_farmer_profile_api latency under concurrent writes.
+
+Usage: python benchmark_profile_save.py [--farmers N] [--saves N] [--concurrency 1,4,8] [--check-independent]
+
+Each round posts --saves profile saves from a pool of --concurrency threads,
+spread over --farmers farmers (so fewer farmers means more saves of the same
+farmer racing for its row lock). Latency percentiles, throughput and failed
+saves are printed per round. The benchmark farmers are created through the
+API under their own externalIds and deleted again at the end.
+
+SQLite serializes all writers on one database lock, so the numbers there
+mostly show queueing; run it against PostgreSQL to see row-level locking.
+
+--check-independent (PostgreSQL only) holds one farmer's row lock in an open
+transaction and checks that a save of another farmer still completes, while a
+save of the locked farmer waits. A save that took a lock shared by all farmers
+would wait in both cases.
+"""
+import os
+import sys
+import time
+import uuid
+import argparse
+import threading
+import contextlib
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+import django
+
+# Set up Django environment
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'AgriGuide.settings')
+django.setup()
+
+from django.db import connection, connections, transaction
+from django.test import Client
+
+from main_app.models import FarmerProfile
+
+URL = '/api/save-farmer-profile/'
+
+
+def profile(external_id, index, revision):
+    return {
+        'externalId': str(external_id),
+        'personal': {'firstName': f'Bench{index}', 'lastName': 'Farmer', 'age': 40, 'district': 'Belagavi'},
+        'farm': {
+            'size': f'{1 + revision % 5} Acre', 'soilType': 'Black', 'irrigationSources': ['Borewell'],
+            'irrigationSystems': ['Drip'], 'landOwnership': 'Owned', 'nitrogenValue': 280, 'soilPh': 7.1,
+        },
+        'financial': {'annualIncome': '1l_3l', 'governmentSchemes': ['Kisan Credit Card'], 'bankAccount': 'Yes'},
+        'preferences': {'sustainablePractices': ['Mulching']},
+        'challenges': ['Water Scarcity', 'Credit Access'],
+    }
+
+
+def save(job):
+    external_id, index, revision = job
+    client = Client(HTTP_HOST='localhost')
+    start = time.perf_counter()
+    response = client.post(URL, profile(external_id, index, revision), content_type='application/json')
+    elapsed = time.perf_counter() - start
+    return elapsed, response.status_code == 200 and response.json().get('success')
+
+
+def run_round(external_ids, saves, concurrency):
+    jobs = [(external_ids[i % len(external_ids)], i % len(external_ids), i) for i in range(saves)]
+
+    def worker(job):
+        try:
+            return save(job)
+        finally:
+            # Every thread has its own connection
+            connections.close_all()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(worker, jobs))
+    wall = time.perf_counter() - start
+
+    latencies = sorted(elapsed for elapsed, ok in results if ok)
+    failed = sum(1 for _, ok in results if not ok)
+    return latencies, failed, wall
+
+
+def check_independent(external_ids, timeout):
+    """
+    (whether a save of another farmer completes, whether a save of the locked
+    farmer waits) while one farmer's row is locked
+    """
+    locked, other = external_ids[0], external_ids[1]
+    holding, release = threading.Event(), threading.Event()
+
+    def hold_lock():
+        try:
+            with transaction.atomic():
+                FarmerProfile.objects.select_for_update().get(external_id=locked)
+                holding.set()
+                release.wait(4 * timeout)
+        finally:
+            connections.close_all()
+
+    def worker(job):
+        try:
+            return save(job)
+        finally:
+            connections.close_all()
+
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        holder = pool.submit(hold_lock)
+        holding.wait(timeout)
+        same = pool.submit(worker, (locked, 0, 1))
+        try:
+            _, other_ok = pool.submit(worker, (other, 1, 1)).result(timeout=timeout)
+            other_done = other_ok
+        except TimeoutError:
+            other_done = False
+        same_waited = not same.done()
+        release.set()
+        holder.result()
+        same.result()
+
+    return other_done, same_waited
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else float('nan')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--farmers', type=int, default=10)
+    parser.add_argument('--saves', type=int, default=200)
+    parser.add_argument('--concurrency', default='1,4,8')
+    parser.add_argument('--check-independent', action='store_true')
+    parser.add_argument('--timeout', type=float, default=5.0, help='Seconds a save may take in --check-independent')
+    args = parser.parse_args()
+    levels = [int(level) for level in args.concurrency.split(',')]
+    if args.check_independent and connection.vendor != 'postgresql':
+        parser.error('--check-independent needs PostgreSQL; SQLite locks the whole database for every write')
+    if args.check_independent and args.farmers < 2:
+        parser.error('--check-independent needs at least 2 farmers')
+
+    external_ids = [uuid.uuid4() for _ in range(args.farmers)]
+    print(f"Database: {connection.vendor}, {args.farmers} farmers, {args.saves} saves per round")
+    print(f"{'threads':>8}{'p50':>10}{'p95':>10}{'max':>10}{'saves/s':>10}{'failed':>8}")
+    try:
+        # The engines and views print as they go
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            run_round(external_ids, args.farmers, 1)  # create the farmers
+        if args.check_independent:
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                other_done, same_waited = check_independent(external_ids, args.timeout)
+            print(f"Save of another farmer while one is locked: {'completed' if other_done else 'BLOCKED'}")
+            print(f"Save of the locked farmer: {'waited for the lock' if same_waited else 'did NOT wait'}")
+            return 0 if other_done and same_waited else 1
+        for concurrency in levels:
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                latencies, failed, wall = run_round(external_ids, args.saves, concurrency)
+            print(f"{concurrency:>8}"
+                  f"{percentile(latencies, 0.5) * 1000:8.1f}ms"
+                  f"{percentile(latencies, 0.95) * 1000:8.1f}ms"
+                  f"{(latencies[-1] if latencies else float('nan')) * 1000:8.1f}ms"
+                  f"{len(latencies) / wall:10.1f}{failed:>8}")
+    finally:
+        FarmerProfile.objects.filter(external_id__in=external_ids).delete()
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
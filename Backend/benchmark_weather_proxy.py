@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+"""
+Compare the sync weather client, as used by WSGI workers, with the async one
+used by the ASGI views, against a local stub of OpenWeather with a fixed
+latency.
+
+Usage: python benchmark_weather_proxy.py [--requests N] [--workers N] [--latency SECONDS]
+
+--workers is the number of sync workers (WSGI threads) serving requests; the
+async client serves every request from one event loop.
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+import django
+
+# Set up Django environment
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'AgriGuide.settings')
+django.setup()
+
+from django.conf import settings
+from django.test.utils import override_settings
+
+from myapp import weather
+from myapp.weather_stub import StubWeatherServer
+
+CITIES = ['Belagavi', 'Mysuru', 'Hubballi', 'Mangaluru', 'Kalaburagi', 'Ballari', 'Shivamogga', 'Tumakuru']
+
+
+def run_sync(count, workers):
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(lambda i: weather.fetch(weather.CURRENT, CITIES[i % len(CITIES)]), range(count)))
+
+
+async def run_async(count):
+    await asyncio.gather(*(weather.afetch(weather.CURRENT, CITIES[i % len(CITIES)]) for i in range(count)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--latency', type=float, default=0.2)
+    args = parser.parse_args()
+
+    with StubWeatherServer(latency=args.latency) as stub, override_settings(WEATHER_API_BASE_URL=stub.base_url):
+        print(f"{args.requests} requests, upstream latency {args.latency * 1000:.0f} ms, "
+              f"at most {settings.WEATHER_MAX_CONNECTIONS} upstream connections\n")
+
+        start = time.perf_counter()
+        run_sync(args.requests, args.workers)
+        elapsed = time.perf_counter() - start
+        print(f"  {f'sync, {args.workers} workers':<24}{elapsed:8.2f} s  {args.requests / elapsed:8.1f} requests/s")
+
+        start = time.perf_counter()
+        asyncio.run(run_async(args.requests))
+        elapsed = time.perf_counter() - start
+        print(f"  {'async, one event loop':<24}{elapsed:8.2f} s  {args.requests / elapsed:8.1f} requests/s")
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,7 +3,8 @@ from .models import (
     District, Crop, CropEconomics, Technology, GovernmentScheme, 
     LoanOption, OrganicPractice, PestDisease, SoilCropCompatibility,
     FertilizerRecommendation, IrrigationRequirement, FarmerProfile,
-    FarmDetail, FarmingExperience, FinancialInfo, FarmerInterest
+    FarmDetail, FarmingExperience, FinancialInfo, FarmerInterest,
+    SoilType, SoilTypeSynonym
 )
 
 # Register your models here.
@@ -17,6 +18,8 @@ admin.site.register(OrganicPractice)
 admin.site.register(PestDisease)
 admin.site.register(SoilCropCompatibility)
 admin.site.register(FertilizerRecommendation)
+admin.site.register(SoilType)
+admin.site.register(SoilTypeSynonym)
 admin.site.register(IrrigationRequirement)
 admin.site.register(FarmerProfile)
 admin.site.register(FarmDetail)
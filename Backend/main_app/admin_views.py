@@ -1,4 +1,4 @@
-from django.http import JsonResponse
+from AgriGuide.renderers import FastJsonResponse as JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 import json
 from .models import (
@@ -0,0 +1,137 @@
+"""
+Per-table version counters for the catalog endpoints.
+
+Every save or delete on a tracked model bumps that table's CatalogVersion row
+(see main_app.signals) once the change is committed. The bump is a short
+autocommit UPDATE of that table's own row, so writers never hold the row lock
+for the rest of their transaction. Endpoints decorated with catalog_condition
+derive their ETag and Last-Modified headers from those counters, so a client
+that already has the current catalog gets a 304 without the catalog being
+queried or serialized.
+
+Users and farmer profiles are written on every login and profile save, too
+often for one counter row. They are versioned by their rows instead (see
+version_by_rows): the row count and the latest updated_at.
+
+The counters are read through Django's cache. With a shared cache backend a
+bump is seen by every process at once; with the default per-process cache a
+process may keep answering with the previous version for up to
+CATALOG_VERSION_CACHE_TIMEOUT seconds.
+"""
+import datetime
+import hashlib
+
+from django.db import transaction
+from django.db.models import Count, F, Max
+from django.core.cache import cache
+from django.utils import timezone
+from django.views.decorators.http import condition
+
+from AgriGuide.middleware import prefers_msgpack
+
+from .models import CatalogVersion
+
+CATALOG_VERSION_CACHE_TIMEOUT = 60
+CACHE_KEY_PREFIX = 'catalog-version:'
+
+# Last-Modified of a row-versioned table without rows
+EMPTY_TABLE_MODIFIED = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+# Tables versioned by their rows rather than a CatalogVersion counter, by table name
+_row_versioned = {}
+
+
+def table_name(model):
+    return model._meta.label_lower
+
+
+def version_by_rows(model):
+    """Version model by its row count and latest updated_at instead of a counter"""
+    _row_versioned[table_name(model)] = model
+
+
+def bump_catalog_version(model):
+    """Record that the table behind model has changed, once the change is committed"""
+    name = table_name(model)
+
+    def bump():
+        now = timezone.now()
+        updated = CatalogVersion.objects.filter(name=name).update(version=F('version') + 1, updated_at=now)
+        if not updated:
+            CatalogVersion.objects.get_or_create(name=name, defaults={'version': 1, 'updated_at': now})
+        cache.delete(CACHE_KEY_PREFIX + name)
+
+    transaction.on_commit(bump)
+
+
+def forget_catalog_version(model):
+    """Drop the cached version of a row-versioned table once the change is committed"""
+    key = CACHE_KEY_PREFIX + table_name(model)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+def row_version(model):
+    """(version, updated_at) of a table versioned by its rows"""
+    stamp = model.objects.aggregate(row_count=Count('pk'), latest_update=Max('updated_at'))
+    updated_at = stamp['latest_update'] or EMPTY_TABLE_MODIFIED
+    return f"{stamp['row_count']}@{updated_at.timestamp()}", updated_at
+
+
+def catalog_versions(models):
+    """{table name: (version, updated_at)} for the given models"""
+    names = [table_name(model) for model in models]
+    keys = {CACHE_KEY_PREFIX + name: name for name in names}
+
+    versions = {keys[key]: value for key, value in cache.get_many(list(keys)).items()}
+    missing = [name for name in names if name not in versions]
+    if missing:
+        found = {name: row_version(_row_versioned[name]) for name in missing if name in _row_versioned}
+        counted = [name for name in missing if name not in found]
+        if counted:
+            found.update(
+                (row.name, (row.version, row.updated_at))
+                for row in CatalogVersion.objects.filter(name__in=counted)
+            )
+        for name in counted:
+            if name not in found:
+                # A table that has never changed since versioning started
+                row, _ = CatalogVersion.objects.get_or_create(name=name)
+                found[name] = (row.version, row.updated_at)
+        versions.update(found)
+        cache.set_many(
+            {CACHE_KEY_PREFIX + name: found[name] for name in missing},
+            CATALOG_VERSION_CACHE_TIMEOUT
+        )
+    return versions
+
+
+def catalog_etag(models):
+    versions = catalog_versions(models)
+    state = ';'.join(f"{name}={versions[name][0]}" for name in sorted(versions))
+    return hashlib.md5(state.encode()).hexdigest()
+
+
+def catalog_last_modified(models):
+    return max(updated_at for _, updated_at in catalog_versions(models).values())
+
+
+def response_etag(request, models):
+    """
+    ETag of a catalog response. The JSON and MessagePack encodings of a
+    response (see AgriGuide.middleware) are different representations, so
+    they get different strong ETags and a validator of one never matches the
+    other.
+    """
+    etag = catalog_etag(models)
+    return f'{etag}-msgpack' if prefers_msgpack(request) else etag
+
+
+def catalog_condition(*models):
+    """
+    View decorator adding ETag/Last-Modified to GET responses and answering
+    matching conditional requests with 304 Not Modified.
+    """
+    return condition(
+        etag_func=lambda request, *args, **kwargs: response_etag(request, models),
+        last_modified_func=lambda request, *args, **kwargs: catalog_last_modified(models),
+    )
@@ -0,0 +1,88 @@
+"""
+Concurrent execution of the farmer dashboard sections.
+
+Each section runs on a shared thread pool with its own time budget. A section
+that finishes in time refreshes its cached copy. One that is too slow or fails
+is answered from the last cached copy, so it cannot hold up the rest of the
+dashboard. A slow section that has started keeps running in the background and
+still refreshes the cache when it completes, so the next dashboard load has it.
+One still waiting for a worker when its time is up is dropped instead, so a
+burst of slow requests cannot queue more work than the pool can get through.
+"""
+import contextvars
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from django.core.cache import cache
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+DASHBOARD_WORKERS = 8
+
+# Seconds each section may take, counted from the start of the request
+SECTION_TIMEOUTS = {
+    'crops': 5.0,
+    'schemes': 3.0,
+    'loans': 3.0,
+    'technologies': 3.0,
+}
+DEFAULT_SECTION_TIMEOUT = 3.0
+
+SECTION_CACHE_TIMEOUT = 24 * 60 * 60
+CACHE_KEY_PREFIX = 'dashboard:'
+
+_executor = ThreadPoolExecutor(max_workers=DASHBOARD_WORKERS, thread_name_prefix='dashboard')
+
+
+def section_cache_key(farmer_id, name):
+    return f'{CACHE_KEY_PREFIX}{farmer_id}:{name}'
+
+
+def _run_section(farmer_id, name, build):
+    try:
+        data = build()
+        cache.set(section_cache_key(farmer_id, name), data, SECTION_CACHE_TIMEOUT)
+        return data
+    finally:
+        # Database connections are per thread; don't leave the worker's open
+        connections.close_all()
+
+
+def cached_section(farmer_id, name, reason):
+    data = cache.get(section_cache_key(farmer_id, name))
+    if data is None:
+        return {'status': 'unavailable', 'reason': reason, 'data': None}
+    return {'status': 'cached', 'reason': reason, 'data': data}
+
+
+def run_sections(farmer_id, sections, timeouts=None):
+    """
+    Run {name: build} concurrently and return {name: result}. Each result has
+    a status of 'ok', 'cached' (the section timed out or failed and the last
+    cached copy is returned) or 'unavailable' (nothing cached either).
+    """
+    timeouts = timeouts or SECTION_TIMEOUTS
+    started = time.monotonic()
+    # Each section runs in a copy of the request's context, so it reads from
+    # the same database as the request (see AgriGuide.db_routers)
+    futures = {
+        name: _executor.submit(contextvars.copy_context().run, _run_section, farmer_id, name, build)
+        for name, build in sections.items()
+    }
+
+    results = {}
+    for name, future in futures.items():
+        deadline = started + timeouts.get(name, DEFAULT_SECTION_TIMEOUT)
+        try:
+            results[name] = {'status': 'ok', 'data': future.result(timeout=max(0, deadline - time.monotonic()))}
+        except TimeoutError:
+            dropped = future.cancel()
+            logger.warning(f"Dashboard section {name} for farmer {farmer_id} timed out"
+                           f"{' before it started' if dropped else ''}")
+            results[name] = cached_section(farmer_id, name, 'timeout')
+        except Exception as e:
+            logger.error(f"Dashboard section {name} for farmer {farmer_id} failed: {str(e)}")
+            results[name] = cached_section(farmer_id, name, 'error')
+    return results
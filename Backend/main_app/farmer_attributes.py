@@ -0,0 +1,118 @@
+"""
+Multi-valued farmer attributes.
+
+The profile form sends irrigation sources and systems, challenges,
+sustainable practices and enrolled schemes as lists. They are still kept as
+", "-joined text for display, and on save each one is also stored in a form
+the database can query:
+
+- Closed vocabularies (the options offered on the form) go into a FlagsField,
+  one bit per option. "Drip irrigation" is then an integer test:
+  FarmDetail.objects.filter(irrigation_system_flags__has='Drip').
+- Open lists (enrolled schemes and sustainable practices) become one row per
+  item in EnrolledScheme and SustainablePractice, indexed by name.
+
+The engines read the flags and rows and no longer split strings.
+"""
+import re
+
+from django.db import models
+
+LIST_SEPARATORS = re.compile(r'[,;]')
+
+
+def split_list(value):
+    """Items of a comma-separated list or a list, stripped and without repeats (ignoring case)"""
+    if isinstance(value, str):
+        value = LIST_SEPARATORS.split(value)
+    items = {}
+    for item in value or ():
+        item = ' '.join(str(item).split())
+        if item:
+            items.setdefault(item.lower(), item)
+    return list(items.values())
+
+
+class FlagSet:
+    """A closed vocabulary, one bit per option in the order listed"""
+
+    def __init__(self, names):
+        self.names = tuple(names)
+        self.bits = {name.lower(): 1 << index for index, name in enumerate(self.names)}
+
+    def mask(self, values, strict=False):
+        """Bits of the options in a list (or comma-separated text); others are ignored unless strict"""
+        mask = 0
+        for value in split_list(values):
+            bit = self.bits.get(value.lower())
+            if bit is None and strict:
+                raise ValueError(f"Unknown option: {value}")
+            mask |= bit or 0
+        return mask
+
+    def names_of(self, mask):
+        """Options whose bit is set in mask, in vocabulary order"""
+        return [name for index, name in enumerate(self.names) if (mask or 0) >> index & 1]
+
+    def indexes_of(self, mask):
+        return [index for index in range(len(self.names)) if (mask or 0) >> index & 1]
+
+    def has(self, mask, *names):
+        """Whether every one of names is set in mask"""
+        wanted = self.mask(names, strict=True)
+        return (mask or 0) & wanted == wanted
+
+
+# Options of the profile form. Bits are stored in the database, so new options
+# must only ever be appended.
+IRRIGATION_SOURCES = FlagSet(['Well', 'Borewell', 'Canal', 'River', 'Pond', 'Rainwater', 'None'])
+IRRIGATION_SYSTEMS = FlagSet(['Drip', 'Sprinkler', 'Flood', 'Furrow', 'None'])
+CHALLENGES = FlagSet([
+    'Water Scarcity', 'Market Access', 'Price Volatility', 'Input Costs',
+    'Financial Constraints', 'Credit Access', 'Irrigation Management',
+    'Crop Financing', 'Seed Quality', 'Technology Access',
+    'Collateral Requirements', 'High Interest Rates', 'Processing Delays',
+    'Seasonal Cash Flow', 'Documentation Complexity', 'Limited Credit History',
+    'Infrastructure Development', 'Farm Mechanization Costs',
+    'Post-harvest Financing', 'Loan Repayment Flexibility',
+])
+
+
+class FlagsField(models.PositiveIntegerField):
+    """Bitmask of the options of a FlagSet, queried with __has (all of) and __hasany"""
+
+    def __init__(self, *args, flags=None, **kwargs):
+        self.flags = flags
+        kwargs.setdefault('default', 0)
+        kwargs.setdefault('editable', False)
+        # The vocabulary lives in code and is left out of migrations
+        super().__init__(*args, **kwargs)
+
+
+class FlagsLookup(models.Lookup):
+
+    def get_prep_lookup(self):
+        # Accept option names as well as a mask
+        if isinstance(self.rhs, int):
+            return self.rhs
+        return self.lhs.output_field.flags.mask(self.rhs, strict=True)
+
+
+@FlagsField.register_lookup
+class HasFlags(FlagsLookup):
+    lookup_name = 'has'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'({lhs} & {rhs}) = {rhs}', (*lhs_params, *rhs_params, *rhs_params)
+
+
+@FlagsField.register_lookup
+class HasAnyFlags(FlagsLookup):
+    lookup_name = 'hasany'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'({lhs} & {rhs}) <> 0', (*lhs_params, *rhs_params)
@@ -0,0 +1,54 @@
+"""
+Everything the recommendation engines read about one farmer.
+
+Each engine used to query the farm details, interests, financial info and
+cultivated crops on its own. A FarmerContext loads each of them at most once
+and can be shared by every engine serving the same request. The engines read
+the farmer's materialized features (main_app.farmer_features); the rows
+themselves are only loaded for the callers that still need them.
+"""
+from django.utils.functional import cached_property
+
+from AgriGuide.db_routers import pin_to_primary
+
+from .farmer_features import rebuild_farmer_features
+from .models import FarmDetail, FarmerFeatures, FarmerInterest, FarmingExperience, FinancialInfo
+
+
+class FarmerContext:
+
+    def __init__(self, farmer):
+        self.farmer = farmer
+
+    @cached_property
+    def features(self):
+        features = FarmerFeatures.objects.select_related('district').filter(farmer=self.farmer).first()
+        if features is None:
+            # Farmers saved before the features existed get theirs on first
+            # use. The rebuild saves what it reads, so it reads the primary
+            # even in @replica_reads views.
+            pin_to_primary()
+            features = rebuild_farmer_features(self.farmer.id)
+        return features
+
+    @cached_property
+    def farm_details(self):
+        return FarmDetail.objects.filter(farmer=self.farmer).first()
+
+    @cached_property
+    def interests(self):
+        # The most recent one if the farmer saved several
+        return FarmerInterest.objects.filter(farmer=self.farmer).order_by('-id').first()
+
+    @cached_property
+    def financial_info(self):
+        return FinancialInfo.objects.filter(farmer=self.farmer).first()
+
+    @cached_property
+    def experiences(self):
+        return list(FarmingExperience.objects.filter(farmer=self.farmer).select_related('crop'))
+
+    def load(self):
+        """Load everything now, e.g. before handing the context to other threads"""
+        self.features, self.farm_details, self.interests, self.financial_info, self.experiences
+        return self
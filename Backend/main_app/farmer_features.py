@@ -0,0 +1,138 @@
+"""
+Materialized farmer features.
+
+Every recommendation engine starts from the same facts about a farmer: the
+challenges, the income bracket and monthly income, the irrigation flags, the
+land ownership, the crops grown and the resolved district. They used to be
+re-derived on each request from the profile, the farm details, interests,
+financial info and experiences, plus a district lookup per crop.
+
+FarmerFeatures keeps them in one row per farmer. The row is rebuilt by the
+signals in main_app.signals whenever the profile or one of its parts is
+saved, inside the same transaction as the change. save_farmer_profile_api
+writes several parts at once, so it wraps them in rebuild_once() to rebuild
+the row a single time. A FarmerContext reads the row, joined with its
+district, in one query.
+"""
+import datetime
+import threading
+from contextlib import contextmanager
+
+from .farmer_attributes import split_list
+from .land_allocation import to_hectares
+from .models import (
+    District, FarmDetail, FarmerFeatures, FarmerInterest, FarmerProfile, FarmingExperience, FinancialInfo
+)
+
+# Monthly income assumed for each FinancialInfo.annual_income bracket
+MONTHLY_INCOME = {
+    'below_50k': 4000,  # 48,000 per year
+    '50k_1l': 6000,  # 72,000 per year
+    '1l_3l': 16000,  # 2,00,000 per year
+    '3l_5l': 33000,  # 4,00,000 per year
+    'above_5l': 50000,  # 6,00,000 per year
+}
+
+# Financial info assumed for farmers who have not filled theirs in
+DEFAULT_ANNUAL_INCOME = '1l_3l'
+DEFAULT_BANK_ACCOUNT = True
+DEFAULT_INSURANCE_COVERAGE = False
+
+
+def current_season(today=None):
+    """Cropping season of a date: kharif (June-September), rabi (October-January) or zaid"""
+    month = (today or datetime.date.today()).month
+    if 6 <= month <= 9:
+        return 'kharif'
+    if month >= 10 or month == 1:
+        return 'rabi'
+    return 'zaid'
+
+
+def resolve_district(name):
+    """District of a farmer's free-text district name, or None"""
+    name = (name or '').strip()
+    if not name:
+        return None
+    return (
+        District.objects.filter(name__iexact=name).first()
+        or District.objects.filter(name__icontains=name).order_by('id').first()
+    )
+
+
+def build_features(farmer):
+    """Unsaved FarmerFeatures of a farmer, read from the profile and its parts"""
+    features = FarmerFeatures(farmer=farmer, district=resolve_district(farmer.district))
+
+    farm = FarmDetail.objects.filter(farmer=farmer).first()
+    if farm:
+        features.has_farm = True
+        for field in (
+            'soil_type', 'soil_id', 'farm_size', 'unit', 'land_ownership', 'irrigation_source_flags',
+            'irrigation_system_flags', 'nitrogen_value', 'phosphorus_value', 'potassium_value', 'ph_value',
+        ):
+            setattr(features, field, getattr(farm, field))
+        features.farm_size_ha = to_hectares(farm.farm_size or 0, farm.unit)
+
+    # The most recent one if the farmer saved several
+    interest = FarmerInterest.objects.filter(farmer=farmer).order_by('-id').first()
+    if interest:
+        features.challenge_flags = interest.challenge_flags
+
+    financial_info = FinancialInfo.objects.filter(farmer=farmer).first()
+    if financial_info:
+        features.has_financial_info = True
+        features.annual_income = financial_info.annual_income
+        features.bank_account = financial_info.bank_account
+        features.insurance_coverage = financial_info.insurance_coverage
+        features.enrolled_schemes = split_list(financial_info.govt_schemes_enrolled)
+    else:
+        features.annual_income = DEFAULT_ANNUAL_INCOME
+        features.bank_account = DEFAULT_BANK_ACCOUNT
+        features.insurance_coverage = DEFAULT_INSURANCE_COVERAGE
+    features.monthly_income = MONTHLY_INCOME.get(features.annual_income, 0)
+
+    crops = FarmingExperience.objects.filter(farmer=farmer).order_by('id').values_list('crop__name', 'crop__growing_season')
+    features.crop_names = [name for name, _ in crops]
+    features.crop_seasons = [season for _, season in crops]
+    return features
+
+
+def rebuild_farmer_features(farmer_id):
+    """Rebuild and save the features of a farmer; None if the farmer no longer exists"""
+    farmer = FarmerProfile.objects.filter(id=farmer_id).first()
+    if farmer is None:
+        return None
+    features = build_features(farmer)
+    features.save()
+    return features
+
+
+_pending = threading.local()
+
+
+def request_rebuild(farmer_id):
+    """Rebuild a farmer's features now, or at the end of the enclosing rebuild_once() block"""
+    farmer_ids = getattr(_pending, 'farmer_ids', None)
+    if farmer_ids is not None:
+        farmer_ids.add(farmer_id)
+    else:
+        rebuild_farmer_features(farmer_id)
+
+
+@contextmanager
+def rebuild_once():
+    """Collect the rebuilds requested inside the block and run each one once when it ends"""
+    if getattr(_pending, 'farmer_ids', None) is not None:
+        # Nested: the outermost block rebuilds
+        yield
+        return
+
+    _pending.farmer_ids = set()
+    try:
+        yield
+        farmer_ids = _pending.farmer_ids
+    finally:
+        _pending.farmer_ids = None
+    for farmer_id in sorted(farmer_ids):
+        rebuild_farmer_features(farmer_id)
@@ -0,0 +1,403 @@
+"""
+Bulk farmer onboarding.
+
+FPOs and extension programs send spreadsheets of thousands of farmers. A
+FarmerImporter reads one, as CSV or XLSX, row by row and writes it in chunks.
+Each chunk is validated, then written in a single transaction with a fixed
+number of bulk_create/bulk_update queries, however many rows it holds. Memory
+stays bounded by the chunk size, not the file size.
+
+Columns are named after the model fields (see COLUMNS). Only first_name is
+required. Columns missing from the file are left untouched on farmers that
+already exist. Rows are keyed by external_id, the key save_farmer_profile_api
+uses. A row with a known external_id updates that farmer, and a row without
+one creates a new farmer. Invalid rows go to the error file with their row
+number and the reason, and the rest of their chunk is still written.
+
+Bulk writes skip save() and the model signals, so the importer does their
+work per chunk. It resolves soils, encodes attribute flags and writes item
+rows. It drops the stale FarmerFeatures (FarmerContext rebuilds them on
+first use), stamps updated_at, which versions the farmer listing, and
+refreshes the similarity index.
+"""
+import csv
+import io
+import math
+import time
+import uuid
+
+from django.db import transaction
+from django.db.backends.base.operations import BaseDatabaseOperations
+from django.utils import timezone
+
+from .catalog_versions import forget_catalog_version
+from .farmer_attributes import split_list
+from .farmer_similarity import refresh_farmers
+from .models import (
+    EnrolledScheme, FarmDetail, FarmerFeatures, FarmerInterest, FarmerProfile, FinancialInfo, SustainablePractice
+)
+from .soil_types import soil_taxonomy
+
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+DEFAULT_CHUNK_SIZE = 1000
+
+# Columns of each model, named after its fields
+PROFILE_COLUMNS = [
+    'first_name', 'last_name', 'age', 'gender', 'mobile', 'district', 'state', 'address', 'pincode',
+    'education_level', 'preferred_season',
+]
+FARM_COLUMNS = [
+    'farm_size', 'unit', 'soil_type', 'land_ownership', 'irrigation_sources', 'irrigation_systems',
+    'nitrogen_value', 'phosphorus_value', 'potassium_value', 'ph_value',
+]
+FINANCIAL_COLUMNS = ['annual_income', 'loan_history', 'govt_schemes_enrolled', 'insurance_coverage', 'bank_account']
+INTEREST_COLUMNS = ['challenges', 'sustainable_practices']
+COLUMNS = ['external_id', *PROFILE_COLUMNS, *FARM_COLUMNS, *FINANCIAL_COLUMNS, *INTEREST_COLUMNS]
+
+TRUE_VALUES = {'yes', 'y', 'true', '1'}
+FALSE_VALUES = {'no', 'n', 'false', '0'}
+UNITS = {'acre': 'Acre', 'hectare': 'Hectare', 'ha': 'Hectare'}
+
+
+class InvalidImportFile(ValueError):
+    pass
+
+
+def normalize_column(name):
+    """'Farm Size ' -> 'farm_size'"""
+    return '_'.join(str(name or '').lower().split())
+
+
+def cell_text(value):
+    """Text of a spreadsheet cell; whole numbers lose their '.0' (phone numbers, pincodes)"""
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def read_rows(file, name):
+    """Yield (row number, {column: text}) of a binary .csv or .xlsx file; row 1 is the header"""
+    if name.lower().endswith('.xlsx'):
+        if openpyxl is None:
+            raise InvalidImportFile('Reading .xlsx files needs openpyxl; upload a .csv file instead')
+        workbook = openpyxl.load_workbook(file, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            yield from _numbered_rows(rows)
+        finally:
+            workbook.close()
+    elif name.lower().endswith('.csv'):
+        yield from _numbered_rows(csv.reader(io.TextIOWrapper(file, encoding='utf-8-sig', newline='')))
+    else:
+        raise InvalidImportFile('Expected a .csv or .xlsx file')
+
+
+def _numbered_rows(rows):
+    header = [normalize_column(column) for column in next(rows, None) or ()]
+    if 'first_name' not in header:
+        raise InvalidImportFile('The first row must name the columns, including first_name')
+    for number, values in enumerate(rows, start=2):
+        row = {column: cell_text(value) for column, value in zip(header, values) if column}
+        if any(row.values()):
+            yield number, row
+
+
+def finite_number(text):
+    """float of text; raises ValueError for inf and nan, which no column should hold"""
+    value = float(text)
+    if not math.isfinite(value):
+        raise ValueError('expected a finite number')
+    return value
+
+
+def clean_value(model, column, text):
+    """Value of a model field from the text of its cell; raises ValueError naming the column"""
+    field = model._meta.get_field(column)
+    if not text:
+        return None if field.null else field.get_default()
+
+    flags = None
+    if column in getattr(model, 'attribute_flags', {}):
+        # Lists of the form's options: every item must be one of them
+        flags = model._meta.get_field(model.attribute_flags[column]).flags
+    try:
+        if flags is not None:
+            items = split_list(text)
+            flags.mask(items, strict=True)
+            return ', '.join(items)
+        if field.choices:
+            for value, label in field.choices:
+                if text.lower() in (value.lower(), str(label).lower()):
+                    return value
+            raise ValueError(f"expected one of {', '.join(value for value, _ in field.choices)}")
+        if field.get_internal_type() == 'BooleanField':
+            if text.lower() in TRUE_VALUES:
+                return True
+            if text.lower() in FALSE_VALUES:
+                return False
+            raise ValueError('expected yes or no')
+        if field.get_internal_type() == 'FloatField':
+            value = finite_number(text)
+            if not 0 <= value <= (14 if column == 'ph_value' else float('inf')):
+                raise ValueError('out of range')
+            return value
+        if field.get_internal_type() == 'PositiveIntegerField':
+            value = int(finite_number(text))
+            # The range every database can store, not just the one in use
+            low, high = BaseDatabaseOperations.integer_field_ranges[field.get_internal_type()]
+            if not low <= value <= high:
+                raise ValueError('out of range')
+            return value
+    except ValueError as e:
+        raise ValueError(f"{column}: {e}") from None
+
+    if field.max_length and len(text) > field.max_length:
+        raise ValueError(f"{column}: longer than {field.max_length} characters")
+    return text
+
+
+def clean_farm_size(row):
+    """(size, unit) of the farm_size and unit cells; farm_size may carry the unit ("2 Acre")"""
+    size, _, unit = row.get('farm_size', '').partition(' ')
+    unit = row.get('unit') or unit.strip()
+    try:
+        size = finite_number(size) if size else 0
+    except ValueError:
+        raise ValueError('farm_size: expected a number, optionally followed by Acre or Hectare') from None
+    if size < 0:
+        raise ValueError('farm_size: out of range')
+    if not unit:
+        return size, None
+    for prefix, name in UNITS.items():
+        if unit.lower().startswith(prefix):
+            return size, name
+    raise ValueError('unit: expected Acre or Hectare')
+
+
+def clean_part(model, columns, row):
+    """{field: value} of the columns of model present in row, or None if all of them are blank"""
+    present = [column for column in columns if column in row]
+    if not any(row[column] for column in present):
+        return None
+    values = {}
+    for column in present:
+        if model is FarmDetail and column in ('farm_size', 'unit'):
+            continue
+        values[column] = clean_value(model, column, row[column])
+    if model is FarmDetail and ('farm_size' in row or 'unit' in row):
+        values['farm_size'], unit = clean_farm_size(row)
+        if unit or 'unit' in row:
+            values['unit'] = unit or FarmDetail._meta.get_field('unit').get_default()
+    return values
+
+
+def clean_row(row):
+    """(external id, {model: field values}) of a row; raises ValueError with the reason"""
+    if not row.get('first_name'):
+        raise ValueError('first_name: required')
+    try:
+        external_id = uuid.UUID(row['external_id']) if row.get('external_id') else uuid.uuid4()
+    except ValueError:
+        raise ValueError('external_id: not a valid UUID') from None
+
+    parts = {FarmerProfile: clean_part(FarmerProfile, PROFILE_COLUMNS, row)}
+    for model, columns in ((FarmDetail, FARM_COLUMNS), (FinancialInfo, FINANCIAL_COLUMNS),
+                           (FarmerInterest, INTEREST_COLUMNS)):
+        values = clean_part(model, columns, row)
+        if values is not None:
+            parts[model] = values
+    return external_id, parts
+
+
+def encode(instance, fields, taxonomy):
+    """Set the columns save() derives from fields on instance (soil, attribute flags); returns their names"""
+    derived = []
+    if isinstance(instance, FarmDetail) and 'soil_type' in fields:
+        instance.soil_id = taxonomy.resolve(instance.soil_type)
+        derived.append('soil')
+    for text_field, flags_field in getattr(instance, 'attribute_flags', {}).items():
+        if text_field in fields:
+            flags = instance._meta.get_field(flags_field).flags
+            setattr(instance, flags_field, flags.mask(getattr(instance, text_field)))
+            derived.append(flags_field)
+    return derived
+
+
+def upsert(model, existing_ids, values_by_farmer, taxonomy):
+    """bulk_create the rows of farmers without one and bulk_update the others (existing_ids: farmer id -> row id)"""
+    all_fields = [field.name for field in model._meta.concrete_fields]
+    created, updated, update_fields = [], [], set()
+    for farmer_id, values in values_by_farmer.items():
+        if farmer_id in existing_ids:
+            instance = model(id=existing_ids[farmer_id], farmer_id=farmer_id, **values)
+            update_fields.update(values, encode(instance, values, taxonomy))
+            updated.append(instance)
+        else:
+            instance = model(farmer_id=farmer_id, **values)
+            encode(instance, all_fields, taxonomy)
+            created.append(instance)
+    model.objects.bulk_create(created)
+    if updated:
+        model.objects.bulk_update(updated, sorted(update_fields))
+
+
+def replace_items(model, parent_field, names_by_parent):
+    """Make the item rows of each parent id exactly the given names"""
+    model.objects.filter(**{f'{parent_field}__in': names_by_parent}).delete()
+    model.objects.bulk_create([
+        model(name=name, **{parent_field: parent_id})
+        for parent_id, names in names_by_parent.items()
+        for name in names
+    ])
+
+
+class ImportReport:
+
+    def __init__(self):
+        self.rows = 0
+        self.created = 0
+        self.updated = 0
+        self.failed = 0
+        self.ignored_columns = []
+        self.started = time.monotonic()
+
+    @property
+    def seconds(self):
+        return time.monotonic() - self.started
+
+    def as_dict(self):
+        return {
+            'rows': self.rows,
+            'created': self.created,
+            'updated': self.updated,
+            'failed': self.failed,
+            'ignored_columns': self.ignored_columns,
+            'seconds': round(self.seconds, 2),
+        }
+
+    def __str__(self):
+        return (f"{self.rows} rows: {self.created} farmers created, {self.updated} updated, "
+                f"{self.failed} failed in {self.seconds:.1f}s")
+
+
+class FarmerImporter:
+    """Imports rows of farmers in chunks, writing the rows that fail to an error file"""
+
+    def __init__(self, chunk_size=DEFAULT_CHUNK_SIZE, errors=None, progress=None, dry_run=False):
+        """errors: text file the failed rows are written to as CSV; progress: called with the report after each chunk"""
+        self.chunk_size = chunk_size
+        self.errors = errors
+        self.progress = progress
+        self.dry_run = dry_run
+        self.error_writer = None
+        self.report = ImportReport()
+
+    def run(self, rows):
+        """Import (row number, {column: text}) rows, e.g. from read_rows; returns the ImportReport"""
+        chunk = {}
+        for number, row in rows:
+            if self.report.rows == 0:
+                self.report.ignored_columns = sorted(set(row) - set(COLUMNS))
+            self.report.rows += 1
+            try:
+                external_id, parts = clean_row(row)
+            except ValueError as e:
+                self.fail(number, row, str(e))
+                continue
+            # A farmer listed twice in a chunk is saved as of their last row
+            chunk[external_id] = parts
+            if len(chunk) >= self.chunk_size:
+                self.write_chunk(chunk)
+                chunk = {}
+        if chunk:
+            self.write_chunk(chunk)
+        return self.report
+
+    def fail(self, number, row, error):
+        self.report.failed += 1
+        if self.errors is None:
+            return
+        if self.error_writer is None:
+            self.error_writer = csv.DictWriter(self.errors, ['row', 'error', *row], extrasaction='ignore')
+            self.error_writer.writeheader()
+        self.error_writer.writerow({**row, 'row': number, 'error': error})
+
+    def write_chunk(self, chunk):
+        if not self.dry_run:
+            with transaction.atomic():
+                self._write(chunk)
+        else:
+            existing = set(FarmerProfile.objects.filter(external_id__in=chunk).values_list('external_id', flat=True))
+            self.report.updated += len(existing)
+            self.report.created += len(chunk) - len(existing)
+        if self.progress:
+            self.progress(self.report)
+
+    def _write(self, chunk):
+        profiles = FarmerProfile.objects.filter(external_id__in=chunk)
+        existing = dict(profiles.values_list('external_id', 'id'))
+        FarmerProfile.objects.bulk_create([
+            FarmerProfile(external_id=key, **parts[FarmerProfile])
+            for key, parts in chunk.items() if key not in existing
+        ])
+        updated = [
+            FarmerProfile(id=existing[key], external_id=key, **parts[FarmerProfile])
+            for key, parts in chunk.items() if key in existing
+        ]
+        if updated:
+            # bulk_update skips the auto_now of updated_at
+            now = timezone.now()
+            for profile in updated:
+                profile.updated_at = now
+            fields = {'updated_at'} | {field for parts in chunk.values() for field in parts[FarmerProfile]}
+            FarmerProfile.objects.bulk_update(updated, sorted(fields))
+        self.report.created += len(chunk) - len(existing)
+        self.report.updated += len(existing)
+
+        # Not every backend returns the ids of bulk-created rows
+        farmer_ids = existing if len(existing) == len(chunk) else dict(profiles.values_list('external_id', 'id'))
+        parts_by_farmer = {farmer_ids[key]: parts for key, parts in chunk.items()}
+        taxonomy = soil_taxonomy()
+
+        farms = self.values_of(FarmDetail, parts_by_farmer)
+        # The first farm is the one the engines read
+        first_farms = FarmDetail.objects.filter(farmer_id__in=farms).order_by('-id').values_list('farmer_id', 'id')
+        upsert(FarmDetail, dict(first_farms), farms, taxonomy)
+
+        financials = self.values_of(FinancialInfo, parts_by_farmer)
+        financial_ids = FinancialInfo.objects.filter(farmer_id__in=financials).values_list('farmer_id', 'id')
+        upsert(FinancialInfo, dict(financial_ids), financials, taxonomy)
+
+        interests = self.values_of(FarmerInterest, parts_by_farmer)
+        # The latest interests are the ones the engines read
+        latest_interests = FarmerInterest.objects.filter(farmer_id__in=interests).order_by('id').values_list('farmer_id', 'id')
+        upsert(FarmerInterest, dict(latest_interests), interests, taxonomy)
+
+        self.write_items(FinancialInfo, financials, EnrolledScheme, 'financial_info_id')
+        self.write_items(FarmerInterest, interests, SustainablePractice, 'interest_id')
+
+        ids = list(parts_by_farmer)
+        FarmerFeatures.objects.filter(farmer_id__in=ids).delete()
+        forget_catalog_version(FarmerProfile)
+        transaction.on_commit(lambda: refresh_farmers(ids))
+
+    @staticmethod
+    def values_of(model, parts_by_farmer):
+        return {farmer_id: parts[model] for farmer_id, parts in parts_by_farmer.items() if model in parts}
+
+    @staticmethod
+    def write_items(model, values_by_farmer, item_model, parent_field):
+        """Replace the item rows of the list field of model (see AttributeListsMixin.attribute_items)"""
+        (text_field, _), = model.attribute_items.items()
+        names = {farmer_id: split_list(values[text_field])
+                 for farmer_id, values in values_by_farmer.items() if text_field in values}
+        if names:
+            parents = model.objects.filter(farmer_id__in=names).order_by('id').values_list('farmer_id', 'id')
+            parent_ids = dict(parents)
+            replace_items(item_model, parent_field, {parent_ids[farmer_id]: items for farmer_id, items in names.items()})
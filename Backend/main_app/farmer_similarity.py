@@ -0,0 +1,293 @@
+"""
+Nearest-neighbour index over farmer profiles.
+
+Every FarmerProfile is turned into a fixed-length feature vector (soil type,
+soil nutrients, district climate, farm size, income bracket and challenges).
+The vectors live in one in-memory NumPy matrix per process, so finding the
+closest peers is a single matrix-vector product even at 100k farmers. The
+index is built from the database on first use and then kept current by the
+signals in main_app.signals, one farmer at a time.
+
+Signals only reach the process that made the change, so every
+INDEX_CHECK_SECONDS each process also compares a cheap stamp of the farmer
+tables (see index_stamp) with the one its index was built at. Edits made by
+other processes are read in by their FarmerFeatures.updated_at; farmers added
+or removed behind the signals' back, as bulk imports do, rebuild the index.
+"""
+import datetime
+import math
+import threading
+import time
+
+import numpy as np
+from django.db.models import Count, Max
+
+from .farmer_attributes import CHALLENGES
+from .land_allocation import to_hectares
+from .models import District, FarmDetail, FarmerFeatures, FarmerInterest, FarmerProfile, FinancialInfo
+
+SOIL_TYPES = [choice for choice, _ in FarmDetail.SOIL_TYPE_CHOICES]
+INCOME_BRACKETS = [choice for choice, _ in FinancialInfo.INCOME_CHOICES]
+
+# Values used when a farm has no soil test, roughly a "medium" soil
+DEFAULT_NPK = (420.0, 17.0, 200.0)
+DEFAULT_PH = 6.5
+
+# Scale of each numeric feature, so that a typical difference is about 1
+NPK_SCALE = (280.0, 15.0, 170.0)
+PH_SCALE = 1.5
+RAINFALL_SCALE = 800.0
+TEMPERATURE_SCALE = 8.0
+FARM_SIZE_SCALE = math.log1p(20)
+
+# Challenges are many weak signals, so together they weigh about as much as
+# one of the other features
+CHALLENGE_WEIGHT = 0.5
+
+FEATURE_COUNT = len(SOIL_TYPES) + 4 + 3 + 1 + 1 + len(CHALLENGES.names)
+
+
+def feature_vector(soil_type='', npk=(None, None, None), ph=None, climate=None,
+                   farm_size_ha=0, annual_income='', challenge_flags=0):
+    """Feature vector of one farmer as a float32 array"""
+    vector = np.zeros(FEATURE_COUNT, dtype=np.float32)
+    offset = 0
+
+    if soil_type in SOIL_TYPES:
+        vector[SOIL_TYPES.index(soil_type)] = 1
+    offset += len(SOIL_TYPES)
+
+    for value, default, scale in zip(npk, DEFAULT_NPK, NPK_SCALE):
+        vector[offset] = (value if value is not None else default) / scale
+        offset += 1
+    vector[offset] = (ph if ph is not None else DEFAULT_PH) / PH_SCALE
+    offset += 1
+
+    # District rainfall and temperature range; unknown districts sit at zero
+    if climate:
+        rainfall, min_temp, max_temp = climate
+        vector[offset] = rainfall / RAINFALL_SCALE
+        vector[offset + 1] = min_temp / TEMPERATURE_SCALE
+        vector[offset + 2] = max_temp / TEMPERATURE_SCALE
+    offset += 3
+
+    vector[offset] = math.log1p(max(0.0, farm_size_ha or 0)) / FARM_SIZE_SCALE
+    offset += 1
+
+    if annual_income in INCOME_BRACKETS:
+        vector[offset] = INCOME_BRACKETS.index(annual_income)
+    offset += 1
+
+    selected = CHALLENGES.indexes_of(challenge_flags)
+    if selected:
+        vector[[offset + index for index in selected]] = CHALLENGE_WEIGHT / math.sqrt(len(selected))
+
+    return vector
+
+
+class FarmerIndex:
+    """Exact nearest-neighbour index with incremental inserts, updates and removals"""
+
+    def __init__(self, capacity=1024):
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self.vectors = np.zeros((capacity, FEATURE_COUNT), dtype=np.float32)
+        self.norms = np.zeros(capacity, dtype=np.float32)
+        self.positions = {}
+        self.size = 0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return self.size
+
+    def _grow(self):
+        capacity = len(self.ids) * 2
+        self.ids = np.resize(self.ids, capacity)
+        vectors = np.zeros((capacity, FEATURE_COUNT), dtype=np.float32)
+        vectors[:self.size] = self.vectors[:self.size]
+        self.vectors = vectors
+        self.norms = np.resize(self.norms, capacity)
+
+    def upsert(self, farmer_id, vector):
+        with self.lock:
+            row = self.positions.get(farmer_id)
+            if row is None:
+                if self.size == len(self.ids):
+                    self._grow()
+                row = self.size
+                self.size += 1
+                self.positions[farmer_id] = row
+                self.ids[row] = farmer_id
+            self.vectors[row] = vector
+            self.norms[row] = vector @ vector
+
+    def remove(self, farmer_id):
+        with self.lock:
+            row = self.positions.pop(farmer_id, None)
+            if row is None:
+                return
+            # Move the last row into the gap so the matrix stays dense
+            last = self.size - 1
+            if row != last:
+                moved_id = int(self.ids[last])
+                self.ids[row] = moved_id
+                self.vectors[row] = self.vectors[last]
+                self.norms[row] = self.norms[last]
+                self.positions[moved_id] = row
+            self.size = last
+
+    def vector_for(self, farmer_id):
+        row = self.positions.get(farmer_id)
+        return None if row is None else self.vectors[row].copy()
+
+    def nearest(self, vector, k=10, exclude=None):
+        """(farmer_id, distance) of the k closest farmers, closest first"""
+        with self.lock:
+            size = self.size
+            if size == 0:
+                return []
+            # |a - b|^2 = |a|^2 - 2 a.b + |b|^2 over every stored farmer at once
+            distances = self.norms[:size] - 2 * (self.vectors[:size] @ vector) + vector @ vector
+            ids = self.ids[:size]
+            if exclude is not None and exclude in self.positions:
+                distances[self.positions[exclude]] = np.inf
+
+            count = min(k, size)
+            candidates = np.argpartition(distances, count - 1)[:count]
+            candidates = candidates[np.argsort(distances[candidates])]
+            return [
+                (int(ids[row]), float(math.sqrt(max(0.0, distances[row]))))
+                for row in candidates
+                if np.isfinite(distances[row])
+            ]
+
+
+# How often a process checks the database for farmer changes made elsewhere;
+# also the margin allowed for clock differences between servers
+INDEX_CHECK_SECONDS = 30
+
+_index = None
+_index_stamp = None
+_index_checked_at = 0.0
+_index_lock = threading.Lock()
+
+
+def district_climates():
+    return {
+        name.lower(): (rainfall, min_temp, max_temp)
+        for name, rainfall, min_temp, max_temp in District.objects.values_list(
+            'name', 'avg_annual_rainfall_mm', 'min_temp_c', 'max_temp_c'
+        )
+    }
+
+
+def farmer_vectors(farmer_ids=None):
+    """Yield (farmer_id, vector) for the given farmers, or for all of them"""
+    farmers = FarmerProfile.objects.all()
+    farms = FarmDetail.objects.order_by('-id')
+    financials = FinancialInfo.objects.all()
+    interests = FarmerInterest.objects.order_by('id')
+    if farmer_ids is not None:
+        farmers = farmers.filter(id__in=farmer_ids)
+        farms = farms.filter(farmer_id__in=farmer_ids)
+        financials = financials.filter(farmer_id__in=farmer_ids)
+        interests = interests.filter(farmer_id__in=farmer_ids)
+
+    # The first farm and the latest interests are the ones the engines use
+    farm_by_farmer = {farm['farmer_id']: farm for farm in farms.values(
+        'farmer_id', 'soil_type', 'nitrogen_value', 'phosphorus_value', 'potassium_value',
+        'ph_value', 'farm_size', 'unit'
+    )}
+    income_by_farmer = dict(financials.values_list('farmer_id', 'annual_income'))
+    challenges_by_farmer = dict(interests.values_list('farmer_id', 'challenge_flags'))
+    climates = district_climates()
+
+    for farmer_id, district in farmers.values_list('id', 'district'):
+        farm = farm_by_farmer.get(farmer_id, {})
+        yield farmer_id, feature_vector(
+            soil_type=farm.get('soil_type', ''),
+            npk=(farm.get('nitrogen_value'), farm.get('phosphorus_value'), farm.get('potassium_value')),
+            ph=farm.get('ph_value'),
+            climate=climates.get((district or '').lower()),
+            farm_size_ha=to_hectares(farm.get('farm_size') or 0, farm.get('unit')),
+            annual_income=income_by_farmer.get(farmer_id, ''),
+            challenge_flags=challenges_by_farmer.get(farmer_id, 0),
+        )
+
+
+def index_stamp():
+    """
+    (farmers, farmers with features, latest features update). FarmerFeatures
+    are rebuilt whenever any part of a profile is saved, and bulk imports
+    delete them, so any change to a farmer changes the stamp.
+    """
+    stamp = FarmerProfile.objects.aggregate(
+        farmer_count=Count('id'), feature_count=Count('features'), latest_update=Max('features__updated_at')
+    )
+    return stamp['farmer_count'], stamp['feature_count'], stamp['latest_update']
+
+
+def build_farmer_index():
+    index = FarmerIndex(capacity=max(1024, FarmerProfile.objects.count()))
+    for farmer_id, vector in farmer_vectors():
+        index.upsert(farmer_id, vector)
+    return index
+
+
+def get_farmer_index():
+    """The process-wide index, built from the database on first use and checked against it periodically"""
+    global _index, _index_stamp, _index_checked_at
+    with _index_lock:
+        now = time.monotonic()
+        if _index is not None and now - _index_checked_at < INDEX_CHECK_SECONDS:
+            return _index
+
+        # Read the stamp first, so changes made while the index is read are
+        # seen at the next check
+        stamp = index_stamp()
+        if _index is None:
+            _index = build_farmer_index()
+        elif stamp != _index_stamp:
+            farmers, features, updated = stamp
+            old_farmers, old_features, old_updated = _index_stamp
+            if farmers == old_farmers and features >= old_features and old_updated is not None:
+                # Only edits: read in the farmers whose features changed since the last check
+                since = old_updated - datetime.timedelta(seconds=INDEX_CHECK_SECONDS)
+                changed = FarmerFeatures.objects.filter(updated_at__gte=since).values_list('farmer_id', flat=True)
+                for farmer_id, vector in farmer_vectors(list(changed)):
+                    _index.upsert(farmer_id, vector)
+            else:
+                _index = build_farmer_index()
+        _index_stamp = stamp
+        _index_checked_at = now
+        return _index
+
+
+def refresh_farmer(farmer_id):
+    """Re-read one farmer into the index after their profile changed"""
+    refresh_farmers([farmer_id])
+
+
+def refresh_farmers(farmer_ids):
+    """Re-read farmers into the index, e.g. after a bulk import"""
+    if _index is None:
+        # Nothing to keep current yet; the first query builds the index
+        return
+    for farmer_id, vector in farmer_vectors(farmer_ids):
+        _index.upsert(farmer_id, vector)
+
+
+def forget_farmer(farmer_id):
+    if _index is not None:
+        _index.remove(farmer_id)
+
+
+def similar_farmers(farmer_id, k=10):
+    """(farmer_id, distance) of the k farmers most like the given one"""
+    index = get_farmer_index()
+    vector = index.vector_for(farmer_id)
+    if vector is None:
+        refresh_farmer(farmer_id)
+        vector = index.vector_for(farmer_id)
+    if vector is None:
+        return []
+    return index.nearest(vector, k, exclude=farmer_id)
@@ -0,0 +1,52 @@
+"""
+Sparse fieldsets: ?fields=name,status returns only those keys of each object.
+
+A Fieldset maps each output key of an endpoint to the model columns it is
+built from, so the same selection limits both the serialized output and the
+columns loaded with only(). Large JSON and text columns that the client did
+not ask for are never read from the database.
+"""
+from operator import attrgetter
+
+FIELDS_PARAM = 'fields'
+
+
+class InvalidFieldset(ValueError):
+    pass
+
+
+def column(name):
+    """Output field that is the model column of the same name"""
+    return (name,), attrgetter(name)
+
+
+class Fieldset:
+    """Output fields of an endpoint: name -> (columns read, value of an instance)"""
+
+    def __init__(self, fields):
+        self.fields = fields
+
+    @classmethod
+    def of_columns(cls, *names):
+        return cls({name: column(name) for name in names})
+
+    def select(self, params):
+        """Field names requested in params, or every field when none are"""
+        raw = params.get(FIELDS_PARAM)
+        if not raw:
+            return list(self.fields)
+        names = list(dict.fromkeys(name.strip() for name in raw.split(',') if name.strip()))
+        unknown = [name for name in names if name not in self.fields]
+        if unknown:
+            raise InvalidFieldset(f"Unknown fields: {', '.join(unknown)}")
+        return names
+
+    def columns(self, names):
+        return list(dict.fromkeys(name for field in names for name in self.fields[field][0]))
+
+    def only(self, queryset, names):
+        # only() always loads the primary key as well
+        return queryset.only(*self.columns(names))
+
+    def serialize(self, instance, names):
+        return {name: self.fields[name][1](instance) for name in names}
@@ -0,0 +1,157 @@
+"""
+Season-long irrigation calendar built from IrrigationRequirement rows.
+
+Every step is a generator so that long-duration crops such as sugarcane are
+produced one day at a time and streamed to the client instead of being held
+in memory as a list.
+"""
+import calendar
+import datetime
+import json
+import re
+
+# Share of the annual rainfall that falls in each month (January to December),
+# following the south-west monsoon pattern seen across Karnataka districts
+MONTHLY_RAINFALL_SHARE = [
+    0.005, 0.005, 0.010, 0.035, 0.070, 0.170,
+    0.230, 0.200, 0.150, 0.090, 0.030, 0.005,
+]
+
+# Only part of the rain that falls is available to the crop
+EFFECTIVE_RAINFALL_FACTOR = 0.8
+
+# Crop coefficient by fraction of the season (initial, development, mid-season, late)
+CROP_COEFFICIENT_PHASES = [
+    (0.15, 0.5),
+    (0.40, 0.8),
+    (0.80, 1.15),
+    (1.00, 0.8),
+]
+
+DEFAULT_SEASON_DAYS = 120
+
+# Perennial crops are planned one year at a time
+PERENNIAL_SEASON_DAYS = 365
+
+
+def parse_growth_days(growth_period, default=DEFAULT_SEASON_DAYS):
+    """Convert a growth period such as '90-120 days' or '10-12 months' into days"""
+    if not growth_period:
+        return default
+
+    numbers = [float(n) for n in re.findall(r'\d+(?:\.\d+)?', growth_period)]
+    if not numbers:
+        return default
+
+    # Use the upper bound so the calendar covers the whole season
+    upper = max(numbers)
+    period = growth_period.lower()
+    if 'year' in period:
+        return PERENNIAL_SEASON_DAYS
+    if 'month' in period:
+        return int(round(upper * 30))
+    return int(upper)
+
+
+def parse_stages(critical_stages):
+    """Split the comma-separated critical stages of an IrrigationRequirement"""
+    if not critical_stages:
+        return []
+    return [stage.strip() for stage in critical_stages.split(',') if stage.strip()]
+
+
+def crop_coefficient(season_fraction):
+    """Crop coefficient (Kc) for the given fraction of the season"""
+    for upper_bound, coefficient in CROP_COEFFICIENT_PHASES:
+        if season_fraction < upper_bound:
+            return coefficient
+    return CROP_COEFFICIENT_PHASES[-1][1]
+
+
+def daily_effective_rainfall(date, annual_rainfall_mm):
+    """Expected effective rainfall (mm) on a given date for a district"""
+    if not annual_rainfall_mm:
+        return 0.0
+    month_total = annual_rainfall_mm * MONTHLY_RAINFALL_SHARE[date.month - 1]
+    days_in_month = calendar.monthrange(date.year, date.month)[1]
+    return month_total / days_in_month * EFFECTIVE_RAINFALL_FACTOR
+
+
+def iter_irrigation_schedule(requirement, sowing_date, season_days, annual_rainfall_mm=0):
+    """
+    Yield one entry per day of the season.
+
+    The soil water deficit grows by the crop's daily need and shrinks with the
+    expected rainfall. Once it reaches the depth of one application for the
+    chosen irrigation system, an irrigation is scheduled for that day.
+    """
+    depth = requirement.water_requirement_mm or 0
+    interval = max(1, int(round(requirement.irrigation_interval_days or 7)))
+    base_daily_need = depth / interval
+    stages = parse_stages(requirement.critical_stages)
+
+    deficit = 0.0
+    for day in range(season_days):
+        date = sowing_date + datetime.timedelta(days=day)
+        season_fraction = day / season_days
+
+        need = base_daily_need * crop_coefficient(season_fraction)
+        rainfall = daily_effective_rainfall(date, annual_rainfall_mm)
+        deficit = max(0.0, deficit + need - rainfall)
+
+        # Stages are spread evenly over the season in the order they are listed
+        stage = stages[min(len(stages) - 1, int(season_fraction * len(stages)))] if stages else ''
+
+        water_mm = 0.0
+        if depth > 0 and deficit >= depth:
+            water_mm = depth
+            deficit -= depth
+
+        yield {
+            'date': date.isoformat(),
+            'day': day + 1,
+            'stage': stage,
+            'crop_water_need_mm': round(need, 2),
+            'effective_rainfall_mm': round(rainfall, 2),
+            'irrigate': water_mm > 0,
+            'water_mm': round(water_mm, 1),
+            'soil_water_deficit_mm': round(deficit, 1),
+        }
+
+
+def iter_ndjson(entries):
+    """Serialize schedule entries as newline-delimited JSON"""
+    for entry in entries:
+        yield json.dumps(entry) + '\n'
+
+
+def iter_ics(entries, crop, irrigation_system):
+    """Serialize the irrigation days of a schedule as an iCalendar feed"""
+    stamp = datetime.datetime.now(datetime.timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+    yield (
+        'BEGIN:VCALENDAR\r\n'
+        'VERSION:2.0\r\n'
+        'PRODID:-//AgriGuide//Irrigation Schedule//EN\r\n'
+        'CALSCALE:GREGORIAN\r\n'
+        f'X-WR-CALNAME:{crop.name} irrigation ({irrigation_system})\r\n'
+    )
+
+    for entry in entries:
+        if not entry['irrigate']:
+            continue
+        day = entry['date'].replace('-', '')
+        description = f"{irrigation_system} irrigation"
+        if entry['stage']:
+            description += f" during {entry['stage']} stage"
+        yield (
+            'BEGIN:VEVENT\r\n'
+            f'UID:irrigation-{crop.id}-{day}@agriguide\r\n'
+            f'DTSTAMP:{stamp}\r\n'
+            f'DTSTART;VALUE=DATE:{day}\r\n'
+            f"SUMMARY:Irrigate {crop.name} ({entry['water_mm']} mm)\r\n"
+            f'DESCRIPTION:{description}\r\n'
+            'END:VEVENT\r\n'
+        )
+
+    yield 'END:VCALENDAR\r\n'
@@ -0,0 +1,214 @@
+"""
+Split a farm's area between candidate crops.
+
+The allocation is a small linear program: choose the hectares given to each
+crop so the expected net income is as high as possible without using more
+land, water or labour than the farm has, and without giving any single crop
+more than its diversification share. It is solved with a dense simplex on a
+NumPy tableau, so no external solver is needed.
+"""
+import numpy as np
+
+from .farmer_attributes import IRRIGATION_SOURCES
+from .irrigation_schedule import EFFECTIVE_RAINFALL_FACTOR
+
+ACRES_PER_HECTARE = 2.47105
+
+# Seasonal water (mm over the irrigated area) each irrigation source can supply
+IRRIGATION_SOURCE_SUPPLY_MM = {
+    'borewell': 450,
+    'canal': 600,
+    'river': 500,
+    'well': 350,
+    'pond': 200,
+    'rainwater': 100,
+    'none': 0,
+}
+
+# Part of the cost of cultivation that is spent on labour, and the daily wage
+# used to turn it into person-days
+LABOUR_SHARE_OF_COST = 0.4
+DAILY_WAGE = 400
+
+# Labour a farm can count on when none is given: the family's own working days
+# plus hired labour in proportion to the farm size
+FAMILY_LABOUR_DAYS = 500
+HIRED_LABOUR_DAYS_PER_HA = 60
+
+DEFAULT_MIN_CROPS = 2
+
+# Crop and economics columns allocation_candidate reads, for only() on
+# Crop.objects.select_related('economics')
+CANDIDATE_COLUMNS = (
+    'name', 'water_requirement_mm', 'economics__net_income_per_ha', 'economics__cost_of_cultivation_per_ha',
+)
+
+SIMPLEX_TOLERANCE = 1e-9
+SIMPLEX_MAX_ITERATIONS = 1000
+
+
+class InfeasibleAllocation(ValueError):
+    pass
+
+
+def to_hectares(area, unit):
+    if (unit or '').lower().startswith('acre'):
+        return area / ACRES_PER_HECTARE
+    return area
+
+
+def from_hectares(area, unit):
+    if (unit or '').lower().startswith('acre'):
+        return area * ACRES_PER_HECTARE
+    return area
+
+
+def available_water_mm(annual_rainfall_mm, irrigation_source_flags):
+    """Water depth (mm) the farm can give its crops over a season"""
+    supply = sum(
+        IRRIGATION_SOURCE_SUPPLY_MM.get(source.lower(), 0)
+        for source in IRRIGATION_SOURCES.names_of(irrigation_source_flags)
+    )
+    return (annual_rainfall_mm or 0) * EFFECTIVE_RAINFALL_FACTOR + supply
+
+
+def available_labour_days(area_ha):
+    return FAMILY_LABOUR_DAYS + HIRED_LABOUR_DAYS_PER_HA * area_ha
+
+
+def labour_days_per_ha(cost_of_cultivation_per_ha):
+    return float(cost_of_cultivation_per_ha or 0) * LABOUR_SHARE_OF_COST / DAILY_WAGE
+
+
+def allocation_candidate(crop, economics):
+    """Per-hectare income, water and labour of one crop, or None if it has no economics"""
+    if economics is None:
+        return None
+    return {
+        'crop_id': crop.id,
+        'name': crop.name,
+        'net_income_per_ha': float(economics.net_income_per_ha),
+        'water_mm': float(crop.water_requirement_mm or 0),
+        'labour_days_per_ha': labour_days_per_ha(economics.cost_of_cultivation_per_ha),
+    }
+
+
+def simplex_max(c, A, b):
+    """
+    Maximize c @ x subject to A @ x <= b and x >= 0, with b >= 0.
+
+    The origin is always feasible for these problems, so a single phase is
+    enough; a negative bound would need a second phase and is refused as
+    infeasible. Bland's rule is used for pivoting so degenerate problems
+    cannot cycle.
+    """
+    m, n = A.shape
+    if (b < 0).any():
+        raise InfeasibleAllocation('The allocation limits must not be negative')
+    tableau = np.zeros((m + 1, n + m + 1))
+    tableau[:m, :n] = A
+    tableau[:m, n:n + m] = np.eye(m)
+    tableau[:m, -1] = b
+    tableau[-1, :n] = -c
+    basis = np.arange(n, n + m)
+
+    for _ in range(SIMPLEX_MAX_ITERATIONS):
+        entering = np.flatnonzero(tableau[-1, :-1] < -SIMPLEX_TOLERANCE)
+        if entering.size == 0:
+            break
+        col = entering[0]
+
+        column = tableau[:m, col]
+        positive = column > SIMPLEX_TOLERANCE
+        if not positive.any():
+            raise InfeasibleAllocation('The allocation problem is unbounded')
+        ratios = np.full(m, np.inf)
+        ratios[positive] = tableau[:m, -1][positive] / column[positive]
+        best = ratios.min()
+        ties = np.flatnonzero(ratios <= best + SIMPLEX_TOLERANCE)
+        row = ties[np.argmin(basis[ties])]
+
+        tableau[row] /= tableau[row, col]
+        others = np.arange(m + 1) != row
+        tableau[others] -= np.outer(tableau[others, col], tableau[row])
+        basis[row] = col
+    else:
+        raise InfeasibleAllocation('The allocation problem did not converge')
+
+    x = np.zeros(n)
+    in_solution = basis < n
+    x[basis[in_solution]] = tableau[:m, -1][in_solution]
+    return x, tableau[-1, -1]
+
+
+def allocate_land(candidates, area_ha, water_mm, labour_days, min_crops=DEFAULT_MIN_CROPS):
+    """
+    Allocate area_ha between the candidate crops.
+
+    The diversification minimum is expressed linearly: no crop may take more
+    than 1/min_crops of the farm, so filling the farm needs at least min_crops
+    different crops.
+    """
+    candidates = [candidate for candidate in candidates if candidate['net_income_per_ha'] > 0]
+    if area_ha <= 0 or not candidates:
+        return {'allocations': [], 'total_net_income': 0.0, 'area_used_ha': 0.0,
+                'water_used_mm': 0.0, 'labour_used_days': 0.0}
+
+    income = np.array([candidate['net_income_per_ha'] for candidate in candidates])
+    water = np.array([candidate['water_mm'] for candidate in candidates])
+    labour = np.array([candidate['labour_days_per_ha'] for candidate in candidates])
+    n = len(candidates)
+
+    max_share = area_ha / max(1, min_crops)
+    A = np.vstack([
+        np.ones(n),   # land
+        water,        # water, in mm x ha against the farm's depth x area
+        labour,       # labour, in person-days
+        np.eye(n),    # diversification cap per crop
+    ])
+    b = np.concatenate([
+        [area_ha, water_mm * area_ha, labour_days],
+        np.full(n, max_share),
+    ])
+
+    x, total_income = simplex_max(income, A, b)
+
+    allocations = []
+    for candidate, area in zip(candidates, x):
+        if area <= SIMPLEX_TOLERANCE:
+            continue
+        allocations.append({
+            'crop_id': candidate['crop_id'],
+            'crop': candidate['name'],
+            'area_ha': round(float(area), 3),
+            'share_percentage': round(float(area / area_ha * 100), 1),
+            'expected_net_income': round(float(area * candidate['net_income_per_ha']), 2),
+        })
+    allocations.sort(key=lambda allocation: allocation['area_ha'], reverse=True)
+
+    return {
+        'allocations': allocations,
+        'total_net_income': round(float(total_income), 2),
+        'area_used_ha': round(float(x.sum()), 3),
+        # Average depth over the farm, comparable with the water available
+        'water_used_mm': round(float(water @ x / area_ha), 1),
+        'labour_used_days': round(float(labour @ x), 1),
+    }
+
+
+def allocate_land_per_farm(problems):
+    """
+    Solve each farm's allocation in turn, one simplex per farm.
+
+    Each problem is a dict with the keyword arguments of allocate_land; farms
+    that share a candidate list (for example the same soil type) should pass
+    the same list so it is built only once by the caller. A farm whose problem
+    cannot be solved gets {'error': ...} without failing the others.
+    """
+    results = []
+    for problem in problems:
+        try:
+            results.append(allocate_land(**problem))
+        except InfeasibleAllocation as e:
+            results.append({'error': str(e)})
+    return results
@@ -0,0 +1,50 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from main_app.farmer_import import COLUMNS, DEFAULT_CHUNK_SIZE, FarmerImporter, InvalidImportFile, read_rows
+
+
+class Command(BaseCommand):
+    help = ('Import farmers with their farm, financial and challenge data from a .csv or .xlsx file. '
+            f'Columns: {", ".join(COLUMNS)}. Rows with a known external_id update that farmer.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='The .csv or .xlsx file to import')
+        parser.add_argument(
+            '--errors',
+            help='Where to write the rows that fail validation, as CSV with the row number and reason '
+                 '(default: PATH with .errors.csv appended; removed again if no row fails)'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+            help='Rows validated and written per transaction'
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Only validate the file and report')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        errors_path = options['errors'] or f'{path}.errors.csv'
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be at least 1')
+
+        def progress(report):
+            self.stdout.write(str(report))
+
+        try:
+            with open(path, 'rb') as file, open(errors_path, 'w', newline='', encoding='utf-8') as errors:
+                importer = FarmerImporter(
+                    chunk_size=options['chunk_size'], errors=errors, progress=progress, dry_run=options['dry_run']
+                )
+                report = importer.run(read_rows(file, path))
+        except (OSError, InvalidImportFile) as e:
+            raise CommandError(str(e))
+
+        if report.ignored_columns:
+            self.stdout.write(self.style.WARNING(f"Ignored unknown columns: {', '.join(report.ignored_columns)}"))
+        if report.failed:
+            self.stdout.write(self.style.WARNING(f'{report.failed} rows failed; see {errors_path}'))
+        else:
+            os.remove(errors_path)
+        verb = 'Validated' if options['dry_run'] else 'Imported'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {report}'))
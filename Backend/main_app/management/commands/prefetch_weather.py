@@ -0,0 +1,89 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand, CommandError
+
+from main_app.models import District, FarmerProfile
+from myapp import weather, weather_cache
+
+# Backends whose entries no other process can read
+PROCESS_LOCAL_CACHES = (LocMemCache, DummyCache)
+
+
+def prefetch_cities():
+    """Every district name and farmer district, one spelling per normalized city"""
+    names = list(District.objects.values_list('name', flat=True))
+    names += FarmerProfile.objects.exclude(district='').values_list('district', flat=True).distinct()
+
+    cities = {}
+    for name in names:
+        city = ' '.join(name.split())
+        if city:
+            cities.setdefault(weather_cache.normalize_city(city), city)
+    return sorted(cities.values())
+
+
+class Command(BaseCommand):
+    help = ('Prefetch current weather and forecasts for every district into the weather cache, '
+            'so user requests are served from cache')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Repeat every INTERVAL seconds; 0 (the default) runs once. '
+                 f'Keep it below the current weather TTL ({weather_cache.CURRENT_TTL} s) to keep entries fresh.'
+        )
+        parser.add_argument(
+            '--concurrency', type=int, default=8,
+            help='Number of upstream requests in flight at once (at most WEATHER_MAX_CONNECTIONS)'
+        )
+
+    def handle(self, *args, **options):
+        interval = options['interval']
+        concurrency = options['concurrency']
+        if interval < 0:
+            raise CommandError('--interval must not be negative')
+        if concurrency < 1:
+            raise CommandError('--concurrency must be at least 1')
+        concurrency = min(concurrency, settings.WEATHER_MAX_CONNECTIONS)
+        if isinstance(caches[DEFAULT_CACHE_ALIAS], PROCESS_LOCAL_CACHES):
+            raise CommandError(
+                'The default cache is local to this process, so the server would never see the prefetched '
+                'weather; configure a shared cache (set REDIS_URL)'
+            )
+
+        while True:
+            started = time.monotonic()
+            self.prefetch(concurrency)
+            if not interval:
+                return
+
+            # Fixed cadence: a run that overruns the interval skips the missed ticks
+            elapsed = time.monotonic() - started
+            time.sleep(interval - elapsed % interval)
+
+    def prefetch(self, concurrency):
+        cities = prefetch_cities()
+        jobs = [(endpoint, city) for city in cities for endpoint in (weather.CURRENT, weather.FORECAST)]
+        self.stdout.write(f'Prefetching weather for {len(cities)} cities...')
+
+        def run(job):
+            endpoint, city = job
+            try:
+                weather_cache.refresh(endpoint, city)
+            except (weather.WeatherServiceError, weather.WeatherUnavailable) as e:
+                return f'{city} ({endpoint}): {str(e)}'
+            return None
+
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='weather-prefetch') as pool:
+            errors = [error for error in pool.map(run, jobs) if error]
+
+        for error in errors:
+            self.stdout.write(self.style.WARNING(f'Could not prefetch {error}'))
+        self.stdout.write(self.style.SUCCESS(
+            f'Cached {len(jobs) - len(errors)} of {len(jobs)} weather responses'
+        ))
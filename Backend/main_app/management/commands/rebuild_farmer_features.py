@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from main_app.farmer_features import rebuild_farmer_features
+from main_app.models import FarmerProfile
+
+
+class Command(BaseCommand):
+    help = ('Rebuild the materialized features of every farmer, e.g. after a bulk import that '
+            'bypassed the model signals. Farmers without features also get theirs on first use.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('farmer_ids', nargs='*', type=int, help='Only rebuild these farmers')
+
+    def handle(self, *args, **options):
+        farmer_ids = options['farmer_ids'] or list(FarmerProfile.objects.order_by('id').values_list('id', flat=True))
+        count = 0
+        for farmer_id in farmer_ids:
+            with transaction.atomic():
+                if rebuild_farmer_features(farmer_id) is not None:
+                    count += 1
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt features of {count} farmers'))
@@ -0,0 +1,53 @@
+# Generated by Django 5.1.7 on 2026-10-19 17:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_app', '0024_catalogversion'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='crop',
+            name='growing_season',
+            field=models.CharField(db_index=True, default='All seasons', max_length=50),
+        ),
+        migrations.AlterField(
+            model_name='crop',
+            name='name',
+            field=models.CharField(db_index=True, max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='governmentscheme',
+            name='name',
+            field=models.CharField(db_index=True, max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='loanoption',
+            name='loan_type',
+            field=models.CharField(db_index=True, default='', max_length=50),
+        ),
+        migrations.AlterField(
+            model_name='loanoption',
+            name='name',
+            field=models.CharField(db_index=True, max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='loanoption',
+            name='provider',
+            field=models.CharField(db_index=True, default='', max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='technology',
+            name='category',
+            field=models.CharField(choices=[('irrigation', 'Irrigation'), ('precision_agriculture', 'Precision Agriculture'), ('soil_management', 'Soil Management'), ('climate_monitoring', 'Climate Monitoring'), ('crop_management', 'Crop Management'), ('planting_technology', 'Planting Technology'), ('harvesting', 'Harvesting'), ('protected_cultivation', 'Protected Cultivation'), ('renewable_energy', 'Renewable Energy'), ('organic_fertilizer', 'Organic Fertilizer'), ('post_harvest', 'Post Harvest'), ('pest_control', 'Pest Control'), ('nutrient_management', 'Nutrient Management'), ('animal_husbandry', 'Animal Husbandry'), ('storage_technology', 'Storage Technology'), ('disease_detection', 'Disease Detection'), ('smart_irrigation', 'Smart Irrigation'), ('food_processing', 'Food Processing'), ('livestock_technology', 'Livestock Technology'), ('integrated_farming', 'Integrated Farming'), ('waste_management', 'Waste Management'), ('market_technology', 'Market Technology'), ('specialty_crops', 'Specialty Crops'), ('fodder_management', 'Fodder Management'), ('aquaculture', 'Aquaculture'), ('farm_protection', 'Farm Protection'), ('research_tool', 'Research Tool'), ('microclimate_monitoring', 'Microclimate Monitoring'), ('seed_technology', 'Seed Technology')], db_index=True, default='irrigation', max_length=50),
+        ),
+        migrations.AlterField(
+            model_name='technology',
+            name='name',
+            field=models.CharField(db_index=True, max_length=100),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.7 on 2026-10-19 17:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_app', '0025_admin_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='farmerprofile',
+            name='district',
+            field=models.CharField(db_index=True, default='', max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='farmerprofile',
+            name='first_name',
+            field=models.CharField(db_index=True, default='', max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='farmerprofile',
+            name='last_name',
+            field=models.CharField(db_index=True, default='', max_length=100),
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 5.1.7 on 2026-10-19 18:14
+
+import re
+
+from django.conf import settings
+from django.db import migrations, models
+
+# Copy of main_app.soil_types as of this migration
+SOIL_TYPE_PREFIXES = [
+    ('black', 'Black'),
+    ('red', 'Red'),
+    ('alluvi', 'Alluvial'),
+    ('laterit', 'Laterite'),
+    ('clay', 'Clay'),
+    ('sand', 'Sandy'),
+]
+
+
+def canonical_soil_type(soil_type):
+    words = re.findall(r'[a-z]+', (soil_type or '').lower())
+    for prefix, canonical in SOIL_TYPE_PREFIXES:
+        if any(word.startswith(prefix) for word in words):
+            return canonical
+    return ' '.join(word for word in words if word != 'soil').capitalize()
+
+
+def fill_canonical_soil_types(apps, schema_editor):
+    for model_name in ('SoilCropCompatibility', 'FertilizerRecommendation'):
+        model = apps.get_model('main_app', model_name)
+        for soil_type in model.objects.values_list('soil_type', flat=True).distinct():
+            model.objects.filter(soil_type=soil_type).update(canonical_soil_type=canonical_soil_type(soil_type))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_app', '0026_farmer_profile_search_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fertilizerrecommendation',
+            name='canonical_soil_type',
+            field=models.CharField(default='', editable=False, max_length=50),
+        ),
+        migrations.AddField(
+            model_name='soilcropcompatibility',
+            name='canonical_soil_type',
+            field=models.CharField(default='', editable=False, max_length=50),
+        ),
+        migrations.RunPython(fill_canonical_soil_types, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='farmerinterest',
+            index=models.Index(fields=['farmer', '-id'], name='interest_farmer_latest_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='farmerprofile',
+            index=models.Index(fields=['first_name', 'last_name'], name='farmer_full_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fertilizerrecommendation',
+            index=models.Index(fields=['crop', 'canonical_soil_type'], name='fertilizer_crop_soil_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='soilcropcompatibility',
+            index=models.Index(fields=['canonical_soil_type', '-compatibility_score'], name='soilcompat_soil_score_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='soilcropcompatibility',
+            index=models.Index(fields=['crop', 'canonical_soil_type'], name='soilcompat_crop_soil_idx'),
+        ),
+    ]
@@ -0,0 +1,206 @@
+# Generated by Django 5.1.7 on 2026-10-19 18:18
+
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Copy of main_app.soil_types as of this migration
+
+# (name, parent, synonyms), parents listed before their children
+SOIL_TAXONOMY = [
+    ('Black', None, ['Regur']),
+    ('Deep black', 'Black', []),
+    ('Medium black', 'Black', ['Medium deep black soil']),
+    ('Black cotton', 'Black', []),
+    ('Red', None, []),
+    ('Red loam', 'Red', ['Red loamy soil']),
+    ('Red sandy loam', 'Red', []),
+    ('Red laterite', 'Red', []),
+    ('Red clay', 'Red', []),
+    ('Red gravelly loam', 'Red', []),
+    ('Red gravelly clay', 'Red', []),
+    ('Alluvial', None, ['Alluvium']),
+    ('Coastal alluvium', 'Alluvial', ['Coastal alluvial']),
+    ('Alluvio-colluvial', 'Alluvial', ['Saline alluvio-colluvial soil', 'Non-saline and saline alluvio-colluvial soil']),
+    ('Laterite', None, ['Lateritic']),
+    ('Lateritic gravelly clay', 'Laterite', []),
+    ('Lateritic clay', 'Laterite', []),
+    ('Clay', None, ['Clayey']),
+    ('Clay loam', 'Clay', ['Clayey loam']),
+    ('Sandy', None, ['Sand']),
+    ('Sandy loam', 'Sandy', []),
+    ('Coastal sandy', 'Sandy', []),
+    ('Loamy', None, ['Loam']),
+    ('Forest', None, []),
+    ('Brown forest', 'Forest', []),
+    ('Forest loam', 'Forest', []),
+]
+
+# Word prefixes naming a family, for soils not listed by name
+FAMILY_PREFIXES = [
+    ('black', 'Black'),
+    ('red', 'Red'),
+    ('alluvi', 'Alluvial'),
+    ('laterit', 'Laterite'),
+    ('clay', 'Clay'),
+    ('sand', 'Sandy'),
+    ('loam', 'Loamy'),
+    ('forest', 'Forest'),
+]
+
+LIST_SEPARATORS = re.compile(r'[,;/]')
+
+
+def normalize_soil_name(name):
+    words = re.findall(r'[a-z]+(?:-[a-z]+)*', (name or '').lower())
+    return ' '.join(word for word in words if word not in ('soil', 'soils'))
+
+
+def resolve(ids_by_name, name):
+    key = normalize_soil_name(name)
+    if not key:
+        return None
+    soil_id = ids_by_name.get(key)
+    if soil_id is None:
+        words = key.split()
+        for prefix, family in FAMILY_PREFIXES:
+            if any(word.startswith(prefix) for word in words):
+                return ids_by_name.get(normalize_soil_name(family))
+    return soil_id
+
+
+def resolve_all(ids_by_name, names):
+    ids = (resolve(ids_by_name, name) for name in LIST_SEPARATORS.split(names or ''))
+    return list(dict.fromkeys(soil_id for soil_id in ids if soil_id is not None))
+
+
+def seed_soil_taxonomy(apps, schema_editor):
+    SoilType = apps.get_model('main_app', 'SoilType')
+    SoilTypeSynonym = apps.get_model('main_app', 'SoilTypeSynonym')
+
+    ids = {}
+    ids_by_name = {}
+    for name, parent, synonyms in SOIL_TAXONOMY:
+        soil_type = SoilType.objects.create(name=name, parent_id=ids.get(parent))
+        ids[name] = soil_type.id
+        ids_by_name[normalize_soil_name(name)] = soil_type.id
+        for synonym in synonyms:
+            SoilTypeSynonym.objects.create(name=synonym, soil_type=soil_type)
+    for name, parent, synonyms in SOIL_TAXONOMY:
+        for synonym in synonyms:
+            ids_by_name.setdefault(normalize_soil_name(synonym), ids[name])
+
+    # Historical models have no custom save(), so resolve existing rows here
+    for model_name in ('SoilCropCompatibility', 'FertilizerRecommendation', 'FarmDetail'):
+        model = apps.get_model('main_app', model_name)
+        for soil_type in model.objects.values_list('soil_type', flat=True).distinct():
+            model.objects.filter(soil_type=soil_type).update(soil_id=resolve(ids_by_name, soil_type))
+
+    for model_name, field in (('Crop', 'suitable_soil_types'), ('District', 'major_soil_types'),
+                              ('OrganicPractice', 'soil_types')):
+        model = apps.get_model('main_app', model_name)
+        through = model.soils.through
+        links = [
+            through(**{f'{model_name.lower()}_id': pk, 'soiltype_id': soil_id})
+            for pk, soil_types in model.objects.values_list('pk', field)
+            for soil_id in resolve_all(ids_by_name, soil_types)
+        ]
+        through.objects.bulk_create(links)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_app', '0027_hot_lookup_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SoilType',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SoilTypeSynonym',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+            ],
+        ),
+        migrations.RemoveIndex(
+            model_name='fertilizerrecommendation',
+            name='fertilizer_crop_soil_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='soilcropcompatibility',
+            name='soilcompat_soil_score_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='soilcropcompatibility',
+            name='soilcompat_crop_soil_idx',
+        ),
+        migrations.RemoveField(
+            model_name='fertilizerrecommendation',
+            name='canonical_soil_type',
+        ),
+        migrations.RemoveField(
+            model_name='soilcropcompatibility',
+            name='canonical_soil_type',
+        ),
+        migrations.AddField(
+            model_name='soiltype',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='children', to='main_app.soiltype'),
+        ),
+        migrations.AddField(
+            model_name='crop',
+            name='soils',
+            field=models.ManyToManyField(blank=True, related_name='crops', to='main_app.soiltype'),
+        ),
+        migrations.AddField(
+            model_name='district',
+            name='soils',
+            field=models.ManyToManyField(blank=True, related_name='districts', to='main_app.soiltype'),
+        ),
+        migrations.AddField(
+            model_name='farmdetail',
+            name='soil',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='main_app.soiltype'),
+        ),
+        migrations.AddField(
+            model_name='fertilizerrecommendation',
+            name='soil',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='main_app.soiltype'),
+        ),
+        migrations.AddField(
+            model_name='organicpractice',
+            name='soils',
+            field=models.ManyToManyField(blank=True, related_name='organic_practices', to='main_app.soiltype'),
+        ),
+        migrations.AddField(
+            model_name='soilcropcompatibility',
+            name='soil',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='main_app.soiltype'),
+        ),
+        migrations.AddIndex(
+            model_name='fertilizerrecommendation',
+            index=models.Index(fields=['crop', 'soil'], name='fertilizer_crop_soil_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='soilcropcompatibility',
+            index=models.Index(fields=['soil', '-compatibility_score'], name='soilcompat_soil_score_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='soilcropcompatibility',
+            index=models.Index(fields=['crop', 'soil'], name='soilcompat_crop_soil_idx'),
+        ),
+        migrations.AddField(
+            model_name='soiltypesynonym',
+            name='soil_type',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='synonyms', to='main_app.soiltype'),
+        ),
+        migrations.RunPython(seed_soil_taxonomy, migrations.RunPython.noop),
+    ]
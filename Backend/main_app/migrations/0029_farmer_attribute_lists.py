@@ -0,0 +1,120 @@
+# Generated by Django 5.1.7 on 2026-10-19 18:22
+
+import re
+
+import django.db.models.deletion
+import main_app.farmer_attributes
+from django.db import migrations, models
+
+# Copy of main_app.farmer_attributes as of this migration
+LIST_SEPARATORS = re.compile(r'[,;]')
+
+IRRIGATION_SOURCES = ['Well', 'Borewell', 'Canal', 'River', 'Pond', 'Rainwater', 'None']
+IRRIGATION_SYSTEMS = ['Drip', 'Sprinkler', 'Flood', 'Furrow', 'None']
+CHALLENGES = [
+    'Water Scarcity', 'Market Access', 'Price Volatility', 'Input Costs',
+    'Financial Constraints', 'Credit Access', 'Irrigation Management',
+    'Crop Financing', 'Seed Quality', 'Technology Access',
+    'Collateral Requirements', 'High Interest Rates', 'Processing Delays',
+    'Seasonal Cash Flow', 'Documentation Complexity', 'Limited Credit History',
+    'Infrastructure Development', 'Farm Mechanization Costs',
+    'Post-harvest Financing', 'Loan Repayment Flexibility',
+]
+
+
+def split_list(value):
+    if isinstance(value, str):
+        value = LIST_SEPARATORS.split(value)
+    items = {}
+    for item in value or ():
+        item = ' '.join(str(item).split())
+        if item:
+            items.setdefault(item.lower(), item)
+    return list(items.values())
+
+
+def mask(vocabulary, values):
+    """Bits of the options of vocabulary in values; others are ignored"""
+    bits = {name.lower(): 1 << index for index, name in enumerate(vocabulary)}
+    result = 0
+    for value in split_list(values):
+        result |= bits.get(value.lower(), 0)
+    return result
+
+
+def encode_attribute_lists(apps, schema_editor):
+    FarmDetail = apps.get_model('main_app', 'FarmDetail')
+    FarmerInterest = apps.get_model('main_app', 'FarmerInterest')
+    FinancialInfo = apps.get_model('main_app', 'FinancialInfo')
+    EnrolledScheme = apps.get_model('main_app', 'EnrolledScheme')
+    SustainablePractice = apps.get_model('main_app', 'SustainablePractice')
+
+    # Historical models have no custom save(), so encode existing rows here
+    farms = list(FarmDetail.objects.only('irrigation_sources', 'irrigation_systems'))
+    for farm in farms:
+        farm.irrigation_source_flags = mask(IRRIGATION_SOURCES, farm.irrigation_sources)
+        farm.irrigation_system_flags = mask(IRRIGATION_SYSTEMS, farm.irrigation_systems)
+    FarmDetail.objects.bulk_update(farms, ['irrigation_source_flags', 'irrigation_system_flags'], batch_size=500)
+
+    interests = list(FarmerInterest.objects.only('challenges', 'sustainable_practices'))
+    for interest in interests:
+        interest.challenge_flags = mask(CHALLENGES, interest.challenges)
+    FarmerInterest.objects.bulk_update(interests, ['challenge_flags'], batch_size=500)
+
+    SustainablePractice.objects.bulk_create([
+        SustainablePractice(interest=interest, name=name)
+        for interest in interests for name in split_list(interest.sustainable_practices)
+    ], batch_size=500)
+    EnrolledScheme.objects.bulk_create([
+        EnrolledScheme(financial_info_id=pk, name=name)
+        for pk, schemes in FinancialInfo.objects.values_list('pk', 'govt_schemes_enrolled')
+        for name in split_list(schemes)
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_app', '0028_soil_taxonomy'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='farmdetail',
+            name='irrigation_source_flags',
+            field=main_app.farmer_attributes.FlagsField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='farmdetail',
+            name='irrigation_system_flags',
+            field=main_app.farmer_attributes.FlagsField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='farmerinterest',
+            name='challenge_flags',
+            field=main_app.farmer_attributes.FlagsField(default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name='EnrolledScheme',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(db_index=True, max_length=200)),
+                ('financial_info', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='enrolled_schemes', to='main_app.financialinfo')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('financial_info', 'name'), name='enrolled_scheme_unique')],
+            },
+        ),
+        migrations.CreateModel(
+            name='SustainablePractice',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(db_index=True, max_length=200)),
+                ('interest', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='practices', to='main_app.farmerinterest')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('interest', 'name'), name='sustainable_practice_unique')],
+            },
+        ),
+        migrations.RunPython(encode_attribute_lists, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.1.7 on 2026-10-19 18:28
+
+import django.db.models.deletion
+import main_app.farmer_attributes
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_app', '0029_farmer_attribute_lists'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FarmerFeatures',
+            fields=[
+                ('farmer', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='features', serialize=False, to='main_app.farmerprofile')),
+                ('has_farm', models.BooleanField(default=False)),
+                ('soil_type', models.CharField(blank=True, max_length=20)),
+                ('farm_size', models.FloatField(default=0)),
+                ('unit', models.CharField(default='Hectare', max_length=10)),
+                ('farm_size_ha', models.FloatField(default=0)),
+                ('land_ownership', models.CharField(default='Owned', max_length=10)),
+                ('irrigation_source_flags', main_app.farmer_attributes.FlagsField(default=0, editable=False)),
+                ('irrigation_system_flags', main_app.farmer_attributes.FlagsField(default=0, editable=False)),
+                ('nitrogen_value', models.FloatField(blank=True, null=True)),
+                ('phosphorus_value', models.FloatField(blank=True, null=True)),
+                ('potassium_value', models.FloatField(blank=True, null=True)),
+                ('ph_value', models.FloatField(blank=True, null=True)),
+                ('challenge_flags', main_app.farmer_attributes.FlagsField(default=0, editable=False)),
+                ('has_financial_info', models.BooleanField(default=False)),
+                ('annual_income', models.CharField(blank=True, max_length=20)),
+                ('monthly_income', models.PositiveIntegerField(default=0)),
+                ('bank_account', models.BooleanField(default=True)),
+                ('insurance_coverage', models.BooleanField(default=False)),
+                ('enrolled_schemes', models.JSONField(blank=True, default=list)),
+                ('crop_names', models.JSONField(blank=True, default=list)),
+                ('crop_seasons', models.JSONField(blank=True, default=list)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('district', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='main_app.district')),
+                ('soil', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='main_app.soiltype')),
+            ],
+        ),
+    ]
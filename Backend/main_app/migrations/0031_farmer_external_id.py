@@ -0,0 +1,36 @@
+# Generated by Django 5.1.7 on 2026-10-19 18:35
+
+import uuid
+
+from django.db import migrations, models
+
+
+def assign_external_ids(apps, schema_editor):
+    FarmerProfile = apps.get_model('main_app', 'FarmerProfile')
+    farmers = list(FarmerProfile.objects.only('id'))
+    for farmer in farmers:
+        farmer.external_id = uuid.uuid4()
+    FarmerProfile.objects.bulk_update(farmers, ['external_id'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_app', '0030_farmer_features'),
+    ]
+
+    # A unique default cannot be added in one step: every existing row would
+    # get the same value, so the ids are assigned before the constraint
+    operations = [
+        migrations.AddField(
+            model_name='farmerprofile',
+            name='external_id',
+            field=models.UUIDField(editable=False, null=True),
+        ),
+        migrations.RunPython(assign_external_ids, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='farmerprofile',
+            name='external_id',
+            field=models.UUIDField(default=uuid.uuid4, editable=False, unique=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-19 21:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_app', '0031_farmer_external_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='farmerprofile',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.7 on 2026-10-19 21:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_app', '0032_row_versions'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='farmerprofile',
+            name='first_name',
+            field=models.CharField(default='', max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='farmerprofile',
+            name='last_name',
+            field=models.CharField(default='', max_length=100),
+        ),
+    ]
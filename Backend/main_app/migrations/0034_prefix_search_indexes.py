@@ -0,0 +1,28 @@
+# Generated by Django 5.1.7 on 2026-10-19 19:27
+
+import main_app.prefix_search
+from django.conf import settings
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_app', '0033_drop_farmer_name_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='farmerprofile',
+            index=main_app.prefix_search.PrefixSearchIndex(field='first_name', name='farmer_first_name_search_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='farmerprofile',
+            index=main_app.prefix_search.PrefixSearchIndex(field='last_name', name='farmer_last_name_search_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='farmerprofile',
+            index=main_app.prefix_search.PrefixSearchIndex(field='district', name='farmer_district_search_idx'),
+        ),
+    ]
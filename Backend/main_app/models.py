@@ -1,27 +1,104 @@
+import uuid
+
 from django.db import models
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.conf import settings
+from django.utils import timezone
+
+from .prefix_search import FARMER_SEARCH_FIELDS, PrefixSearchIndex
+from .farmer_attributes import CHALLENGES, IRRIGATION_SOURCES, IRRIGATION_SYSTEMS, FlagsField, split_list
+from .soil_types import resolve_soil_type, resolve_soil_types
 
 # Create your models here.
 
-class District(models.Model):
+class SoilType(models.Model):
+    """Canonical soil type; see main_app.soil_types"""
+    name = models.CharField(max_length=50, unique=True)
+    parent = models.ForeignKey('self', on_delete=models.PROTECT, null=True, blank=True, related_name='children')
+
+    def __str__(self):
+        return self.name
+
+class SoilTypeSynonym(models.Model):
+    """Another name a SoilType appears under in the imported data"""
+    name = models.CharField(max_length=100, unique=True)
+    soil_type = models.ForeignKey(SoilType, on_delete=models.CASCADE, related_name='synonyms')
+
+    def __str__(self):
+        return f"{self.name} -> {self.soil_type.name}"
+
+class SoilTypeMixin:
+    """Resolves the soil_type text field to the soil foreign key on save"""
+
+    def save(self, *args, **kwargs):
+        self.soil_id = resolve_soil_type(self.soil_type)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'soil_type' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'soil'}
+        super().save(*args, **kwargs)
+
+class SoilTypesMixin:
+    """Keeps the soils relation in step with a comma-separated soil text field on save"""
+    soil_types_field = None
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or self.soil_types_field in update_fields:
+            self.soils.set(resolve_soil_types(getattr(self, self.soil_types_field)))
+
+class AttributeListsMixin:
+    """Stores comma-separated attribute fields as flags and item rows on save; see main_app.farmer_attributes"""
+    # text field -> FlagsField it is encoded into
+    attribute_flags = {}
+    # text field -> related name of its item rows
+    attribute_items = {}
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        for text_field, flags_field in self.attribute_flags.items():
+            if update_fields is None or text_field in update_fields:
+                flags = self._meta.get_field(flags_field).flags
+                setattr(self, flags_field, flags.mask(getattr(self, text_field)))
+                if update_fields is not None:
+                    update_fields = kwargs['update_fields'] = {*update_fields, flags_field}
+        super().save(*args, **kwargs)
+
+        for text_field, related_name in self.attribute_items.items():
+            if update_fields is None or text_field in update_fields:
+                self.set_items(getattr(self, related_name), split_list(getattr(self, text_field)))
+
+    @staticmethod
+    def set_items(manager, names):
+        existing = set(manager.values_list('name', flat=True))
+        manager.exclude(name__in=names).delete()
+        manager.bulk_create([
+            manager.model(name=name, **{manager.field.name: manager.instance})
+            for name in names if name not in existing
+        ])
+
+class District(SoilTypesMixin, models.Model):
     name = models.CharField(max_length=100)
     region = models.CharField(max_length=50)
     avg_annual_rainfall_mm = models.FloatField()
     min_temp_c = models.FloatField()
     max_temp_c = models.FloatField()
     major_soil_types = models.TextField()
+    soils = models.ManyToManyField(SoilType, blank=True, related_name='districts')
+
+    soil_types_field = 'major_soil_types'
 
     def __str__(self):
         return self.name
 
-class Crop(models.Model):
-    name = models.CharField(max_length=100)
+class Crop(SoilTypesMixin, models.Model):
+    name = models.CharField(max_length=100, db_index=True)
     scientific_name = models.CharField(max_length=100, blank=True)
     varieties = models.TextField(blank=True)
     suitable_soil_types = models.TextField(default="All soil types")
-    growing_season = models.CharField(max_length=50, default="All seasons")
+    soils = models.ManyToManyField(SoilType, blank=True, related_name='crops')
+    growing_season = models.CharField(max_length=50, default="All seasons", db_index=True)
     water_requirement_mm = models.FloatField(default=0)
     avg_yield_q_per_ha = models.FloatField(default=0)
     min_temp_c = models.FloatField(default=0)
@@ -32,6 +109,8 @@ class Crop(models.Model):
     ph_range = models.CharField(max_length=20, default="6.0-7.0")
     cultivation_practices = models.TextField(blank=True)
 
+    soil_types_field = 'suitable_soil_types'
+
     def __str__(self):
         return self.name
 
@@ -63,13 +142,21 @@ class CropEconomics(models.Model):
     def __str__(self):
         return f"Economics for {self.crop.name}"
 
-class SoilCropCompatibility(models.Model):
+class SoilCropCompatibility(SoilTypeMixin, models.Model):
     soil_type = models.CharField(max_length=50)
+    # soil_type resolved on save
+    soil = models.ForeignKey(SoilType, on_delete=models.SET_NULL, null=True, blank=True, editable=False, related_name='+')
     crop = models.ForeignKey(Crop, on_delete=models.CASCADE, related_name='soil_compatibilities')
     compatibility_score = models.IntegerField(validators=[MinValueValidator(1), MaxValueValidator(10)], default=5)
     yield_potential_percentage = models.IntegerField(validators=[MinValueValidator(1), MaxValueValidator(100)], default=70)
     special_requirements = models.TextField(blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['soil', '-compatibility_score'], name='soilcompat_soil_score_idx'),
+            models.Index(fields=['crop', 'soil'], name='soilcompat_crop_soil_idx'),
+        ]
+
     def __str__(self):
         return f"{self.soil_type} - {self.crop.name}"
 
@@ -106,8 +193,8 @@ class Technology(models.Model):
         ('seed_technology', 'Seed Technology'),
     ]
 
-    name = models.CharField(max_length=100)
-    category = models.CharField(max_length=50, choices=CATEGORY_CHOICES, default='irrigation')
+    name = models.CharField(max_length=100, db_index=True)
+    category = models.CharField(max_length=50, choices=CATEGORY_CHOICES, default='irrigation', db_index=True)
     suitable_crops = models.CharField(max_length=200, default='All')
     implementation_cost = models.IntegerField(default=0)
     roi_percentage = models.IntegerField(default=0)
@@ -120,7 +207,7 @@ class Technology(models.Model):
         return self.name
 
 class GovernmentScheme(models.Model):
-    name = models.CharField(max_length=100)
+    name = models.CharField(max_length=100, db_index=True)
     implementing_agency = models.CharField(max_length=100, default='')
     eligibility_criteria = models.TextField(default='')
     benefits = models.TextField(default='')
@@ -136,9 +223,9 @@ class GovernmentScheme(models.Model):
         return self.name
 
 class LoanOption(models.Model):
-    name = models.CharField(max_length=100)
-    provider = models.CharField(max_length=100, default='')
-    loan_type = models.CharField(max_length=50, default='')
+    name = models.CharField(max_length=100, db_index=True)
+    provider = models.CharField(max_length=100, default='', db_index=True)
+    loan_type = models.CharField(max_length=50, default='', db_index=True)
     interest_rate = models.CharField(max_length=50, default='')
     max_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     tenure = models.CharField(max_length=50, default='')
@@ -151,7 +238,7 @@ class LoanOption(models.Model):
     def __str__(self):
         return self.name
 
-class OrganicPractice(models.Model):
+class OrganicPractice(SoilTypesMixin, models.Model):
     practice_name = models.CharField(max_length=100)
     description = models.TextField(default='')
     applicable_crops = models.CharField(max_length=200, default='All crops')
@@ -161,6 +248,9 @@ class OrganicPractice(models.Model):
     challenges = models.TextField(default='')
     time_to_results = models.CharField(max_length=50, default='')
     soil_types = models.CharField(max_length=100, default='All soil types')
+    soils = models.ManyToManyField(SoilType, blank=True, related_name='organic_practices')
+
+    soil_types_field = 'soil_types'
 
     def __str__(self):
         return self.practice_name
@@ -185,9 +275,11 @@ class PestDisease(models.Model):
     def __str__(self):
         return self.name
 
-class FertilizerRecommendation(models.Model):
+class FertilizerRecommendation(SoilTypeMixin, models.Model):
     crop = models.ForeignKey(Crop, on_delete=models.CASCADE, related_name='fertilizer_recommendations')
     soil_type = models.CharField(max_length=50)
+    # soil_type resolved on save
+    soil = models.ForeignKey(SoilType, on_delete=models.SET_NULL, null=True, blank=True, editable=False, related_name='+')
     n_kg_per_ha = models.FloatField(default=0)
     p_kg_per_ha = models.FloatField(default=0)
     k_kg_per_ha = models.FloatField(default=0)
@@ -200,6 +292,11 @@ class FertilizerRecommendation(models.Model):
     mop_kg_per_ha = models.FloatField(default=0)
     npk_complex_kg_per_ha = models.FloatField(default=0)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['crop', 'soil'], name='fertilizer_crop_soil_idx'),
+        ]
+
     def __str__(self):
         return f"Fertilizer for {self.crop.name} in {self.soil_type} soil"
 
@@ -227,22 +324,35 @@ class FarmerProfile(models.Model):
     ]
 
     user = models.OneToOneField(get_user_model(), on_delete=models.CASCADE, related_name='farmer_profile', null=True, blank=True)
+    # Stable key the profile form saves the farmer under
+    external_id = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
     first_name = models.CharField(max_length=100, default='')
     last_name = models.CharField(max_length=100, default='')
     age = models.PositiveIntegerField(null=True, blank=True)
     gender = models.CharField(max_length=10, blank=True)
     mobile = models.CharField(max_length=15, default='')
-    district = models.CharField(max_length=100, default='')
+    # Indexed for the exact ?district= filter of the admin user lists; their
+    # search has its own index (see Meta)
+    district = models.CharField(max_length=100, default='', db_index=True)
     state = models.CharField(max_length=100, default='Karnataka')
     address = models.TextField(blank=True)
     pincode = models.CharField(max_length=10, blank=True)
     education_level = models.CharField(max_length=20, choices=EDUCATION_CHOICES, blank=True)
     preferred_season = models.CharField(max_length=20, blank=True)
+    # Versions the admin user list; see main_app.catalog_versions
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['first_name', 'last_name'], name='farmer_full_name_idx'),
+            # The admin user search (see main_app.prefix_search)
+            *(PrefixSearchIndex(field=field, name=f'farmer_{field}_search_idx') for field in FARMER_SEARCH_FIELDS),
+        ]
 
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
 
-class FarmDetail(models.Model):
+class FarmDetail(SoilTypeMixin, AttributeListsMixin, models.Model):
     SOIL_TYPE_CHOICES = [
         ('Black', 'Black Soil'),
         ('Red', 'Red Soil'),
@@ -262,9 +372,14 @@ class FarmDetail(models.Model):
     farm_size = models.FloatField(default=0)
     unit = models.CharField(max_length=10, default='Hectare')
     soil_type = models.CharField(max_length=20, choices=SOIL_TYPE_CHOICES, default='Black')
+    # soil_type resolved on save
+    soil = models.ForeignKey(SoilType, on_delete=models.SET_NULL, null=True, blank=True, editable=False, related_name='+')
     land_ownership = models.CharField(max_length=10, choices=LAND_OWNERSHIP_CHOICES, default='Owned')
     irrigation_sources = models.CharField(max_length=200, blank=True)
     irrigation_systems = models.CharField(max_length=200, blank=True)
+    # irrigation_sources and irrigation_systems encoded on save
+    irrigation_source_flags = FlagsField(flags=IRRIGATION_SOURCES)
+    irrigation_system_flags = FlagsField(flags=IRRIGATION_SYSTEMS)
     
     # Soil nutrient values (NPK)
     nitrogen_value = models.FloatField(null=True, blank=True, help_text="Nitrogen content in kg/ha")
@@ -272,6 +387,11 @@ class FarmDetail(models.Model):
     potassium_value = models.FloatField(null=True, blank=True, help_text="Potassium content in kg/ha")
     ph_value = models.FloatField(null=True, blank=True, help_text="Soil pH value")
 
+    attribute_flags = {
+        'irrigation_sources': 'irrigation_source_flags',
+        'irrigation_systems': 'irrigation_system_flags',
+    }
+
     def __str__(self):
         return f"{self.farmer.first_name}'s farm - {self.farm_size} {self.unit}"
 
@@ -284,7 +404,7 @@ class FarmingExperience(models.Model):
     def __str__(self):
         return f"{self.farmer.first_name}'s experience with {self.crop.name}"
 
-class FinancialInfo(models.Model):
+class FinancialInfo(AttributeListsMixin, models.Model):
     INCOME_CHOICES = [
         ('below_50k', 'Below ₹50,000'),
         ('50k_1l', '₹50,000 - ₹1,00,000'),
@@ -300,13 +420,104 @@ class FinancialInfo(models.Model):
     insurance_coverage = models.BooleanField(default=False)
     bank_account = models.BooleanField(default=True)
 
+    attribute_items = {'govt_schemes_enrolled': 'enrolled_schemes'}
+
     def __str__(self):
         return f"{self.farmer.first_name}'s financial info"
 
-class FarmerInterest(models.Model):
+class EnrolledScheme(models.Model):
+    """One scheme of FinancialInfo.govt_schemes_enrolled"""
+    financial_info = models.ForeignKey(FinancialInfo, on_delete=models.CASCADE, related_name='enrolled_schemes')
+    name = models.CharField(max_length=200, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['financial_info', 'name'], name='enrolled_scheme_unique'),
+        ]
+
+    def __str__(self):
+        return self.name
+
+class FarmerInterest(AttributeListsMixin, models.Model):
     farmer = models.ForeignKey(FarmerProfile, on_delete=models.CASCADE, related_name='interests')
     sustainable_practices = models.TextField(blank=True)
     challenges = models.TextField(blank=True)
+    # challenges encoded on save
+    challenge_flags = FlagsField(flags=CHALLENGES)
+
+    attribute_flags = {'challenges': 'challenge_flags'}
+    attribute_items = {'sustainable_practices': 'practices'}
+
+    class Meta:
+        indexes = [
+            # Latest interests of a farmer: filter(farmer=...).order_by('-id')
+            models.Index(fields=['farmer', '-id'], name='interest_farmer_latest_idx'),
+        ]
 
     def __str__(self):
         return f"{self.farmer.first_name}'s interests"
+
+class SustainablePractice(models.Model):
+    """One practice of FarmerInterest.sustainable_practices"""
+    interest = models.ForeignKey(FarmerInterest, on_delete=models.CASCADE, related_name='practices')
+    name = models.CharField(max_length=200, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['interest', 'name'], name='sustainable_practice_unique'),
+        ]
+
+    def __str__(self):
+        return self.name
+
+class FarmerFeatures(models.Model):
+    """Features of a farmer the recommendation engines read, rebuilt on save; see main_app.farmer_features"""
+    farmer = models.OneToOneField(FarmerProfile, on_delete=models.CASCADE, primary_key=True, related_name='features')
+    # FarmerProfile.district resolved to a District
+    district = models.ForeignKey(District, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+
+    # From the first FarmDetail, under the same names
+    has_farm = models.BooleanField(default=False)
+    soil_type = models.CharField(max_length=20, blank=True)
+    soil = models.ForeignKey(SoilType, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    farm_size = models.FloatField(default=0)
+    unit = models.CharField(max_length=10, default='Hectare')
+    farm_size_ha = models.FloatField(default=0)
+    land_ownership = models.CharField(max_length=10, default='Owned')
+    irrigation_source_flags = FlagsField(flags=IRRIGATION_SOURCES)
+    irrigation_system_flags = FlagsField(flags=IRRIGATION_SYSTEMS)
+    nitrogen_value = models.FloatField(null=True, blank=True)
+    phosphorus_value = models.FloatField(null=True, blank=True)
+    potassium_value = models.FloatField(null=True, blank=True)
+    ph_value = models.FloatField(null=True, blank=True)
+
+    # From the latest FarmerInterest
+    challenge_flags = FlagsField(flags=CHALLENGES)
+
+    # From FinancialInfo, or the defaults used for farmers without one
+    has_financial_info = models.BooleanField(default=False)
+    annual_income = models.CharField(max_length=20, blank=True)
+    monthly_income = models.PositiveIntegerField(default=0)
+    bank_account = models.BooleanField(default=True)
+    insurance_coverage = models.BooleanField(default=False)
+    enrolled_schemes = models.JSONField(default=list, blank=True)
+
+    # Crops of the farmer's FarmingExperiences, and the growing season of each
+    crop_names = models.JSONField(default=list, blank=True)
+    crop_seasons = models.JSONField(default=list, blank=True)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Features of farmer {self.farmer_id}"
+
+# Catalog versioning
+
+class CatalogVersion(models.Model):
+    """Change counter for one table, used to answer conditional GETs"""
+    name = models.CharField(max_length=100, primary_key=True)
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.name} v{self.version}"
@@ -0,0 +1,71 @@
+"""
+Case-insensitive prefix search that is answered from indexes.
+
+The admin user lists match the search text against the start of names,
+emails and districts with __istartswith. Django runs that as
+UPPER(column) LIKE UPPER('text%') on PostgreSQL and as a plain LIKE, which
+ignores ASCII case, on SQLite. Each database needs its own kind of index to
+read the matches from a range of keys, so PrefixSearchIndex creates the
+one that fits the database it is migrated on.
+
+An OR of matches on two joined tables cannot use any index, so
+prefix_search looks each field up on its own and ORs the key sets.
+"""
+from django.contrib.postgres.indexes import OpClass
+from django.db import models
+from django.db.models import F, Q
+from django.db.models.functions import Collate, Upper
+
+# Fields of the admin user search, on the user and on its farmer profile
+USER_SEARCH_FIELDS = ('username', 'email', 'first_name', 'last_name')
+FARMER_SEARCH_FIELDS = ('first_name', 'last_name', 'district')
+
+
+class PrefixSearchIndex(models.Index):
+    """Index that serves field__istartswith on one field"""
+
+    def __init__(self, *, field, name):
+        self.search_field = field
+        super().__init__(F(field), name=name)
+
+    def deconstruct(self):
+        path, _, _ = super().deconstruct()
+        return path, (), {'field': self.search_field, 'name': self.name}
+
+    def create_sql(self, model, schema_editor, using='', **kwargs):
+        vendor = schema_editor.connection.vendor
+        if vendor == 'postgresql':
+            # text_pattern_ops compares characters, so LIKE 'text%' becomes a
+            # range scan whatever the database collation
+            expression = OpClass(Upper(self.search_field), name='text_pattern_ops')
+        elif vendor == 'sqlite':
+            # SQLite reads LIKE 'text%' from an index only under NOCASE
+            expression = Collate(F(self.search_field), 'nocase')
+        else:
+            expression = F(self.search_field)
+        index = models.Index(expression, name=self.name)
+        return index.create_sql(model, schema_editor, using=using, **kwargs)
+
+
+def prefix_search(text, *sources):
+    """
+    Q of the rows whose pk is among the keys of sources' rows that have a
+    field starting with text. Each source is (queryset, key, fields).
+    """
+    condition = Q()
+    for queryset, key, fields in sources:
+        for field in fields:
+            condition |= Q(pk__in=queryset.filter(**{f'{field}__istartswith': text}).values(key))
+    return condition
+
+
+def user_search(text):
+    """Q of the users whose name, username or email, or whose farmer's name or district, starts with text"""
+    from django.contrib.auth import get_user_model
+    from .models import FarmerProfile
+
+    return prefix_search(
+        text,
+        (get_user_model().objects.all(), 'pk', USER_SEARCH_FIELDS),
+        (FarmerProfile.objects.all(), 'user_id', FARMER_SEARCH_FIELDS),
+    )
@@ -0,0 +1,276 @@
+"""
+Multi-season crop rotation planner.
+
+A plan is a sequence of crops (or fallow seasons) over the Kharif, Rabi and
+Zaid seasons of the coming years. Each crop earns its net income per hectare
+and moves the soil's N, P and K balance up or down. The search runs over
+seasons with dynamic programming: the best continuations from a given season
+and bucketed nutrient state are computed once and reused by every plan that
+reaches that state, which keeps a three year horizon over the whole catalog
+well inside a single request.
+"""
+import heapq
+import math
+from operator import itemgetter
+
+from .irrigation_schedule import parse_growth_days
+
+SEASONS = ['Kharif', 'Rabi', 'Zaid']
+
+# Words used in Crop.growing_season for each rotation season
+SEASON_ALIASES = {
+    'Kharif': ('kharif', 'monsoon', 'rainy'),
+    'Rabi': ('rabi', 'winter'),
+    'Zaid': ('zaid', 'summer'),
+}
+
+MONTH_TO_SEASON = {
+    1: 'Rabi', 2: 'Rabi', 3: 'Zaid', 4: 'Zaid', 5: 'Zaid', 6: 'Kharif',
+    7: 'Kharif', 8: 'Kharif', 9: 'Kharif', 10: 'Rabi', 11: 'Rabi', 12: 'Rabi',
+}
+
+# A crop whose growth period clearly runs past one season keeps the field for
+# the following season(s) as well; annual crops hold it for a full year
+SEASON_LENGTH_DAYS = 150
+MAX_SEASON_SPAN = 3
+
+# Nitrogen fixing crops return most of their N requirement to the soil
+LEGUME_KEYWORDS = ('gram', 'pea', 'groundnut', 'soybean', 'bean', 'lentil')
+LEGUME_N_CREDIT = 1.3
+
+# kg/ha represented by one step of the nutrient balance, and the N, P and K a
+# field receives each season from residues, manure and a routine basal dose
+NUTRIENT_STEP_KG = (40.0, 20.0, 30.0)
+SEASONAL_REPLENISHMENT_KG = (50.0, 25.0, 30.0)
+
+# The balance is tracked between these levels; a crop that would push the soil
+# below the minimum is not allowed
+MIN_NUTRIENT_LEVEL = -3
+MAX_NUTRIENT_LEVEL = 3
+
+# Yield lost for every step a nutrient is below its starting balance
+DEFICIT_YIELD_LOSS = 0.1
+
+# A plan must finish no more than this many steps below the starting balance
+# (or below neutral for a field that starts out enriched)
+BALANCE_TOLERANCE = 1
+
+# Soil test ratings (kg/ha) used to place a farm's starting balance
+SOIL_TEST_RATINGS = (
+    (280.0, 560.0),  # Nitrogen
+    (10.0, 25.0),    # Phosphorus
+    (110.0, 280.0),  # Potassium
+)
+
+FALLOW = 'Fallow'
+
+# Crop and economics columns build_candidate reads, for only() on
+# Crop.objects.select_related('economics')
+CANDIDATE_COLUMNS = (
+    'name', 'growing_season', 'n_requirement_kg_per_ha', 'p_requirement_kg_per_ha', 'k_requirement_kg_per_ha',
+    'economics__growth_period', 'economics__net_income_per_ha',
+)
+
+
+def season_for_month(month):
+    """Rotation season that starts in the given month"""
+    return MONTH_TO_SEASON[month]
+
+
+def crop_seasons(growing_season):
+    """Rotation seasons in which a crop can be sown"""
+    text = (growing_season or '').lower()
+    return {season for season, aliases in SEASON_ALIASES.items() if any(alias in text for alias in aliases)}
+
+
+def is_perennial(growing_season):
+    """Orchard and plantation crops are not part of a seasonal rotation"""
+    return 'perennial' in (growing_season or '').lower()
+
+
+def is_legume(crop_name):
+    return any(keyword in crop_name.lower() for keyword in LEGUME_KEYWORDS)
+
+
+def season_span(growth_period, growing_season=''):
+    """Number of rotation seasons a crop keeps the field"""
+    if 'annual' in (growing_season or '').lower():
+        return MAX_SEASON_SPAN
+    days = parse_growth_days(growth_period)
+    return max(1, min(MAX_SEASON_SPAN, math.ceil(days / SEASON_LENGTH_DAYS)))
+
+
+def nutrient_level(value, rating):
+    """Starting balance for one nutrient from a soil test value"""
+    if value is None:
+        return 0
+    low, high = rating
+    if value < low:
+        return -1
+    if value > high:
+        return 1
+    return 0
+
+
+def initial_nutrient_state(n_value=None, p_value=None, k_value=None):
+    """Bucketed N, P and K balance of a field before the first season"""
+    return tuple(
+        nutrient_level(value, rating)
+        for value, rating in zip((n_value, p_value, k_value), SOIL_TEST_RATINGS)
+    )
+
+
+def build_candidate(crop, economics, yield_factor=1.0):
+    """
+    Describe one crop for the planner, or return None when it cannot be part
+    of a seasonal rotation.
+    """
+    if economics is None or is_perennial(crop.growing_season):
+        return None
+
+    seasons = crop_seasons(crop.growing_season)
+    annual = 'annual' in (crop.growing_season or '').lower()
+    if annual:
+        seasons = set(SEASONS)
+    if not seasons:
+        return None
+
+    span = season_span(economics.growth_period, crop.growing_season)
+
+    removal = [crop.n_requirement_kg_per_ha, crop.p_requirement_kg_per_ha, crop.k_requirement_kg_per_ha]
+    if is_legume(crop.name):
+        removal[0] -= crop.n_requirement_kg_per_ha * LEGUME_N_CREDIT
+
+    delta = tuple(
+        int(round((replenished * span - removed) / step))
+        for replenished, removed, step in zip(SEASONAL_REPLENISHMENT_KG, removal, NUTRIENT_STEP_KG)
+    )
+
+    return {
+        'crop_id': crop.id,
+        'name': crop.name,
+        'seasons': seasons,
+        'span': span,
+        'income': float(economics.net_income_per_ha) * yield_factor,
+        'delta': delta,
+    }
+
+
+def fallow_candidate():
+    """Leaving the field empty earns nothing but lets the soil recover"""
+    return {
+        'crop_id': None,
+        'name': FALLOW,
+        'seasons': set(SEASONS),
+        'span': 1,
+        'income': 0.0,
+        'delta': tuple(
+            int(round(replenished / step))
+            for replenished, step in zip(SEASONAL_REPLENISHMENT_KG, NUTRIENT_STEP_KG)
+        ),
+    }
+
+
+def deficit_yield_factor(initial_state, state):
+    """Share of the normal yield a crop gets when sown on a depleted field"""
+    deficit = max(0, max(initial - level for initial, level in zip(initial_state, state)))
+    return max(0.0, 1 - DEFICIT_YIELD_LOSS * deficit)
+
+
+def plan_rotations(candidates, start_season='Kharif', years=3, top_n=5, initial_state=(0, 0, 0)):
+    """
+    Return the top_n rotation plans over the horizon, best first.
+
+    Each plan is a dict with its total income, the ending nutrient balance and
+    one entry per crop sown.
+    """
+    horizon = years * len(SEASONS)
+    start_index = SEASONS.index(start_season)
+    floor_state = tuple(min(level, 0) - BALANCE_TOLERANCE for level in initial_state)
+
+    # Candidates grouped by the season they can be sown in
+    by_season = {season: [] for season in SEASONS}
+    for index, candidate in enumerate(candidates):
+        for season in candidate['seasons']:
+            by_season[season].append(index)
+    spans = [candidate['span'] for candidate in candidates]
+    incomes = [candidate['income'] for candidate in candidates]
+
+    # Nutrient transitions and yield factors only depend on the bucketed state,
+    # so they are worked out once per state rather than once per plan
+    transitions = {}
+    yield_factors = {}
+    memo = {}
+
+    def next_state_for(state, index):
+        key = (state, index)
+        if key not in transitions:
+            next_state = tuple(level + change for level, change in zip(state, candidates[index]['delta']))
+            if min(next_state) < MIN_NUTRIENT_LEVEL:
+                transitions[key] = None
+            else:
+                transitions[key] = tuple(min(MAX_NUTRIENT_LEVEL, level) for level in next_state)
+        return transitions[key]
+
+    def best_from(step, state):
+        """Top plans as (income, crop indexes) from this season and nutrient state onwards"""
+        if step == horizon:
+            if all(level >= floor for level, floor in zip(state, floor_state)):
+                return [(0.0, ())]
+            return []
+
+        key = (step, state)
+        if key in memo:
+            return memo[key]
+
+        if state not in yield_factors:
+            yield_factors[state] = deficit_yield_factor(initial_state, state)
+        yield_factor = yield_factors[state]
+
+        options = []
+        for index in by_season[SEASONS[(start_index + step) % len(SEASONS)]]:
+            next_step = step + spans[index]
+            if next_step > horizon:
+                continue
+            next_state = next_state_for(state, index)
+            if next_state is None:
+                continue
+
+            income = incomes[index] * yield_factor
+            for future_income, future_plan in best_from(next_step, next_state):
+                options.append((income + future_income, (index,) + future_plan))
+
+        best = heapq.nlargest(top_n, options, key=itemgetter(0))
+        memo[key] = best
+        return best
+
+    plans = []
+    for total_income, indexes in best_from(0, tuple(initial_state)):
+        step = 0
+        state = tuple(initial_state)
+        entries = []
+        for index in indexes:
+            candidate = candidates[index]
+            income = candidate['income'] * deficit_yield_factor(initial_state, state)
+            state = tuple(
+                min(MAX_NUTRIENT_LEVEL, level + change)
+                for level, change in zip(state, candidate['delta'])
+            )
+            entries.append({
+                'year': step // len(SEASONS) + 1,
+                'season': SEASONS[(start_index + step) % len(SEASONS)],
+                'seasons_occupied': candidate['span'],
+                'crop_id': candidate['crop_id'],
+                'crop': candidate['name'],
+                'net_income_per_ha': round(income, 2),
+                'nutrient_balance': dict(zip(('N', 'P', 'K'), state)),
+            })
+            step += candidate['span']
+
+        plans.append({
+            'total_net_income_per_ha': round(total_income, 2),
+            'final_nutrient_balance': dict(zip(('N', 'P', 'K'), state)),
+            'rotation': entries,
+        })
+
+    return plans
@@ -0,0 +1,99 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from myapp.models import GovernmentScheme as BankGovernmentScheme, LoanScheme
+from .catalog_versions import bump_catalog_version, forget_catalog_version, version_by_rows
+from .farmer_features import request_rebuild
+from .farmer_similarity import forget_farmer, refresh_farmer
+from .models import (
+    Crop, FarmDetail, FarmerInterest, FarmerProfile, FarmingExperience, FinancialInfo, GovernmentScheme,
+    LoanOption, SoilType, SoilTypeSynonym, Technology
+)
+
+# Tables whose changes invalidate the conditional GET validators of the
+# catalog and admin list endpoints
+VERSIONED_MODELS = [
+    Crop, Technology, GovernmentScheme, LoanOption,
+    BankGovernmentScheme, LoanScheme, SoilType, SoilTypeSynonym,
+]
+
+# Tables written on every login or profile save, versioned by their own
+# updated_at so that their writers do not all update one version row
+ROW_VERSIONED_MODELS = [FarmerProfile, get_user_model()]
+
+
+# The similarity index is only touched once the change is committed, so a
+# rolled back profile save never leaves it out of step with the database
+
+@receiver(post_save, sender=FarmerProfile)
+def update_similarity_index_for_profile(sender, instance, **kwargs):
+    farmer_id = instance.id
+    transaction.on_commit(lambda: refresh_farmer(farmer_id))
+
+
+@receiver(post_save, sender=FarmDetail)
+@receiver(post_save, sender=FinancialInfo)
+@receiver(post_save, sender=FarmerInterest)
+def update_similarity_index_for_profile_part(sender, instance, **kwargs):
+    farmer_id = instance.farmer_id
+    transaction.on_commit(lambda: refresh_farmer(farmer_id))
+
+
+@receiver(post_delete, sender=FarmerProfile)
+def remove_from_similarity_index(sender, instance, **kwargs):
+    farmer_id = instance.id
+    transaction.on_commit(lambda: forget_farmer(farmer_id))
+
+
+# The features are rebuilt in the same transaction as the change that
+# outdates them. Deletes wait for the commit: a farmer being deleted takes
+# its features with it, and the rebuild then finds no farmer.
+
+@receiver(post_save, sender=FarmerProfile)
+def rebuild_features_for_profile(sender, instance, **kwargs):
+    request_rebuild(instance.id)
+
+
+@receiver(post_save, sender=FarmDetail)
+@receiver(post_save, sender=FinancialInfo)
+@receiver(post_save, sender=FarmerInterest)
+@receiver(post_save, sender=FarmingExperience)
+def rebuild_features_for_profile_part(sender, instance, **kwargs):
+    request_rebuild(instance.farmer_id)
+
+
+@receiver(post_delete, sender=FarmDetail)
+@receiver(post_delete, sender=FinancialInfo)
+@receiver(post_delete, sender=FarmerInterest)
+@receiver(post_delete, sender=FarmingExperience)
+def rebuild_features_after_delete(sender, instance, **kwargs):
+    farmer_id = instance.farmer_id
+    transaction.on_commit(lambda: request_rebuild(farmer_id))
+
+
+@receiver(post_save, sender=Crop)
+def rebuild_features_for_crop(sender, instance, created, **kwargs):
+    # Features copy the name and growing season of the farmer's crops
+    if not created:
+        for farmer_id in FarmingExperience.objects.filter(crop=instance).values_list('farmer_id', flat=True).distinct():
+            request_rebuild(farmer_id)
+
+
+def bump_catalog_version_for_sender(sender, **kwargs):
+    bump_catalog_version(sender)
+
+
+def forget_catalog_version_for_sender(sender, **kwargs):
+    forget_catalog_version(sender)
+
+
+for versioned_model in VERSIONED_MODELS:
+    post_save.connect(bump_catalog_version_for_sender, sender=versioned_model)
+    post_delete.connect(bump_catalog_version_for_sender, sender=versioned_model)
+
+for row_versioned_model in ROW_VERSIONED_MODELS:
+    version_by_rows(row_versioned_model)
+    post_save.connect(forget_catalog_version_for_sender, sender=row_versioned_model)
+    post_delete.connect(forget_catalog_version_for_sender, sender=row_versioned_model)
@@ -0,0 +1,139 @@
+"""
+Canonical soil taxonomy.
+
+Farms record their soil as one of FarmDetail.SOIL_TYPE_CHOICES ("Black",
+"Red", ...), while the imported catalog uses free text ("Black soil",
+"Lateritic", "Red sandy loam", "Clayey"). Every soil string is resolved to a
+SoilType id when its row is imported or saved. The crop engine and the
+fertilizer and compatibility lookups then match soils by comparing integer
+ids instead of running icontains on text. Districts and organic practices
+keep their soils as a relation to SoilType as well, but no engine reads
+those yet: nothing recommends organic practices, and the district is used
+for its climate only.
+
+SoilType rows form a tree. The top-level types are the soil families that
+farms choose from, and more specific soils are their children (Red sandy
+loam -> Red). A farm's soil matches every soil in its family. Names resolve
+through the type names and their synonyms, ignoring case and the word "soil".
+A name that is not listed falls back to the family named by its words
+("Shallow black soils" -> Black).
+
+Migration 0028 seeded the tables with its own copy of the taxonomy; edit
+them through the admin. The tables are small and rarely change, so each
+process keeps them in memory as a SoilTaxonomy keyed by id. It is rebuilt when the catalog version of
+SoilType or SoilTypeSynonym changes.
+"""
+import re
+import threading
+from collections import defaultdict
+
+# Word prefixes naming a family, for soils not listed by name. Checked in
+# order: the first one found wins.
+FAMILY_PREFIXES = [
+    ('black', 'Black'),
+    ('red', 'Red'),
+    ('alluvi', 'Alluvial'),
+    ('laterit', 'Laterite'),
+    ('clay', 'Clay'),
+    ('sand', 'Sandy'),
+    ('loam', 'Loamy'),
+    ('forest', 'Forest'),
+]
+
+LIST_SEPARATORS = re.compile(r'[,;/]')
+
+
+def normalize_soil_name(name):
+    """Lowercase words of a soil name without "soil"/"soils" ('Red Loamy Soils' -> 'red loamy')"""
+    words = re.findall(r'[a-z]+(?:-[a-z]+)*', (name or '').lower())
+    return ' '.join(word for word in words if word not in ('soil', 'soils'))
+
+
+class SoilTaxonomy:
+    """Lookup tables of the soil taxonomy keyed by SoilType id"""
+
+    def __init__(self, soil_types, synonyms):
+        """soil_types: (id, name, parent id) rows; synonyms: (name, soil type id) rows"""
+        self.names = {}
+        self.parents = {}
+        self.ids_by_name = {}
+        for soil_id, name, parent_id in soil_types:
+            self.names[soil_id] = name
+            self.parents[soil_id] = parent_id
+            self.ids_by_name[normalize_soil_name(name)] = soil_id
+        for name, soil_id in synonyms:
+            self.ids_by_name.setdefault(normalize_soil_name(name), soil_id)
+
+        self.families = {soil_id: self._root(soil_id) for soil_id in self.names}
+        self.members = defaultdict(set)
+        for soil_id, family_id in self.families.items():
+            self.members[family_id].add(soil_id)
+        self.members = {family_id: frozenset(ids) for family_id, ids in self.members.items()}
+
+    def _root(self, soil_id):
+        seen = set()
+        while self.parents.get(soil_id) is not None and soil_id not in seen:
+            seen.add(soil_id)
+            soil_id = self.parents[soil_id]
+        return soil_id
+
+    def resolve(self, name):
+        """SoilType id of a soil name, or None when it names no known soil"""
+        key = normalize_soil_name(name)
+        if not key:
+            return None
+        soil_id = self.ids_by_name.get(key)
+        if soil_id is None:
+            words = key.split()
+            for prefix, family in FAMILY_PREFIXES:
+                if any(word.startswith(prefix) for word in words):
+                    return self.ids_by_name.get(normalize_soil_name(family))
+        return soil_id
+
+    def resolve_all(self, names):
+        """SoilType ids of a comma-separated list of soils, in order and without repeats"""
+        ids = (self.resolve(name) for name in LIST_SEPARATORS.split(names or ''))
+        return list(dict.fromkeys(soil_id for soil_id in ids if soil_id is not None))
+
+    def family(self, soil_id):
+        """Id of the top-level soil type soil_id belongs to"""
+        return self.families.get(soil_id)
+
+    def family_members(self, soil_id):
+        """Ids of every soil in the same family as soil_id (empty for None)"""
+        return self.members.get(self.family(soil_id), frozenset())
+
+
+_taxonomy = None
+_taxonomy_version = None
+_taxonomy_lock = threading.Lock()
+
+
+def soil_taxonomy():
+    """The current SoilTaxonomy, loaded once per catalog version"""
+    global _taxonomy, _taxonomy_version
+    from .catalog_versions import catalog_etag
+    from .models import SoilType, SoilTypeSynonym
+
+    version = catalog_etag((SoilType, SoilTypeSynonym))
+    if _taxonomy is None or version != _taxonomy_version:
+        with _taxonomy_lock:
+            if _taxonomy is None or version != _taxonomy_version:
+                _taxonomy = SoilTaxonomy(
+                    SoilType.objects.values_list('id', 'name', 'parent_id'),
+                    SoilTypeSynonym.objects.values_list('name', 'soil_type_id'),
+                )
+                _taxonomy_version = version
+    return _taxonomy
+
+
+def resolve_soil_type(name):
+    return soil_taxonomy().resolve(name)
+
+
+def resolve_soil_types(names):
+    return soil_taxonomy().resolve_all(names)
+
+
+def soil_family_ids(soil_id):
+    return soil_taxonomy().family_members(soil_id)
@@ -1,3 +1,1334 @@
-from django.test import TestCase
+import datetime
+import json
+import re
+import tempfile
+import threading
+import time
+import uuid
+from io import BytesIO, StringIO
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+import msgpack
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import update_last_login
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from AgriGuide.db_routers import REPLICA, REPLICA_PIN_COOKIE, ReplicaRouter, RoutingState, replica_reads, routing
+from AgriGuide.testing import ReplicaTestCase
+from myapp import weather, weather_cache
+from myapp.models import GovernmentScheme as GovScheme, LoanScheme
+from myapp.weather_stub import StubWeatherServer
+
+from . import dashboard, farmer_similarity, land_allocation, rotation_planner, yield_projection
+from .farmer_attributes import CHALLENGES
+from .farmer_context import FarmerContext
+from .farmer_features import current_season, rebuild_farmer_features
+from .farmer_import import FarmerImporter, read_rows
+from .irrigation_schedule import iter_ndjson
+from .rotation_planner import SEASONS
+from .prefix_search import FARMER_SEARCH_FIELDS, USER_SEARCH_FIELDS, user_search
+from .models import (
+    Crop, CropEconomics, District, EnrolledScheme, FarmDetail, FarmerFeatures, FarmerInterest, FarmerProfile, FarmingExperience,
+    FertilizerRecommendation, FinancialInfo, GovernmentScheme, IrrigationRequirement, LoanOption,
+    SoilCropCompatibility, SoilType, SoilTypeSynonym
+)
+from .views import get_crop_recommendations, get_loan_recommendations, get_scheme_recommendations
+from .soil_types import resolve_soil_type, soil_family_ids
+
+User = get_user_model()
+
+
+class AdminUsersListQueryTests(ReplicaTestCase):
+    """The admin user listing reads users and profiles in one joined query"""
+
+    url = '/api/admin/users/'
+
+    def setUp(self):
+        cache.clear()
+
+    def add_users(self, count, start=0):
+        for number in range(start, start + count):
+            user = User.objects.create(username=f'farmer{number}', email=f'farmer{number}@example.com')
+            # Every other user has a farmer profile
+            if number % 2 == 0:
+                FarmerProfile.objects.create(
+                    user=user, first_name=f'Ravi{number}', last_name='Gowda', district='Mandya'
+                )
+
+    def count_queries(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_query_count_does_not_grow_with_users(self):
+        self.add_users(3)
+        few = self.count_queries(self.url)
+        self.add_users(30, start=3)
+        many = self.count_queries(self.url)
+        self.assertEqual(few, many)
+
+    def test_warm_listing_is_one_query(self):
+        self.add_users(10)
+        self.client.get(self.url)
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertEqual(len(response.json()), 10)
+
+    def test_search_matches_profile_fields_in_one_query(self):
+        self.add_users(10)
+        url = self.url + '?search=ravi'
+        self.client.get(url)
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        users = response.json()
+        self.assertEqual(len(users), 5)
+        self.assertTrue(all(user['district'] == 'Mandya' for user in users))
+
+    def test_search_matches_the_start_of_each_field(self):
+        self.add_users(4)
+        for search, expected in (('GOW', ['farmer0', 'farmer2']), ('mand', ['farmer0', 'farmer2']),
+                                 ('farmer3@', ['farmer3']), ('owda', [])):
+            with self.subTest(search=search):
+                response = self.client.get(self.url, {'search': search})
+                self.assertEqual([user['username'] for user in response.json()], expected)
+
+    def test_search_includes_users_without_profile(self):
+        self.add_users(4)
+        FarmerProfile.objects.create(first_name='Orphan', district='Mandya')
+        response = self.client.get(self.url + '?search=farmer1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([user['username'] for user in response.json()], ['farmer1'])
+        self.assertIsNone(response.json()[0]['district'])
+
+
+class PrefetchWeatherTests(TestCase):
+    """prefetch_weather fills the weather cache for every district"""
+
+    def setUp(self):
+        # A file cache stands in for the shared cache the command needs
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        cache_override = override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': cache_dir.name,
+        }})
+        cache_override.enable()
+        self.addCleanup(cache_override.disable)
+        self.stub = StubWeatherServer(unknown_cities=['Atlantis']).start()
+        self.addCleanup(self.stub.stop)
+        settings_override = override_settings(WEATHER_API_BASE_URL=self.stub.base_url)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        for name in ('Belagavi', 'Mysuru'):
+            District.objects.create(
+                name=name, region='South', avg_annual_rainfall_mm=800,
+                min_temp_c=18, max_temp_c=32, major_soil_types='Red'
+            )
+        for district in ('mysuru', 'Mandya', 'Mandya', 'Atlantis', ''):
+            FarmerProfile.objects.create(first_name='Ravi', district=district)
+
+    def test_refuses_process_local_cache(self):
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+            with self.assertRaisesMessage(CommandError, 'shared cache'):
+                call_command('prefetch_weather', stdout=StringIO())
+        self.assertEqual(self.stub.total_calls, 0)
+
+    def test_prefetch_caches_every_city(self):
+        out = StringIO()
+        call_command('prefetch_weather', concurrency=4, stdout=out)
+
+        # Mysuru and Mandya are fetched once each however they are spelled
+        self.assertEqual(self.stub.total_calls, 8)
+        self.assertIn('Cached 6 of 8', out.getvalue())
+        self.assertIn('Could not prefetch Atlantis', out.getvalue())
+
+        for city in ('Belagavi', 'Mysuru', 'Mandya'):
+            for endpoint in (weather.CURRENT, weather.FORECAST):
+                data, status = weather_cache.get_weather(endpoint, city)
+                self.assertEqual(status, weather_cache.HIT)
+        self.assertEqual(self.stub.total_calls, 8)
+
+        response = self.client.get('/api/weather/', {'city': 'mandya'})
+        self.assertEqual(response['X-Weather-Cache'], weather_cache.HIT)
+        self.assertEqual(self.stub.total_calls, 8)
+
+
+class MessagePackNegotiationTests(ReplicaTestCase):
+    """Accept: application/msgpack returns the JSON payload as MessagePack"""
+
+    def setUp(self):
+        cache.clear()
+        GovernmentScheme.objects.create(name='Raitha Siri', benefits='Rs 10,000 per hectare')
+
+    def test_json_view(self):
+        json_response = self.client.get('/api/admin/schemes/')
+        response = self.client.get('/api/admin/schemes/', HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        self.assertEqual(msgpack.unpackb(response.content), json_response.json())
+        self.assertIn('Accept', response['Vary'])
+        self.assertIn('Accept', json_response['Vary'])
+
+    def test_drf_views(self):
+        response = self.client.get('/api/gov-schemes/', HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        self.assertEqual(msgpack.unpackb(response.content)['schemes'], [])
+
+        # Rendered by DRF itself
+        response = self.client.get('/api/farm-resources/', HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        self.assertIn('detail', msgpack.unpackb(response.content))
+
+    def test_json_preferred(self):
+        for accept in ('*/*', 'application/json, application/msgpack;q=0.5', 'application/msgpack;q=0'):
+            response = self.client.get('/api/admin/schemes/', HTTP_ACCEPT=accept)
+            self.assertEqual(response['Content-Type'], 'application/json')
+
+
+class HotLookupQueryPlanTests(ReplicaTestCase):
+    """The recommendation engines' hot lookups are answered from an index, not a full scan"""
+
+    def assertUsesIndex(self, queryset):
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                # Tiny test tables would otherwise always be scanned
+                cursor.execute('SET LOCAL enable_seqscan = off')
+            plan = queryset.explain()
+            self.assertNotIn('Seq Scan', plan)
+            self.assertIn('Index Cond', plan)
+        elif connection.vendor == 'sqlite':
+            plan = queryset.explain()
+            self.assertNotRegex(plan, rf'\bSCAN {re.escape(queryset.model._meta.db_table)}\b')
+            self.assertIn('SEARCH', plan)
+        else:
+            self.skipTest(f'No query plan check for {connection.vendor}')
+
+    def test_soil_lookups(self):
+        crop = Crop.objects.create(name='Ragi')
+        compatibility = SoilCropCompatibility.objects.create(crop=crop, soil_type='Red sandy loam')
+        fertilizer = FertilizerRecommendation.objects.create(crop=crop, soil_type='Clayey')
+        self.assertEqual(compatibility.soil.name, 'Red sandy loam')
+        self.assertEqual(fertilizer.soil.name, 'Clay')
+
+        soils = soil_family_ids(resolve_soil_type('Red'))
+        self.assertIn(compatibility.soil_id, soils)
+        self.assertUsesIndex(
+            SoilCropCompatibility.objects.filter(soil__in=soils).order_by('-compatibility_score')
+        )
+        self.assertUsesIndex(SoilCropCompatibility.objects.filter(crop=crop, soil__in=soils))
+        self.assertUsesIndex(FertilizerRecommendation.objects.filter(crop=crop, soil=fertilizer.soil_id))
+        self.assertUsesIndex(IrrigationRequirement.objects.filter(crop=crop))
+
+    def test_farmer_lookups(self):
+        farmer = FarmerProfile.objects.create(first_name='Ravi', last_name='Gowda')
+        self.assertUsesIndex(FarmerInterest.objects.filter(farmer=farmer).order_by('-id'))
+        self.assertUsesIndex(FarmerProfile.objects.filter(first_name='Ravi', last_name='Gowda'))
+        # The admin user lists' exact district filter
+        self.assertUsesIndex(FarmerProfile.objects.filter(district='Mandya'))
+
+    def test_admin_user_search(self):
+        for field in USER_SEARCH_FIELDS:
+            self.assertUsesIndex(User.objects.filter(**{f'{field}__istartswith': 'rav'}))
+        for field in FARMER_SEARCH_FIELDS:
+            self.assertUsesIndex(FarmerProfile.objects.filter(**{f'{field}__istartswith': 'rav'}))
+        # The whole search reads users by key, without a scan of either table
+        users = User.objects.select_related('farmer_profile').filter(user_search('rav')).order_by('id')
+        self.assertUsesIndex(users)
+        if connection.vendor == 'sqlite':
+            self.assertNotRegex(users.explain(), rf'\bSCAN {FarmerProfile._meta.db_table}\b')
+
+    def test_catalog_filters(self):
+        self.assertUsesIndex(LoanScheme.objects.filter(bank_name='State Bank', loan_type='Crop Loan'))
+        self.assertUsesIndex(LoanScheme.objects.filter(loan_type='Crop Loan'))
+        self.assertUsesIndex(GovScheme.objects.filter(type='Irrigation', state='KA', status='Active'))
+        self.assertUsesIndex(GovScheme.objects.filter(state='KA'))
+        self.assertUsesIndex(GovScheme.objects.filter(status='Active'))
+
+    def test_gov_scheme_filters_ignore_case(self):
+        GovScheme.objects.create(
+            scheme_id='KBS', name='Krishi Bhagya', type='Water Conservation', description='Farm ponds',
+            target_group='Dryland farmers', status='Active', state='KA'
+        )
+        response = self.client.get('/api/gov-schemes/', {'type': 'water conservation', 'state': 'ka', 'status': 'ACTIVE'})
+        self.assertEqual([scheme['scheme_id'] for scheme in response.json()['schemes']], ['KBS'])
+
+
+class SoilTaxonomyTests(TestCase):
+    """Soil names resolve to SoilType ids through names, synonyms and families"""
+
+    def test_resolve(self):
+        red = SoilType.objects.get(name='Red')
+        self.assertEqual(resolve_soil_type('Red soil'), red.id)
+        self.assertEqual(resolve_soil_type('RED SOILS'), red.id)
+        self.assertEqual(resolve_soil_type('Lateritic'), SoilType.objects.get(name='Laterite').id)
+        self.assertEqual(resolve_soil_type('Red loamy soil'), SoilType.objects.get(name='Red loam').id)
+        # Unlisted soils fall back to the family named by their words
+        self.assertEqual(resolve_soil_type('Shallow red gravelly soil'), red.id)
+        self.assertIsNone(resolve_soil_type('All soil types'))
+
+    def test_families(self):
+        red = SoilType.objects.get(name='Red')
+        self.assertIn(SoilType.objects.get(name='Red sandy loam').id, soil_family_ids(red.id))
+        self.assertNotIn(SoilType.objects.get(name='Sandy loam').id, soil_family_ids(red.id))
+        self.assertEqual(soil_family_ids(None), frozenset())
+
+    def test_catalog_edits_are_picked_up(self):
+        black = SoilType.objects.get(name='Black')
+        self.assertIsNone(resolve_soil_type('Karail'))
+        with self.captureOnCommitCallbacks(execute=True):
+            SoilTypeSynonym.objects.create(name='Karail', soil_type=black)
+        self.assertEqual(resolve_soil_type('Karail soil'), black.id)
+
+    def test_soil_lists(self):
+        crop = Crop.objects.create(name='Maize', suitable_soil_types='Red soil, Black soil, Red soil')
+        self.assertEqual(sorted(crop.soils.values_list('name', flat=True)), ['Black', 'Red'])
+        crop.suitable_soil_types = 'Loamy'
+        crop.save()
+        self.assertEqual(list(crop.soils.values_list('name', flat=True)), ['Loamy'])
+
+
+class FarmerAttributeListsTests(TestCase):
+    """Comma-separated farmer attributes are stored as flags and item rows"""
+
+    def setUp(self):
+        self.farmer = FarmerProfile.objects.create(first_name='Ravi', last_name='Gowda')
+        FarmDetail.objects.create(farmer=self.farmer, irrigation_systems='Drip, Sprinkler', irrigation_sources='Borewell')
+        self.interest = FarmerInterest.objects.create(
+            farmer=self.farmer, challenges='water scarcity, Credit Access, Pests', sustainable_practices='Mulching'
+        )
+
+    def test_flags(self):
+        self.assertEqual(CHALLENGES.names_of(self.interest.challenge_flags), ['Water Scarcity', 'Credit Access'])
+
+        other = FarmerProfile.objects.create(first_name='Asha', last_name='Patil')
+        FarmDetail.objects.create(farmer=other, irrigation_systems='Flood')
+        FarmerInterest.objects.create(farmer=other, challenges='Water Scarcity')
+
+        farmers = FarmerProfile.objects.filter(
+            farms__irrigation_system_flags__has='Drip', interests__challenge_flags__has='Water Scarcity'
+        )
+        self.assertEqual(list(farmers), [self.farmer])
+        farmers = FarmerProfile.objects.filter(farms__irrigation_system_flags__hasany=['Drip', 'Flood'])
+        self.assertEqual(farmers.count(), 2)
+        with self.assertRaises(ValueError):
+            FarmDetail.objects.filter(irrigation_system_flags__has='Canal').count()
+
+    def test_item_rows(self):
+        financial_info = FinancialInfo.objects.create(
+            farmer=self.farmer, govt_schemes_enrolled='Soil Health Card, Kisan Credit Card'
+        )
+        self.assertEqual(
+            set(EnrolledScheme.objects.filter(name='Kisan Credit Card').values_list('financial_info__farmer', flat=True)),
+            {self.farmer.id}
+        )
+
+        financial_info.govt_schemes_enrolled = 'Kisan Credit Card, PM Kisan Samman Nidhi'
+        financial_info.save(update_fields=['govt_schemes_enrolled'])
+        self.assertEqual(
+            sorted(financial_info.enrolled_schemes.values_list('name', flat=True)),
+            ['Kisan Credit Card', 'PM Kisan Samman Nidhi']
+        )
+        self.assertEqual(list(self.interest.practices.values_list('name', flat=True)), ['Mulching'])
+
+    def test_update_fields(self):
+        self.interest.challenges = 'Seed Quality'
+        self.interest.save(update_fields=['challenges'])
+        self.interest.refresh_from_db()
+        self.assertEqual(CHALLENGES.names_of(self.interest.challenge_flags), ['Seed Quality'])
+
+
+class FarmerFeaturesTests(TestCase):
+    """The materialized features follow the profile and are all the engines read"""
+
+    def setUp(self):
+        District.objects.create(
+            name='Belagavi', region='North', avg_annual_rainfall_mm=800, min_temp_c=18, max_temp_c=32,
+            major_soil_types='Black soil'
+        )
+        self.farmer = FarmerProfile.objects.create(first_name='Ravi', last_name='Gowda', district=' belagavi')
+        FarmDetail.objects.create(farmer=self.farmer, farm_size=5, unit='Acre', land_ownership='Leased')
+        FarmerInterest.objects.create(farmer=self.farmer, challenges='Credit Access')
+        FarmingExperience.objects.create(farmer=self.farmer, crop=Crop.objects.create(name='Ragi', growing_season='Kharif'))
+
+    def test_rebuilt_on_save(self):
+        features = FarmerFeatures.objects.get(farmer=self.farmer)
+        self.assertEqual(features.district.name, 'Belagavi')
+        self.assertEqual(features.land_ownership, 'Leased')
+        self.assertAlmostEqual(features.farm_size_ha, 5 / 2.47105)
+        self.assertEqual(features.crop_names, ['Ragi'])
+        self.assertEqual(features.crop_seasons, ['Kharif'])
+        # Farmers without financial info get the defaults the engines assume
+        self.assertFalse(features.has_financial_info)
+        self.assertEqual(features.monthly_income, 16000)
+
+        FinancialInfo.objects.create(farmer=self.farmer, annual_income='below_50k', govt_schemes_enrolled='Kisan Credit Card')
+        features.refresh_from_db()
+        self.assertEqual((features.monthly_income, features.enrolled_schemes), (4000, ['Kisan Credit Card']))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            FarmDetail.objects.filter(farmer=self.farmer).delete()
+        features.refresh_from_db()
+        self.assertFalse(features.has_farm)
+
+    def test_profile_api(self):
+        response = self.client.post('/api/save-farmer-profile/', {
+            'id': self.farmer.id,
+            'personal': {'firstName': 'Ravi', 'lastName': 'Gowda', 'district': 'Belagavi'},
+            'farm': {'size': '2 Hectare', 'soilType': 'Red', 'irrigationSystems': ['Drip']},
+            'financial': {'annualIncome': '3l_5l', 'governmentSchemes': ['Soil Health Card']},
+            'challenges': ['Water Scarcity'],
+        }, content_type='application/json')
+        self.assertTrue(response.json()['success'])
+
+        features = FarmerFeatures.objects.get(farmer=self.farmer)
+        self.assertEqual(features.soil_type, 'Red')
+        self.assertEqual(features.monthly_income, 33000)
+        self.assertEqual(features.enrolled_schemes, ['Soil Health Card'])
+        self.assertEqual(CHALLENGES.names_of(features.challenge_flags), ['Water Scarcity'])
+
+    def test_engines_read_only_the_features(self):
+        context = FarmerContext(self.farmer)
+        with CaptureQueriesContext(connection) as queries:
+            get_scheme_recommendations(self.farmer, context)
+            get_loan_recommendations(self.farmer, FinancialInfo(farmer=self.farmer, annual_income='1l_3l'), context)
+        sql = ' '.join(query['sql'] for query in queries)
+        # The district comes joined to the features
+        for model in (FarmDetail, FarmerInterest, FinancialInfo, FarmingExperience, District):
+            self.assertNotIn(f'FROM "{model._meta.db_table}"', sql)
+
+    def test_current_season(self):
+        self.assertEqual(current_season(datetime.date(2026, 7, 1)), 'kharif')
+        self.assertEqual(current_season(datetime.date(2026, 1, 15)), 'rabi')
+        self.assertEqual(current_season(datetime.date(2026, 11, 1)), 'rabi')
+        self.assertEqual(current_season(datetime.date(2026, 3, 1)), 'zaid')
+
+
+class ProfileSaveTests(TestCase):
+    """save_farmer_profile_api: one transaction, keyed by the external id"""
+
+    def save(self, **profile):
+        profile.setdefault('personal', {'firstName': 'Ravi', 'lastName': 'Gowda', 'district': 'Belagavi'})
+        return self.client.post('/api/save-farmer-profile/', profile, content_type='application/json')
+
+    def test_external_id_upserts(self):
+        external_id = str(uuid.uuid4())
+        first = self.save(externalId=external_id, farm={'size': '2 Acre', 'soilType': 'Red'})
+        second = self.save(externalId=external_id, farm={'size': '3 Acre', 'soilType': 'Black'})
+        self.assertEqual(first.json()['external_id'], external_id)
+        self.assertEqual(first.json()['farmer_id'], second.json()['farmer_id'])
+
+        farmer = FarmerProfile.objects.get(external_id=external_id)
+        self.assertEqual(FarmDetail.objects.filter(farmer=farmer).count(), 1)
+        self.assertEqual(farmer.farms.get().soil_type, 'Black')
+
+    def test_id_wins_over_a_new_external_id(self):
+        # A farmer saved before external ids existed, edited by a form that
+        # had no external id for it yet
+        farmer = FarmerProfile.objects.create(first_name='Ravi', last_name='Gowda')
+        response = self.save(id=farmer.id, externalId=str(uuid.uuid4()), farm={'size': '2 Acre'})
+        self.assertEqual(response.json()['farmer_id'], farmer.id)
+        self.assertEqual(response.json()['external_id'], str(farmer.external_id))
+        self.assertEqual(FarmerProfile.objects.count(), 1)
+
+        profile = self.client.get(f'/api/farmer/{farmer.id}/profile/').json()
+        self.assertEqual((profile['id'], profile['externalId']), (farmer.id, str(farmer.external_id)))
+
+    def test_no_name_matching(self):
+        self.save()
+        self.save()
+        self.assertEqual(FarmerProfile.objects.filter(first_name='Ravi', last_name='Gowda').count(), 2)
+
+    def test_invalid_data_rolls_back(self):
+        self.assertEqual(self.save(externalId='not-a-uuid').status_code, 400)
+        response = self.save(externalId=str(uuid.uuid4()), farm={'size': '2 Acre', 'nitrogenValue': 'lots'})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(FarmerProfile.objects.exists())
+
+    def test_writes_only_the_farmers_own_rows(self):
+        # Nothing shared by all farmers is written, so saves of different
+        # farmers only contend on their own rows
+        external_id = str(uuid.uuid4())
+        self.save(externalId=external_id)
+        with CaptureQueriesContext(connection) as queries, self.captureOnCommitCallbacks(execute=True):
+            response = self.save(externalId=external_id, farm={'size': '3 Acre', 'soilType': 'Red'},
+                                 financial={'governmentSchemes': ['PM-KISAN']}, challenges=['Water Scarcity'])
+        self.assertTrue(response.json()['success'])
+        written = {
+            match.group(1) for query in queries
+            if (match := re.match(r'(?:INSERT INTO|UPDATE|DELETE FROM) "(\w+)"', query['sql']))
+        }
+        farmer_tables = {model._meta.db_table for model in (
+            FarmerProfile, FarmDetail, FinancialInfo, EnrolledScheme, FarmerInterest, FarmerFeatures
+        )} | {'main_app_sustainablepractice'}
+        self.assertTrue(written)
+        self.assertLessEqual(written, farmer_tables)
+
+
+class FarmerImportTests(TestCase):
+    """Bulk onboarding through the import endpoint"""
+
+    CSV = (
+        'External ID,First Name,last_name,district,farm_size,soil_type,irrigation_systems,'
+        'annual_income,govt_schemes_enrolled,challenges,sustainable_practices\n'
+        ',Ravi,Gowda,Belagavi,2 Acre,Red,Drip,3l_5l,PM-KISAN; Soil Health Card,Water Scarcity,Mulching\n'
+        ',Asha,Patil,Dharwad,1.5,Black soil,,below_50k,,,\n'
+        ',Bad,Row,Mysuru,two acres,Red,Teleport,,,,\n'
+    )
+
+    def upload(self, content, name='farmers.csv', **params):
+        upload = SimpleUploadedFile(name, content.encode(), content_type='text/csv')
+        return self.client.post('/api/admin/farmers/import/' + params.pop('query', ''), {'file': upload, **params})
+
+    def test_import(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            report = self.upload(self.CSV).json()
+        self.assertEqual((report['rows'], report['created'], report['failed']), (3, 2, 1))
+        self.assertEqual(report['errors'][0]['row'], 4)
+
+        farm = FarmDetail.objects.get(farmer__first_name='Ravi')
+        self.assertEqual((farm.farm_size, farm.unit), (2, 'Acre'))
+        self.assertEqual(farm.soil_id, resolve_soil_type('Red'))
+        self.assertTrue(FarmDetail.objects.filter(id=farm.id, irrigation_system_flags__has='Drip').exists())
+        self.assertEqual(
+            sorted(EnrolledScheme.objects.filter(financial_info__farmer=farm.farmer).values_list('name', flat=True)),
+            ['PM-KISAN', 'Soil Health Card']
+        )
+        self.assertEqual(FarmerInterest.objects.get(farmer=farm.farmer).practices.get().name, 'Mulching')
+        # Only the columns in the file are written
+        self.assertFalse(FarmerInterest.objects.filter(farmer__first_name='Asha').exists())
+
+    def test_numbers_out_of_range_fail_their_row_only(self):
+        rows = [
+            'first_name,age,farm_size,ph_value',
+            'Ravi,40,2,6.5',
+            'Huge,1e20,,',
+            'Endless,inf,,',
+            'Wide,99999999999,,',
+            'Boundless,,inf,',
+            'Unknown,,,nan',
+            'Asha,35,1,',
+        ]
+        importer = FarmerImporter(chunk_size=100)
+        report = importer.run(read_rows(BytesIO('\n'.join(rows).encode()), 'farmers.csv'))
+        self.assertEqual((report.created, report.failed), (2, 5))
+        self.assertEqual(sorted(FarmerProfile.objects.values_list('first_name', 'age')), [('Asha', 35), ('Ravi', 40)])
+
+    def test_reimport_updates_by_external_id(self):
+        self.upload(self.CSV)
+        farmer = FarmerProfile.objects.get(first_name='Ravi')
+        rebuild_farmer_features(farmer.id)
+
+        report = self.upload(f'external_id,first_name,farm_size,soil_type\n{farmer.external_id},Ravi,3,Clay\n').json()
+        self.assertEqual((report['created'], report['updated']), (0, 1))
+        farm = FarmDetail.objects.get(farmer=farmer)
+        self.assertEqual((farm.farm_size, farm.unit, farm.soil_type), (3, 'Acre', 'Clay'))
+        self.assertEqual(FarmerProfile.objects.get(id=farmer.id).last_name, 'Gowda')
+        # Stale features are dropped and rebuilt on first use
+        self.assertFalse(FarmerFeatures.objects.filter(farmer=farmer).exists())
+
+    def test_error_file_and_bad_files(self):
+        response = self.upload(self.CSV, query='?errors=csv', dry_run='true')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0].split(',')[:2], ['row', 'error'])
+        self.assertTrue(lines[1].startswith('4,'))
+        self.assertFalse(FarmerProfile.objects.exists())
+
+        self.assertEqual(self.upload('name,age\nRavi,40\n').status_code, 400)
+        self.assertEqual(self.upload(self.CSV, name='farmers.txt').status_code, 400)
+
+    def test_queries_per_chunk(self):
+        def import_rows(count):
+            rows = ''.join(f'f{i},l{i},1 Acre,Red,Drip,Water Scarcity,Mulching\n' for i in range(count))
+            importer = FarmerImporter(chunk_size=100)
+            content = 'first_name,last_name,farm_size,soil_type,irrigation_systems,challenges,sustainable_practices\n'
+            with CaptureQueriesContext(connection) as queries:
+                importer.run(read_rows(BytesIO((content + rows).encode()), 'farmers.csv'))
+            return len(queries)
+
+        import_rows(1)  # loads the soil taxonomy and creates the catalog version
+        self.assertEqual(import_rows(5), import_rows(50))
+
+
+class ReplicaRoutingTests(ReplicaTestCase):
+    """Catalog reads and recommendations go to the replica, except right after a write"""
+
+    def test_features_rebuilt_from_primary(self):
+        # A replica that lags behind has neither the features nor the rows they are built from
+        farmer = FarmerProfile.objects.create(first_name='Ravi', district='Mandya')
+        FarmDetail.objects.create(farmer=farmer, farm_size=2, unit='Hectare', land_ownership='Owned')
+        FarmerFeatures.objects.filter(farmer=farmer).delete()
+
+        routed = []
+        db_for_read = ReplicaRouter.db_for_read
+
+        def record(router, model, **hints):
+            alias = db_for_read(router, model, **hints)
+            routed.append((model._meta.label_lower, alias or 'default'))
+            return alias
+
+        with mock.patch.object(ReplicaRouter, 'db_for_read', record), routing(RoutingState()) as state:
+            features = replica_reads(lambda request: FarmerContext(farmer).features)(None)
+        self.assertEqual(features.land_ownership, 'Owned')
+        self.assertEqual(routed[0], ('main_app.farmerfeatures', 'replica'))
+        self.assertTrue(routed[1:])
+        self.assertEqual({alias for _, alias in routed[1:]}, {'default'})
+        self.assertTrue(state.written)
+
+    def test_catalog_reads(self):
+        with routing(RoutingState(catalog_reads=True)):
+            self.assertEqual(Crop.objects.all().db, 'replica')
+            self.assertEqual(GovScheme.objects.all().db, 'replica')
+            self.assertEqual(FarmerProfile.objects.all().db, 'default')
+        # Outside requests, e.g. in management commands
+        self.assertEqual(Crop.objects.all().db, 'default')
+
+    def test_recommendation_views_read_everything_from_replica(self):
+        read_db = replica_reads(lambda request: FarmerProfile.objects.all().db)
+        with routing(RoutingState()):
+            self.assertEqual(read_db(None), 'replica')
+        with routing(RoutingState(pinned=True)):
+            self.assertEqual(read_db(None), 'default')
+
+    def test_reads_after_a_write_go_to_default(self):
+        with routing(RoutingState(catalog_reads=True)) as state:
+            FarmerProfile.objects.create(first_name='Ravi')
+            self.assertTrue(state.written)
+            self.assertEqual(Crop.objects.all().db, 'default')
+
+    def test_client_is_pinned_after_saving(self):
+        response = self.client.get('/api/govt-schemes/')
+        self.assertNotIn(REPLICA_PIN_COOKIE, response.cookies)
+
+        response = self.client.post('/api/save-farmer-profile/', {
+            'personal': {'firstName': 'Ravi', 'lastName': 'Gowda'},
+        }, content_type='application/json')
+        self.assertIn(REPLICA_PIN_COOKIE, response.cookies)
+        self.assertEqual(response.cookies[REPLICA_PIN_COOKIE]['max-age'], 5)
+
+
+class ListProjectionTests(ReplicaTestCase):
+    """List endpoints and engines leave the long text columns they do not use unread"""
+
+    def setUp(self):
+        cache.clear()
+        for name in ('Raitha Siri', 'Krishi Bhagya'):
+            GovernmentScheme.objects.create(
+                name=name, implementing_agency='Agriculture Department',
+                detailed_description='Long description ' * 500, how_to_apply='Apply at the Raitha Samparka Kendra'
+            )
+        LoanOption.objects.create(name='Kisan Credit Card', provider='Canara Bank', special_features='Flexible ' * 500)
+
+    def get(self, url, params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        return response, [query['sql'] for query in queries if query['sql'].startswith('SELECT')]
+
+    def test_admin_lists(self):
+        response, selects = self.get('/api/admin/schemes/', {'fields': 'id,implementing_agency'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0], {'id': response.json()[0]['id'], 'implementing_agency': 'Agriculture Department'})
+        self.assertFalse([sql for sql in selects if '"detailed_description"' in sql])
+
+        response, selects = self.get('/api/admin/loans/', {'fields': 'name,provider'})
+        self.assertEqual(response.json(), [{'name': 'Kisan Credit Card', 'provider': 'Canara Bank'}])
+        self.assertFalse([sql for sql in selects if '"special_features"' in sql])
+
+        # Without ?fields= the whole record is listed as before
+        response = self.client.get('/api/admin/schemes/')
+        self.assertEqual(response.json()[0]['how_to_apply'], 'Apply at the Raitha Samparka Kendra')
+
+    def test_cursor_of_unrequested_sort_column(self):
+        response, selects = self.get('/api/admin/schemes/', {'fields': 'id', 'sort': 'name', 'limit': 1})
+        self.assertEqual(len(response.json()), 1)
+        # The cursor is built from the name loaded with the page; no query follows the page's
+        self.assertIn('LIMIT 2', selects[-1])
+        self.assertIn('"name"', selects[-1])
+        self.assertNotIn('"detailed_description"', selects[-1])
+        next_page = self.client.get('/api/admin/schemes/', {
+            'fields': 'id', 'sort': 'name', 'limit': 1, 'cursor': response['X-Next-Cursor']
+        })
+        self.assertNotEqual(next_page.json(), response.json())
+
+    def test_unknown_field(self):
+        response = self.client.get('/api/admin/crops/', {'fields': 'name,secret'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], 'Unknown fields: secret')
+
+    def test_rotation_candidates(self):
+        crop = Crop.objects.create(
+            name='Ragi', growing_season='Kharif', cultivation_practices='Transplant ' * 500,
+            n_requirement_kg_per_ha=50, p_requirement_kg_per_ha=40, k_requirement_kg_per_ha=25
+        )
+        CropEconomics.objects.create(crop=crop, net_income_per_ha=30000, growth_period='120 days', notes='Note ' * 500)
+        response, selects = self.get('/api/rotation-plan/', {'start_season': 'Kharif', 'years': 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Ragi', response.content.decode())
+        crop_selects = [sql for sql in selects if 'main_app_crop' in sql]
+        self.assertTrue(crop_selects)
+        for sql in crop_selects:
+            self.assertNotIn('"cultivation_practices"', sql)
+            self.assertNotIn('"notes"', sql)
+
+
+class IrrigationScheduleTests(ReplicaTestCase):
+    """The irrigation calendar is streamed as NDJSON or iCalendar, one day at a time"""
+
+    def setUp(self):
+        self.crop = Crop.objects.create(name='Sugarcane')
+        CropEconomics.objects.create(crop=self.crop, growth_period='12 months')
+        IrrigationRequirement.objects.create(
+            crop=self.crop, growth_stage='Drip', water_requirement_mm=30, irrigation_interval_days=5,
+            critical_stages='Germination, Tillering, Grand growth, Maturity'
+        )
+
+    def test_ndjson(self):
+        response = self.client.get('/api/irrigation-schedule/', {
+            'crop_id': self.crop.id, 'sowing_date': '2026-01-15'
+        })
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 360)
+        entries = [json.loads(line) for line in lines]
+        self.assertEqual(entries[0]['date'], '2026-01-15')
+        self.assertEqual([entry['day'] for entry in entries], list(range(1, 361)))
+        self.assertEqual(entries[0]['stage'], 'Germination')
+        self.assertEqual(entries[-1]['stage'], 'Maturity')
+        self.assertTrue(any(entry['irrigate'] for entry in entries))
+        self.assertTrue(all(entry['water_mm'] in (0, 30) for entry in entries))
+
+    def test_ics(self):
+        response = self.client.get('/api/irrigation-schedule/', {
+            'crop_id': self.crop.id, 'sowing_date': '2026-01-15', 'format': 'ics'
+        })
+        self.assertEqual(response['Content-Type'], 'text/calendar; charset=utf-8')
+        self.assertIn('attachment', response['Content-Disposition'])
+        body = b''.join(response.streaming_content).decode()
+        lines = body.split('\r\n')
+        self.assertEqual(lines[0], 'BEGIN:VCALENDAR')
+        self.assertEqual(lines[-2:], ['END:VCALENDAR', ''])
+        self.assertTrue(body.endswith('\r\n'))
+        self.assertNotIn('\n', body.replace('\r\n', ''))
+        events = body.count('BEGIN:VEVENT')
+        self.assertGreater(events, 0)
+        self.assertEqual(events, body.count('END:VEVENT'))
+        self.assertEqual(events, len(set(re.findall(r'UID:(\S+)', body))))
+        self.assertEqual(events, len(re.findall(r'DTSTART;VALUE=DATE:\d{8}\r\n', body)))
+
+    def test_streams_without_building_the_season(self):
+        produced = []
+
+        def entries():
+            for day in range(10000):
+                produced.append(day)
+                yield {'day': day}
+
+        chunks = iter_ndjson(entries())
+        self.assertEqual(json.loads(next(chunks)), {'day': 0})
+        self.assertEqual(len(produced), 1)
+
+        response = self.client.get('/api/irrigation-schedule/', {'crop_id': self.crop.id})
+        self.assertTrue(response.streaming)
+        first = next(iter(response.streaming_content))
+        self.assertEqual(json.loads(first)['day'], 1)
+
+
+def brute_force_rotations(candidates, start_season, years, initial_state):
+    """Total income of every feasible rotation, enumerated one sequence at a time"""
+    horizon = years * len(SEASONS)
+    start_index = SEASONS.index(start_season)
+    floor_state = tuple(min(level, 0) - rotation_planner.BALANCE_TOLERANCE for level in initial_state)
+    totals = []
+
+    def extend(step, state, income):
+        if step == horizon:
+            if all(level >= floor for level, floor in zip(state, floor_state)):
+                totals.append(income)
+            return
+        season = SEASONS[(start_index + step) % len(SEASONS)]
+        for candidate in candidates:
+            if season not in candidate['seasons'] or step + candidate['span'] > horizon:
+                continue
+            next_state = tuple(level + change for level, change in zip(state, candidate['delta']))
+            if min(next_state) < rotation_planner.MIN_NUTRIENT_LEVEL:
+                continue
+            next_state = tuple(min(rotation_planner.MAX_NUTRIENT_LEVEL, level) for level in next_state)
+            earned = candidate['income'] * rotation_planner.deficit_yield_factor(initial_state, state)
+            extend(step + candidate['span'], next_state, income + earned)
+
+    extend(0, tuple(initial_state), 0.0)
+    return sorted(totals, reverse=True)
+
+
+class RotationPlannerTests(SimpleTestCase):
+    """plan_rotations finds the same best plans as trying every sequence"""
+
+    def candidate(self, name, seasons, income, delta, span=1):
+        return {'crop_id': name, 'name': name, 'seasons': set(seasons), 'span': span, 'income': income, 'delta': delta}
+
+    def setUp(self):
+        self.candidates = [
+            rotation_planner.fallow_candidate(),
+            self.candidate('Maize', ['Kharif'], 100.0, (-2, -1, -1)),
+            self.candidate('Wheat', ['Rabi'], 80.0, (-2, -1, -1)),
+            self.candidate('Gram', ['Rabi'], 40.0, (1, 0, 0)),
+            self.candidate('Melon', ['Zaid'], 60.0, (-1, -1, -1)),
+            self.candidate('Sugarcane', ['Kharif'], 170.0, (-3, -2, -2), span=2),
+        ]
+
+    def test_top_plans_match_brute_force(self):
+        for start_season in SEASONS:
+            for initial_state in ((0, 0, 0), (1, 1, 1), (-1, 0, 1)):
+                with self.subTest(start_season=start_season, initial_state=initial_state):
+                    plans = rotation_planner.plan_rotations(
+                        self.candidates, start_season, years=2, top_n=5, initial_state=initial_state
+                    )
+                    expected = brute_force_rotations(self.candidates, start_season, 2, initial_state)[:5]
+                    self.assertEqual(
+                        [plan['total_net_income_per_ha'] for plan in plans],
+                        [round(total, 2) for total in expected]
+                    )
+
+    def test_nutrient_state_carries_across_seasons(self):
+        initial_state = (1, 0, 0)
+        plans = rotation_planner.plan_rotations(self.candidates, 'Kharif', years=2, top_n=5, initial_state=initial_state)
+        by_name = {candidate['name']: candidate for candidate in self.candidates}
+        for plan in plans:
+            state = initial_state
+            total = 0.0
+            for entry in plan['rotation']:
+                candidate = by_name[entry['crop']]
+                income = candidate['income'] * rotation_planner.deficit_yield_factor(initial_state, state)
+                self.assertAlmostEqual(entry['net_income_per_ha'], round(income, 2))
+                state = tuple(
+                    min(rotation_planner.MAX_NUTRIENT_LEVEL, level + change)
+                    for level, change in zip(state, candidate['delta'])
+                )
+                self.assertEqual(entry['nutrient_balance'], dict(zip('NPK', state)))
+                total += income
+            self.assertEqual(plan['final_nutrient_balance'], dict(zip('NPK', state)))
+            self.assertAlmostEqual(plan['total_net_income_per_ha'], round(total, 2))
+
+    def test_fallow_lets_the_soil_recover(self):
+        # Maize every season would exhaust the soil, so the best plans rest it
+        maize = self.candidate('Maize', SEASONS, 100.0, (-2, -1, -1))
+        plans = rotation_planner.plan_rotations(
+            [rotation_planner.fallow_candidate(), maize], 'Kharif', years=1, top_n=3
+        )
+        self.assertTrue(plans)
+        for plan in plans:
+            crops = [entry['crop'] for entry in plan['rotation']]
+            self.assertIn(rotation_planner.FALLOW, crops)
+            self.assertTrue(all(level >= -rotation_planner.BALANCE_TOLERANCE
+                                for level in plan['final_nutrient_balance'].values()))
+        self.assertEqual(
+            [plan['total_net_income_per_ha'] for plan in plans],
+            brute_force_rotations([rotation_planner.fallow_candidate(), maize], 'Kharif', 1, (0, 0, 0))[:3]
+        )
+
+        # Without fallow there is no plan that keeps the balance
+        self.assertEqual(rotation_planner.plan_rotations([maize], 'Kharif', years=1), [])
+
+
+class LandAllocationTests(SimpleTestCase):
+    """simplex_max and the farm allocations built on it"""
+
+    def test_known_optimum(self):
+        c = np.array([3.0, 5.0])
+        A = np.array([[1.0, 0.0], [0.0, 2.0], [3.0, 2.0]])
+        b = np.array([4.0, 12.0, 18.0])
+        x, value = land_allocation.simplex_max(c, A, b)
+        np.testing.assert_allclose(x, [2.0, 6.0])
+        self.assertAlmostEqual(value, 36.0)
+
+    def test_unbounded(self):
+        with self.assertRaisesMessage(land_allocation.InfeasibleAllocation, 'unbounded'):
+            land_allocation.simplex_max(np.array([1.0, 0.0]), np.array([[-1.0, 1.0]]), np.array([1.0]))
+
+    def test_negative_limit_is_infeasible(self):
+        with self.assertRaises(land_allocation.InfeasibleAllocation):
+            land_allocation.simplex_max(np.array([1.0]), np.array([[1.0]]), np.array([-1.0]))
+
+    def test_degenerate_problem_does_not_cycle(self):
+        # Beale's example cycles with the largest-coefficient rule
+        c = np.array([0.75, -150.0, 0.02, -6.0])
+        A = np.array([
+            [0.25, -60.0, -0.04, 9.0],
+            [0.5, -90.0, -0.02, 3.0],
+            [0.0, 0.0, 1.0, 0.0],
+        ])
+        b = np.array([0.0, 0.0, 1.0])
+        x, value = land_allocation.simplex_max(c, A, b)
+        self.assertAlmostEqual(value, 0.05)
+        np.testing.assert_allclose(x, [0.04, 0.0, 1.0, 0.0], atol=1e-9)
+
+    def candidates(self):
+        return [
+            {'crop_id': crop_id, 'name': name, 'net_income_per_ha': income, 'water_mm': 400.0, 'labour_days_per_ha': 10.0}
+            for crop_id, (name, income) in enumerate([('Cotton', 90000.0), ('Maize', 40000.0), ('Ragi', 20000.0)], 1)
+        ]
+
+    def test_min_crops_caps_each_share(self):
+        for min_crops, expected in ((1, [6.0]), (2, [3.0, 3.0]), (3, [2.0, 2.0, 2.0])):
+            with self.subTest(min_crops=min_crops):
+                result = land_allocation.allocate_land(
+                    self.candidates(), area_ha=6.0, water_mm=1000.0, labour_days=1000.0, min_crops=min_crops
+                )
+                self.assertEqual([allocation['area_ha'] for allocation in result['allocations']], expected)
+                self.assertEqual(result['allocations'][0]['crop'], 'Cotton')
+                self.assertEqual(result['area_used_ha'], 6.0)
+
+    def test_each_farm_is_solved_on_its_own(self):
+        problems = [
+            {'candidates': self.candidates(), 'area_ha': 4.0, 'water_mm': 1000.0, 'labour_days': 1000.0},
+            {'candidates': self.candidates(), 'area_ha': 4.0, 'water_mm': -50.0, 'labour_days': 1000.0},
+            {'candidates': self.candidates(), 'area_ha': 2.0, 'water_mm': 200.0, 'labour_days': 1000.0},
+        ]
+        results = land_allocation.allocate_land_per_farm(problems)
+        self.assertEqual(results[0]['area_used_ha'], 4.0)
+        self.assertIn('error', results[1])
+        # Half the water each crop needs: only half the farm can be sown
+        self.assertEqual(results[2]['area_used_ha'], 1.0)
+
+    def test_farmer_ids_must_be_a_list(self):
+        for farmer_ids in ('12', 12, {'id': 1}):
+            with self.subTest(farmer_ids=farmer_ids):
+                response = self.client.post(
+                    '/api/land-allocation/', json.dumps({'farmer_ids': farmer_ids}), content_type='application/json'
+                )
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json(), {'error': 'farmer_ids must be a list'})
+
+
+class YieldProjectionTests(SimpleTestCase):
+    """The (farms, crops) projection agrees with working out one crop on one farm by hand"""
+
+    def setUp(self):
+        self.crops = [
+            (SimpleNamespace(id=1, avg_yield_q_per_ha=30.0, min_temp_c=15, max_temp_c=30),
+             SimpleNamespace(expected_yield_q_per_ha=40, market_price_per_quintal=2000, msp_per_quintal=None,
+                             cost_of_cultivation_per_ha=30000, temperature_range_min=20, temperature_range_max=30,
+                             rainfall_range_min=500, rainfall_range_max=900, drought_resistance='Low')),
+            (SimpleNamespace(id=2, avg_yield_q_per_ha=25.0, min_temp_c=10, max_temp_c=25),
+             SimpleNamespace(expected_yield_q_per_ha=None, market_price_per_quintal=None, msp_per_quintal=2500,
+                             cost_of_cultivation_per_ha=20000, temperature_range_min=None, temperature_range_max=None,
+                             rainfall_range_min=None, rainfall_range_max=None, drought_resistance='High')),
+        ]
+        self.districts = [
+            SimpleNamespace(min_temp_c=18, max_temp_c=34, avg_annual_rainfall_mm=1200),
+            SimpleNamespace(min_temp_c=16, max_temp_c=32, avg_annual_rainfall_mm=700),
+            None,
+        ]
+        self.potential = np.array([[0.9, 0.6], [0.7, 0.8], [0.5, 1.0]])
+        self.projection = yield_projection.project(
+            yield_projection.crop_arrays(self.crops), yield_projection.farm_arrays(self.districts), self.potential
+        )
+
+    def scalar_projection(self, crop, economics, district, potential):
+        base_yield = float(economics.expected_yield_q_per_ha or 0) or crop.avg_yield_q_per_ha
+        price = float(economics.market_price_per_quintal or 0) or float(economics.msp_per_quintal or 0)
+        cost = float(economics.cost_of_cultivation_per_ha)
+        temp_min = economics.temperature_range_min if economics.temperature_range_min is not None else crop.min_temp_c
+        temp_max = economics.temperature_range_max if economics.temperature_range_max is not None else crop.max_temp_c
+
+        fit = 1.0
+        if district is not None:
+            overlap = min(district.max_temp_c, temp_max) - max(district.min_temp_c, temp_min)
+            fit = min(1.0, max(0.0, overlap / max(temp_max - temp_min, 1.0)))
+            if economics.rainfall_range_min is not None:
+                rain = district.avg_annual_rainfall_mm
+                distance = max(economics.rainfall_range_min - rain, 0) + max(rain - economics.rainfall_range_max, 0)
+                middle = max((economics.rainfall_range_min + economics.rainfall_range_max) / 2, 1.0)
+                fit *= min(1.0, max(0.0, 1 - distance / middle))
+
+        expected = base_yield * potential * (
+            yield_projection.CLIMATE_FLOOR + (1 - yield_projection.CLIMATE_FLOOR) * fit
+        )
+        spread = yield_projection.YIELD_SPREAD[economics.drought_resistance.lower()] + yield_projection.CLIMATE_SPREAD * (1 - fit)
+        low, high = expected * max(1 - spread, 0.0), expected * (1 + spread)
+        return {
+            'climate_fit': fit,
+            'yield_low': low,
+            'yield_expected': expected,
+            'yield_high': high,
+            'income_low': low * price * (1 - yield_projection.PRICE_SPREAD) - cost,
+            'income_expected': expected * price - cost,
+            'income_high': high * price * (1 + yield_projection.PRICE_SPREAD) - cost,
+            'roi_percentage': (expected * price - cost) * 100 / cost,
+        }
+
+    def test_matches_scalar_formula(self):
+        for i, district in enumerate(self.districts):
+            for j, (crop, economics) in enumerate(self.crops):
+                with self.subTest(farm=i, crop=j):
+                    expected = self.scalar_projection(crop, economics, district, self.potential[i, j])
+                    for key, value in expected.items():
+                        self.assertAlmostEqual(float(self.projection[key][i, j]), value, places=6, msg=key)
+
+    def test_bands_are_ordered(self):
+        projection = self.projection
+        self.assertTrue((projection['yield_low'] <= projection['yield_expected']).all())
+        self.assertTrue((projection['yield_expected'] <= projection['yield_high']).all())
+        self.assertTrue((projection['income_low'] <= projection['income_expected']).all())
+        self.assertTrue((projection['income_expected'] <= projection['income_high']).all())
+        self.assertTrue(((projection['climate_fit'] >= 0) & (projection['climate_fit'] <= 1)).all())
+
+        entry = yield_projection.projection_entry(projection, 1, 0)
+        self.assertLessEqual(entry['yield_q_per_ha']['low'], entry['yield_q_per_ha']['expected'])
+        self.assertLessEqual(entry['net_income_per_ha']['expected'], entry['net_income_per_ha']['high'])
+
+    def test_poor_climate_widens_the_band(self):
+        # Farm 0 is wetter than crop 0 wants; farm 1 fits it fully
+        width = self.projection['yield_high'] / self.projection['yield_expected'] - 1
+        self.assertEqual(self.projection['climate_fit'][1, 0], 1.0)
+        self.assertLess(self.projection['climate_fit'][0, 0], 1.0)
+        self.assertGreater(width[0, 0], width[1, 0])
+
+
+class CropRecommendationQueryTests(TestCase):
+    """Crop economics are read once for every suitable crop, not once per crop"""
+
+    def test_economics_read_once(self):
+        soil = SoilType.objects.get(name='Red')
+        SoilCropCompatibility.objects.filter(soil__in=soil_family_ids(soil.id)).delete()
+        for name in ('Ragi', 'Groundnut', 'Tur'):
+            crop = Crop.objects.create(name=name, water_requirement_mm=500)
+            CropEconomics.objects.create(
+                crop=crop, expected_yield_q_per_ha=20, market_price_per_quintal=3000, cost_of_cultivation_per_ha=25000
+            )
+            SoilCropCompatibility.objects.create(soil=soil, crop=crop, compatibility_score=8)
+        farmer = FarmerProfile.objects.create(first_name='Asha', last_name='Patil', district='Tumakuru')
+        farm_details = FarmDetail.objects.create(farmer=farmer, farm_size=2, unit='Hectare', soil_type='Red soil')
+
+        with CaptureQueriesContext(connection) as queries:
+            recommendations = get_crop_recommendations(farmer, farm_details)
+        self.assertEqual(len(recommendations), 3)
+        economics_queries = [query['sql'] for query in queries if 'FROM "main_app_cropeconomics"' in query['sql']]
+        self.assertEqual(len(economics_queries), 1, economics_queries)
+
+
+class FarmerSimilarityTests(ReplicaTestCase):
+    """Peers come from the in-memory index, which follows changes made by other processes"""
+
+    def setUp(self):
+        # Each test starts without an index; checks run on every lookup
+        for name, value in (('_index', None), ('_index_stamp', None), ('INDEX_CHECK_SECONDS', 0)):
+            patcher = mock.patch.object(farmer_similarity, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.farmers = {}
+        for name, soil_type, size in (('Ravi', 'black', 5), ('Asha', 'black', 6), ('Manju', 'red', 40), ('Kiran', 'sandy', 1)):
+            farmer = FarmerProfile.objects.create(first_name=name, last_name='Gowda', district='Belagavi')
+            FarmDetail.objects.create(farmer=farmer, farm_size=size, unit='Acre', soil_type=soil_type)
+            self.farmers[name] = farmer.id
+
+    def nearest(self, name, k=1):
+        return [peer_id for peer_id, _ in farmer_similarity.similar_farmers(self.farmers[name], k)]
+
+    def test_nearest(self):
+        self.assertEqual(self.nearest('Ravi'), [self.farmers['Asha']])
+        peers = farmer_similarity.similar_farmers(self.farmers['Ravi'], 10)
+        self.assertEqual(len(peers), 3)
+        self.assertNotIn(self.farmers['Ravi'], [peer_id for peer_id, _ in peers])
+        self.assertEqual([distance for _, distance in peers], sorted(distance for _, distance in peers))
+
+    def test_edits_from_other_processes(self):
+        self.assertEqual(self.nearest('Kiran'), [self.farmers['Ravi']])
+        # The save rebuilds the features but, inside the test transaction, never
+        # runs the on_commit refresh: the index only learns of it from the stamp
+        farm = FarmDetail.objects.get(farmer_id=self.farmers['Manju'])
+        farm.soil_type, farm.farm_size = 'sandy', 1
+        farm.save()
+        self.assertEqual(self.nearest('Kiran'), [self.farmers['Manju']])
+
+    def test_farmers_added_without_signals(self):
+        index = farmer_similarity.get_farmer_index()
+        self.assertEqual(len(index), 4)
+        FarmerProfile.objects.bulk_create([FarmerProfile(first_name='Imported', district='Belagavi')])
+        FarmerProfile.objects.filter(id=self.farmers['Asha']).delete()
+        index = farmer_similarity.get_farmer_index()
+        self.assertEqual(len(index), 4)
+        self.assertIsNone(index.vector_for(self.farmers['Asha']))
+
+    def test_checks_are_throttled(self):
+        farmer_similarity.get_farmer_index()
+        with mock.patch.object(farmer_similarity, 'INDEX_CHECK_SECONDS', 3600):
+            with self.assertNumQueries(0):
+                farmer_similarity.get_farmer_index()
+
+    def test_peers_endpoint(self):
+        url = f"/api/farmer/{self.farmers['Ravi']}/peers/"
+        response = self.client.get(url, {'k': 2})
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual([peer['farmer_id'] for peer in body['peers']][:1], [self.farmers['Asha']])
+        self.assertEqual(len(body['peers']), 2)
+
+        for params in ({'limit': 'five'}, {'limit': 0}, {'limit': -3}, {'k': 0}, {'k': 201}):
+            with self.subTest(**params):
+                self.assertEqual(self.client.get(url, params).status_code, 400)
+        self.assertEqual(self.client.get(url, {'limit': 10 ** 9}).status_code, 200)
+        self.assertEqual(self.client.get('/api/farmer/999999/peers/').status_code, 404)
+
+
+class CatalogConditionTests(ReplicaTestCase):
+    """Catalog and admin lists answer unchanged conditional GETs with 304"""
+
+    def setUp(self):
+        cache.clear()
+        self.crop = Crop.objects.create(name='Ragi')
+
+    def revalidate(self, url, etag):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_catalog_edit_changes_the_validator(self):
+        url = '/api/admin/crops/'
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.revalidate(url, etag).status_code, 304)
+
+        # The version is bumped once the edit is committed
+        with self.captureOnCommitCallbacks(execute=True):
+            self.crop.name = 'Finger millet'
+            self.crop.save()
+        response = self.revalidate(url, etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(self.revalidate(url, response['ETag']).status_code, 304)
+
+    def test_encodings_have_their_own_validators(self):
+        url = '/api/admin/schemes/'
+        json_etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        msgpack_etag = response['ETag']
+        self.assertNotEqual(msgpack_etag, json_etag)
+
+        self.assertEqual(self.client.get(url, HTTP_ACCEPT='application/msgpack', HTTP_IF_NONE_MATCH=json_etag).status_code, 200)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=msgpack_etag).status_code, 200)
+        self.assertEqual(self.client.get(url, HTTP_ACCEPT='application/msgpack', HTTP_IF_NONE_MATCH=msgpack_etag).status_code, 304)
+        self.assertEqual(self.revalidate(url, json_etag).status_code, 304)
+
+    def test_farmer_saves_leave_the_version_rows_alone(self):
+        farmer = FarmerProfile.objects.create(first_name='Ravi', district='Mandya')
+        with CaptureQueriesContext(connection) as queries, self.captureOnCommitCallbacks(execute=True):
+            farmer.district = 'Mysuru'
+            farmer.save()
+            User.objects.create(username='ravi', email='ravi@example.com')
+        self.assertFalse([query['sql'] for query in queries if 'main_app_catalogversion' in query['sql']])
+
+    def test_user_list_follows_user_rows(self):
+        url = '/api/admin/users/'
+        user = User.objects.create(username='ravi', email='ravi@example.com')
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.revalidate(url, etag).status_code, 304)
+
+        # Logging in only saves last_login
+        with self.captureOnCommitCallbacks(execute=True):
+            update_last_login(None, user)
+        self.assertEqual(self.revalidate(url, etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            FarmerProfile.objects.create(user=user, first_name='Ravi', district='Mandya')
+        response = self.revalidate(url, etag)
+        self.assertEqual(response.status_code, 200)
+
+        etag = response['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            user.email = 'ravi.gowda@example.com'
+            user.save()
+        self.assertEqual(self.revalidate(url, etag).status_code, 200)
+
+
+class KeysetPaginationTests(ReplicaTestCase):
+    """Admin lists page by cursor in a stable order and report the total"""
+
+    url = '/api/admin/crops/'
+
+    def setUp(self):
+        cache.clear()
+        for name in ('Ragi', 'Bajra', 'Ragi', 'Maize', 'Bajra', 'Tur', 'Jowar'):
+            Crop.objects.create(name=name, growing_season='Paging')
+
+    def walk(self, **params):
+        """Every row of the listing, following X-Next-Cursor; also the page responses"""
+        params = {'growing_season': 'Paging', 'limit': 2, 'fields': 'id,name', **params}
+        rows, responses = [], []
+        while True:
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, 200, response.content)
+            rows.extend(response.json())
+            responses.append(response)
+            if not response.has_header('X-Next-Cursor'):
+                return rows, responses
+            params['cursor'] = response['X-Next-Cursor']
+
+    def test_pages_follow_the_sort_order(self):
+        crops = list(Crop.objects.filter(growing_season='Paging').values('id', 'name'))
+        for sort, expected in (
+            ('name', sorted(crops, key=lambda crop: (crop['name'], crop['id']))),
+            ('-name', sorted(crops, key=lambda crop: (crop['name'], crop['id']), reverse=True)),
+            ('-id', sorted(crops, key=lambda crop: crop['id'], reverse=True)),
+        ):
+            with self.subTest(sort=sort):
+                rows, responses = self.walk(sort=sort)
+                self.assertEqual(rows, expected)
+                self.assertEqual(len(responses), 4)
+                self.assertEqual({response['X-Total-Count'] for response in responses}, {'7'})
+                self.assertIn('rel="next"', responses[0]['Link'])
+
+    def test_default_page_size(self):
+        response = self.client.get(self.url, {'growing_season': 'Paging'})
+        self.assertEqual(len(response.json()), 7)
+        self.assertFalse(response.has_header('X-Next-Cursor'))
+
+    def test_invalid_page_requests(self):
+        cursor = self.client.get(self.url, {'growing_season': 'Paging', 'limit': 2, 'sort': 'name'})['X-Next-Cursor']
+        for params in (
+            {'cursor': 'not a cursor'},
+            {'cursor': 'bm90IGpzb24'},
+            {'cursor': cursor, 'sort': 'id'},
+            {'limit': 0},
+            {'limit': 'all'},
+            {'sort': 'water_requirement_mm'},
+        ):
+            with self.subTest(**params):
+                response = self.client.get(self.url, {'growing_season': 'Paging', **params})
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('error', response.json())
+
+
+class DashboardSectionTests(SimpleTestCase):
+    """A failing or slow section falls back to its cached copy without holding up the others"""
+
+    def setUp(self):
+        cache.clear()
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+
+    def slow(self, data):
+        def build():
+            self.release.wait(5)
+            return data
+        return build
+
+    def failing(self):
+        raise RuntimeError('scheme service down')
+
+    def test_failure_and_timeout_fall_back(self):
+        cache.set(dashboard.section_cache_key(7, 'schemes'), ['cached scheme'])
+        with self.assertLogs('main_app.dashboard', 'WARNING'):
+            results = dashboard.run_sections(7, {
+                'crops': lambda: ['Ragi'],
+                'schemes': self.failing,
+                'loans': self.failing,
+                'technologies': self.slow(['Drip']),
+            }, timeouts={'technologies': 0.05})
+
+        self.assertEqual(results['crops'], {'status': 'ok', 'data': ['Ragi']})
+        self.assertEqual(results['schemes'], {'status': 'cached', 'reason': 'error', 'data': ['cached scheme']})
+        self.assertEqual(results['loans'], {'status': 'unavailable', 'reason': 'error', 'data': None})
+        self.assertEqual(results['technologies'], {'status': 'unavailable', 'reason': 'timeout', 'data': None})
+        # Sections that finished refresh their cached copy
+        self.assertEqual(cache.get(dashboard.section_cache_key(7, 'crops')), ['Ragi'])
+
+    def test_slow_section_still_fills_the_cache(self):
+        with self.assertLogs('main_app.dashboard', 'WARNING'):
+            results = dashboard.run_sections(7, {'technologies': self.slow(['Drip'])}, timeouts={'technologies': 0.05})
+        self.assertEqual(results['technologies']['reason'], 'timeout')
+        self.release.set()
+        for _ in range(100):
+            if cache.get(dashboard.section_cache_key(7, 'technologies')):
+                break
+            time.sleep(0.01)
+        self.assertEqual(dashboard.run_sections(7, {'technologies': self.failing}, timeouts={'technologies': 1})
+                         ['technologies'], {'status': 'cached', 'reason': 'error', 'data': ['Drip']})
+
+    def test_sections_waiting_for_a_worker_are_dropped(self):
+        executor = dashboard.ThreadPoolExecutor(max_workers=1)
+        self.addCleanup(executor.shutdown)
+        started = []
+        with mock.patch.object(dashboard, '_executor', executor), self.assertLogs('main_app.dashboard', 'WARNING') as logs:
+            dashboard.run_sections(7, {
+                'crops': self.slow(['Ragi']),
+                'schemes': lambda: started.append('schemes'),
+            }, timeouts={'crops': 0.05, 'schemes': 0.05})
+        self.release.set()
+        executor.shutdown(wait=True)
+        self.assertEqual(started, [])
+        self.assertIn('schemes for farmer 7 timed out before it started', logs.output[-1])
+
+
+class FarmerDashboardApiTests(TransactionTestCase):
+    """
+    GET /api/farmer/<id>/dashboard/ end to end. The sections run on worker
+    threads with their own connections, which only see committed rows, so
+    the rows are committed here and the seeded catalog is restored afterwards.
+    """
+    databases = {'default', REPLICA}
+    serialized_rollback = True
+
+    def setUp(self):
+        cache.clear()
+        soil = SoilType.objects.get(name='Red')
+        crop = Crop.objects.create(name='Ragi', water_requirement_mm=500)
+        CropEconomics.objects.create(
+            crop=crop, expected_yield_q_per_ha=20, market_price_per_quintal=3000, cost_of_cultivation_per_ha=25000
+        )
+        SoilCropCompatibility.objects.create(soil=soil, crop=crop, compatibility_score=8)
+        self.farmer = FarmerProfile.objects.create(first_name='Asha', last_name='Patil', district='Tumakuru')
+        FarmDetail.objects.create(farmer=self.farmer, farm_size=2, unit='Hectare', soil_type='Red soil')
+        self.url = f'/api/farmer/{self.farmer.id}/dashboard/'
+
+    def test_sections_in_one_payload(self):
+        routed = []
+        db_for_read = ReplicaRouter.db_for_read
+
+        def record(router, model, **hints):
+            alias = db_for_read(router, model, **hints)
+            routed.append((threading.current_thread().name, alias or 'default'))
+            return alias
+
+        with mock.patch.object(ReplicaRouter, 'db_for_read', record):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body['farmer_id'], self.farmer.id)
+        self.assertEqual(body['profile']['personal']['fullName'], 'Asha Patil')
+        self.assertEqual(set(body['sections']), {'crops', 'schemes', 'loans', 'technologies'})
+        self.assertEqual({section['status'] for section in body['sections'].values()}, {'ok'})
+        self.assertIn('Ragi', [crop['name'] for crop in body['sections']['crops']['data']])
+
+        # The worker threads keep the request's routing and read from the replica
+        worker_reads = {alias for thread, alias in routed if thread.startswith('dashboard')}
+        self.assertEqual(worker_reads, {REPLICA})
+
+    def test_slow_section_is_left_out(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        def slow_technologies(*args, **kwargs):
+            release.wait(5)
+            return []
+
+        with mock.patch('main_app.views.get_technology_recommendations', slow_technologies), \
+                mock.patch.dict(dashboard.SECTION_TIMEOUTS, {'technologies': 0.05}), \
+                self.assertLogs('main_app.dashboard', 'WARNING'):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        sections = response.json()['sections']
+        self.assertEqual(sections['technologies'], {'status': 'unavailable', 'reason': 'timeout', 'data': None})
+        self.assertEqual(sections['crops']['status'], 'ok')
+        self.assertEqual(sections['schemes']['status'], 'ok')
+
+    def test_unknown_farmer(self):
+        response = self.client.get(f'/api/farmer/{self.farmer.id + 1}/dashboard/')
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json(), {'error': 'Farmer not found'})
@@ -10,7 +10,8 @@ from .views import (
     admin_technologies_list, admin_technology_detail,
     admin_schemes_list, admin_scheme_detail,
     admin_loans_list, admin_loan_detail,
-    admin_users_list, admin_user_detail
+    admin_users_list, admin_user_detail,
+    admin_farmers_import
 )
 
 urlpatterns = [
@@ -23,6 +24,12 @@ urlpatterns = [
     path('api/farmer/<int:farmer_id>/profile/', views.farmer_profile_api, name='farmer_profile_api'),
     path('api/farmer/<int:farmer_id>/recommendations/schemes/', farmer_scheme_recommendations, name='farmer_scheme_recommendations'),
     path('api/farmer/<int:farmer_id>/recommendations/loans/', farmer_loan_recommendations, name='farmer_loan_recommendations'),
+    path('api/farmer/<int:farmer_id>/peers/', views.farmer_peers_api, name='farmer_peers_api'),
+    path('api/farmer/<int:farmer_id>/dashboard/', views.farmer_dashboard_api, name='farmer_dashboard_api'),
+    path('api/irrigation-schedule/', views.irrigation_schedule_api, name='irrigation_schedule_api'),
+    path('api/rotation-plan/', views.rotation_plan_api, name='rotation_plan_api'),
+    path('api/land-allocation/', views.land_allocation_api, name='land_allocation_api'),
+    path('api/yield-projection/', views.yield_projection_api, name='yield_projection_api'),
     
     # Debug endpoints
     path('api/debug/loans/', views.debug_loans_list, name='debug_loans_list'),
@@ -51,4 +58,7 @@ urlpatterns = [
     # User admin endpoints
     path('api/admin/users/', admin_users_list, name='admin_users_list'),
     path('api/admin/users/<int:id>/', admin_user_detail, name='admin_user_detail'),
+
+    # Farmer onboarding
+    path('api/admin/farmers/import/', admin_farmers_import, name='admin_farmers_import'),
 ] 
\ No newline at end of file
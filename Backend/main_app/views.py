@@ -1,31 +1,73 @@
-from django.http import JsonResponse
+from django.http import StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
+import csv
 import json
+from AgriGuide.db_routers import replica_reads
+from AgriGuide.renderers import FastJsonResponse as JsonResponse
 from .models import (
     District, Crop, CropEconomics, Technology, GovernmentScheme, 
     LoanOption, OrganicPractice, PestDisease, SoilCropCompatibility,
     FertilizerRecommendation, IrrigationRequirement, FarmerProfile,
-    FarmDetail, FarmingExperience, FinancialInfo, FarmerInterest
+    FarmDetail, FarmingExperience, FinancialInfo, FarmerInterest, EnrolledScheme,
+    SustainablePractice
 )
 import logging
+import tempfile
+import uuid
 from django.contrib.auth import get_user_model
 import datetime
+from collections import Counter
+from django.db import transaction
+from django.db.models import Count, Q
 from django.forms import model_to_dict
 from django.contrib.auth.decorators import login_required, user_passes_test
+from .irrigation_schedule import (
+    iter_irrigation_schedule, iter_ndjson, iter_ics, parse_growth_days, DEFAULT_SEASON_DAYS
+)
+from .rotation_planner import (
+    CANDIDATE_COLUMNS as ROTATION_CANDIDATE_COLUMNS, SEASONS, build_candidate, fallow_candidate, initial_nutrient_state, plan_rotations, season_for_month
+)
+from .yield_projection import (
+    crop_arrays, farm_arrays, project, projection_entry, soil_potential_matrix
+)
+from .farmer_similarity import similar_farmers
+from .catalog_versions import catalog_condition
+from .farmer_context import FarmerContext
+from .dashboard import run_sections
+from .fieldsets import Fieldset, InvalidFieldset
+from .pagination import InvalidPageRequest, paginate, set_page_headers
+from .prefix_search import user_search
+from .soil_types import resolve_soil_type, soil_family_ids
+from .farmer_attributes import CHALLENGES, IRRIGATION_SYSTEMS
+from .farmer_import import FarmerImporter, InvalidImportFile, read_rows
+from .farmer_features import (
+    DEFAULT_ANNUAL_INCOME, DEFAULT_BANK_ACCOUNT, DEFAULT_INSURANCE_COVERAGE, MONTHLY_INCOME, current_season,
+    rebuild_once
+)
+from .land_allocation import (
+    CANDIDATE_COLUMNS as ALLOCATION_CANDIDATE_COLUMNS, DEFAULT_MIN_CROPS, allocate_land_per_farm, allocation_candidate, available_labour_days,
+    available_water_mm, from_hectares, to_hectares
+)
 
 
 
 # Recommendation functions
 
-def get_crop_recommendations(farmer, farm_details):
+# Crop columns the crop engine neither scores on nor returns
+CROP_ENGINE_DEFERRED_COLUMNS = ('cultivation_practices',)
+
+def get_crop_recommendations(farmer, farm_details, context=None):
     """Generate crop recommendations based on farmer profile and farm details"""
+    context = context or FarmerContext(farmer)
     crop_scores = {}  # Store scores for each crop
     
     # Get district information
-    district_obj = District.objects.filter(name__iexact=farmer.district).first()
+    district_obj = context.features.district
     
-    # Get soil type
+    # Get soil type and every soil in its family
     soil_type = farm_details.soil_type
+    soil_id = getattr(farm_details, 'soil_id', None) or resolve_soil_type(soil_type)
+    soil_ids = soil_family_ids(soil_id)
     
     # Get NPK values if available
     n_value = getattr(farm_details, 'nitrogen_value', None)
@@ -38,7 +80,9 @@ def get_crop_recommendations(farmer, farm_details):
     
     # Check soil-crop compatibility by soil type only
     soil_compatibilities = SoilCropCompatibility.objects.filter(
-        soil_type__icontains=soil_type
+        soil__in=soil_ids
+    ).select_related('crop').defer(
+        *(f'crop__{name}' for name in CROP_ENGINE_DEFERRED_COLUMNS)
     ).order_by('-compatibility_score')
     
     # Initialize scores based on soil compatibility
@@ -51,15 +95,15 @@ def get_crop_recommendations(farmer, farm_details):
     # If no specific compatibility data, fall back to crops mentioning this soil type
     if not suitable_crops:
         fallback_crops = Crop.objects.filter(
-            suitable_soil_types__icontains=soil_type
-        )
+            soils__in=soil_ids
+        ).defer(*CROP_ENGINE_DEFERRED_COLUMNS).distinct()
         for crop in fallback_crops:
             suitable_crops.append(crop)
             crop_scores[crop] = 15  # Medium base score
     
     # If still no suitable crops, include all crops with a lower base score
     if not suitable_crops:
-        all_crops = Crop.objects.all()
+        all_crops = Crop.objects.defer(*CROP_ENGINE_DEFERRED_COLUMNS)
         for crop in all_crops:
             suitable_crops.append(crop)
             crop_scores[crop] = 5  # Lower base score
@@ -181,10 +225,10 @@ def get_crop_recommendations(farmer, farm_details):
                 pass  # Skip if pH range is not properly formatted
     
     # Consider irrigation requirements (0-15 points)
-    irrigation_systems = farm_details.irrigation_systems.split(', ') if farm_details.irrigation_systems else []
-    has_drip = 'Drip' in irrigation_systems
-    has_sprinkler = 'Sprinkler' in irrigation_systems
-    has_flood = 'Flood' in irrigation_systems
+    irrigation_systems = farm_details.irrigation_system_flags
+    has_drip = IRRIGATION_SYSTEMS.has(irrigation_systems, 'Drip')
+    has_sprinkler = IRRIGATION_SYSTEMS.has(irrigation_systems, 'Sprinkler')
+    has_flood = IRRIGATION_SYSTEMS.has(irrigation_systems, 'Flood')
     
     for crop in list(suitable_crops):
         # Check crop water requirements
@@ -205,7 +249,7 @@ def get_crop_recommendations(farmer, farm_details):
                 crop_scores[crop] = max(0, crop_scores.get(crop, 0) - 10)
     
     # Consider farmer's experience (0-10 points)
-    farmer_crops = FarmingExperience.objects.filter(farmer=farmer).values_list('crop__name', flat=True)
+    farmer_crops = context.features.crop_names
     for crop in list(suitable_crops):
         if crop.name in farmer_crops:
             crop_scores[crop] = crop_scores.get(crop, 0) + 10
@@ -213,12 +257,32 @@ def get_crop_recommendations(farmer, farm_details):
     # Find max score for normalization
     max_possible_score = 125  # Maximum theoretical score based on all criteria
     
-    # Consider economics and ROI (0-20 points)
+    # Project yield and income of every suitable crop on this farm in one pass
+    economics_by_crop = {e.crop_id: e for e in CropEconomics.objects.filter(crop__in=suitable_crops)}
+    projected_crops = [crop for crop in suitable_crops if crop.id in economics_by_crop]
+    projection = None
+    projection_column = {crop.id: j for j, crop in enumerate(projected_crops)}
+    if projected_crops:
+        crops_data = crop_arrays([(crop, economics_by_crop[crop.id]) for crop in projected_crops])
+        projection = project(
+            crops_data,
+            farm_arrays([district_obj]),
+            soil_potential_matrix(
+                [soil_id], crops_data['crop_id'],
+                SoilCropCompatibility.objects.filter(crop__in=projected_crops)
+            )
+        )
+    
+    # Consider projected economics and ROI (0-20 points)
     recommendations = []
     for crop in list(suitable_crops):
         try:
-            economics = CropEconomics.objects.get(crop=crop)
-            roi_score = min(20, float(economics.roi_percentage) / 5)  # Cap at 20 points
+            economics = economics_by_crop.get(crop.id)
+            if economics is None:
+                raise CropEconomics.DoesNotExist
+            j = projection_column[crop.id]
+            projected_roi = float(projection['roi_percentage'][0, j])
+            roi_score = min(20, max(0, projected_roi) / 5)  # Cap at 20 points
             crop_scores[crop] = crop_scores.get(crop, 0) + roi_score
             
             # Determine suitability based on total score
@@ -239,7 +303,7 @@ def get_crop_recommendations(farmer, farm_details):
                 # If the crop has varieties listed, use those
                 variety_list = [v.strip() for v in crop.varieties.split(',') if v.strip()]
                 # Get the compatibility score from soil compatibility if available
-                compatibility = SoilCropCompatibility.objects.filter(crop=crop, soil_type__icontains=soil_type).first()
+                compatibility = SoilCropCompatibility.objects.filter(crop=crop, soil__in=soil_ids).first()
                 score = compatibility.compatibility_score if compatibility else 7  # Default score if no compatibility record
                 recommended_varieties = [(variety, score, "Recommended for your soil type") 
                                         for variety in variety_list[:3]]
@@ -285,41 +349,38 @@ def get_crop_recommendations(farmer, farm_details):
             rainfall_min = getattr(economics, 'rainfall_range_min', rainfall_min)
             rainfall_max = getattr(economics, 'rainfall_range_max', rainfall_max)
             
-            # Add scoring for temperature and rainfall match if the farmer has a district set
-            if farmer.district:
-                try:
-                    district = District.objects.get(name__icontains=farmer.district)
-                    
-                    # Temperature match scoring (up to 10 points)
-                    district_avg_temp = (district.min_temp_c + district.max_temp_c) / 2
-                    crop_avg_temp = (temp_min + temp_max) / 2
-                    temp_diff = abs(district_avg_temp - crop_avg_temp)
-                    
-                    if temp_diff <= 2:
-                        crop_scores[crop] = crop_scores.get(crop, 0) + 10
-                    elif temp_diff <= 4:
-                        crop_scores[crop] = crop_scores.get(crop, 0) + 7
-                    elif temp_diff <= 6:
-                        crop_scores[crop] = crop_scores.get(crop, 0) + 4
-                    
-                    # Rainfall match scoring (up to 10 points)
-                    if rainfall_min <= district.avg_annual_rainfall_mm <= rainfall_max:
-                        crop_scores[crop] = crop_scores.get(crop, 0) + 10
-                    elif abs(district.avg_annual_rainfall_mm - (rainfall_min + rainfall_max) / 2) <= 200:
-                        crop_scores[crop] = crop_scores.get(crop, 0) + 5
-                    
-                    # Recalculate total and normalized scores after district adjustments
-                    total_score = crop_scores.get(crop, 0)
-                    normalized_score = min(100, (total_score / max_possible_score) * 100)
-                except District.DoesNotExist:
-                    pass
+            # Add scoring for temperature and rainfall match if the farmer's district is known
+            if district_obj:
+                district = district_obj
+                
+                # Temperature match scoring (up to 10 points)
+                district_avg_temp = (district.min_temp_c + district.max_temp_c) / 2
+                crop_avg_temp = (temp_min + temp_max) / 2
+                temp_diff = abs(district_avg_temp - crop_avg_temp)
+                
+                if temp_diff <= 2:
+                    crop_scores[crop] = crop_scores.get(crop, 0) + 10
+                elif temp_diff <= 4:
+                    crop_scores[crop] = crop_scores.get(crop, 0) + 7
+                elif temp_diff <= 6:
+                    crop_scores[crop] = crop_scores.get(crop, 0) + 4
+                
+                # Rainfall match scoring (up to 10 points)
+                if rainfall_min <= district.avg_annual_rainfall_mm <= rainfall_max:
+                    crop_scores[crop] = crop_scores.get(crop, 0) + 10
+                elif abs(district.avg_annual_rainfall_mm - (rainfall_min + rainfall_max) / 2) <= 200:
+                    crop_scores[crop] = crop_scores.get(crop, 0) + 5
+                
+                # Recalculate total and normalized scores after district adjustments
+                total_score = crop_scores.get(crop, 0)
+                normalized_score = min(100, (total_score / max_possible_score) * 100)
             
-            notes = getattr(economics, 'notes', crop.cultivation_practices)
+            notes = economics.notes
             
             # Get fertilizer recommendations for this crop and soil type
             fertilizer_data = FertilizerRecommendation.objects.filter(
                 crop=crop, 
-                soil_type__icontains=soil_type
+                soil__in=soil_ids
             ).first()
             
             # Get irrigation requirements for this crop
@@ -340,6 +401,7 @@ def get_crop_recommendations(farmer, farm_details):
                 'crop': crop,
                 'economics': economics,
                 'roi': economics.roi_percentage,
+                'projection': projection_entry(projection, 0, j),
                 'suitability': suitability,
                 'score': normalized_score,  # Use normalized score here
                 'recommended_varieties': recommended_varieties,
@@ -385,7 +447,7 @@ def get_crop_recommendations(farmer, farm_details):
             # Get fertilizer recommendations for this crop and soil type
             fertilizer_data = FertilizerRecommendation.objects.filter(
                 crop=crop, 
-                soil_type__icontains=soil_type
+                soil__in=soil_ids
             ).first()
             
             # Get irrigation requirements for this crop
@@ -425,8 +487,9 @@ def get_crop_recommendations(farmer, farm_details):
     # Return top 5 recommendations
     return recommendations[:5]
 
-def get_scheme_recommendations(farmer):
+def get_scheme_recommendations(farmer, context=None):
     """Generate government scheme recommendations based on farmer profile"""
+    context = context or FarmerContext(farmer)
     recommendations = []
     
     # Helper function for diversity promotion
@@ -459,39 +522,34 @@ def get_scheme_recommendations(farmer):
         district_availability__icontains='All Karnataka districts'
     )
     
-    # Add schemes for the specific district with fuzzy matching
+    # Add schemes for the specific district with fuzzy matching; only the
+    # district column is read to find them
     if farmer.district:
-        district_lower = farmer.district.lower()
-        for scheme in GovernmentScheme.objects.all():
-            if scheme not in district_schemes:
-                scheme_districts = scheme.district_availability.lower()
-                district_parts = district_lower.split()
-                # Consider it a match if any part of the district name is in the scheme's district availability
-                if any(part in scheme_districts for part in district_parts if len(part) > 3):
-                    district_schemes = district_schemes | GovernmentScheme.objects.filter(pk=scheme.pk)
-    
-    # Get farmer interests (use the most recent one if multiple exist)
-    interests = FarmerInterest.objects.filter(farmer=farmer).order_by('-id').first()
-    
-    # Get farm details for land ownership info
-    farm_details = FarmDetail.objects.filter(farmer=farmer).first()
-    land_ownership = farm_details.land_ownership if farm_details else 'Owned'
+        district_parts = farmer.district.lower().split()
+        matching_ids = [
+            pk for pk, scheme_districts in GovernmentScheme.objects.values_list('pk', 'district_availability')
+            # Consider it a match if any part of the district name is in the scheme's district availability
+            if any(part in scheme_districts.lower() for part in district_parts if len(part) > 3)
+        ]
+        if matching_ids:
+            district_schemes = district_schemes | GovernmentScheme.objects.filter(pk__in=matching_ids)
+    
+    features = context.features
+    
+    # Land ownership of the farm, 'Owned' if the farmer has none
+    land_ownership = features.land_ownership
     
     # Get farmer challenges
-    challenges = []
-    if interests and interests.challenges:
-        challenges = [c.strip() for c in interests.challenges.split(',') if c.strip()]
+    challenges = CHALLENGES.names_of(features.challenge_flags)
     
     # Get farmer crops
-    farmer_crops = list(FarmingExperience.objects.filter(farmer=farmer).values_list('crop__name', flat=True))
+    farmer_crops = features.crop_names
     
-    # Get financial information
-    financial_info = FinancialInfo.objects.filter(farmer=farmer).first()
+    # Get financial information (the features carry its columns under the same names)
+    financial_info = features if features.has_financial_info else None
     
     # Get enrolled schemes (to avoid recommending schemes the farmer is already part of)
-    enrolled_schemes = []
-    if financial_info and financial_info.govt_schemes_enrolled:
-        enrolled_schemes = [scheme.strip().lower() for scheme in financial_info.govt_schemes_enrolled.split(',')]
+    enrolled_schemes = [scheme.lower() for scheme in features.enrolled_schemes]
     
     # Challenge keyword mappings - expanded for better matching
     challenge_keywords = {
@@ -650,7 +708,7 @@ def get_scheme_recommendations(farmer):
                 context_reasons.append("Compatible with your bank account")
                 
             # Check for government scheme enrollment
-            if financial_info.govt_schemes_enrolled:
+            if enrolled_schemes:
                 # Tendency to diversify schemes
                 if 'complementary' in scheme.benefits.lower():
                     priority += 2
@@ -777,7 +835,9 @@ def get_scheme_recommendations(farmer):
             'reasons': context_reasons,  # Store reasons for recommendation
             'addresses_challenge': addresses_challenge,
             'designed_for': designed_for,
-            'matched_challenges': matched_challenges  # Use consistent key name that matches the API
+            'matched_challenges': matched_challenges,  # Use consistent key name that matches the API
+            'land_context': f"{land_ownership} Land",
+            'crop_context': crop_context
         })
     
         # Store all recommendations before filtering
@@ -820,8 +880,9 @@ def get_scheme_recommendations(farmer):
     # Apply diversity promotion before returning
     return add_diversity(recommendations, 5)
 
-def get_loan_recommendations(farmer, financial_info):
+def get_loan_recommendations(farmer, financial_info, context=None):
     """Generate loan recommendations based on farmer profile and financial info"""
+    context = context or FarmerContext(farmer)
     recommendations = []
     
     # Helper function for diversity promotion
@@ -851,51 +912,45 @@ def get_loan_recommendations(farmer, financial_info):
     # Get all loan options
     loan_options = LoanOption.objects.all()
     
-    # Get farm details for land ownership info
-    farm_details = FarmDetail.objects.filter(farmer=farmer).first()
-    land_ownership = farm_details.land_ownership if farm_details else 'Owned'
-    farm_size = farm_details.farm_size if farm_details else 0
+    features = context.features
+    
+    # Land ownership and size of the farm ('Owned' and 0 if the farmer has none)
+    land_ownership = features.land_ownership
+    farm_size = features.farm_size
     
     # Get farmer crops
-    farmer_crops = list(FarmingExperience.objects.filter(farmer=farmer).values_list('crop__name', flat=True))
-    farmer_crop_objects = list(FarmingExperience.objects.filter(farmer=farmer).values_list('crop', flat=True))
+    farmer_crops = features.crop_names
     
     # Get crop categories by combining crops with similar characteristics
     crop_categories = {}
-    if farmer_crop_objects:
-        for crop_id in farmer_crop_objects:
-            try:
-                crop = Crop.objects.get(id=crop_id)
-                crop_type = ""
-                
-                # Categorize crops
-                if crop.name.lower() in ['rice', 'wheat', 'maize', 'barley', 'sorghum', 'millet', 'oats', 'ragi']:
-                    crop_type = "cereal"
-                elif crop.name.lower() in ['chickpea', 'pigeon pea', 'lentil', 'kidney bean', 'mung bean', 'black gram', 'cowpea']:
-                    crop_type = "pulse"
-                elif crop.name.lower() in ['peanut', 'soybean', 'sunflower', 'mustard', 'sesame', 'flax', 'coconut']:
-                    crop_type = "oilseed"
-                elif crop.name.lower() in ['potato', 'onion', 'tomato', 'cabbage', 'cauliflower', 'carrot']:
-                    crop_type = "vegetable"
-                elif crop.name.lower() in ['mango', 'banana', 'papaya', 'apple', 'grape', 'citrus', 'watermelon']:
-                    crop_type = "fruit"
-                elif crop.name.lower() in ['cotton', 'jute', 'sugarcane', 'tobacco']:
-                    crop_type = "cash crop"
-                else:
-                    crop_type = "other"
-                
-                if crop_type in crop_categories:
-                    crop_categories[crop_type].append(crop.name)
-                else:
-                    crop_categories[crop_type] = [crop.name]
-            except Crop.DoesNotExist:
-                pass
+    if farmer_crops:
+        for crop_name in farmer_crops:
+            crop_type = ""
+
+            # Categorize crops
+            if crop_name.lower() in ['rice', 'wheat', 'maize', 'barley', 'sorghum', 'millet', 'oats', 'ragi']:
+                crop_type = "cereal"
+            elif crop_name.lower() in ['chickpea', 'pigeon pea', 'lentil', 'kidney bean', 'mung bean', 'black gram', 'cowpea']:
+                crop_type = "pulse"
+            elif crop_name.lower() in ['peanut', 'soybean', 'sunflower', 'mustard', 'sesame', 'flax', 'coconut']:
+                crop_type = "oilseed"
+            elif crop_name.lower() in ['potato', 'onion', 'tomato', 'cabbage', 'cauliflower', 'carrot']:
+                crop_type = "vegetable"
+            elif crop_name.lower() in ['mango', 'banana', 'papaya', 'apple', 'grape', 'citrus', 'watermelon']:
+                crop_type = "fruit"
+            elif crop_name.lower() in ['cotton', 'jute', 'sugarcane', 'tobacco']:
+                crop_type = "cash crop"
+            else:
+                crop_type = "other"
+
+            if crop_type in crop_categories:
+                crop_categories[crop_type].append(crop_name)
+            else:
+                crop_categories[crop_type] = [crop_name]
     
     # Get farmer challenges for urgency detection
-    farmer_interests = FarmerInterest.objects.filter(farmer=farmer).order_by('-id').first()
-    farmer_challenges = []
-    if farmer_interests and farmer_interests.challenges:
-        farmer_challenges = [c.strip().lower() for c in farmer_interests.challenges.split(',') if c.strip()]
+    challenge_flags = features.challenge_flags
+    farmer_challenges = [challenge.lower() for challenge in CHALLENGES.names_of(challenge_flags)]
     
     # Challenge keyword mappings - expanded for better matching
     challenge_keywords = {
@@ -922,44 +977,21 @@ def get_loan_recommendations(farmer, financial_info):
     }
     
     # Get enrolled government schemes for subsidy matching
-    enrolled_schemes = []
-    if financial_info.govt_schemes_enrolled:
-        enrolled_schemes = [scheme.strip().lower() for scheme in financial_info.govt_schemes_enrolled.split(',') if scheme.strip()]
+    enrolled_schemes = [scheme.lower() for scheme in features.enrolled_schemes]
     
     # Calculate estimated monthly income based on annual income
-    monthly_income = 0
-    if financial_info.annual_income == 'below_50k':
-        monthly_income = 4000  # 48,000 per year
-    elif financial_info.annual_income == '50k_1l':
-        monthly_income = 6000  # 72,000 per year
-    elif financial_info.annual_income == '1l_3l':
-        monthly_income = 16000  # 2,00,000 per year
-    elif financial_info.annual_income == '3l_5l':
-        monthly_income = 33000  # 4,00,000 per year
-    elif financial_info.annual_income == 'above_5l':
-        monthly_income = 50000  # 6,00,000 per year
+    monthly_income = MONTHLY_INCOME.get(financial_info.annual_income, 0)
     
     # Estimate loan repayment capacity (50% of monthly income)
     repayment_capacity = monthly_income * 0.5
     
     # Crop seasonality data for cash flow matching
-    current_month = datetime.datetime.now().month
-    current_season = ""
-    if 6 <= current_month <= 9:  # June to September
-        current_season = "kharif"
-    elif 10 <= current_month <= 1:  # October to January
-        current_season = "rabi"
-    else:  # February to May
-        current_season = "zaid"
+    season = current_season()
     
     # Determine if farmer has seasonal cash flow needs based on crops
-    seasonal_cash_need = False
-    if farmer_crops:
-        for crop in farmer_crops:
-            crop_obj = Crop.objects.filter(name=crop).first()
-            if crop_obj and crop_obj.growing_season and current_season.lower() in crop_obj.growing_season.lower():
-                seasonal_cash_need = True
-                break
+    seasonal_cash_need = any(
+        growing_season and season in growing_season.lower() for growing_season in features.crop_seasons
+    )
     
     # Prioritize loans based on farmer's financial situation
     for loan in loan_options:
@@ -1101,7 +1133,7 @@ def get_loan_recommendations(farmer, financial_info):
             
             # Check for no collateral loans (important for farmers without assets)
             if 'no collateral' in special_features_lower or 'collateral free' in special_features_lower:
-                if 'Collateral Requirements' in farmer_challenges:
+                if CHALLENGES.has(challenge_flags, 'Collateral Requirements'):
                     priority += 5
                     loan_relevance_score += 30
                     reasons.append("No collateral required - addresses your challenge")
@@ -1112,7 +1144,7 @@ def get_loan_recommendations(farmer, financial_info):
         
             # Check for flexible repayment options
             if 'flexible repayment' in special_features_lower or 'repayment flexibility' in special_features_lower:
-                if 'Loan Repayment Flexibility' in farmer_challenges:
+                if CHALLENGES.has(challenge_flags, 'Loan Repayment Flexibility'):
                     priority += 5
                     loan_relevance_score += 30
                     reasons.append("Offers flexible repayment options - matches your needs")
@@ -1129,7 +1161,7 @@ def get_loan_recommendations(farmer, financial_info):
                 
             # Check for minimal documentation
             if 'minimal documentation' in special_features_lower or 'simplified' in special_features_lower:
-                if 'Documentation Complexity' in farmer_challenges:
+                if CHALLENGES.has(challenge_flags, 'Documentation Complexity'):
                     priority += 5
                     loan_relevance_score += 30
                     reasons.append("Simplified documentation - addresses your challenge")
@@ -1158,10 +1190,10 @@ def get_loan_recommendations(farmer, financial_info):
         
         # Check if loan matches seasonal cash flow needs
         if seasonal_cash_need:
-            if 'seasonal' in loan_text or current_season.lower() in loan_text:
+            if 'seasonal' in loan_text or season in loan_text:
                 priority += 4
                 loan_relevance_score += 25
-                reasons.append(f"Well-timed for your {current_season} season needs")
+                reasons.append(f"Well-timed for your {season} season needs")
             
             # Special check for pre-harvest loans during growing season
             if 'pre-harvest' in loan_text or 'crop loan' in loan_text:
@@ -1301,23 +1333,24 @@ def get_loan_category(loan_type):
     else:
         return 'Agricultural Loan'
 
-def get_technology_recommendations(farmer, farm_details, interests):
+def get_technology_recommendations(farmer, farm_details, interests, context=None):
     """Generate technology recommendations based on farmer profile, farm details and interests"""
+    context = context or FarmerContext(farmer)
     recommendations = []
     
     # Get all technologies
     technologies = Technology.objects.all()
     
+    features = context.features
+    
     # Get farmer crops
-    farmer_crops = FarmingExperience.objects.filter(farmer=farmer).values_list('crop__name', flat=True)
+    farmer_crops = features.crop_names
     
     # Get land ownership
-    land_ownership = farm_details.land_ownership
+    land_ownership = features.land_ownership
     
     # Get farmer challenges
-    challenges = []
-    if interests:
-        challenges = [c.strip() for c in interests.challenges.split(',') if c.strip()]
+    challenges = CHALLENGES.names_of(features.challenge_flags)
     
     # Prioritize technologies based on challenges and crops
     prioritized_technologies = []
@@ -1441,7 +1474,247 @@ def get_technology_recommendations(farmer, farm_details, interests):
     
     return recommendations
 
+def default_financial_info(farmer):
+    """Unsaved financial info used for farmers who have not filled theirs in"""
+    # Set by id: assigning the farmer asks the router where the new row will
+    # be written, which sends the rest of the request's reads to the primary
+    return FinancialInfo(
+        farmer_id=farmer.id,
+        annual_income=DEFAULT_ANNUAL_INCOME,  # Default middle income
+        bank_account=DEFAULT_BANK_ACCOUNT,
+        insurance_coverage=DEFAULT_INSURANCE_COVERAGE
+    )
+
+def format_crop_recommendation(rec, farm_details):
+    """Crop recommendation in the shape the frontend expects"""
+    crop = rec['crop']
+
+    # Get details needed for the frontend
+    recommended_varieties = []
+    for variety_tuple in rec.get('recommended_varieties', []):
+        if variety_tuple and len(variety_tuple) > 0:
+            recommended_varieties.append(variety_tuple[0])
+
+    # Format irrigation data
+    irrigation_data = []
+    for irr in rec.get('irrigation', []):
+        irrigation_data.append({
+            'growth_stage': irr.growth_stage,
+            'water_requirement_mm': irr.water_requirement_mm,
+            'irrigation_interval_days': irr.irrigation_interval_days,
+            'critical_stages': irr.critical_stages
+        })
+
+    # Build the crop recommendation data
+    crop_data = {
+        'id': crop.id,
+        'name': crop.name,
+        'matchPercentage': min(95, int(rec['score']) + 15),
+        'suitability': rec['suitability'],
+        'soilMatch': True if rec['score'] > 70 else False,
+        'npkMatch': True if farm_details.nitrogen_value and farm_details.phosphorus_value and farm_details.potassium_value else False,
+        'climateMatch': True if rec['score'] > 60 else False,
+        'score': min(95, int(rec['score']) + 15),
+        'details': {
+            'bestFor': farm_details.soil_type,
+            'season': crop.growing_season,
+            'waterRequirement': rec['water_requirement'],
+            'growthPeriod': "3-4 months",  # Default value
+            'temperatureRange': f"{crop.min_temp_c}°C - {crop.max_temp_c}°C",
+            'rainfallRange': f"{rec.get('rainfall_min', 0)} - {rec.get('rainfall_max', 0)} mm",
+            'droughtResistance': rec.get('drought_resistance', 'Medium'),
+            'recommendedVarieties': recommended_varieties,
+            'irrigation': irrigation_data
+        }
+    }
+
+    # Add economics data if available
+    try:
+        economics = CropEconomics.objects.get(crop=crop)
+        crop_data['details']['marketPrice'] = f"₹{economics.market_price_per_quintal}/quintal" if economics.market_price_per_quintal else 'Not available'
+    except CropEconomics.DoesNotExist:
+        # Set default values if no economics data
+        crop_data['details']['marketPrice'] = 'Not available'
+
+    # Add detailed soil analysis data
+    # Get pH range from crop model
+    crop_data['details']['phRange'] = crop.ph_range
+
+    # Get suitable soil types
+    crop_data['details']['suitableSoilTypes'] = crop.suitable_soil_types
+    crop_data['details']['projection'] = rec.get('projection')
+
+    # Get soil compatibility scores for different soil types
+    soil_compat_scores = []
+    soil_compatibilities = SoilCropCompatibility.objects.filter(crop=crop)
+
+    if soil_compatibilities.exists():
+        for sc in soil_compatibilities:
+            soil_compat_scores.append({
+                'soilType': sc.soil_type,
+                'score': sc.compatibility_score,
+                'yieldPotential': sc.yield_potential_percentage
+            })
+
+    crop_data['details']['soilCompatibilityScores'] = soil_compat_scores
+
+    # Add fertilizer recommendation data if available
+    fertilizer_obj = rec.get('fertilizer')
+    if fertilizer_obj:
+        crop_data['fertilizer'] = {
+            'soilType': fertilizer_obj.soil_type,
+            'n_kg_per_ha': fertilizer_obj.n_kg_per_ha,
+            'p_kg_per_ha': fertilizer_obj.p_kg_per_ha,
+            'k_kg_per_ha': fertilizer_obj.k_kg_per_ha,
+            'urea_kg_per_ha': fertilizer_obj.urea_kg_per_ha,
+            'dap_kg_per_ha': fertilizer_obj.dap_kg_per_ha,
+            'mop_kg_per_ha': fertilizer_obj.mop_kg_per_ha,
+            'npk_complex_kg_per_ha': fertilizer_obj.npk_complex_kg_per_ha,
+            'organic_alternatives': fertilizer_obj.organic_alternatives,
+            'application_schedule': fertilizer_obj.application_schedule,
+        }
+    else:
+        crop_data['fertilizer'] = None
+    
+    return crop_data
+
+def format_scheme_recommendation(rec):
+    """Scheme recommendation in the shape the frontend expects"""
+    scheme = rec['scheme']
+
+    # Build the scheme recommendation data
+    scheme_data = {
+        'id': scheme.id,
+        'name': scheme.name,
+        'implementing_agency': scheme.implementing_agency,
+        'relevance': rec['relevance'],
+        'land_context': rec['land_context'],
+        'crop_context': rec['crop_context'],
+        'details': {
+            'eligibility_criteria': scheme.eligibility_criteria,
+            'benefits': scheme.benefits,
+            'application_process': scheme.application_process,
+            'documents_required': scheme.documents_required,
+            'district_availability': scheme.district_availability,
+            'crop_applicability': scheme.crop_applicability,
+            'official_website': scheme.official_website,
+            'detailed_description': scheme.detailed_description,
+            'how_to_apply': scheme.how_to_apply
+        }
+    }
+    
+    return scheme_data
+
+def format_loan_recommendation(rec):
+    """Loan recommendation in the shape the frontend expects"""
+    loan = rec['loan']
+
+    # Build the loan recommendation data
+    loan_data = {
+        'id': loan.id,
+        'name': loan.name,
+        'provider': loan.provider,
+        'loan_type': loan.loan_type,
+        'interest_rate': loan.interest_rate,
+        'relevance': rec['relevance'],
+        'details': {
+            'max_amount': loan.max_amount,
+            'tenure': loan.tenure,
+            'eligibility': loan.eligibility,
+            'documents_required': loan.documents_required,
+            'processing_time': loan.processing_time,
+            'special_features': loan.special_features,
+            'benefits': loan.benefits  # Add benefits to the response
+        },
+        'reasons': rec.get('reasons', []),
+        'loan_category': rec.get('loan_category', 'Agricultural Loan'),
+        'processing_speed': rec.get('processing_speed', 'Normal')
+    }
+    
+    return loan_data
+
+def format_technology_recommendation(rec):
+    """Technology recommendation in the shape the frontend expects"""
+    tech = rec['technology']
+
+    # Build the technology recommendation data
+    tech_data = {
+        'id': tech.id,
+        'name': tech.name,
+        'category': tech.category,
+        'category_display': dict(Technology.CATEGORY_CHOICES).get(tech.category, tech.category),
+        'relevance': rec['relevance'],
+        'reasoning': rec['reasoning'],
+        'ownership_context': rec['ownership_context'],
+        'difficulty': rec['difficulty'],
+        'details': {
+            'suitable_crops': tech.suitable_crops,
+            'implementation_cost': tech.implementation_cost,
+            'roi_percentage': tech.roi_percentage,
+            'technical_requirements': tech.technical_requirements,
+            'training_needs': tech.training_needs,
+            'supplier_contacts': tech.supplier_contacts,
+            'district_availability': tech.district_availability
+        }
+    }
+    
+    return tech_data
+
+def format_farmer_profile(farmer, context=None):
+    """Farmer profile summary in the shape the frontend expects"""
+    context = context or FarmerContext(farmer)
+    farm_details = context.farm_details
+    experiences = context.experiences
+    financial_info = context.financial_info
+    interests = context.interests
+
+    # Extract crop names
+    cultivated_crops = []
+    for exp in experiences:
+        if exp.crop:
+            cultivated_crops.append(exp.crop.name)
+
+    # Build response
+    response_data = {
+        'personal': {
+            'firstName': farmer.first_name,
+            'lastName': farmer.last_name,
+            'fullName': f"{farmer.first_name} {farmer.last_name}".strip(),
+            'age': farmer.age,
+            'gender': farmer.gender,
+            'district': farmer.district,
+            'state': farmer.state
+        },
+        'farm': {
+            'size': farm_details.farm_size if farm_details else None,
+            'soilType': farm_details.soil_type if farm_details else None,
+            'irrigationSources': farm_details.irrigation_sources.split(', ') if farm_details and farm_details.irrigation_sources else [],
+            'irrigationSystems': farm_details.irrigation_systems.split(', ') if farm_details and farm_details.irrigation_systems else [],
+            'landOwnership': farm_details.land_ownership if farm_details else None,
+            'mainCrops': cultivated_crops
+        }
+    }
+
+    # Add financial info if available
+    if financial_info:
+        response_data['financial'] = {
+            'annualIncome': financial_info.annual_income,
+            'govtSchemesEnrolled': financial_info.govt_schemes_enrolled.split(',') if financial_info.govt_schemes_enrolled else [],
+            'bankAccount': financial_info.bank_account,
+            'insuranceCoverage': financial_info.insurance_coverage
+        }
+
+    # Add interests and challenges if available
+    if interests:
+        response_data['interests'] = {
+            'sustainablePractices': interests.sustainable_practices.split(',') if interests.sustainable_practices else [],
+            'challenges': interests.challenges.split(',') if interests.challenges else []
+        }
+    
+    return response_data
+
 @csrf_exempt
+@replica_reads
 def crop_recommendations_api(request):
     """API endpoint for crop recommendations to be used by React frontend"""
     logger = logging.getLogger(__name__)
@@ -1584,97 +1857,9 @@ def crop_recommendations_api(request):
             logger.debug(f"Got {len(recommendations)} recommendations")
             
             # Format recommendations for JSON response
-            formatted_recommendations = []
-            for rec in recommendations:
-                crop = rec['crop']
-                
-                # Get details needed for the frontend
-                recommended_varieties = []
-                for variety_tuple in rec.get('recommended_varieties', []):
-                    if variety_tuple and len(variety_tuple) > 0:
-                        recommended_varieties.append(variety_tuple[0])
-                
-                # Format irrigation data
-                irrigation_data = []
-                for irr in rec.get('irrigation', []):
-                    irrigation_data.append({
-                        'growth_stage': irr.growth_stage,
-                        'water_requirement_mm': irr.water_requirement_mm,
-                        'irrigation_interval_days': irr.irrigation_interval_days,
-                        'critical_stages': irr.critical_stages
-                    })
-                
-                # Build the crop recommendation data
-                crop_data = {
-                    'id': crop.id,
-                    'name': crop.name,
-                    'matchPercentage': min(95, int(rec['score']) + 15),
-                    'suitability': rec['suitability'],
-                    'soilMatch': True if rec['score'] > 70 else False,
-                    'npkMatch': True if farm_details.nitrogen_value and farm_details.phosphorus_value and farm_details.potassium_value else False,
-                    'climateMatch': True if rec['score'] > 60 else False,
-                    'score': min(95, int(rec['score']) + 15),
-                    'details': {
-                        'bestFor': farm_details.soil_type,
-                        'season': crop.growing_season,
-                        'waterRequirement': rec['water_requirement'],
-                        'growthPeriod': "3-4 months",  # Default value
-                        'temperatureRange': f"{crop.min_temp_c}°C - {crop.max_temp_c}°C",
-                        'rainfallRange': f"{rec.get('rainfall_min', 0)} - {rec.get('rainfall_max', 0)} mm",
-                        'droughtResistance': rec.get('drought_resistance', 'Medium'),
-                        'recommendedVarieties': recommended_varieties,
-                        'irrigation': irrigation_data
-                    }
-                }
-                
-                # Add economics data if available
-                try:
-                    economics = CropEconomics.objects.get(crop=crop)
-                    crop_data['details']['marketPrice'] = f"₹{economics.market_price_per_quintal}/quintal" if economics.market_price_per_quintal else 'Not available'
-                except CropEconomics.DoesNotExist:
-                    # Set default values if no economics data
-                    crop_data['details']['marketPrice'] = 'Not available'
-
-                # Add detailed soil analysis data
-                # Get pH range from crop model
-                crop_data['details']['phRange'] = crop.ph_range
-                
-                # Get suitable soil types
-                crop_data['details']['suitableSoilTypes'] = crop.suitable_soil_types
-                
-                # Get soil compatibility scores for different soil types
-                soil_compat_scores = []
-                soil_compatibilities = SoilCropCompatibility.objects.filter(crop=crop)
-                
-                if soil_compatibilities.exists():
-                    for sc in soil_compatibilities:
-                        soil_compat_scores.append({
-                            'soilType': sc.soil_type,
-                            'score': sc.compatibility_score,
-                            'yieldPotential': sc.yield_potential_percentage
-                        })
-                
-                crop_data['details']['soilCompatibilityScores'] = soil_compat_scores
-                
-                # Add fertilizer recommendation data if available
-                fertilizer_obj = rec.get('fertilizer')
-                if fertilizer_obj:
-                    crop_data['fertilizer'] = {
-                        'soilType': fertilizer_obj.soil_type,
-                        'n_kg_per_ha': fertilizer_obj.n_kg_per_ha,
-                        'p_kg_per_ha': fertilizer_obj.p_kg_per_ha,
-                        'k_kg_per_ha': fertilizer_obj.k_kg_per_ha,
-                        'urea_kg_per_ha': fertilizer_obj.urea_kg_per_ha,
-                        'dap_kg_per_ha': fertilizer_obj.dap_kg_per_ha,
-                        'mop_kg_per_ha': fertilizer_obj.mop_kg_per_ha,
-                        'npk_complex_kg_per_ha': fertilizer_obj.npk_complex_kg_per_ha,
-                        'organic_alternatives': fertilizer_obj.organic_alternatives,
-                        'application_schedule': fertilizer_obj.application_schedule,
-                    }
-                else:
-                    crop_data['fertilizer'] = None
-                
-                formatted_recommendations.append(crop_data)
+            formatted_recommendations = [
+                format_crop_recommendation(rec, farm_details) for rec in recommendations
+            ]
             
             response = JsonResponse({
                 'success': True,
@@ -1700,6 +1885,7 @@ def crop_recommendations_api(request):
     return response
 
 @csrf_exempt
+@replica_reads
 def govt_schemes_api(request):
     """API endpoint for government scheme recommendations to be used by React frontend"""
     import logging
@@ -1749,32 +1935,9 @@ def govt_schemes_api(request):
             logger.debug(f"Got {len(recommendations)} recommendations")
             
             # Format recommendations for JSON response
-            formatted_recommendations = []
-            for rec in recommendations:
-                scheme = rec['scheme']
-                
-                # Build the scheme recommendation data
-                scheme_data = {
-                    'id': scheme.id,
-                    'name': scheme.name,
-                    'implementing_agency': scheme.implementing_agency,
-                    'relevance': rec['relevance'],
-                    'land_context': rec['land_context'],
-                    'crop_context': rec['crop_context'],
-                    'details': {
-                        'eligibility_criteria': scheme.eligibility_criteria,
-                        'benefits': scheme.benefits,
-                        'application_process': scheme.application_process,
-                        'documents_required': scheme.documents_required,
-                        'district_availability': scheme.district_availability,
-                        'crop_applicability': scheme.crop_applicability,
-                        'official_website': scheme.official_website,
-                        'detailed_description': scheme.detailed_description,
-                        'how_to_apply': scheme.how_to_apply
-                    }
-                }
-                
-                formatted_recommendations.append(scheme_data)
+            formatted_recommendations = [
+                format_scheme_recommendation(rec) for rec in recommendations
+            ]
             
             response = JsonResponse({
                 'success': True,
@@ -1800,6 +1963,7 @@ def govt_schemes_api(request):
     return response
 
 @csrf_exempt
+@replica_reads
 def loan_options_api(request):
     """API endpoint for loan options recommendations to be used by React frontend"""
     import logging
@@ -1864,44 +2028,15 @@ def loan_options_api(request):
             else:
                 # Create temporary financial info
                 logger.debug("Creating temporary financial info for recommendations")
-                temp_financial_info = FinancialInfo(
-                    farmer=farmer,
-                    annual_income='1l_3l',  # Default middle income
-                    bank_account=True,
-                    insurance_coverage=False
-                )
+                temp_financial_info = default_financial_info(farmer)
                 recommendations = get_loan_recommendations(farmer, temp_financial_info)
             
             logger.debug(f"Got {len(recommendations)} recommendations")
             
             # Format recommendations for JSON response
-            formatted_recommendations = []
-            for rec in recommendations:
-                loan = rec['loan']
-                
-                # Build the loan recommendation data
-                loan_data = {
-                    'id': loan.id,
-                    'name': loan.name,
-                    'provider': loan.provider,
-                    'loan_type': loan.loan_type,
-                    'interest_rate': loan.interest_rate,
-                    'relevance': rec['relevance'],
-                    'details': {
-                        'max_amount': str(loan.max_amount),
-                        'tenure': loan.tenure,
-                        'eligibility': loan.eligibility,
-                        'documents_required': loan.documents_required,
-                        'processing_time': loan.processing_time,
-                        'special_features': loan.special_features,
-                        'benefits': loan.benefits  # Add benefits to the response
-                    },
-                    'reasons': rec.get('reasons', []),
-                    'loan_category': rec.get('loan_category', 'Agricultural Loan'),
-                    'processing_speed': rec.get('processing_speed', 'Normal')
-                }
-                
-                formatted_recommendations.append(loan_data)
+            formatted_recommendations = [
+                format_loan_recommendation(rec) for rec in recommendations
+            ]
             
             response = JsonResponse({
                 'success': True,
@@ -1931,6 +2066,7 @@ def loan_options_api(request):
     return response
 
 @csrf_exempt
+@replica_reads
 def technology_api(request):
     """API endpoint for technology recommendations to be used by React frontend"""
     import logging
@@ -2078,32 +2214,9 @@ def technology_api(request):
             logger.debug(f"Got {len(recommendations)} recommendations")
             
             # Format recommendations for JSON response
-            formatted_recommendations = []
-            for rec in recommendations:
-                tech = rec['technology']
-                
-                # Build the technology recommendation data
-                tech_data = {
-                    'id': tech.id,
-                    'name': tech.name,
-                    'category': tech.category,
-                    'category_display': dict(Technology.CATEGORY_CHOICES).get(tech.category, tech.category),
-                    'relevance': rec['relevance'],
-                    'reasoning': rec['reasoning'],
-                    'ownership_context': rec['ownership_context'],
-                    'difficulty': rec['difficulty'],
-                    'details': {
-                        'suitable_crops': tech.suitable_crops,
-                        'implementation_cost': tech.implementation_cost,
-                        'roi_percentage': tech.roi_percentage,
-                        'technical_requirements': tech.technical_requirements,
-                        'training_needs': tech.training_needs,
-                        'supplier_contacts': tech.supplier_contacts,
-                        'district_availability': tech.district_availability
-                    }
-                }
-                
-                formatted_recommendations.append(tech_data)
+            formatted_recommendations = [
+                format_technology_recommendation(rec) for rec in recommendations
+            ]
             
             response = JsonResponse({
                 'success': True,
@@ -2128,232 +2241,166 @@ def technology_api(request):
     response['Access-Control-Allow-Origin'] = '*'
     return response
 
+def profile_list(value):
+    """Text of a list field of the profile form, joined with ", " if sent as a list"""
+    return ', '.join(value) if isinstance(value, list) else str(value)
+
+def parse_farm_size(raw):
+    """(size, unit) of a farm size such as "5 Acre"; unit is None when not given"""
+    parts = (raw or '').split()
+    try:
+        size = float(parts[0])
+    except (ValueError, IndexError):
+        return 0, None
+    return size, parts[1] if len(parts) > 1 else None
+
+def lock_farmer(farmer_id, external_id, fields):
+    """
+    Create or update the farmer with farmer_id, else the one saved under
+    external_id, holding its row lock. A farmer found by its id keeps its own
+    external_id.
+    """
+    farmers = FarmerProfile.objects.select_for_update()
+    farmer = farmers.filter(id=farmer_id).first() if farmer_id else None
+    created = False
+    if farmer is None:
+        if external_id:
+            farmer, created = farmers.get_or_create(external_id=external_id, defaults=fields)
+        else:
+            farmer, created = FarmerProfile.objects.create(**fields), True
+    if not created:
+        for field, value in fields.items():
+            setattr(farmer, field, value)
+        farmer.save()
+    return farmer
+
 # New API endpoint for saving farmer profile data
 @csrf_exempt
 def save_farmer_profile_api(request):
-    """API endpoint to save or update farmer profile information"""
-    if request.method == 'POST':
-        try:
-            # Parse request data
-            data = json.loads(request.body)
-            print("Received profile data:", data)
-            
-            # Extract personal info
-            personal_data = data.get('personal', {})
-            first_name = personal_data.get('firstName', '')
-            last_name = personal_data.get('lastName', '')
-            age = personal_data.get('age', None)
-            gender = personal_data.get('gender', 'Male')
-            district = personal_data.get('district', '')
-            state = personal_data.get('state', '')
-            pincode = personal_data.get('pincode', '')
-            
-            # Extract farm details
-            farm_data = data.get('farm', {})
-            farm_size_raw = farm_data.get('size', '0 Acre')
-            soil_type = farm_data.get('soilType', '')
-            irrigation_sources = farm_data.get('irrigationSources', [])
-            irrigation_systems = farm_data.get('irrigationSystems', [])
-            land_ownership = farm_data.get('landOwnership', 'Owned')
-            
-            # Extract financial info
-            financial_data = data.get('financial', {})
-            annual_income = financial_data.get('annualIncome', '')
-            govt_schemes_enrolled = financial_data.get('governmentSchemes', [])
-            bank_account = financial_data.get('bankAccount', 'No')
-            crop_insurance = financial_data.get('cropInsurance', 'No')
-            
-            # Extract interests and preferences
-            preferences_data = data.get('preferences', {})
-            seasonal_preference = preferences_data.get('seasonalPreference', [])
-            organic_farming = preferences_data.get('organicFarming', False)
-            sustainable_practices = preferences_data.get('sustainablePractices', [])
-            
-            # Extract challenges - this is a critical part that was causing issues
-            challenges = data.get('challenges', [])
-            print("Challenges to save:", challenges)
-            
-            # Check if farmer with this name already exists
-            farmer_id = data.get('id')
-            farmer = None
-            
-            if farmer_id:
-                try:
-                    farmer = FarmerProfile.objects.get(id=farmer_id)
-                    print(f"Found existing farmer with ID {farmer_id}")
-                except FarmerProfile.DoesNotExist:
-                    print(f"No farmer found with ID {farmer_id}")
-                    farmer = None
-            
-            # If no farmer_id or farmer not found, try to find by name
-            if not farmer:
-                matching_farmers = FarmerProfile.objects.filter(
-                    first_name=first_name,
-                    last_name=last_name
-                )
-                
-                if matching_farmers.exists():
-                    farmer = matching_farmers.first()
-                    print(f"Found farmer by name: {farmer.id}")
-            
-            # If still no farmer, create new one
-            if not farmer:
-                farmer = FarmerProfile.objects.create(
-                    first_name=first_name,
-                    last_name=last_name,
-                    age=age,
-                    gender=gender,
-                    district=district,
-                    state=state,
-                    preferred_season=', '.join(seasonal_preference) if seasonal_preference else '',
-                    pincode=pincode
-                )
-                print(f"Created new farmer with ID: {farmer.id}")
-            else:
-                # Update existing farmer with new data
-                farmer.first_name = first_name
-                farmer.last_name = last_name
-                farmer.age = age
-                farmer.gender = gender
-                farmer.district = district
-                farmer.state = state
-                farmer.preferred_season = ', '.join(seasonal_preference) if seasonal_preference else ''
-                farmer.pincode = pincode
-                farmer.save()
-            
-            # Process farm details
-            try:
-                farm_detail = FarmDetail.objects.get(farmer=farmer)
-                print(f"Found existing farm details for farmer {farmer.id}")
-            except FarmDetail.DoesNotExist:
-                farm_detail = FarmDetail(farmer=farmer)
-                print(f"Creating new farm details for farmer {farmer.id}")
-            
-            # Parse farm_size_raw to extract numeric part
-            if farm_size_raw:
-                try:
-                    # Extract the numeric part from the string (e.g., "5 Acre" -> 5)
-                    farm_size_numeric = float(farm_size_raw.split()[0])
-                    farm_detail.farm_size = farm_size_numeric
-                    
-                    # Extract the unit if available (e.g., "5 Acre" -> "Acre")
-                    parts = farm_size_raw.split()
-                    if len(parts) > 1:
-                        farm_detail.unit = parts[1]
-                except (ValueError, IndexError):
-                    # If parsing fails, use a default value
-                    farm_detail.farm_size = 0
-                    print(f"Could not parse farm size: {farm_size_raw}")
-            else:
-                farm_detail.farm_size = 0
-                
-            farm_detail.soil_type = soil_type
-            
-            if isinstance(irrigation_sources, list):
-                farm_detail.irrigation_sources = ', '.join(irrigation_sources)
-            else:
-                farm_detail.irrigation_sources = str(irrigation_sources)
-                
-            if isinstance(irrigation_systems, list):
-                farm_detail.irrigation_systems = ', '.join(irrigation_systems)
-            else:
-                farm_detail.irrigation_systems = str(irrigation_systems)
-                
-            farm_detail.land_ownership = land_ownership
-            
-            # Add NPK and pH values if provided
-            if 'nitrogenValue' in farm_data and farm_data['nitrogenValue']:
-                farm_detail.nitrogen_value = float(farm_data['nitrogenValue'])
-            if 'phosphorusValue' in farm_data and farm_data['phosphorusValue']:
-                farm_detail.phosphorus_value = float(farm_data['phosphorusValue'])
-            if 'potassiumValue' in farm_data and farm_data['potassiumValue']:
-                farm_detail.potassium_value = float(farm_data['potassiumValue'])
-            if 'soilPh' in farm_data and farm_data['soilPh']:
-                farm_detail.ph_value = float(farm_data['soilPh'])
-                
-            farm_detail.save()
-            
-            # Process financial info
-            try:
-                financial_info = FinancialInfo.objects.get(farmer=farmer)
-                print(f"Found existing financial info for farmer {farmer.id}")
-            except FinancialInfo.DoesNotExist:
-                financial_info = FinancialInfo(farmer=farmer)
-                print(f"Creating new financial info for farmer {farmer.id}")
-            
-            financial_info.annual_income = annual_income
-            
-            if isinstance(govt_schemes_enrolled, list):
-                financial_info.govt_schemes_enrolled = ', '.join(govt_schemes_enrolled)
-            else:
-                financial_info.govt_schemes_enrolled = str(govt_schemes_enrolled)
-                
-            financial_info.bank_account = bank_account == 'Yes'
-            financial_info.insurance_coverage = crop_insurance == 'Yes'
-            financial_info.save()
-            
-            # Process interests and challenges - CRITICAL FIX HERE
-            try:
-                farmer_interest = FarmerInterest.objects.filter(farmer=farmer).order_by('-id').first()
-                if not farmer_interest:
-                    farmer_interest = FarmerInterest(farmer=farmer)
-                    print(f"Creating new interests for farmer {farmer.id}")
-            except Exception as e:
-                farmer_interest = FarmerInterest(farmer=farmer)
-                print(f"Exception in farmer interests, creating new: {str(e)}")
-            
-            if isinstance(sustainable_practices, list):
-                farmer_interest.sustainable_practices = ', '.join(sustainable_practices)
-            else:
-                farmer_interest.sustainable_practices = str(sustainable_practices)
-                
-            # IMPORTANT: Save the challenges properly
-            if isinstance(challenges, list):
-                farmer_interest.challenges = ', '.join(challenges)
-                print(f"Saved farmer challenges: {farmer_interest.challenges}")
-            else:
-                farmer_interest.challenges = str(challenges)
-                print(f"Saved farmer challenges (from string): {farmer_interest.challenges}")
-                
-            farmer_interest.organic_farming_interest = organic_farming
+    """
+    API endpoint to save or update farmer profile information.
+
+    The farmer is the one with the request's "id", else the one saved under
+    its "externalId" (created with that key if there is none yet); a new
+    farmer is created when neither is given or found. The profile, farm
+    details, financial info and interests are written in one transaction with
+    the farmer's row locked, so concurrent saves of a farmer apply one after
+    the other and a failed save leaves nothing half-written.
+    """
+    if request.method != 'POST':
+        return JsonResponse({
+            'success': False,
+            'message': 'Method not allowed'
+        }, status=405)
+
+    logger = logging.getLogger(__name__)
+    try:
+        data = json.loads(request.body)
+        external_id = uuid.UUID(str(data['externalId'])) if data.get('externalId') else None
+    except json.JSONDecodeError:
+        return JsonResponse({
+            'success': False,
+            'message': 'Invalid JSON data'
+        }, status=400)
+    except ValueError:
+        return JsonResponse({
+            'success': False,
+            'message': 'externalId must be a UUID'
+        }, status=400)
+
+    personal_data = data.get('personal', {})
+    farm_data = data.get('farm', {})
+    financial_data = data.get('financial', {})
+    preferences_data = data.get('preferences', {})
+    seasonal_preference = preferences_data.get('seasonalPreference', [])
+
+    farmer_fields = {
+        'first_name': personal_data.get('firstName', ''),
+        'last_name': personal_data.get('lastName', ''),
+        'age': personal_data.get('age', None),
+        'gender': personal_data.get('gender', 'Male'),
+        'district': personal_data.get('district', ''),
+        'state': personal_data.get('state', ''),
+        'preferred_season': ', '.join(seasonal_preference) if seasonal_preference else '',
+        'pincode': personal_data.get('pincode', ''),
+    }
+
+    try:
+        farm_size, unit = parse_farm_size(farm_data.get('size', '0 Acre'))
+        farm_fields = {
+            'farm_size': farm_size,
+            'soil_type': farm_data.get('soilType', ''),
+            'irrigation_sources': profile_list(farm_data.get('irrigationSources', [])),
+            'irrigation_systems': profile_list(farm_data.get('irrigationSystems', [])),
+            'land_ownership': farm_data.get('landOwnership', 'Owned'),
+        }
+        if unit:
+            farm_fields['unit'] = unit
+        # Soil test values are only overwritten when sent
+        for key, field in [('nitrogenValue', 'nitrogen_value'), ('phosphorusValue', 'phosphorus_value'),
+                           ('potassiumValue', 'potassium_value'), ('soilPh', 'ph_value')]:
+            if farm_data.get(key):
+                farm_fields[field] = float(farm_data[key])
+
+        financial_fields = {
+            'annual_income': financial_data.get('annualIncome', ''),
+            'govt_schemes_enrolled': profile_list(financial_data.get('governmentSchemes', [])),
+            'bank_account': financial_data.get('bankAccount', 'No') == 'Yes',
+            'insurance_coverage': financial_data.get('cropInsurance', 'No') == 'Yes',
+        }
+
+        # The farmer's features are rebuilt once, inside the transaction
+        with transaction.atomic(), rebuild_once():
+            farmer = lock_farmer(data.get('id'), external_id, farmer_fields)
+            FarmDetail.objects.update_or_create(farmer=farmer, defaults=farm_fields)
+            FinancialInfo.objects.update_or_create(farmer=farmer, defaults=financial_fields)
+
+            # The most recent interests if the farmer saved several
+            farmer_interest = (
+                FarmerInterest.objects.select_for_update().filter(farmer=farmer).order_by('-id').first()
+                or FarmerInterest(farmer=farmer)
+            )
+            farmer_interest.sustainable_practices = profile_list(preferences_data.get('sustainablePractices', []))
+            farmer_interest.challenges = profile_list(data.get('challenges', []))
             farmer_interest.save()
-            
-            # Return success with farmer_id
-            return JsonResponse({
-                'success': True,
-                'message': 'Farmer profile updated successfully',
-                'farmer_id': farmer.id
-            })
-        except json.JSONDecodeError:
-            return JsonResponse({
-                'success': False,
-                'message': 'Invalid JSON data'
-            }, status=400)
-        except Exception as e:
-            import traceback
-            traceback.print_exc()
-            return JsonResponse({
-                'success': False,
-                'message': f'Error saving farmer profile: {str(e)}'
-            }, status=500)
-    
+    except (ValueError, TypeError) as e:
+        return JsonResponse({
+            'success': False,
+            'message': f'Invalid profile data: {str(e)}'
+        }, status=400)
+    except Exception as e:
+        logger.exception('Error saving farmer profile')
+        return JsonResponse({
+            'success': False,
+            'message': f'Error saving farmer profile: {str(e)}'
+        }, status=500)
+
+    logger.debug(f"Saved profile of farmer {farmer.id}")
     return JsonResponse({
-        'success': False,
-        'message': 'Method not allowed'
-    }, status=405)
+        'success': True,
+        'message': 'Farmer profile updated successfully',
+        'farmer_id': farmer.id,
+        'external_id': str(farmer.external_id),
+    })
+
+# Scheme fields of a recommendation, selectable with ?fields=. The engine
+# scores schemes on most of their columns, so only the output is limited.
+SCHEME_RECOMMENDATION_FIELDSET = Fieldset.of_columns(
+    *(field.name for field in GovernmentScheme._meta.concrete_fields)
+)
 
 @csrf_exempt
+@replica_reads
 def farmer_scheme_recommendations(request, farmer_id):
     """API endpoint to get government scheme recommendations for a farmer"""
     if request.method == 'GET':
         try:
+            fields = SCHEME_RECOMMENDATION_FIELDSET.select(request.GET)
             farmer = FarmerProfile.objects.get(id=farmer_id)
             
             # Get farmer interests to access challenges
             interests = FarmerInterest.objects.filter(farmer=farmer).order_by('-id').first()
-            farmer_challenges = []
-            if interests and interests.challenges:
-                farmer_challenges = [c.strip() for c in interests.challenges.split(',') if c.strip()]
+            farmer_challenges = CHALLENGES.names_of(interests.challenge_flags) if interests else []
             
             # Log farmer challenges for debugging
             print(f"Farmer ID {farmer_id} challenges: {farmer_challenges}")
@@ -2363,7 +2410,7 @@ def farmer_scheme_recommendations(request, farmer_id):
             # Convert to JSON serializable format
             serialized_recommendations = []
             for rec in recommendations:
-                scheme_dict = model_to_dict(rec['scheme'])
+                scheme_dict = SCHEME_RECOMMENDATION_FIELDSET.serialize(rec['scheme'], fields)
                 
                 # Extract most relevant challenge for this scheme
                 # Instead of using the first challenge match, use the one with highest relevance
@@ -2392,6 +2439,8 @@ def farmer_scheme_recommendations(request, farmer_id):
                 })
                 
             return JsonResponse(serialized_recommendations, safe=False)
+        except InvalidFieldset as e:
+            return JsonResponse({'error': str(e)}, status=400)
         except FarmerProfile.DoesNotExist:
             return JsonResponse({'error': 'Farmer not found'}, status=404)
         except Exception as e:
@@ -2400,6 +2449,7 @@ def farmer_scheme_recommendations(request, farmer_id):
     return JsonResponse({'error': 'Method not allowed'}, status=405)
 
 @csrf_exempt
+@replica_reads
 def farmer_loan_recommendations(request, farmer_id):
     """API endpoint to get loan recommendations for a farmer"""
     if request.method == 'GET':
@@ -2414,19 +2464,18 @@ def farmer_loan_recommendations(request, farmer_id):
             if not financial_info:
                 print(f"No financial information found for farmer ID: {farmer_id}")
                 # Create default financial info instead of returning error
-                financial_info = FinancialInfo.objects.create(
-                    farmer=farmer,
-                    annual_income='1l_3l',  # Default to middle-income range
-                    bank_account=True,
-                    insurance_coverage=False
-                )
+                # get_or_create reads the primary, where the replica may lag
+                financial_info, _ = FinancialInfo.objects.get_or_create(farmer=farmer, defaults={
+                    'annual_income': '1l_3l',  # Default to middle-income range
+                    'bank_account': True,
+                    'insurance_coverage': False,
+                })
                 print(f"Created default financial info for farmer ID: {farmer_id}")
                 
             # Get farmer interests for debugging
             interests = FarmerInterest.objects.filter(farmer=farmer).order_by('-id').first()
-            if interests and interests.challenges:
-                challenges = [c.strip() for c in interests.challenges.split(',') if c.strip()]
-                print(f"Farmer challenges: {challenges}")
+            if interests and interests.challenge_flags:
+                print(f"Farmer challenges: {CHALLENGES.names_of(interests.challenge_flags)}")
             else:
                 print(f"No challenges found for farmer ID: {farmer_id}")
                 
@@ -2464,6 +2513,494 @@ def farmer_loan_recommendations(request, farmer_id):
     
     return JsonResponse({'error': 'Method not allowed'}, status=405)
 
+@csrf_exempt
+@replica_reads
+def irrigation_schedule_api(request):
+    """API endpoint that streams a day-by-day irrigation calendar for a crop season"""
+    # Handle OPTIONS requests for CORS preflight
+    if request.method == 'OPTIONS':
+        response = JsonResponse({'status': 'ok'})
+        response['Access-Control-Allow-Origin'] = '*'
+        response['Access-Control-Allow-Methods'] = 'GET, OPTIONS'
+        response['Access-Control-Allow-Headers'] = 'Content-Type, Authorization'
+        return response
+
+    if request.method != 'GET':
+        return JsonResponse({'error': 'Method not allowed'}, status=405)
+
+    try:
+        crop = Crop.objects.get(id=request.GET.get('crop_id'))
+    except (Crop.DoesNotExist, ValueError, TypeError):
+        return JsonResponse({'error': 'Crop not found'}, status=404)
+
+    # Farmer profile supplies the default irrigation system and district
+    farmer = None
+    farm_details = None
+    farmer_id = request.GET.get('farmer_id')
+    if farmer_id:
+        try:
+            farmer = FarmerProfile.objects.get(id=farmer_id)
+        except (FarmerProfile.DoesNotExist, ValueError):
+            return JsonResponse({'error': 'Farmer not found'}, status=404)
+        farm_details = FarmDetail.objects.filter(farmer=farmer).first()
+
+    sowing_date_raw = request.GET.get('sowing_date')
+    try:
+        sowing_date = datetime.date.fromisoformat(sowing_date_raw) if sowing_date_raw else datetime.date.today()
+    except ValueError:
+        return JsonResponse({'error': 'sowing_date must be in YYYY-MM-DD format'}, status=400)
+
+    irrigation_system = request.GET.get('irrigation_system', '')
+    if not irrigation_system and farm_details and farm_details.irrigation_system_flags:
+        irrigation_system = IRRIGATION_SYSTEMS.names_of(farm_details.irrigation_system_flags)[0]
+
+    requirements = IrrigationRequirement.objects.filter(crop=crop)
+    requirement = None
+    if irrigation_system:
+        requirement = requirements.filter(growth_stage__iexact=irrigation_system).first()
+    if requirement is None:
+        requirement = requirements.first()
+    if requirement is None:
+        return JsonResponse({'error': f'No irrigation requirements found for {crop.name}'}, status=404)
+
+    district_name = request.GET.get('district') or (farmer.district if farmer else '')
+    district = District.objects.filter(name__iexact=district_name).first() if district_name else None
+    annual_rainfall_mm = district.avg_annual_rainfall_mm if district else 0
+
+    try:
+        season_days = parse_growth_days(crop.economics.growth_period)
+    except CropEconomics.DoesNotExist:
+        season_days = DEFAULT_SEASON_DAYS
+
+    entries = iter_irrigation_schedule(requirement, sowing_date, season_days, annual_rainfall_mm)
+
+    if request.GET.get('format') == 'ics':
+        response = StreamingHttpResponse(
+            iter_ics(entries, crop, requirement.growth_stage),
+            content_type='text/calendar; charset=utf-8'
+        )
+        response['Content-Disposition'] = f'attachment; filename="irrigation-{crop.id}-{sowing_date.isoformat()}.ics"'
+    else:
+        response = StreamingHttpResponse(iter_ndjson(entries), content_type='application/x-ndjson')
+
+    response['Access-Control-Allow-Origin'] = '*'
+    return response
+
+@csrf_exempt
+@replica_reads
+def rotation_plan_api(request):
+    """API endpoint that returns the best multi-season crop rotations for a field"""
+    # Handle OPTIONS requests for CORS preflight
+    if request.method == 'OPTIONS':
+        response = JsonResponse({'status': 'ok'})
+        response['Access-Control-Allow-Origin'] = '*'
+        response['Access-Control-Allow-Methods'] = 'GET, OPTIONS'
+        response['Access-Control-Allow-Headers'] = 'Content-Type, Authorization'
+        return response
+
+    if request.method != 'GET':
+        return JsonResponse({'error': 'Method not allowed'}, status=405)
+
+    try:
+        years = int(request.GET.get('years', 3))
+        top_n = int(request.GET.get('top_n', 5))
+    except ValueError:
+        return JsonResponse({'error': 'years and top_n must be integers'}, status=400)
+    if not 1 <= years <= 5 or not 1 <= top_n <= 20:
+        return JsonResponse({'error': 'years must be between 1 and 5 and top_n between 1 and 20'}, status=400)
+
+    start_season = request.GET.get('start_season', '').capitalize() or season_for_month(datetime.date.today().month)
+    if start_season not in SEASONS:
+        return JsonResponse({'error': f"start_season must be one of {', '.join(SEASONS)}"}, status=400)
+
+    # Farmer profile supplies the soil type and the starting nutrient balance
+    farm_details = None
+    farmer_id = request.GET.get('farmer_id')
+    if farmer_id:
+        try:
+            farmer = FarmerProfile.objects.get(id=farmer_id)
+        except (FarmerProfile.DoesNotExist, ValueError):
+            return JsonResponse({'error': 'Farmer not found'}, status=404)
+        farm_details = FarmDetail.objects.filter(farmer=farmer).first()
+
+    soil_type = request.GET.get('soil_type') or (farm_details.soil_type if farm_details else '')
+    if farm_details:
+        initial_state = initial_nutrient_state(
+            farm_details.nitrogen_value, farm_details.phosphorus_value, farm_details.potassium_value
+        )
+    else:
+        initial_state = initial_nutrient_state()
+
+    # Yield potential on this soil scales each crop's income; when the soil has
+    # compatibility data only the compatible crops are considered
+    yield_factors = {}
+    if soil_type:
+        for crop_id, yield_potential in SoilCropCompatibility.objects.filter(
+            soil__in=soil_family_ids(resolve_soil_type(soil_type))
+        ).values_list('crop_id', 'yield_potential_percentage'):
+            yield_factors[crop_id] = max(yield_factors.get(crop_id, 0), yield_potential / 100)
+
+    candidates = [fallow_candidate()]
+    for crop in Crop.objects.select_related('economics').only(*ROTATION_CANDIDATE_COLUMNS):
+        if yield_factors and crop.id not in yield_factors:
+            continue
+        try:
+            economics = crop.economics
+        except CropEconomics.DoesNotExist:
+            economics = None
+        candidate = build_candidate(crop, economics, yield_factors.get(crop.id, 1.0))
+        if candidate:
+            candidates.append(candidate)
+
+    plans = plan_rotations(candidates, start_season, years, top_n, initial_state)
+
+    response = JsonResponse({
+        'start_season': start_season,
+        'years': years,
+        'soil_type': soil_type,
+        'initial_nutrient_balance': dict(zip(('N', 'P', 'K'), initial_state)),
+        'plans': plans,
+    })
+    response['Access-Control-Allow-Origin'] = '*'
+    return response
+
+@csrf_exempt
+@replica_reads
+def land_allocation_api(request):
+    """
+    API endpoint that splits a farm's area between crops to maximize net income.
+
+    GET takes a single farmer_id; POST takes {"farmer_ids": [...]} and solves
+    each of those farms in turn within one request.
+    """
+    # Handle OPTIONS requests for CORS preflight
+    if request.method == 'OPTIONS':
+        response = JsonResponse({'status': 'ok'})
+        response['Access-Control-Allow-Origin'] = '*'
+        response['Access-Control-Allow-Methods'] = 'GET, POST, OPTIONS'
+        response['Access-Control-Allow-Headers'] = 'Content-Type, Authorization'
+        return response
+
+    if request.method == 'GET':
+        params = request.GET
+        farmer_ids = [params.get('farmer_id')] if params.get('farmer_id') else []
+    elif request.method == 'POST':
+        try:
+            params = json.loads(request.body or '{}')
+        except json.JSONDecodeError:
+            return JsonResponse({'error': 'Invalid JSON data'}, status=400)
+        farmer_ids = params.get('farmer_ids') or []
+        if not isinstance(farmer_ids, list):
+            return JsonResponse({'error': 'farmer_ids must be a list'}, status=400)
+    else:
+        return JsonResponse({'error': 'Method not allowed'}, status=405)
+
+    if not farmer_ids:
+        return JsonResponse({'error': 'farmer_id is required'}, status=400)
+
+    try:
+        min_crops = int(params.get('min_crops', DEFAULT_MIN_CROPS))
+        water_override = float(params['water_mm']) if params.get('water_mm') else None
+        labour_override = float(params['labour_days']) if params.get('labour_days') else None
+    except (TypeError, ValueError):
+        return JsonResponse({'error': 'min_crops, water_mm and labour_days must be numbers'}, status=400)
+
+    try:
+        farmers = list(FarmerProfile.objects.filter(id__in=farmer_ids))
+    except (ValueError, TypeError):
+        return JsonResponse({'error': 'farmer_ids must be integers'}, status=400)
+    if not farmers:
+        return JsonResponse({'error': 'Farmer not found'}, status=404)
+
+    farm_details_by_farmer = {}
+    for farm_detail in FarmDetail.objects.filter(farmer__in=farmers).order_by('id'):
+        farm_details_by_farmer.setdefault(farm_detail.farmer_id, farm_detail)
+
+    rainfall_by_district = {
+        name.lower(): rainfall
+        for name, rainfall in District.objects.values_list('name', 'avg_annual_rainfall_mm')
+    }
+
+    # The crop catalog is read once and candidate lists are shared between
+    # farms on the same soil
+    all_candidates = []
+    for crop in Crop.objects.select_related('economics').only(*ALLOCATION_CANDIDATE_COLUMNS):
+        try:
+            candidate = allocation_candidate(crop, crop.economics)
+        except CropEconomics.DoesNotExist:
+            candidate = None
+        if candidate:
+            all_candidates.append(candidate)
+
+    candidates_by_soil = {}
+    problems = []
+    units = []
+    for farmer in farmers:
+        farm_details = farm_details_by_farmer.get(farmer.id)
+        soil_ids = soil_family_ids(farm_details.soil_id if farm_details else None)
+        if soil_ids not in candidates_by_soil:
+            compatible_ids = set(SoilCropCompatibility.objects.filter(
+                soil__in=soil_ids
+            ).values_list('crop_id', flat=True)) if soil_ids else set()
+            candidates_by_soil[soil_ids] = [
+                candidate for candidate in all_candidates
+                if not compatible_ids or candidate['crop_id'] in compatible_ids
+            ]
+
+        unit = farm_details.unit if farm_details else 'Hectare'
+        area_ha = to_hectares(farm_details.farm_size, unit) if farm_details else 0
+        if water_override is not None:
+            water_mm = water_override
+        else:
+            water_mm = available_water_mm(
+                rainfall_by_district.get(farmer.district.lower(), 0),
+                farm_details.irrigation_source_flags if farm_details else 0
+            )
+
+        problems.append({
+            'candidates': candidates_by_soil[soil_ids],
+            'area_ha': area_ha,
+            'water_mm': water_mm,
+            'labour_days': labour_override if labour_override is not None else available_labour_days(area_ha),
+            'min_crops': min_crops,
+        })
+        units.append(unit)
+
+    results = {}
+    for farmer, unit, problem, result in zip(farmers, units, problems, allocate_land_per_farm(problems)):
+        if 'error' not in result:
+            for allocation in result['allocations']:
+                allocation['area'] = round(from_hectares(allocation['area_ha'], unit), 3)
+                allocation['unit'] = unit
+            result['water_available_mm'] = round(problem['water_mm'], 1)
+            result['labour_available_days'] = round(problem['labour_days'], 1)
+        results[str(farmer.id)] = result
+
+    if request.method == 'GET':
+        response = JsonResponse(results[str(farmers[0].id)])
+    else:
+        response = JsonResponse({'results': results})
+    response['Access-Control-Allow-Origin'] = '*'
+    return response
+
+@csrf_exempt
+@replica_reads
+def yield_projection_api(request):
+    """
+    API endpoint that projects yield and net income bands of every crop for
+    one or more farmers (farmer_id, or comma-separated farmer_ids)
+    """
+    # Handle OPTIONS requests for CORS preflight
+    if request.method == 'OPTIONS':
+        response = JsonResponse({'status': 'ok'})
+        response['Access-Control-Allow-Origin'] = '*'
+        response['Access-Control-Allow-Methods'] = 'GET, OPTIONS'
+        response['Access-Control-Allow-Headers'] = 'Content-Type, Authorization'
+        return response
+
+    if request.method != 'GET':
+        return JsonResponse({'error': 'Method not allowed'}, status=405)
+
+    raw_ids = request.GET.get('farmer_ids') or request.GET.get('farmer_id') or ''
+    try:
+        farmer_ids = [int(farmer_id) for farmer_id in raw_ids.split(',') if farmer_id.strip()]
+        crop_ids = [int(crop_id) for crop_id in request.GET.get('crop_ids', '').split(',') if crop_id.strip()]
+    except ValueError:
+        return JsonResponse({'error': 'farmer_ids and crop_ids must be integers'}, status=400)
+    if not farmer_ids:
+        return JsonResponse({'error': 'farmer_id is required'}, status=400)
+
+    farmers = list(FarmerProfile.objects.filter(id__in=farmer_ids).order_by('id'))
+    if not farmers:
+        return JsonResponse({'error': 'Farmer not found'}, status=404)
+
+    soil_by_farmer = {}
+    for farmer_id, soil_type, soil_id in FarmDetail.objects.filter(farmer__in=farmers).order_by('id').values_list('farmer_id', 'soil_type', 'soil_id'):
+        soil_by_farmer.setdefault(farmer_id, (soil_type, soil_id))
+    districts = {district.name.lower(): district for district in District.objects.all()}
+
+    economics_qs = CropEconomics.objects.select_related('crop')
+    if crop_ids:
+        economics_qs = economics_qs.filter(crop_id__in=crop_ids)
+    economics_list = list(economics_qs)
+    if not economics_list:
+        return JsonResponse({'error': 'No crops with economics data found'}, status=404)
+
+    crops_data = crop_arrays([(economics.crop, economics) for economics in economics_list])
+    farm_soils = [soil_by_farmer.get(farmer.id, ('', None)) for farmer in farmers]
+    projection = project(
+        crops_data,
+        farm_arrays([districts.get(farmer.district.lower()) for farmer in farmers]),
+        soil_potential_matrix(
+            [soil_id for _, soil_id in farm_soils], crops_data['crop_id'],
+            SoilCropCompatibility.objects.filter(crop_id__in=crops_data['crop_id'].tolist())
+        )
+    )
+
+    results = []
+    for i, farmer in enumerate(farmers):
+        order = projection['income_expected'][i].argsort()[::-1]
+        crops = []
+        for j in order:
+            entry = projection_entry(projection, i, j)
+            entry['crop_id'] = economics_list[j].crop_id
+            entry['crop'] = economics_list[j].crop.name
+            crops.append(entry)
+        results.append({
+            'farmer_id': farmer.id,
+            'district': farmer.district,
+            'soil_type': farm_soils[i][0],
+            'crops': crops,
+        })
+
+    response = JsonResponse({'success': True, 'projections': results})
+    response['Access-Control-Allow-Origin'] = '*'
+    return response
+
+# Most crops, schemes and technologies the peers endpoint lists; larger
+# ?limit= values are capped to it
+MAX_PEER_ITEMS = 50
+
+@csrf_exempt
+@replica_reads
+def farmer_peers_api(request, farmer_id):
+    """
+    API endpoint listing the crops, schemes and technologies most common among
+    the farmers most similar to this one
+    """
+    # Handle OPTIONS requests for CORS preflight
+    if request.method == 'OPTIONS':
+        response = JsonResponse({'status': 'ok'})
+        response['Access-Control-Allow-Origin'] = '*'
+        response['Access-Control-Allow-Methods'] = 'GET, OPTIONS'
+        response['Access-Control-Allow-Headers'] = 'Content-Type, Authorization'
+        return response
+
+    if request.method != 'GET':
+        return JsonResponse({'error': 'Method not allowed'}, status=405)
+
+    try:
+        k = int(request.GET.get('k', 20))
+        limit = int(request.GET.get('limit', 5))
+    except ValueError:
+        return JsonResponse({'error': 'k and limit must be integers'}, status=400)
+    if not 1 <= k <= 200:
+        return JsonResponse({'error': 'k must be between 1 and 200'}, status=400)
+    if limit < 1:
+        return JsonResponse({'error': 'limit must be at least 1'}, status=400)
+    limit = min(limit, MAX_PEER_ITEMS)
+
+    if not FarmerProfile.objects.filter(id=farmer_id).exists():
+        return JsonResponse({'error': 'Farmer not found'}, status=404)
+
+    peers = similar_farmers(farmer_id, k)
+    peer_ids = [peer_id for peer_id, _ in peers]
+
+    crops = FarmingExperience.objects.filter(farmer_id__in=peer_ids).values(
+        'crop_id', 'crop__name'
+    ).annotate(farmers=Count('farmer', distinct=True)).order_by('-farmers', 'crop__name')[:limit]
+
+    def most_common(counts):
+        return [{'name': name, 'farmers': count} for name, count in counts.most_common(limit)]
+
+    schemes = Counter(dict(
+        EnrolledScheme.objects.filter(financial_info__farmer_id__in=peer_ids).values_list('name')
+        .annotate(farmers=Count('financial_info__farmer', distinct=True))
+    ))
+    technologies = Counter(dict(
+        SustainablePractice.objects.filter(interest__farmer_id__in=peer_ids).values_list('name')
+        .annotate(farmers=Count('interest__farmer', distinct=True))
+    ))
+    system_flags_by_farmer = {}
+    for peer_id, flags in FarmDetail.objects.filter(farmer_id__in=peer_ids).values_list('farmer_id', 'irrigation_system_flags'):
+        system_flags_by_farmer[peer_id] = system_flags_by_farmer.get(peer_id, 0) | flags
+    for flags in system_flags_by_farmer.values():
+        technologies.update(IRRIGATION_SYSTEMS.names_of(flags))
+    schemes, technologies = most_common(schemes), most_common(technologies)
+
+    response = JsonResponse({
+        'farmer_id': farmer_id,
+        'peers': [{'farmer_id': peer_id, 'distance': round(distance, 4)} for peer_id, distance in peers],
+        'crops': [
+            {'crop_id': crop['crop_id'], 'name': crop['crop__name'], 'farmers': crop['farmers']}
+            for crop in crops
+        ],
+        'schemes': schemes,
+        'technologies': technologies,
+    })
+    response['Access-Control-Allow-Origin'] = '*'
+    return response
+
+@csrf_exempt
+@replica_reads
+def farmer_dashboard_api(request, farmer_id):
+    """
+    API endpoint returning the farmer's profile with their crop, scheme, loan
+    and technology recommendations in one payload
+    """
+    # Handle OPTIONS requests for CORS preflight
+    if request.method == 'OPTIONS':
+        response = JsonResponse({'status': 'ok'})
+        response['Access-Control-Allow-Origin'] = '*'
+        response['Access-Control-Allow-Methods'] = 'GET, OPTIONS'
+        response['Access-Control-Allow-Headers'] = 'Content-Type, Authorization'
+        return response
+
+    if request.method != 'GET':
+        return JsonResponse({'error': 'Method not allowed'}, status=405)
+
+    try:
+        farmer = FarmerProfile.objects.get(id=farmer_id)
+    except FarmerProfile.DoesNotExist:
+        return JsonResponse({'error': 'Farmer not found'}, status=404)
+
+    # Loaded once here and shared by every engine, so the worker threads only
+    # read the catalog tables
+    context = FarmerContext(farmer).load()
+    farm_details = context.farm_details
+
+    def crops():
+        if not farm_details:
+            return []
+        return [
+            format_crop_recommendation(rec, farm_details)
+            for rec in get_crop_recommendations(farmer, farm_details, context)
+        ]
+
+    def schemes():
+        return [format_scheme_recommendation(rec) for rec in get_scheme_recommendations(farmer, context)]
+
+    def loans():
+        financial_info = context.financial_info or default_financial_info(farmer)
+        return [
+            format_loan_recommendation(rec)
+            for rec in get_loan_recommendations(farmer, financial_info, context)
+        ]
+
+    def technologies():
+        if not farm_details:
+            return []
+        return [
+            format_technology_recommendation(rec)
+            for rec in get_technology_recommendations(farmer, farm_details, context.interests, context)
+        ]
+
+    sections = run_sections(farmer.id, {
+        'crops': crops,
+        'schemes': schemes,
+        'loans': loans,
+        'technologies': technologies,
+    })
+
+    response = JsonResponse({
+        'success': True,
+        'farmer_id': farmer.id,
+        'profile': format_farmer_profile(farmer, context),
+        'sections': sections,
+    })
+    response['Access-Control-Allow-Origin'] = '*'
+    return response
+
 # Admin API Functions
 
 from django.contrib.auth import get_user_model
@@ -2509,12 +3046,34 @@ def admin_dashboard_stats(request):
     
     return JsonResponse({'error': 'Method not allowed'}, status=405)
 
+# Fields of the admin list endpoints, selectable with ?fields=. The dashboard
+# tables ask for the few they show, so the long text columns stay unread.
+ADMIN_CROP_FIELDSET = Fieldset.of_columns(
+    'id', 'name', 'scientific_name', 'growing_season', 'cultivation_practices', 'water_requirement_mm',
+    'min_temp_c', 'max_temp_c', 'ph_range', 'suitable_soil_types', 'varieties'
+)
+ADMIN_TECHNOLOGY_FIELDSET = Fieldset.of_columns(
+    'id', 'name', 'category', 'suitable_crops', 'implementation_cost', 'roi_percentage',
+    'technical_requirements', 'training_needs', 'supplier_contacts', 'district_availability'
+)
+ADMIN_SCHEME_FIELDSET = Fieldset.of_columns(
+    'id', 'name', 'implementing_agency', 'eligibility_criteria', 'benefits', 'application_process',
+    'documents_required', 'district_availability', 'crop_applicability', 'official_website',
+    'detailed_description', 'how_to_apply'
+)
+ADMIN_LOAN_FIELDSET = Fieldset.of_columns(
+    'id', 'name', 'provider', 'loan_type', 'interest_rate', 'max_amount', 'tenure', 'eligibility',
+    'documents_required', 'processing_time', 'special_features'
+)
+
 # Admin Crop API
 @csrf_exempt
+@catalog_condition(Crop)
 def admin_crops_list(request):
     """List and create crops"""
     if request.method == 'GET':
         try:
+            fields = ADMIN_CROP_FIELDSET.select(request.GET)
             search_query = request.GET.get('search', '')
             
             if search_query:
@@ -2522,23 +3081,16 @@ def admin_crops_list(request):
             else:
                 crops = Crop.objects.all()
             
-            crops_data = []
-            for crop in crops:
-                crops_data.append({
-                    'id': crop.id,
-                    'name': crop.name,
-                    'scientific_name': crop.scientific_name,
-                    'growing_season': crop.growing_season,
-                    'cultivation_practices': crop.cultivation_practices,
-                    'water_requirement_mm': crop.water_requirement_mm,
-                    'min_temp_c': crop.min_temp_c,
-                    'max_temp_c': crop.max_temp_c,
-                    'ph_range': crop.ph_range,
-                    'suitable_soil_types': crop.suitable_soil_types,
-                    'varieties': crop.varieties,
-                })
+            page = paginate(
+                ADMIN_CROP_FIELDSET.only(crops, fields), request.GET, sort_fields={'id': 'id', 'name': 'name'},
+                filter_fields={'growing_season': 'growing_season'}
+            )
+
+            crops_data = [ADMIN_CROP_FIELDSET.serialize(crop, fields) for crop in page.rows]
             
-            return JsonResponse(crops_data, safe=False)
+            return set_page_headers(JsonResponse(crops_data, safe=False), request, page)
+        except (InvalidPageRequest, InvalidFieldset) as e:
+            return JsonResponse({'error': str(e)}, status=400)
         except Exception as e:
             return JsonResponse({'error': str(e)}, status=500)
     
@@ -2628,10 +3180,12 @@ def admin_crop_detail(request, id):
 
 # Admin Technology API
 @csrf_exempt
+@catalog_condition(Technology)
 def admin_technologies_list(request):
     """List and create technologies"""
     if request.method == 'GET':
         try:
+            fields = ADMIN_TECHNOLOGY_FIELDSET.select(request.GET)
             search_query = request.GET.get('search', '')
             
             if search_query:
@@ -2639,22 +3193,16 @@ def admin_technologies_list(request):
             else:
                 technologies = Technology.objects.all()
             
-            technologies_data = []
-            for tech in technologies:
-                technologies_data.append({
-                    'id': tech.id,
-                    'name': tech.name,
-                    'category': tech.category,
-                    'suitable_crops': tech.suitable_crops,
-                    'implementation_cost': tech.implementation_cost,
-                    'roi_percentage': tech.roi_percentage,
-                    'technical_requirements': tech.technical_requirements,
-                    'training_needs': tech.training_needs,
-                    'supplier_contacts': tech.supplier_contacts,
-                    'district_availability': tech.district_availability,
-                })
+            page = paginate(
+                ADMIN_TECHNOLOGY_FIELDSET.only(technologies, fields), request.GET, sort_fields={'id': 'id', 'name': 'name'},
+                filter_fields={'category': 'category'}
+            )
+
+            technologies_data = [ADMIN_TECHNOLOGY_FIELDSET.serialize(tech, fields) for tech in page.rows]
             
-            return JsonResponse(technologies_data, safe=False)
+            return set_page_headers(JsonResponse(technologies_data, safe=False), request, page)
+        except (InvalidPageRequest, InvalidFieldset) as e:
+            return JsonResponse({'error': str(e)}, status=400)
         except Exception as e:
             return JsonResponse({'error': str(e)}, status=500)
     
@@ -2741,10 +3289,12 @@ def admin_technology_detail(request, id):
 
 # Admin Scheme API
 @csrf_exempt
+@catalog_condition(GovernmentScheme)
 def admin_schemes_list(request):
     """List and create government schemes"""
     if request.method == 'GET':
         try:
+            fields = ADMIN_SCHEME_FIELDSET.select(request.GET)
             search_query = request.GET.get('search', '')
             
             if search_query:
@@ -2752,24 +3302,15 @@ def admin_schemes_list(request):
             else:
                 schemes = GovernmentScheme.objects.all()
             
-            schemes_data = []
-            for scheme in schemes:
-                schemes_data.append({
-                    'id': scheme.id,
-                    'name': scheme.name,
-                    'implementing_agency': scheme.implementing_agency,
-                    'eligibility_criteria': scheme.eligibility_criteria,
-                    'benefits': scheme.benefits,
-                    'application_process': scheme.application_process,
-                    'documents_required': scheme.documents_required,
-                    'district_availability': scheme.district_availability,
-                    'crop_applicability': scheme.crop_applicability,
-                    'official_website': scheme.official_website,
-                    'detailed_description': scheme.detailed_description,
-                    'how_to_apply': scheme.how_to_apply
-                })
+            page = paginate(
+                ADMIN_SCHEME_FIELDSET.only(schemes, fields), request.GET, sort_fields={'id': 'id', 'name': 'name'}
+            )
+
+            schemes_data = [ADMIN_SCHEME_FIELDSET.serialize(scheme, fields) for scheme in page.rows]
             
-            return JsonResponse(schemes_data, safe=False)
+            return set_page_headers(JsonResponse(schemes_data, safe=False), request, page)
+        except (InvalidPageRequest, InvalidFieldset) as e:
+            return JsonResponse({'error': str(e)}, status=400)
         except Exception as e:
             return JsonResponse({'error': str(e)}, status=500)
     
@@ -2862,10 +3403,12 @@ def admin_scheme_detail(request, id):
 
 # Admin Loan API
 @csrf_exempt
+@catalog_condition(LoanOption)
 def admin_loans_list(request):
     """List and create loan options"""
     if request.method == 'GET':
         try:
+            fields = ADMIN_LOAN_FIELDSET.select(request.GET)
             search_query = request.GET.get('search', '')
             
             if search_query:
@@ -2873,23 +3416,16 @@ def admin_loans_list(request):
             else:
                 loans = LoanOption.objects.all()
             
-            loans_data = []
-            for loan in loans:
-                loans_data.append({
-                    'id': loan.id,
-                    'name': loan.name,
-                    'provider': loan.provider,
-                    'loan_type': loan.loan_type,
-                    'interest_rate': loan.interest_rate,
-                    'max_amount': loan.max_amount,
-                    'tenure': loan.tenure,
-                    'eligibility': loan.eligibility,
-                    'documents_required': loan.documents_required,
-                    'processing_time': loan.processing_time,
-                    'special_features': loan.special_features
-                })
+            page = paginate(
+                ADMIN_LOAN_FIELDSET.only(loans, fields), request.GET, sort_fields={'id': 'id', 'name': 'name'},
+                filter_fields={'loan_type': 'loan_type', 'provider': 'provider'}
+            )
+
+            loans_data = [ADMIN_LOAN_FIELDSET.serialize(loan, fields) for loan in page.rows]
             
-            return JsonResponse(loans_data, safe=False)
+            return set_page_headers(JsonResponse(loans_data, safe=False), request, page)
+        except (InvalidPageRequest, InvalidFieldset) as e:
+            return JsonResponse({'error': str(e)}, status=400)
         except Exception as e:
             return JsonResponse({'error': str(e)}, status=500)
     
@@ -2979,37 +3515,33 @@ def admin_loan_detail(request, id):
 
 # Admin User API
 @csrf_exempt
+@catalog_condition(User, FarmerProfile)
 def admin_users_list(request):
     """List and create users"""
     if request.method == 'GET':
         try:
             search_query = request.GET.get('search', '')
             
+            # Users and their farmer profiles come from one joined query
+            users = User.objects.select_related('farmer_profile')
             if search_query:
-                users = User.objects.filter(
-                    username__icontains=search_query
-                ) | User.objects.filter(
-                    email__icontains=search_query
-                )
-                
-                # Also search in FarmerProfile
-                user_ids_from_profile = FarmerProfile.objects.filter(
-                    first_name__icontains=search_query
-                ) | FarmerProfile.objects.filter(
-                    last_name__icontains=search_query
-                ) | FarmerProfile.objects.filter(
-                    district__icontains=search_query
-                )
-                
-                users = users | User.objects.filter(id__in=[profile.user.id for profile in user_ids_from_profile])
-            else:
-                users = User.objects.all()
-            
+                users = users.filter(user_search(search_query))
+            
+            page = paginate(
+                users, request.GET,
+                sort_fields={'id': 'id', 'username': 'username', 'email': 'email'},
+                filter_fields={
+                    'is_staff': 'is_staff', 'is_active': 'is_active',
+                    'district': 'farmer_profile__district'
+                },
+                versioned_models=[User, FarmerProfile]
+            )
+
             users_data = []
-            for user in users:
-                # Get associated farmer profile if exists
+            for user in page.rows:
+                # Farmer profile loaded with the user, if there is one
                 try:
-                    profile = FarmerProfile.objects.get(user=user)
+                    profile = user.farmer_profile
                     users_data.append({
                         'id': user.id,
                         'username': user.username,
@@ -3038,7 +3570,9 @@ def admin_users_list(request):
                         'date_joined': user.date_joined
                     })
             
-            return JsonResponse(users_data, safe=False)
+            return set_page_headers(JsonResponse(users_data, safe=False), request, page)
+        except InvalidPageRequest as e:
+            return JsonResponse({'error': str(e)}, status=400)
         except Exception as e:
             return JsonResponse({'error': str(e)}, status=500)
     
@@ -3159,60 +3693,54 @@ def admin_user_detail(request, id):
     
     return JsonResponse({'error': 'Method not allowed'}, status=405)
 
+# Admin farmer import API
+
+# Failed rows listed in the import report; ?errors=csv downloads all of them
+MAX_REPORTED_IMPORT_ERRORS = 100
+
+@csrf_exempt
+def admin_farmers_import(request):
+    """Import farmers from an uploaded .csv or .xlsx file (form field "file"); see main_app.farmer_import"""
+    logger = logging.getLogger(__name__)
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Method not allowed'}, status=405)
+    upload = request.FILES.get('file')
+    if upload is None:
+        return JsonResponse({'error': 'Upload the farmers as the "file" form field'}, status=400)
+
+    # Failed rows are spooled to disk, so a bad file costs no memory
+    errors = tempfile.TemporaryFile('w+', newline='', encoding='utf-8')
+    importer = FarmerImporter(errors=errors, dry_run=request.POST.get('dry_run') in ('1', 'true', 'yes'))
+    try:
+        report = importer.run(read_rows(upload.file, upload.name))
+    except InvalidImportFile as e:
+        errors.close()
+        return JsonResponse({'error': str(e)}, status=400)
+    logger.info(f"Imported {upload.name}: {report}")
+    errors.seek(0)
+
+    if request.GET.get('errors') == 'csv':
+        response = StreamingHttpResponse(errors, content_type='text/csv')
+        response['Content-Disposition'] = 'attachment; filename="farmer-import-errors.csv"'
+        return response
+
+    with errors:
+        failed_rows = [
+            {'row': int(row['row']), 'error': row['error']}
+            for _, row in zip(range(MAX_REPORTED_IMPORT_ERRORS), csv.DictReader(errors))
+        ]
+    return JsonResponse({**report.as_dict(), 'errors': failed_rows})
+
 @csrf_exempt
 def farmer_profile_api(request, farmer_id):
     """API endpoint to get farmer profile information for debugging/frontend use"""
     if request.method == 'GET':
         try:
             farmer = FarmerProfile.objects.get(id=farmer_id)
-            farm_details = FarmDetail.objects.filter(farmer=farmer).first()
-            experiences = FarmingExperience.objects.filter(farmer=farmer).all()
-            financial_info = FinancialInfo.objects.filter(farmer=farmer).first()
-            interests = FarmerInterest.objects.filter(farmer=farmer).order_by('-id').first()
-            
-            # Extract crop names
-            cultivated_crops = []
-            for exp in experiences:
-                if exp.crop:
-                    cultivated_crops.append(exp.crop.name)
-            
-            # Build response
-            response_data = {
-                'personal': {
-                    'firstName': farmer.first_name,
-                    'lastName': farmer.last_name,
-                    'fullName': f"{farmer.first_name} {farmer.last_name}".strip(),
-                    'age': farmer.age,
-                    'gender': farmer.gender,
-                    'district': farmer.district,
-                    'state': farmer.state
-                },
-                'farm': {
-                    'size': farm_details.farm_size if farm_details else None,
-                    'soilType': farm_details.soil_type if farm_details else None,
-                    'irrigationSources': farm_details.irrigation_sources.split(', ') if farm_details and farm_details.irrigation_sources else [],
-                    'irrigationSystems': farm_details.irrigation_systems.split(', ') if farm_details and farm_details.irrigation_systems else [],
-                    'landOwnership': farm_details.land_ownership if farm_details else None,
-                    'mainCrops': cultivated_crops
-                }
-            }
-            
-            # Add financial info if available
-            if financial_info:
-                response_data['financial'] = {
-                    'annualIncome': financial_info.annual_income,
-                    'govtSchemesEnrolled': financial_info.govt_schemes_enrolled.split(',') if financial_info.govt_schemes_enrolled else [],
-                    'bankAccount': financial_info.bank_account,
-                    'insuranceCoverage': financial_info.insurance_coverage
-                }
-            
-            # Add interests and challenges if available
-            if interests:
-                response_data['interests'] = {
-                    'sustainablePractices': interests.sustainable_practices.split(',') if interests.sustainable_practices else [],
-                    'challenges': interests.challenges.split(',') if interests.challenges else []
-                }
-            
+            response_data = format_farmer_profile(farmer)
+            # The profile form saves the farmer back under these
+            response_data['id'] = farmer.id
+            response_data['externalId'] = str(farmer.external_id)
             return JsonResponse(response_data)
         except FarmerProfile.DoesNotExist:
             # Return dummy data that matches the expected structure
@@ -3271,7 +3799,7 @@ def debug_loans_list(request):
                 'provider': loan.provider,
                 'loan_type': loan.loan_type,
                 'interest_rate': loan.interest_rate,
-                'max_amount': str(loan.max_amount),
+                'max_amount': loan.max_amount,
                 'tenure': loan.tenure,
                 'eligibility': loan.eligibility[:100] + '...' if len(loan.eligibility) > 100 else loan.eligibility,
                 'documents_required': loan.documents_required[:100] + '...' if len(loan.documents_required) > 100 else loan.documents_required,
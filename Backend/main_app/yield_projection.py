@@ -0,0 +1,170 @@
+"""
+Projected yield and income of every crop on every farm.
+
+All crops and farms are projected together as NumPy arrays of shape
+(farms, crops): the catalog yield is scaled by the soil's yield potential and
+by how well the district's temperature and rainfall suit the crop, then priced
+with CropEconomics. Low and high bands widen for drought-sensitive crops and
+for crops that fit the district's climate poorly.
+"""
+import numpy as np
+
+from .soil_types import soil_taxonomy
+
+# Used when a crop has no compatibility record for the farm's soil; matches the
+# default of SoilCropCompatibility.yield_potential_percentage
+DEFAULT_YIELD_POTENTIAL = 0.7
+
+# Share of the yield kept by a crop that fits the district's climate badly
+CLIMATE_FLOOR = 0.5
+
+# Half-width of the yield band by drought resistance, widened further by
+# CLIMATE_SPREAD as the climate fit gets worse
+YIELD_SPREAD = {'high': 0.10, 'medium': 0.15, 'low': 0.20}
+DEFAULT_YIELD_SPREAD = 0.15
+CLIMATE_SPREAD = 0.2
+
+# Half-width of the market price band
+PRICE_SPREAD = 0.1
+
+
+def crop_arrays(crops_with_economics):
+    """
+    Arrays describing each (crop, economics) pair. Crops without economics
+    have no price or cost and are left out by the caller.
+    """
+    rows = []
+    for crop, economics in crops_with_economics:
+        base_yield = float(economics.expected_yield_q_per_ha or 0) or crop.avg_yield_q_per_ha
+        price = float(economics.market_price_per_quintal or 0) or float(economics.msp_per_quintal or 0)
+        temp_min = economics.temperature_range_min if economics.temperature_range_min is not None else crop.min_temp_c
+        temp_max = economics.temperature_range_max if economics.temperature_range_max is not None else crop.max_temp_c
+        rain_min = economics.rainfall_range_min if economics.rainfall_range_min is not None else np.nan
+        rain_max = economics.rainfall_range_max if economics.rainfall_range_max is not None else np.nan
+        spread = YIELD_SPREAD.get((economics.drought_resistance or '').lower(), DEFAULT_YIELD_SPREAD)
+        rows.append((
+            crop.id, base_yield, price, float(economics.cost_of_cultivation_per_ha or 0),
+            temp_min, temp_max, rain_min, rain_max, spread,
+        ))
+
+    columns = np.array(rows, dtype=float).reshape(-1, 9).T
+    return {
+        'crop_id': columns[0].astype(int),
+        'base_yield': columns[1],
+        'price': columns[2],
+        'cost': columns[3],
+        'temp_min': columns[4],
+        'temp_max': columns[5],
+        'rain_min': columns[6],
+        'rain_max': columns[7],
+        'spread': columns[8],
+    }
+
+
+def farm_arrays(districts):
+    """Climate arrays for each farm's District (None when unknown)"""
+    rows = [
+        (district.min_temp_c, district.max_temp_c, district.avg_annual_rainfall_mm)
+        if district else (np.nan, np.nan, np.nan)
+        for district in districts
+    ]
+    columns = np.array(rows, dtype=float).reshape(-1, 3).T
+    return {'temp_min': columns[0], 'temp_max': columns[1], 'rainfall': columns[2]}
+
+
+def soil_potential_matrix(soil_ids, crop_ids, compatibilities):
+    """
+    (farms, crops) matrix of yield potential fractions from
+    SoilCropCompatibility rows, matched the same way as the recommendation
+    engine (a record applies to every farm whose soil is in the same family).
+    soil_ids are the farms' SoilType ids (None when unknown).
+    """
+    taxonomy = soil_taxonomy()
+    column = {crop_id: index for index, crop_id in enumerate(crop_ids)}
+    potential = np.full((len(soil_ids), len(crop_ids)), np.nan)
+    farm_families = [taxonomy.family(soil_id) for soil_id in soil_ids]
+
+    for compatibility in compatibilities:
+        j = column.get(compatibility.crop_id)
+        if j is None:
+            continue
+        family = taxonomy.family(compatibility.soil_id)
+        for i, farm_family in enumerate(farm_families):
+            if farm_family is not None and farm_family == family:
+                potential[i, j] = np.fmax(potential[i, j], compatibility.yield_potential_percentage / 100)
+
+    return np.where(np.isnan(potential), DEFAULT_YIELD_POTENTIAL, potential)
+
+
+def climate_fit(crops, farms):
+    """(farms, crops) fit in [0, 1] of each district's temperature and rainfall"""
+    # Share of the crop's temperature band that the district's range covers
+    overlap = (
+        np.minimum(farms['temp_max'][:, None], crops['temp_max'][None, :])
+        - np.maximum(farms['temp_min'][:, None], crops['temp_min'][None, :])
+    )
+    band = np.maximum(crops['temp_max'] - crops['temp_min'], 1.0)[None, :]
+    temp_fit = np.clip(overlap / band, 0.0, 1.0)
+
+    # Rainfall inside the crop's range fits fully and falls off with the
+    # distance to the nearest bound, relative to the middle of the range
+    rainfall = farms['rainfall'][:, None]
+    distance = np.maximum(crops['rain_min'][None, :] - rainfall, 0) + np.maximum(rainfall - crops['rain_max'][None, :], 0)
+    middle = np.maximum((crops['rain_min'] + crops['rain_max']) / 2, 1.0)[None, :]
+    rain_fit = np.clip(1 - distance / middle, 0.0, 1.0)
+
+    # Unknown districts or ranges are treated as a good fit
+    temp_fit = np.where(np.isnan(temp_fit), 1.0, temp_fit)
+    rain_fit = np.where(np.isnan(rain_fit), 1.0, rain_fit)
+    return temp_fit * rain_fit
+
+
+def project(crops, farms, yield_potential):
+    """
+    Project yield (q/ha) and net income (per ha) with low, expected and high
+    bands. Every value returned is a (farms, crops) array.
+    """
+    fit = climate_fit(crops, farms)
+    climate_factor = CLIMATE_FLOOR + (1 - CLIMATE_FLOOR) * fit
+
+    expected_yield = crops['base_yield'][None, :] * yield_potential * climate_factor
+    spread = crops['spread'][None, :] + CLIMATE_SPREAD * (1 - fit)
+    low_yield = expected_yield * np.clip(1 - spread, 0.0, None)
+    high_yield = expected_yield * (1 + spread)
+
+    price = crops['price'][None, :]
+    cost = crops['cost'][None, :]
+    expected_income = expected_yield * price - cost
+    low_income = low_yield * price * (1 - PRICE_SPREAD) - cost
+    high_income = high_yield * price * (1 + PRICE_SPREAD) - cost
+
+    roi = np.divide(expected_income * 100, cost, out=np.zeros_like(expected_income), where=cost > 0)
+
+    return {
+        'climate_fit': fit,
+        'yield_low': low_yield,
+        'yield_expected': expected_yield,
+        'yield_high': high_yield,
+        'income_low': low_income,
+        'income_expected': expected_income,
+        'income_high': high_income,
+        'roi_percentage': roi,
+    }
+
+
+def projection_entry(projection, i, j):
+    """JSON-ready projection of crop j on farm i"""
+    return {
+        'climate_fit': round(float(projection['climate_fit'][i, j]), 3),
+        'yield_q_per_ha': {
+            'low': round(float(projection['yield_low'][i, j]), 2),
+            'expected': round(float(projection['yield_expected'][i, j]), 2),
+            'high': round(float(projection['yield_high'][i, j]), 2),
+        },
+        'net_income_per_ha': {
+            'low': round(float(projection['income_low'][i, j]), 2),
+            'expected': round(float(projection['income_expected'][i, j]), 2),
+            'high': round(float(projection['income_high'][i, j]), 2),
+        },
+        'roi_percentage': round(float(projection['roi_percentage'][i, j]), 1),
+    }
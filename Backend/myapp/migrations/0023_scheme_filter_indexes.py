@@ -0,0 +1,41 @@
+# Generated by Django 5.1.7 on 2026-10-19 18:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0022_customuser_profile_image'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='governmentscheme',
+            name='state',
+            field=models.CharField(choices=[('CENTRAL', 'Central Government'), ('KA', 'Karnataka'), ('MH', 'Maharashtra')], db_index=True, default='CENTRAL', help_text='State or central government scheme', max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='governmentscheme',
+            name='status',
+            field=models.CharField(db_index=True, help_text='Current status of the scheme (Active/Inactive/etc)', max_length=50),
+        ),
+        migrations.AlterField(
+            model_name='governmentscheme',
+            name='type',
+            field=models.CharField(db_index=True, help_text='Type/category of the scheme', max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='loanscheme',
+            name='loan_type',
+            field=models.CharField(db_index=True, max_length=100),
+        ),
+        migrations.AddIndex(
+            model_name='governmentscheme',
+            index=models.Index(fields=['type', 'state', 'status'], name='govscheme_filters_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='loanscheme',
+            index=models.Index(fields=['bank_name', 'loan_type'], name='loanscheme_bank_type_idx'),
+        ),
+    ]
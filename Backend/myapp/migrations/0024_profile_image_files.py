@@ -0,0 +1,142 @@
+# Generated by Django 5.1.7 on 2026-10-19 19:40
+
+import base64
+import binascii
+import hashlib
+import io
+import mimetypes
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import migrations, models
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+# Profile image storage as of this migration
+UPLOAD_DIR = 'profile_images'
+MAX_IMAGE_BYTES = 5 * 1024 * 1024
+THUMBNAIL_SIZE = (128, 128)
+THUMBNAIL_QUALITY = 85
+IMAGE_FORMATS = {'JPEG': 'jpg', 'PNG': 'png', 'GIF': 'gif', 'WEBP': 'webp'}
+
+# Values that are not base64 are kept as they were, in a text file
+RAW_SUFFIX = '.original.txt'
+
+
+def decode(value):
+    """(bytes, extension) of a stored data URL, or None when it is not base64"""
+    header, comma, data = value.partition(',')
+    if not comma:
+        header, data = '', header
+    try:
+        content = base64.b64decode(''.join(data.split()), validate=True)
+    except (binascii.Error, ValueError):
+        return None
+    content_type = header.removeprefix('data:').removesuffix(';base64')
+    extension = (mimetypes.guess_extension(content_type) or '.bin').lstrip('.')
+    return content, extension
+
+
+def thumbnail(content):
+    """(extension, JPEG thumbnail) of a supported image, or None"""
+    if len(content) > MAX_IMAGE_BYTES:
+        return None
+    try:
+        with Image.open(io.BytesIO(content)) as image:
+            extension = IMAGE_FORMATS.get(image.format)
+            if extension is None:
+                return None
+            image = ImageOps.exif_transpose(image)
+            image.thumbnail(THUMBNAIL_SIZE)
+            if image.mode in ('RGBA', 'LA', 'P'):
+                image = image.convert('RGBA')
+                background = Image.new('RGB', image.size, 'white')
+                background.paste(image, mask=image.getchannel('A'))
+                image = background
+            else:
+                image = image.convert('RGB')
+            output = io.BytesIO()
+            image.save(output, 'JPEG', quality=THUMBNAIL_QUALITY, optimize=True)
+            return extension, output.getvalue()
+    except (OSError, Image.DecompressionBombError):
+        return None
+
+
+def save(name, content):
+    if not default_storage.exists(name):
+        name = default_storage.save(name, ContentFile(content))
+    return name
+
+
+def extract_profile_images(apps, schema_editor):
+    """
+    Move every stored image to file storage before its column is removed.
+    Supported images get a thumbnail; anything else is stored unchanged
+    without one, so that no image is lost.
+    """
+    CustomUser = apps.get_model('myapp', 'CustomUser')
+    users = CustomUser.objects.exclude(profile_image_data__isnull=True).exclude(profile_image_data='')
+    if Image is None and users.exists():
+        raise RuntimeError('Moving profile images to file storage needs Pillow; install it and migrate again')
+    for user in users.only('id', 'profile_image_data').iterator():
+        decoded = decode(user.profile_image_data)
+        if decoded is None:
+            content, extension = user.profile_image_data.encode(), RAW_SUFFIX.lstrip('.')
+        else:
+            content, extension = decoded
+        digest = hashlib.sha256(content).hexdigest()[:32]
+        made = thumbnail(content) if decoded else None
+        thumbnail_name = ''
+        if made:
+            extension, thumbnail_content = made
+            thumbnail_name = save(f'{UPLOAD_DIR}/{user.id}/{digest}_thumb.jpg', thumbnail_content)
+        image_name = save(f'{UPLOAD_DIR}/{user.id}/{digest}.{extension}', content)
+        CustomUser.objects.filter(pk=user.pk).update(profile_image=image_name, profile_image_thumbnail=thumbnail_name)
+
+
+def restore_profile_images(apps, schema_editor):
+    CustomUser = apps.get_model('myapp', 'CustomUser')
+    for user in CustomUser.objects.exclude(profile_image='').only('id', 'profile_image').iterator():
+        with default_storage.open(user.profile_image.name) as file:
+            content = file.read()
+        if user.profile_image.name.endswith(RAW_SUFFIX):
+            value = content.decode()
+        else:
+            content_type = mimetypes.guess_type(user.profile_image.name)[0] or 'image/jpeg'
+            value = f'data:{content_type};base64,{base64.b64encode(content).decode()}'
+        CustomUser.objects.filter(pk=user.pk).update(profile_image_data=value)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0023_scheme_filter_indexes'),
+    ]
+
+    # The base64 column is kept until its images are in storage; the files are
+    # left in storage when migrating back
+    operations = [
+        migrations.RenameField(
+            model_name='customuser',
+            old_name='profile_image',
+            new_name='profile_image_data',
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='profile_image',
+            field=models.FileField(blank=True, upload_to='profile_images'),
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='profile_image_thumbnail',
+            field=models.FileField(blank=True, upload_to='profile_images'),
+        ),
+        migrations.RunPython(extract_profile_images, restore_profile_images),
+        migrations.RemoveField(
+            model_name='customuser',
+            name='profile_image_data',
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.1.7 on 2026-10-19 19:27
+
+import main_app.prefix_search
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('myapp', '0025_row_versions'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customuser',
+            index=main_app.prefix_search.PrefixSearchIndex(field='username', name='user_username_search_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=main_app.prefix_search.PrefixSearchIndex(field='email', name='user_email_search_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=main_app.prefix_search.PrefixSearchIndex(field='first_name', name='user_first_name_search_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=main_app.prefix_search.PrefixSearchIndex(field='last_name', name='user_last_name_search_idx'),
+        ),
+    ]
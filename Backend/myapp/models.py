@@ -1,6 +1,10 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 
+from main_app.prefix_search import USER_SEARCH_FIELDS, PrefixSearchIndex
+
+from .profile_images import UPLOAD_DIR
+
 class CustomUser(AbstractUser):
     # Add custom fields here
     phone_number = models.CharField(max_length=15, blank=True, null=True)
@@ -11,8 +15,19 @@ class CustomUser(AbstractUser):
     is_email_verified = models.BooleanField(default=False)
     password_reset_token = models.CharField(max_length=100, null=True, blank=True)
     password_reset_token_created_at = models.DateTimeField(null=True, blank=True)
-    profile_image = models.TextField(blank=True, null=True)  # Store base64 encoded image
+    # Names of the image and its thumbnail in file storage (see profile_images)
+    profile_image = models.FileField(upload_to=UPLOAD_DIR, blank=True)
+    profile_image_thumbnail = models.FileField(upload_to=UPLOAD_DIR, blank=True)
+    # Versions the admin user list (see main_app.catalog_versions); logins
+    # save last_login alone and leave it as it was
+    updated_at = models.DateTimeField(auto_now=True)
     
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # The admin user search (see main_app.prefix_search)
+            PrefixSearchIndex(field=field, name=f'user_{field}_search_idx') for field in USER_SEARCH_FIELDS
+        ]
+
     def __str__(self):
         return self.username
 
@@ -33,7 +48,7 @@ class LoanScheme(models.Model):
     scheme_id = models.CharField(max_length=50, primary_key=True)
     scheme_name = models.CharField(max_length=200)
     bank_name = models.CharField(max_length=100)
-    loan_type = models.CharField(max_length=100)
+    loan_type = models.CharField(max_length=100, db_index=True)
     interest_rate_min = models.FloatField()
     interest_rate_max = models.FloatField()
     interest_rate_note = models.TextField(null=True, blank=True)
@@ -59,6 +74,11 @@ class LoanScheme(models.Model):
     contact_website = models.URLField(null=True, blank=True)
     contact_info = models.TextField(null=True, blank=True, help_text="Additional contact information")
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['bank_name', 'loan_type'], name='loanscheme_bank_type_idx'),
+        ]
+
     def __str__(self):
         return f"{self.bank_name} - {self.scheme_name}"
 
@@ -86,15 +106,15 @@ class GovernmentScheme(models.Model):
         help_text="Unique identifier for the scheme")
     name = models.CharField(max_length=255, 
         help_text="Name of the government scheme")
-    type = models.CharField(max_length=100, 
+    type = models.CharField(max_length=100, db_index=True,
         help_text="Type/category of the scheme")
     description = models.TextField(
         help_text="Detailed description of the scheme")
     target_group = models.CharField(max_length=255, 
         help_text="Target beneficiaries of the scheme")
-    status = models.CharField(max_length=50, 
+    status = models.CharField(max_length=50, db_index=True,
         help_text="Current status of the scheme (Active/Inactive/etc)")
-    state = models.CharField(max_length=20, choices=STATE_CHOICES, default='CENTRAL',
+    state = models.CharField(max_length=20, choices=STATE_CHOICES, default='CENTRAL', db_index=True,
         help_text="State or central government scheme")
     
     # Complex data stored as JSON
@@ -113,6 +133,11 @@ class GovernmentScheme(models.Model):
     faq = models.JSONField(default=list, null=True, blank=True,
         help_text="Frequently asked questions and answers")
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['type', 'state', 'status'], name='govscheme_filters_idx'),
+        ]
+    
     def __str__(self):
         """String representation of the scheme"""
         return f"{self.name} ({self.state})"
@@ -0,0 +1,116 @@
+"""
+Profile images in file storage.
+
+Clients upload a profile image as a base64 data URL. It is stored in the
+default storage with a small JPEG thumbnail, and CustomUser keeps only the
+two file names, so user queries and responses no longer carry the image.
+
+Files are named after a hash of the uploaded image, so a name never gets
+other content and views.profile_image_file serves them as immutable. It serves
+them to their owner and to staff only, under the user id the name starts
+with, and marks them private so that no shared cache keeps them.
+"""
+import base64
+import binascii
+import hashlib
+import io
+from collections import namedtuple
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.urls import reverse
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow is needed to store images, not to serve them
+    Image = None
+
+UPLOAD_DIR = 'profile_images'
+MAX_IMAGE_BYTES = 5 * 1024 * 1024
+THUMBNAIL_SIZE = (128, 128)
+THUMBNAIL_QUALITY = 85
+
+# Formats kept as uploaded, with their file extension
+IMAGE_FORMATS = {'JPEG': 'jpg', 'PNG': 'png', 'GIF': 'gif', 'WEBP': 'webp'}
+
+# An uploaded image that is ready to store
+ProfileImage = namedtuple('ProfileImage', ['content', 'extension', 'thumbnail'])
+
+
+class InvalidProfileImage(ValueError):
+    pass
+
+
+def decode_data_url(value):
+    """Image bytes of a base64 data URL (a bare base64 string is accepted too)"""
+    header, comma, data = value.partition(',')
+    if not comma:
+        data = header
+    elif not (header.startswith('data:image/') and header.endswith(';base64')):
+        raise InvalidProfileImage('Expected a base64 data URL of an image')
+    try:
+        return base64.b64decode(''.join(data.split()), validate=True)
+    except (binascii.Error, ValueError):
+        raise InvalidProfileImage('The image is not valid base64')
+
+
+def thumbnail(image):
+    """JPEG bytes of image scaled down to fit THUMBNAIL_SIZE"""
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail(THUMBNAIL_SIZE)
+    if image.mode in ('RGBA', 'LA', 'P'):
+        # JPEG has no transparency; put the image on white
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A'))
+        image = background
+    else:
+        image = image.convert('RGB')
+    output = io.BytesIO()
+    image.save(output, 'JPEG', quality=THUMBNAIL_QUALITY, optimize=True)
+    return output.getvalue()
+
+
+def read_profile_image(content):
+    """
+    Check that content is a supported image and make its thumbnail.
+    Raises InvalidProfileImage otherwise.
+    """
+    if len(content) > MAX_IMAGE_BYTES:
+        raise InvalidProfileImage(f'The image is larger than {MAX_IMAGE_BYTES // (1024 * 1024)} MB')
+    if Image is None:
+        raise InvalidProfileImage('Storing profile images needs Pillow')
+    try:
+        with Image.open(io.BytesIO(content)) as image:
+            extension = IMAGE_FORMATS.get(image.format)
+            if extension is None:
+                raise InvalidProfileImage(f'Unsupported image format {image.format}')
+            image.load()
+            return ProfileImage(content, extension, thumbnail(image))
+    except (OSError, Image.DecompressionBombError) as e:
+        raise InvalidProfileImage(f'Not a readable image: {e}')
+
+
+def store_profile_image(user_id, image):
+    """Save a ProfileImage of a user; returns (image name, thumbnail name) in the default storage"""
+    digest = hashlib.sha256(image.content).hexdigest()[:32]
+    names = []
+    for name, content in ((f'{UPLOAD_DIR}/{user_id}/{digest}.{image.extension}', image.content),
+                          (f'{UPLOAD_DIR}/{user_id}/{digest}_thumb.jpg', image.thumbnail)):
+        if not default_storage.exists(name):
+            name = default_storage.save(name, ContentFile(content))
+        names.append(name)
+    return tuple(names)
+
+
+def delete_profile_images(*names):
+    for name in names:
+        if name:
+            default_storage.delete(name)
+
+
+def profile_image_url(name):
+    """URL that serves a stored profile image, or None without one"""
+    if not name:
+        return None
+    return reverse('profile-image', args=[name.removeprefix(f'{UPLOAD_DIR}/')])
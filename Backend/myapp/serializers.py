@@ -1,7 +1,13 @@
 from rest_framework import serializers
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError
+from django.db import transaction
+from rest_framework.fields import SkipField
 from .models import CustomUser
+from .profile_images import (
+    InvalidProfileImage, decode_data_url, delete_profile_images, profile_image_url, read_profile_image,
+    store_profile_image
+)
 import logging
 
 logger = logging.getLogger(__name__)
@@ -77,15 +83,59 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
             logger.error(f"Error creating user: {str(e)}")
             raise serializers.ValidationError(f"Error creating user: {str(e)}")
 
+class ProfileImageField(serializers.Field):
+    """
+    Written as a base64 data URL of the image (empty to remove it), read as
+    the URL the stored image is served from. Writing back the URL that was
+    read leaves the image as it is.
+    """
+
+    def to_representation(self, value):
+        return profile_image_url(value.name)
+
+    def to_internal_value(self, data):
+        if not data:
+            return None
+        instance = self.parent.instance
+        if instance is not None and data == profile_image_url(instance.profile_image.name):
+            raise SkipField()
+        if not isinstance(data, str):
+            raise serializers.ValidationError('Expected a base64 data URL of an image')
+        try:
+            return read_profile_image(decode_data_url(data))
+        except InvalidProfileImage as e:
+            raise serializers.ValidationError(str(e))
+
+
 class UserProfileSerializer(serializers.ModelSerializer):
     """Serializer for user profile information."""
+    profile_image = ProfileImageField(required=False, allow_null=True)
+    profile_image_thumbnail = serializers.SerializerMethodField()
     
     class Meta:
         model = CustomUser
         fields = ('id', 'username', 'email', 'first_name', 'last_name', 'phone_number', 
-                  'address', 'date_joined', 'is_email_verified', 'profile_image')
+                  'address', 'date_joined', 'is_email_verified', 'profile_image', 'profile_image_thumbnail')
         read_only_fields = ('id', 'email', 'date_joined', 'is_email_verified')
 
+    def get_profile_image_thumbnail(self, user):
+        return profile_image_url(user.profile_image_thumbnail.name)
+
+    def update(self, instance, validated_data):
+        if 'profile_image' not in validated_data:
+            return super().update(instance, validated_data)
+
+        # The files replaced are deleted once the row pointing at the new ones
+        # is committed, so a rolled back save still has its files
+        image = validated_data.pop('profile_image')
+        old_names = {instance.profile_image.name, instance.profile_image_thumbnail.name}
+        names = store_profile_image(instance.id, image) if image else ('', '')
+        instance.profile_image, instance.profile_image_thumbnail = names
+        instance = super().update(instance, validated_data)
+        replaced = old_names - set(names)
+        transaction.on_commit(lambda: delete_profile_images(*replaced))
+        return instance
+
 class PasswordResetSerializer(serializers.Serializer):
     """Serializer for requesting a password reset"""
     email = serializers.EmailField()
@@ -1,3 +1,272 @@
-from django.test import TestCase
+import asyncio
+import base64
+import io
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from PIL import Image
+from rest_framework.authtoken.models import Token
+
+from AgriGuide.testing import ReplicaTestCase
+
+from . import weather, weather_cache
+from .models import CustomUser, GovernmentScheme, LoanScheme
+from .weather_stub import StubWeatherServer
+
+
+class WeatherProxyTests(SimpleTestCase):
+    """Weather endpoints against a local stand-in for OpenWeather"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.stub = StubWeatherServer(unknown_cities=['Atlantis']).start()
+        cls.settings_override = override_settings(WEATHER_API_BASE_URL=cls.stub.base_url)
+        cls.settings_override.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings_override.disable()
+        cls.stub.stop()
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+
+    def test_current_weather(self):
+        response = self.client.get('/api/weather/', {'city': 'Belagavi'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['city'], 'Belagavi')
+        self.assertEqual(response.json()['humidity'], 64)
+
+    def test_forecast(self):
+        response = self.client.get('/api/weather/forecast/', {'city': 'Mysuru'})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(len(data['forecasts']), 5)
+        self.assertEqual(len(data['hourly']), 8)
+        self.assertTrue(all(forecast['timestamp'].endswith('12:00:00') for forecast in data['forecasts']))
+
+    def test_unknown_city(self):
+        response = self.client.get('/api/weather/', {'city': 'Atlantis'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], 'city not found')
+
+    async def test_async_views(self):
+        response = await self.async_client.get('/api/weather/async/', {'city': 'Hubballi'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['city'], 'Hubballi')
+
+        response = await self.async_client.get('/api/weather/forecast/async/', {'city': 'Atlantis'})
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(WEATHER_API_BASE_URL='http://127.0.0.1:9', WEATHER_CONNECT_TIMEOUT=0.5)
+    def test_unreachable_upstream(self):
+        response = self.client.get('/api/weather/', {'city': 'Belagavi'})
+        self.assertEqual(response.status_code, 503)
+
+
+class WeatherCacheTests(SimpleTestCase):
+    """Caching, request coalescing and stale-while-revalidate"""
+
+    def setUp(self):
+        cache.clear()
+        self.stub = StubWeatherServer(latency=0.2).start()
+        self.addCleanup(self.stub.stop)
+        settings_override = override_settings(WEATHER_API_BASE_URL=self.stub.base_url)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def wait_for_calls(self, count, timeout=5):
+        deadline = time.monotonic() + timeout
+        while self.stub.total_calls < count and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def test_cached_by_normalized_city(self):
+        data, status = weather_cache.get_weather(weather.CURRENT, 'Belagavi')
+        self.assertEqual(status, weather_cache.MISS)
+        data, status = weather_cache.get_weather(weather.CURRENT, '  belagavi ')
+        self.assertEqual(status, weather_cache.HIT)
+        self.assertEqual(data['city'], 'Belagavi')
+        self.assertEqual(self.stub.total_calls, 1)
+
+    def test_concurrent_requests_share_one_upstream_call(self):
+        with ThreadPoolExecutor(max_workers=50) as pool:
+            results = list(pool.map(
+                lambda _: weather_cache.get_weather(weather.FORECAST, 'Belagavi'), range(50)
+            ))
+        self.assertEqual(self.stub.total_calls, 1)
+        self.assertTrue(all(data['city'] == 'Belagavi' for data, _ in results))
+
+    def test_concurrent_async_requests_share_one_upstream_call(self):
+        async def lookups():
+            return await asyncio.gather(*(
+                weather_cache.aget_weather(weather.CURRENT, 'Belagavi') for _ in range(200)
+            ))
+        results = asyncio.run(lookups())
+        self.assertEqual(self.stub.total_calls, 1)
+        self.assertEqual(len(results), 200)
+
+    def test_stale_entry_is_served_while_refreshing(self):
+        old = {'data': {'city': 'Belagavi', 'temperature': 19.0}, 'fetched_at': time.time() - weather_cache.CURRENT_TTL - 1}
+        cache.set(weather_cache.cache_key(weather.CURRENT, 'Belagavi'), old)
+
+        start = time.monotonic()
+        data, status = weather_cache.get_weather(weather.CURRENT, 'Belagavi')
+        self.assertLess(time.monotonic() - start, self.stub.latency)
+        self.assertEqual(status, weather_cache.STALE)
+        self.assertEqual(data['temperature'], 19.0)
+
+        self.wait_for_calls(1)
+        deadline = time.monotonic() + 5
+        while status != weather_cache.HIT and time.monotonic() < deadline:
+            time.sleep(0.01)
+            data, status = weather_cache.get_weather(weather.CURRENT, 'Belagavi')
+        self.assertEqual(status, weather_cache.HIT)
+        self.assertEqual(data['temperature'], 27.5)
+        self.assertEqual(self.stub.total_calls, 1)
+
+
+class SparseFieldsetTests(ReplicaTestCase):
+    """?fields= limits both the columns loaded and the keys returned"""
+
+    def setUp(self):
+        cache.clear()
+        GovernmentScheme.objects.create(
+            scheme_id='PMKSY', name='PM Krishi Sinchayee Yojana', type='Irrigation',
+            description='Per drop more crop', target_group='All farmers', status='Active',
+            faq=[{'question': 'Who can apply?', 'answer': 'Any farmer'}] * 50
+        )
+        LoanScheme.objects.create(
+            scheme_id='KCC', scheme_name='Kisan Credit Card', bank_name='State Bank',
+            loan_type='Crop Loan', interest_rate_min=7, interest_rate_max=9,
+            repayment_term_months=12, description='Short-term credit'
+        )
+
+    def get(self, url, params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        select = [query['sql'] for query in queries if query['sql'].startswith('SELECT')][-1]
+        return response, select
+
+    def test_gov_scheme_detail(self):
+        response, select = self.get('/api/gov-schemes/PMKSY/', {'fields': 'name,status'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'name': 'PM Krishi Sinchayee Yojana', 'status': 'Active'})
+        self.assertNotIn('"faq"', select)
+
+        full = self.client.get('/api/gov-schemes/PMKSY/')
+        self.assertEqual(len(full.json()['faq']), 50)
+        self.assertLess(len(response.content), len(full.content) / 10)
+
+    def test_loan_scheme_detail(self):
+        response, select = self.get('/api/bank-schemes/KCC/', {'fields': 'name,contactInfo'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.json()), {'name', 'contactInfo'})
+        self.assertEqual(response.json()['contactInfo']['website'], 'https://www.statebank.com')
+        self.assertNotIn('"description"', select)
+
+    def test_list_endpoints(self):
+        response = self.client.get('/api/gov-schemes/', {'fields': 'scheme_id'})
+        self.assertEqual(response.json()['schemes'], [{'scheme_id': 'PMKSY'}])
+        response = self.client.get('/api/bank-schemes/', {'fields': 'id,bank'})
+        self.assertEqual(response.json()['schemes'], [{'id': 'KCC', 'bank': 'State Bank'}])
+
+    def test_unknown_field(self):
+        response = self.client.get('/api/gov-schemes/PMKSY/', {'fields': 'name,password'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], 'Unknown fields: password')
+
+
+def data_url(size, color, image_format='PNG'):
+    output = io.BytesIO()
+    Image.new('RGBA' if image_format == 'PNG' else 'RGB', size, color).save(output, image_format)
+    content_type = f'image/{image_format.lower()}'
+    return f'data:{content_type};base64,{base64.b64encode(output.getvalue()).decode()}'
+
+
+class ProfileImageTests(TestCase):
+    """Profile images go to file storage with a thumbnail; the user row keeps their names"""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings = override_settings(MEDIA_ROOT=media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.user = CustomUser.objects.create_user(username='ravi', email='ravi@example.com', password='secret')
+        token = Token.objects.create(user=self.user)
+        self.auth = {'HTTP_AUTHORIZATION': f'Token {token.key}'}
+
+    def put(self, data):
+        return self.client.put('/api/profile/', data, content_type='application/json', **self.auth)
+
+    def test_upload(self):
+        response = self.put({'profile_image': data_url((800, 600), (0, 128, 0, 255))})
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertRegex(self.user.profile_image.name, r'^profile_images/\d+/[0-9a-f]{32}\.png$')
+        self.assertEqual(response.json()['profile_image'], f'/api/profile-images/{self.user.profile_image.name[15:]}')
+
+        thumbnail = self.client.get(response.json()['profile_image_thumbnail'], **self.auth)
+        self.assertEqual(thumbnail['Content-Type'], 'image/jpeg')
+        self.assertEqual(
+            sorted(thumbnail['Cache-Control'].split(', ')), ['immutable', 'max-age=31536000', 'private']
+        )
+        self.assertIn('Authorization', thumbnail['Vary'])
+        with Image.open(io.BytesIO(b''.join(thumbnail.streaming_content))) as image:
+            self.assertEqual(image.size, (128, 96))
+
+        image = self.client.get(response.json()['profile_image'], **self.auth)
+        cached = self.client.get(response.json()['profile_image'], HTTP_IF_NONE_MATCH=image['ETag'], **self.auth)
+        self.assertEqual(cached.status_code, 304)
+
+    def test_only_owner_and_staff_see_the_image(self):
+        url = self.put({'profile_image': data_url((64, 64), (255, 0, 0), 'JPEG')}).json()['profile_image']
+        self.assertEqual(self.client.get(url).status_code, 401)
+
+        other = CustomUser.objects.create_user(username='asha', email='asha@example.com', password='secret')
+        other_auth = {'HTTP_AUTHORIZATION': f'Token {Token.objects.create(user=other).key}'}
+        self.assertEqual(self.client.get(url, **other_auth).status_code, 404)
+
+        other.is_staff = True
+        other.save()
+        self.assertEqual(self.client.get(url, **other_auth).status_code, 200)
+
+    def test_replace_and_remove(self):
+        first = self.put({'profile_image': data_url((64, 64), (255, 0, 0), 'JPEG')}).json()
+        self.user.refresh_from_db()
+        first_names = [self.user.profile_image.name, self.user.profile_image_thumbnail.name]
+
+        # Saving the profile form sends back the URL it was given
+        response = self.put({'first_name': 'Ravi', 'profile_image': first['profile_image']})
+        self.assertEqual(response.json()['profile_image'], first['profile_image'])
+
+        # The replaced files are deleted once the new names are committed
+        with self.captureOnCommitCallbacks() as callbacks:
+            second = self.put({'profile_image': data_url((64, 64), (0, 0, 255), 'JPEG')}).json()
+        self.assertNotEqual(second['profile_image'], first['profile_image'])
+        self.assertTrue(all(default_storage.exists(name) for name in first_names))
+        for callback in callbacks:
+            callback()
+        self.assertFalse(any(default_storage.exists(name) for name in first_names))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.put({'profile_image': None})
+        self.assertIsNone(response.json()['profile_image'])
+        self.assertEqual(self.client.get(second['profile_image'], **self.auth).status_code, 404)
+
+    def test_invalid_image(self):
+        response = self.put({'profile_image': 'data:image/png;base64,bm90IGFuIGltYWdl'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('profile_image', response.json())
+        self.assertEqual(self.client.get('/api/profile-images/../settings.py', **self.auth).status_code, 404)
@@ -9,7 +9,10 @@ urlpatterns = [
     path('login/', views.login_user, name='login'),
     path('weather/', views.get_weather, name='weather'),
     path('weather/forecast/', views.get_weather_forecast, name='weather-forecast'),
+    path('weather/async/', views.get_weather_async, name='weather-async'),
+    path('weather/forecast/async/', views.get_weather_forecast_async, name='weather-forecast-async'),
     path('profile/', views.user_profile, name='profile'),
+    path('profile-images/<path:name>', views.profile_image_file, name='profile-image'),
     path('password-reset/', views.password_reset_request, name='password-reset'),
     path('password-reset/confirm/', views.password_reset_confirm, name='password-reset-confirm'),
     # Bank app endpoints - renamed to avoid conflict
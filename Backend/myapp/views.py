@@ -15,18 +15,28 @@ from datetime import timedelta
 import logging
 from django.core.mail import send_mail
 from django.conf import settings
-import requests
 import json
 import os
 from django.contrib.auth.hashers import make_password
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from django.db.models import Q, Min, Max
-from django.http import JsonResponse
+from AgriGuide.renderers import FastJsonResponse as JsonResponse
 from main_app.models import Crop, Technology, LoanOption, FarmerProfile
 from django.views.decorators.csrf import csrf_exempt
 from django.db import models
 from django.contrib.auth import get_user_model
 import uuid
+from main_app.catalog_versions import catalog_condition
+from main_app.fieldsets import Fieldset, InvalidFieldset, column
+from main_app.pagination import InvalidPageRequest, paginate
+from main_app.prefix_search import user_search
+from . import weather, weather_cache
+from .profile_images import UPLOAD_DIR, profile_image_url
+import mimetypes
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import etag
 
 logger = logging.getLogger(__name__)
 #registration
@@ -243,7 +253,8 @@ def login_user(request):
                 'is_verified': user.is_email_verified,
                 'is_staff': user.is_staff,
                 'date_joined': user.date_joined,
-                'profile_image': user.profile_image  # Include profile image in response
+                'profile_image': profile_image_url(user.profile_image.name),
+                'profile_image_thumbnail': profile_image_url(user.profile_image_thumbnail.name),
             }, status=status.HTTP_200_OK)
         else:
             return Response({'error': 'Invalid username or password'}, status=status.HTTP_400_BAD_REQUEST)
@@ -252,169 +263,86 @@ def login_user(request):
         return Response({'error': 'An error occurred during login'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 # Weather API
+def weather_error(error, subject):
+    """(payload, status) for a failed weather lookup"""
+    if isinstance(error, weather.WeatherServiceError):
+        return {'message': f'Failed to fetch {subject}', 'error': error.message}, status.HTTP_400_BAD_REQUEST
+    if isinstance(error, weather.WeatherUnavailable):
+        logger.error(f"Request error to OpenWeather API: {str(error)}")
+        return {'message': 'Failed to connect to weather service', 'error': str(error)}, status.HTTP_503_SERVICE_UNAVAILABLE
+    logger.error(f"Weather API error: {str(error)}")
+    return {'message': f'Failed to retrieve {subject}', 'error': str(error)}, status.HTTP_500_INTERNAL_SERVER_ERROR
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def get_weather(request):
+    city = request.query_params.get('city', 'London')  # Default to London if no city provided
     try:
-        city = request.query_params.get('city', 'London')  # Default to London if no city provided
-        api_key = 'bc9254afa9db3515eab55abb72088120'  # OpenWeather API key
-        
-        # Make request to OpenWeather API
-        url = f'https://api.openweathermap.org/data/2.5/weather?q={city}&appid={api_key}&units=metric'
-        response = requests.get(url)
-        
-        if response.status_code == 200:
-            data = response.json()
-            weather_data = {
-                'city': data['name'],
-                'temperature': data['main']['temp'],
-                'description': data['weather'][0]['description'],
-                'icon': data['weather'][0]['icon'],
-                'humidity': data['main']['humidity'],
-                'wind_speed': data['wind']['speed'],
-                'timestamp': timezone.now().isoformat()
-            }
-            return Response(weather_data, status=status.HTTP_200_OK)
-        else:
-            return Response({
-                'message': 'Failed to fetch weather data',
-                'error': response.json().get('message', 'Unknown error')
-            }, status=status.HTTP_400_BAD_REQUEST)
-    
+        data, cache_status = weather_cache.get_weather(weather.CURRENT, city)
+        return Response(data, status=status.HTTP_200_OK, headers={'X-Weather-Cache': cache_status})
     except Exception as e:
-        logger.error(f"Weather API error: {str(e)}")
-        return Response({
-            'message': 'Failed to retrieve weather data',
-            'error': str(e)
-        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        payload, status_code = weather_error(e, 'weather data')
+        return Response(payload, status=status_code)
 
 # 5-day Weather Forecast API
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def get_weather_forecast(request):
+    city = request.query_params.get('city', 'Mumbai')  # Default to Mumbai if no city provided
+    logger.info(f"Weather forecast request for city: {city}")
     try:
-        city = request.query_params.get('city', 'Mumbai')  # Default to Mumbai if no city provided
-        api_key = '08fdd254cb046013cd79b0c67a7a485d'  # OpenWeather API key
-        
-        logger.info(f"Weather forecast request for city: {city}")
-        
-        # Make request to OpenWeather 5-day forecast API
-        url = f'https://api.openweathermap.org/data/2.5/forecast?q={city}&appid={api_key}&units=metric'
-        logger.info(f"Making request to OpenWeather API: {url}")
-        
-        try:
-            response = requests.get(url, timeout=10)  # Add timeout to prevent hanging
-            logger.info(f"OpenWeather API response status: {response.status_code}")
-            
-            if response.status_code == 200:
-                data = response.json()
-                
-                # Process the forecast data - we'll take one forecast per day (noon time) for 5-day forecast
-                daily_forecasts = []
-                days_processed = set()
-                
-                for item in data['list']:
-                    # Parse date from timestamp
-                    date = item['dt_txt'].split(' ')[0]
-                    time = item['dt_txt'].split(' ')[1]
-                    
-                    # Only take one reading per day (around noon) for daily forecast
-                    if date not in days_processed and '12:00:00' in time:
-                        days_processed.add(date)
-                        
-                        forecast = {
-                            'date': date,
-                            'temperature': item['main']['temp'],
-                            'feels_like': item['main']['feels_like'],
-                            'description': item['weather'][0]['description'],
-                            'icon': item['weather'][0]['icon'],
-                            'humidity': item['main']['humidity'],
-                            'wind_speed': item['wind']['speed'],
-                            'timestamp': item['dt_txt']
-                        }
-                        daily_forecasts.append(forecast)
-                        
-                        # Only get 5 days of forecast
-                        if len(daily_forecasts) >= 5:
-                            break
-                
-                # If we couldn't find exactly noon forecasts, just take the first forecast for each day
-                if len(daily_forecasts) < 5:
-                    days_processed = set()
-                    daily_forecasts = []
-                    
-                    for item in data['list']:
-                        date = item['dt_txt'].split(' ')[0]
-                        if date not in days_processed:
-                            days_processed.add(date)
-                            
-                            forecast = {
-                                'date': date,
-                                'temperature': item['main']['temp'],
-                                'feels_like': item['main']['feels_like'],
-                                'description': item['weather'][0]['description'],
-                                'icon': item['weather'][0]['icon'],
-                                'humidity': item['main']['humidity'],
-                                'wind_speed': item['wind']['speed'],
-                                'timestamp': item['dt_txt']
-                            }
-                            daily_forecasts.append(forecast)
-                            
-                            if len(daily_forecasts) >= 5:
-                                break
-                
-                # For hourly forecast, take the first 8 entries which will have different times
-                hourly_forecasts = []
-                for i, item in enumerate(data['list']):
-                    if i >= 8:  # Only take first 8 entries for hourly forecast
-                        break
-                        
-                    forecast = {
-                        'date': item['dt_txt'].split(' ')[0],
-                        'temperature': item['main']['temp'],
-                        'feels_like': item['main']['feels_like'],
-                        'description': item['weather'][0]['description'],
-                        'icon': item['weather'][0]['icon'],
-                        'humidity': item['main']['humidity'],
-                        'wind_speed': item['wind']['speed'],
-                        'timestamp': item['dt_txt']
-                    }
-                    hourly_forecasts.append(forecast)
-                
-                response_data = {
-                    'city': data['city']['name'],
-                    'country': data['city']['country'],
-                    'forecasts': daily_forecasts,
-                    'hourly': hourly_forecasts
-                }
-                
-                logger.info(f"Successfully processed forecast data for {city}, found {len(daily_forecasts)} day(s) and {len(hourly_forecasts)} hourly forecasts")
-                return Response(response_data, status=status.HTTP_200_OK)
-            else:
-                error_message = response.json().get('message', 'Unknown error')
-                logger.error(f"OpenWeather API error: {response.status_code} - {error_message}")
-                return Response({
-                    'message': 'Failed to fetch forecast data',
-                    'error': error_message
-                }, status=status.HTTP_400_BAD_REQUEST)
-                
-        except requests.RequestException as req_err:
-            logger.error(f"Request error to OpenWeather API: {str(req_err)}")
-            return Response({
-                'message': 'Failed to connect to weather service',
-                'error': str(req_err)
-            }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
-    
+        data, cache_status = weather_cache.get_weather(weather.FORECAST, city)
+        return Response(data, status=status.HTTP_200_OK, headers={'X-Weather-Cache': cache_status})
     except Exception as e:
-        logger.error(f"Weather forecast API error: {str(e)}")
-        return Response({
-            'message': 'Failed to retrieve forecast data',
-            'error': str(e)
-        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        payload, status_code = weather_error(e, 'forecast data')
+        return Response(payload, status=status_code)
+
+# Async weather APIs for ASGI deployments. The worker is free to serve other
+# requests while OpenWeather answers.
+async def get_weather_async(request):
+    if request.method != 'GET':
+        return JsonResponse({'error': 'Method not allowed'}, status=405)
+    city = request.GET.get('city', 'London')
+    try:
+        data, cache_status = await weather_cache.aget_weather(weather.CURRENT, city)
+        return JsonResponse(data, headers={'X-Weather-Cache': cache_status})
+    except Exception as e:
+        payload, status_code = weather_error(e, 'weather data')
+        return JsonResponse(payload, status=status_code)
+
+async def get_weather_forecast_async(request):
+    if request.method != 'GET':
+        return JsonResponse({'error': 'Method not allowed'}, status=405)
+    city = request.GET.get('city', 'Mumbai')
+    try:
+        data, cache_status = await weather_cache.aget_weather(weather.FORECAST, city)
+        return JsonResponse(data, headers={'X-Weather-Cache': cache_status})
+    except Exception as e:
+        payload, status_code = weather_error(e, 'forecast data')
+        return JsonResponse(payload, status=status_code)
 
 def home(request):
     return render(request, 'myapp/home.html')
 
+# Profile images, served to their owner and to staff only. The file names
+# change with the content (see profile_images), so the browser may keep a file
+# for good and the name serves as its ETag; shared caches may not keep it.
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@etag(lambda request, name: name)
+def profile_image_file(request, name):
+    parts = name.split('/')
+    if '..' in parts or not (request.user.is_staff or parts[0] == str(request.user.id)):
+        raise Http404('No such profile image')
+    try:
+        file = default_storage.open(f'{UPLOAD_DIR}/{name}')
+    except FileNotFoundError:
+        raise Http404('No such profile image')
+    response = FileResponse(file, content_type=mimetypes.guess_type(name)[0] or 'application/octet-stream')
+    patch_cache_control(response, private=True, max_age=365 * 24 * 60 * 60, immutable=True)
+    patch_vary_headers(response, ['Authorization'])
+    return response
+
 # JSON Data Deletion API
 @api_view(['DELETE'])
 @permission_classes([IsAuthenticated])
@@ -608,11 +536,71 @@ def password_reset_confirm(request):
 
 # Bank App API endpoints
 
+LOAN_REQUIRED_DOCUMENTS = ['Proof of Identity (Aadhaar/PAN/Voter ID)', 'Proof of Address', 'Land Records', 'Income Statements (if applicable)', 'Bank Statements (last 6 months)']
+LOAN_APPLICATION_PROCESS = [
+    'Visit your nearest branch or apply online through the bank website',
+    'Fill out the loan application form',
+    'Submit all required documents',
+    'Await field verification and loan approval',
+    'Sign loan agreement and receive disbursement'
+]
+
+def loan_contact_info(scheme):
+    bank_domain = scheme.bank_name.lower().replace(' ', '')
+    return {
+        'phone': scheme.contact_phone or '1800-XXX-XXXX',
+        'email': scheme.contact_email or ('support@' + bank_domain + '.com'),
+        'website': scheme.contact_website or ('https://www.' + bank_domain + '.com'),
+        'additionalInfo': scheme.contact_info
+    }
+
+# Output fields of the loan scheme endpoints, selectable with ?fields=
+LOAN_SCHEME_LIST_FIELDS = {
+    'id': column('scheme_id'),
+    'name': column('scheme_name'),
+    'bank': column('bank_name'),
+    'description': column('description'),
+    'loanType': column('loan_type'),
+    'interestRateMin': column('interest_rate_min'),
+    'interestRateMax': column('interest_rate_max'),
+    'repaymentTermMonths': column('repayment_term_months'),
+}
+LOAN_SCHEME_LIST_FIELDSET = Fieldset(LOAN_SCHEME_LIST_FIELDS)
+LOAN_SCHEME_DETAIL_FIELDSET = Fieldset({
+    **LOAN_SCHEME_LIST_FIELDS,
+    'interestRateNote': column('interest_rate_note'),
+    'repaymentCategory': column('repayment_category'),
+    'eligibilityCriteria': column('eligibility'),
+    'benefits': column('key_benefits'),
+    'maxLoanAmount': (('loan_limit_max',), lambda scheme: scheme.loan_limit_max or None),
+    'minLoanAmount': (('loan_limit_min',), lambda scheme: scheme.loan_limit_min or None),
+    'loanLimitNote': column('loan_limit_note'),
+    'collateralRequired': column('collateral_required'),
+    'loanPurpose': column('loan_purpose'),
+    'processingFeeNote': column('processing_fee_note'),
+    'subsidyAvailable': column('subsidy_available'),
+    'subsidyDetails': column('subsidy_details'),
+    'insuranceLinkage': column('insurance_linkage'),
+    'renewalPeriod': column('renewal_period'),
+    'longDescription': column('description'),
+    'requiredDocuments': ((), lambda scheme: LOAN_REQUIRED_DOCUMENTS),
+    'applicationProcess': ((), lambda scheme: LOAN_APPLICATION_PROCESS),
+    'contactInfo': (
+        ('bank_name', 'contact_phone', 'contact_email', 'contact_website', 'contact_info'),
+        loan_contact_info
+    ),
+})
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@catalog_condition(LoanScheme)
 def api_loan_schemes(request):
     """API endpoint to fetch loan schemes for the React frontend"""
-    schemes = LoanScheme.objects.all()
+    try:
+        fields = LOAN_SCHEME_LIST_FIELDSET.select(request.GET)
+    except InvalidFieldset as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    schemes = LOAN_SCHEME_LIST_FIELDSET.only(LoanScheme.objects.all(), fields)
     
     # Filter by bank
     bank = request.GET.get('bank')
@@ -649,19 +637,7 @@ def api_loan_schemes(request):
         )
     
     # Format data for frontend
-    schemes_data = []
-    for scheme in schemes:
-        scheme_data = {
-            'id': scheme.scheme_id,
-            'name': scheme.scheme_name,
-            'bank': scheme.bank_name,
-            'description': scheme.description,
-            'loanType': scheme.loan_type,
-            'interestRateMin': scheme.interest_rate_min,
-            'interestRateMax': scheme.interest_rate_max,
-            'repaymentTermMonths': scheme.repayment_term_months
-        }
-        schemes_data.append(scheme_data)
+    schemes_data = [LOAN_SCHEME_LIST_FIELDSET.serialize(scheme, fields) for scheme in schemes]
     
     # Get filter options
     filter_options = {
@@ -682,55 +658,19 @@ def api_loan_schemes(request):
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@catalog_condition(LoanScheme)
 def api_scheme_detail(request, scheme_id):
     """API endpoint to fetch details of a specific loan scheme"""
     try:
+        fields = LOAN_SCHEME_DETAIL_FIELDSET.select(request.GET)
         print(f"Fetching scheme with ID: {scheme_id}")
-        scheme = LoanScheme.objects.get(scheme_id=scheme_id)
-        print(f"Found scheme: {scheme.scheme_name}")
-        
-        scheme_data = {
-            'id': scheme.scheme_id,
-            'name': scheme.scheme_name,
-            'bank': scheme.bank_name,
-            'description': scheme.description,
-            'loanType': scheme.loan_type,
-            'interestRateMin': scheme.interest_rate_min,
-            'interestRateMax': scheme.interest_rate_max,
-            'interestRateNote': scheme.interest_rate_note,
-            'repaymentTermMonths': scheme.repayment_term_months,
-            'repaymentCategory': scheme.repayment_category,
-            'eligibilityCriteria': scheme.eligibility,
-            'benefits': scheme.key_benefits,
-            'maxLoanAmount': float(scheme.loan_limit_max) if scheme.loan_limit_max else None,
-            'minLoanAmount': float(scheme.loan_limit_min) if scheme.loan_limit_min else None,
-            'loanLimitNote': scheme.loan_limit_note,
-            'collateralRequired': scheme.collateral_required,
-            'loanPurpose': scheme.loan_purpose,
-            'processingFeeNote': scheme.processing_fee_note,
-            'subsidyAvailable': scheme.subsidy_available,
-            'subsidyDetails': scheme.subsidy_details,
-            'insuranceLinkage': scheme.insurance_linkage,
-            'renewalPeriod': scheme.renewal_period,
-            'longDescription': scheme.description,
-            'requiredDocuments': ['Proof of Identity (Aadhaar/PAN/Voter ID)', 'Proof of Address', 'Land Records', 'Income Statements (if applicable)', 'Bank Statements (last 6 months)'],
-            'applicationProcess': [
-                'Visit your nearest branch or apply online through the bank website',
-                'Fill out the loan application form',
-                'Submit all required documents',
-                'Await field verification and loan approval',
-                'Sign loan agreement and receive disbursement'
-            ],
-            'contactInfo': {
-                'phone': scheme.contact_phone or '1800-XXX-XXXX',
-                'email': scheme.contact_email or ('support@' + scheme.bank_name.lower().replace(' ', '') + '.com'),
-                'website': scheme.contact_website or ('https://www.' + scheme.bank_name.lower().replace(' ', '') + '.com'),
-                'additionalInfo': scheme.contact_info
-            }
-        }
+        scheme = LOAN_SCHEME_DETAIL_FIELDSET.only(LoanScheme.objects.all(), fields).get(scheme_id=scheme_id)
+        scheme_data = LOAN_SCHEME_DETAIL_FIELDSET.serialize(scheme, fields)
         
         print("Returning data to frontend")
         return JsonResponse(scheme_data)
+    except InvalidFieldset as e:
+        return JsonResponse({'error': str(e)}, status=400)
     except LoanScheme.DoesNotExist:
         print(f"Error: Scheme with ID {scheme_id} not found")
         return JsonResponse({'error': 'Scheme not found'}, status=404)
@@ -739,8 +679,22 @@ def api_scheme_detail(request, scheme_id):
         return JsonResponse({'error': f'Server error: {str(e)}'}, status=500)
 
 # Government Schemes API views
+
+def stored_spelling(value, stored_values):
+    """The stored value equal to value ignoring case, or value itself when there is none"""
+    value = value.strip()
+    return next((stored for stored in stored_values if stored and stored.casefold() == value.casefold()), value)
+
+GOV_SCHEME_SUMMARY_COLUMNS = ('scheme_id', 'name', 'type', 'description', 'state', 'target_group', 'status')
+GOV_SCHEME_LIST_FIELDSET = Fieldset.of_columns(*GOV_SCHEME_SUMMARY_COLUMNS)
+GOV_SCHEME_DETAIL_FIELDSET = Fieldset.of_columns(
+    *GOV_SCHEME_SUMMARY_COLUMNS,
+    'eligibility', 'benefits', 'how_to_apply', 'required_documents', 'contact', 'faq', 'language_support'
+)
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@catalog_condition(GovernmentScheme)
 def api_gov_schemes(request):
     """API endpoint to fetch government schemes for the React frontend"""
     try:
@@ -749,19 +703,28 @@ def api_gov_schemes(request):
         state = request.GET.get('state')
         status = request.GET.get('status')
         search_query = request.GET.get('search')
+        fields = GOV_SCHEME_LIST_FIELDSET.select(request.GET)
+        
+        # Prepare filter options from database
+        filter_options = {
+            'types': list(GovernmentScheme.objects.values_list('type', flat=True).distinct()),
+            'states': list(GovernmentScheme.objects.values_list('state', flat=True).distinct()),
+            'statuses': list(GovernmentScheme.objects.values_list('status', flat=True).distinct())
+        }
         
         # Get data from database
-        schemes = GovernmentScheme.objects.all()
+        schemes = GOV_SCHEME_LIST_FIELDSET.only(GovernmentScheme.objects.all(), fields)
         
-        # Apply filters if any
+        # Apply filters if any. Filters match case-insensitively; they are
+        # resolved to the stored spelling first so the lookup is an indexed equality.
         if scheme_type:
-            schemes = schemes.filter(type__iexact=scheme_type)
+            schemes = schemes.filter(type=stored_spelling(scheme_type, filter_options['types']))
         
         if state:
-            schemes = schemes.filter(state__iexact=state)
+            schemes = schemes.filter(state=stored_spelling(state, filter_options['states']))
             
         if status:
-            schemes = schemes.filter(status__iexact=status)
+            schemes = schemes.filter(status=stored_spelling(status, filter_options['statuses']))
             
         if search_query:
             schemes = schemes.filter(
@@ -772,25 +735,7 @@ def api_gov_schemes(request):
             )
         
         # Convert queryset to list of dictionaries
-        schemes_data = []
-        for scheme in schemes:
-            scheme_data = {
-                'scheme_id': scheme.scheme_id,
-                'name': scheme.name,
-                'type': scheme.type,
-                'description': scheme.description,
-                'state': scheme.state,
-                'target_group': scheme.target_group,
-                'status': scheme.status
-            }
-            schemes_data.append(scheme_data)
-        
-        # Prepare filter options from database
-        filter_options = {
-            'types': list(GovernmentScheme.objects.values_list('type', flat=True).distinct()),
-            'states': list(GovernmentScheme.objects.values_list('state', flat=True).distinct()),
-            'statuses': list(GovernmentScheme.objects.values_list('status', flat=True).distinct())
-        }
+        schemes_data = [GOV_SCHEME_LIST_FIELDSET.serialize(scheme, fields) for scheme in schemes]
         
         response_data = {
             'schemes': schemes_data,
@@ -799,40 +744,32 @@ def api_gov_schemes(request):
         
         return JsonResponse(response_data)
             
+    except InvalidFieldset as e:
+        return JsonResponse({'error': str(e)}, status=400)
     except Exception as e:
         logger.error(f"Error in api_gov_schemes: {str(e)}")
         return JsonResponse({'error': str(e)}, status=500)
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@catalog_condition(GovernmentScheme)
 def api_gov_scheme_detail(request, scheme_id):
     """API endpoint to fetch details of a specific government scheme"""
     try:
+        fields = GOV_SCHEME_DETAIL_FIELDSET.select(request.GET)
+        
         # Get scheme from database
         try:
-            scheme = GovernmentScheme.objects.get(scheme_id=scheme_id)
+            scheme = GOV_SCHEME_DETAIL_FIELDSET.only(GovernmentScheme.objects.all(), fields).get(scheme_id=scheme_id)
             
             # Convert DB object to dict
-            scheme_data = {
-                'scheme_id': scheme.scheme_id,
-                'name': scheme.name,
-                'type': scheme.type,
-                'description': scheme.description,
-                'state': scheme.state,
-                'target_group': scheme.target_group,
-                'status': scheme.status,
-                'eligibility': scheme.eligibility,
-                'benefits': scheme.benefits,
-                'how_to_apply': scheme.how_to_apply,
-                'required_documents': scheme.required_documents,
-                'contact': scheme.contact,
-                'faq': scheme.faq,
-                'language_support': scheme.language_support
-            }
+            scheme_data = GOV_SCHEME_DETAIL_FIELDSET.serialize(scheme, fields)
             
             return JsonResponse(scheme_data)
         except GovernmentScheme.DoesNotExist:
             return JsonResponse({'error': 'Scheme not found'}, status=404)
+    except InvalidFieldset as e:
+        return JsonResponse({'error': str(e)}, status=400)
     except Exception as e:
         logger.error(f"Error in api_gov_scheme_detail: {str(e)}")
         return JsonResponse({'error': str(e)}, status=500)
@@ -960,6 +897,13 @@ def admin_check_api(request):
         return Response({'is_admin': True})
     return Response({'is_admin': False})
 
+# Output fields of the admin crop list, selectable with ?fields=
+ADMIN_CROP_FIELDSET = Fieldset.of_columns(
+    'id', 'name', 'scientific_name', 'growing_season', 'min_temp_c', 'max_temp_c', 'water_requirement_mm',
+    'suitable_soil_types', 'ph_range', 'varieties', 'cultivation_practices',
+    'n_requirement_kg_per_ha', 'p_requirement_kg_per_ha', 'k_requirement_kg_per_ha'
+)
+
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
 def admin_crops_api(request):
@@ -969,9 +913,7 @@ def admin_crops_api(request):
         return Response({'error': 'Unauthorized'}, status=status.HTTP_401_UNAUTHORIZED)
         
     if request.method == 'GET':
-        # List all crops with pagination
-        page = int(request.query_params.get('page', 1))
-        page_size = int(request.query_params.get('page_size', 10))
+        # List crops a page at a time, continuing from the cursor of the previous page
         search = request.query_params.get('search', '')
         
         # Apply search filter if provided
@@ -980,39 +922,24 @@ def admin_crops_api(request):
         else:
             crops = Crop.objects.all()
             
-        # Calculate pagination
-        start = (page - 1) * page_size
-        end = start + page_size
-        
-        # Get paginated crops
-        paginated_crops = crops[start:end]
+        try:
+            fields = ADMIN_CROP_FIELDSET.select(request.query_params)
+            page = paginate(
+                ADMIN_CROP_FIELDSET.only(crops, fields), request.query_params, sort_fields={'id': 'id', 'name': 'name'},
+                filter_fields={'growing_season': 'growing_season'}
+            )
+        except (InvalidPageRequest, InvalidFieldset) as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
         # Serialize crops data
-        crops_data = []
-        for crop in paginated_crops:
-            crops_data.append({
-                'id': crop.id,
-                'name': crop.name,
-                'scientific_name': crop.scientific_name if hasattr(crop, 'scientific_name') else '',
-                'growing_season': crop.growing_season,
-                'min_temp_c': crop.min_temp_c,
-                'max_temp_c': crop.max_temp_c,
-                'water_requirement_mm': crop.water_requirement_mm,
-                'suitable_soil_types': crop.suitable_soil_types,
-                'ph_range': crop.ph_range,
-                'varieties': crop.varieties,
-                'cultivation_practices': crop.cultivation_practices,
-                'n_requirement_kg_per_ha': crop.n_requirement_kg_per_ha,
-                'p_requirement_kg_per_ha': crop.p_requirement_kg_per_ha,
-                'k_requirement_kg_per_ha': crop.k_requirement_kg_per_ha
-            })
+        crops_data = [ADMIN_CROP_FIELDSET.serialize(crop, fields) for crop in page.rows]
             
         return Response({
             'crops': crops_data,
-            'total_count': crops.count(),
-            'page': page,
-            'page_size': page_size,
-            'total_pages': (crops.count() + page_size - 1) // page_size
+            'total_count': page.total_count,
+            'page_size': page.limit,
+            'total_pages': (page.total_count + page.limit - 1) // page.limit,
+            'next_cursor': page.next_cursor
         })
         
     elif request.method == 'POST':
@@ -1140,37 +1067,37 @@ def admin_users_api(request):
         return Response({'error': 'Unauthorized'}, status=status.HTTP_401_UNAUTHORIZED)
         
     if request.method == 'GET':
-        # List all users with pagination
-        page = int(request.query_params.get('page', 1))
-        page_size = int(request.query_params.get('page_size', 10))
+        # List users a page at a time, continuing from the cursor of the previous page
         search = request.query_params.get('search', '')
         
         User = get_user_model()
         
+        # Users and their farmer profiles come from one joined query
+        users = User.objects.select_related('farmer_profile')
+        
         # Apply search filter if provided
         if search:
-            users = User.objects.filter(
-                models.Q(username__icontains=search) | 
-                models.Q(email__icontains=search) |
-                models.Q(first_name__icontains=search) |
-                models.Q(last_name__icontains=search)
-            )
-        else:
-            users = User.objects.all()
+            users = users.filter(user_search(search))
             
-        # Calculate pagination
-        start = (page - 1) * page_size
-        end = start + page_size
-        
-        # Get paginated users
-        paginated_users = users[start:end]
+        try:
+            page = paginate(
+                users, request.query_params,
+                sort_fields={'id': 'id', 'username': 'username', 'email': 'email'},
+                filter_fields={
+                    'is_staff': 'is_staff', 'is_active': 'is_active',
+                    'district': 'farmer_profile__district'
+                },
+                versioned_models=[User, FarmerProfile]
+            )
+        except InvalidPageRequest as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
         # Serialize users data
         users_data = []
-        for user in paginated_users:
-            # Get farmer profile if exists
+        for user in page.rows:
+            # Farmer profile loaded with the user, if there is one
             try:
-                farmer_profile = FarmerProfile.objects.get(user=user)
+                farmer_profile = user.farmer_profile
                 profile_data = {
                     'first_name': farmer_profile.first_name,
                     'last_name': farmer_profile.last_name,
@@ -1198,10 +1125,10 @@ def admin_users_api(request):
             
         return Response({
             'users': users_data,
-            'total_count': users.count(),
-            'page': page,
-            'page_size': page_size,
-            'total_pages': (users.count() + page_size - 1) // page_size
+            'total_count': page.total_count,
+            'page_size': page.limit,
+            'total_pages': (page.total_count + page.limit - 1) // page.limit,
+            'next_cursor': page.next_cursor
         })
         
     elif request.method == 'POST':
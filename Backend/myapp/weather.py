@@ -0,0 +1,195 @@
+"""
+OpenWeather client used by the weather endpoints.
+
+Both the sync and the async path keep their connections alive in a shared
+pool and give up after WEATHER_CONNECT_TIMEOUT / WEATHER_READ_TIMEOUT. At
+most WEATHER_MAX_CONNECTIONS requests per process are in flight upstream.
+Requests beyond that wait for a free connection, up to the connect timeout,
+and then fail with WeatherUnavailable. A slow or unreachable upstream can
+therefore neither hold a worker indefinitely nor be flooded by it.
+
+The upstream base URL is WEATHER_API_BASE_URL, so a local stub server can
+stand in for OpenWeather.
+"""
+import asyncio
+import threading
+import weakref
+
+import httpx
+import requests
+from django.conf import settings
+from django.utils import timezone
+from requests.adapters import HTTPAdapter
+
+CURRENT = 'weather'
+FORECAST = 'forecast'
+
+
+class WeatherServiceError(Exception):
+    """OpenWeather answered with an error, e.g. for an unknown city"""
+
+    def __init__(self, message, status_code):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+class WeatherUnavailable(Exception):
+    """OpenWeather could not be reached in time"""
+
+
+def upstream_url(endpoint):
+    return f"{settings.WEATHER_API_BASE_URL.rstrip('/')}/{endpoint}"
+
+
+def upstream_params(endpoint, city):
+    api_key = settings.WEATHER_FORECAST_API_KEY if endpoint == FORECAST else settings.WEATHER_API_KEY
+    return {'q': city, 'appid': api_key, 'units': 'metric'}
+
+
+def parse_current(data):
+    return {
+        'city': data['name'],
+        'temperature': data['main']['temp'],
+        'description': data['weather'][0]['description'],
+        'icon': data['weather'][0]['icon'],
+        'humidity': data['main']['humidity'],
+        'wind_speed': data['wind']['speed'],
+        'timestamp': timezone.now().isoformat()
+    }
+
+
+def forecast_entry(item):
+    return {
+        'date': item['dt_txt'].split(' ')[0],
+        'temperature': item['main']['temp'],
+        'feels_like': item['main']['feels_like'],
+        'description': item['weather'][0]['description'],
+        'icon': item['weather'][0]['icon'],
+        'humidity': item['main']['humidity'],
+        'wind_speed': item['wind']['speed'],
+        'timestamp': item['dt_txt']
+    }
+
+
+def parse_forecast(data):
+    """One forecast per day (the noon reading where there is one) and the next eight 3-hour readings"""
+    daily_forecasts = []
+    days_processed = set()
+    for item in data['list']:
+        date, time = item['dt_txt'].split(' ')
+        if date not in days_processed and '12:00:00' in time:
+            days_processed.add(date)
+            daily_forecasts.append(forecast_entry(item))
+            if len(daily_forecasts) >= 5:
+                break
+
+    # If we couldn't find exactly noon forecasts, just take the first forecast for each day
+    if len(daily_forecasts) < 5:
+        daily_forecasts = []
+        days_processed = set()
+        for item in data['list']:
+            date = item['dt_txt'].split(' ')[0]
+            if date not in days_processed:
+                days_processed.add(date)
+                daily_forecasts.append(forecast_entry(item))
+                if len(daily_forecasts) >= 5:
+                    break
+
+    return {
+        'city': data['city']['name'],
+        'country': data['city']['country'],
+        'forecasts': daily_forecasts,
+        'hourly': [forecast_entry(item) for item in data['list'][:8]]
+    }
+
+
+PARSERS = {CURRENT: parse_current, FORECAST: parse_forecast}
+
+
+def parse_response(endpoint, status_code, payload):
+    if status_code != 200:
+        message = payload.get('message', 'Unknown error') if isinstance(payload, dict) else 'Unknown error'
+        raise WeatherServiceError(message, status_code)
+    return PARSERS[endpoint](payload)
+
+
+def response_payload(response):
+    try:
+        return response.json()
+    except ValueError:
+        return None
+
+
+# Sync client, for the WSGI views
+
+_session = None
+_session_slots = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Shared session and the semaphore bounding its concurrent requests"""
+    global _session, _session_slots
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=settings.WEATHER_MAX_CONNECTIONS)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                _session_slots = threading.BoundedSemaphore(settings.WEATHER_MAX_CONNECTIONS)
+                _session = session
+    return _session, _session_slots
+
+
+def fetch(endpoint, city):
+    """Parsed current weather or forecast for city"""
+    session, slots = get_session()
+    if not slots.acquire(timeout=settings.WEATHER_CONNECT_TIMEOUT):
+        raise WeatherUnavailable('Too many concurrent weather requests')
+    try:
+        response = session.get(
+            upstream_url(endpoint), params=upstream_params(endpoint, city),
+            timeout=(settings.WEATHER_CONNECT_TIMEOUT, settings.WEATHER_READ_TIMEOUT)
+        )
+    except requests.RequestException as e:
+        # The message would include the URL, and with it the API key
+        raise WeatherUnavailable(e.__class__.__name__)
+    finally:
+        slots.release()
+    return parse_response(endpoint, response.status_code, response_payload(response))
+
+
+# Async client, for the ASGI views. httpx clients are bound to the event loop
+# they were first used on, so there is one per running loop.
+
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_async_client():
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            timeout=httpx.Timeout(
+                settings.WEATHER_READ_TIMEOUT,
+                connect=settings.WEATHER_CONNECT_TIMEOUT,
+                pool=settings.WEATHER_CONNECT_TIMEOUT,
+            ),
+            limits=httpx.Limits(
+                max_connections=settings.WEATHER_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.WEATHER_MAX_CONNECTIONS,
+            ),
+        )
+        _async_clients[loop] = client
+    return client
+
+
+async def afetch(endpoint, city):
+    """Async version of fetch"""
+    try:
+        response = await get_async_client().get(upstream_url(endpoint), params=upstream_params(endpoint, city))
+    except httpx.HTTPError as e:
+        raise WeatherUnavailable(e.__class__.__name__)
+    return parse_response(endpoint, response.status_code, response_payload(response))
@@ -0,0 +1,175 @@
+"""
+Cache in front of the weather client.
+
+Entries are keyed by endpoint and normalized city name. They are fresh for
+CURRENT_TTL (current conditions) or FORECAST_TTL (forecasts). After that they
+are served stale for up to STALE_TTL more while a background refresh runs, so
+a user only waits on OpenWeather when a city has no cached entry at all.
+
+Concurrent lookups of the same uncached city share one upstream request
+(single flight). Requests are only shared within a process, so with several
+worker processes each one may make its own request.
+"""
+import asyncio
+import logging
+import threading
+import time
+import weakref
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from django.core.cache import cache
+
+from . import weather
+
+logger = logging.getLogger(__name__)
+
+CURRENT_TTL = 10 * 60
+FORECAST_TTL = 60 * 60
+TTLS = {weather.CURRENT: CURRENT_TTL, weather.FORECAST: FORECAST_TTL}
+
+# How long past its TTL an entry may still be served while it is refreshed
+STALE_TTL = 6 * 60 * 60
+
+CACHE_KEY_PREFIX = 'weather:'
+
+# Cache status of a lookup
+HIT = 'hit'
+STALE = 'stale'
+MISS = 'miss'
+
+
+def normalize_city(city):
+    return ' '.join(city.split()).casefold()
+
+
+def cache_key(endpoint, city):
+    return f'{CACHE_KEY_PREFIX}{endpoint}:{normalize_city(city)}'
+
+
+def cache_entry(data):
+    return {'data': data, 'fetched_at': time.time()}
+
+
+def cache_timeout(endpoint):
+    return TTLS[endpoint] + STALE_TTL
+
+
+def store(endpoint, city, data):
+    """Cache data fetched just now for city"""
+    cache.set(cache_key(endpoint, city), cache_entry(data), cache_timeout(endpoint))
+
+
+def is_fresh(entry, endpoint):
+    return time.time() - entry['fetched_at'] < TTLS[endpoint]
+
+
+# Sync lookups
+
+class SingleFlight:
+    """Runs one call per key at a time; concurrent callers wait for its result"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}
+
+    def in_flight(self, key):
+        with self.lock:
+            return key in self.calls
+
+    def do(self, key, fn):
+        with self.lock:
+            future = self.calls.get(key)
+            leader = future is None
+            if leader:
+                future = self.calls[key] = Future()
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self.lock:
+                del self.calls[key]
+
+
+_flight = SingleFlight()
+_refresher = ThreadPoolExecutor(max_workers=4, thread_name_prefix='weather-refresh')
+
+
+def refresh(endpoint, city):
+    """Fetch city from upstream and cache it, sharing any fetch already running"""
+    def fetch_and_store():
+        data = weather.fetch(endpoint, city)
+        store(endpoint, city, data)
+        return data
+    return _flight.do(cache_key(endpoint, city), fetch_and_store)
+
+
+def _refresh_in_background(endpoint, city):
+    if _flight.in_flight(cache_key(endpoint, city)):
+        return
+
+    def run():
+        try:
+            refresh(endpoint, city)
+        except Exception as e:
+            logger.warning(f"Background weather refresh for {city} failed: {str(e)}")
+    _refresher.submit(run)
+
+
+def get_weather(endpoint, city):
+    """(data, cache status) of the current weather or forecast for city"""
+    entry = cache.get(cache_key(endpoint, city))
+    if entry is not None:
+        if is_fresh(entry, endpoint):
+            return entry['data'], HIT
+        _refresh_in_background(endpoint, city)
+        return entry['data'], STALE
+    return refresh(endpoint, city), MISS
+
+
+# Async lookups. In-flight fetches are tasks of the running event loop.
+
+_tasks = weakref.WeakKeyDictionary()
+
+
+def _log_background_failure(task):
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning(f"Background weather refresh failed: {str(task.exception())}")
+
+
+def _refresh_task(endpoint, city):
+    tasks = _tasks.setdefault(asyncio.get_running_loop(), {})
+    key = cache_key(endpoint, city)
+    task = tasks.get(key)
+    if task is None:
+        async def fetch_and_store():
+            data = await weather.afetch(endpoint, city)
+            await cache.aset(key, cache_entry(data), cache_timeout(endpoint))
+            return data
+        task = tasks[key] = asyncio.ensure_future(fetch_and_store())
+        task.add_done_callback(lambda _: tasks.pop(key, None))
+    return task
+
+
+async def arefresh(endpoint, city):
+    # Shielded so that a client disconnecting does not cancel the fetch
+    # other requests are waiting on
+    return await asyncio.shield(_refresh_task(endpoint, city))
+
+
+async def aget_weather(endpoint, city):
+    """Async version of get_weather"""
+    entry = await cache.aget(cache_key(endpoint, city))
+    if entry is not None:
+        if is_fresh(entry, endpoint):
+            return entry['data'], HIT
+        _refresh_task(endpoint, city).add_done_callback(_log_background_failure)
+        return entry['data'], STALE
+    return await arefresh(endpoint, city), MISS
@@ -0,0 +1,116 @@
+"""
+Local stand-in for the OpenWeather API, for tests and benchmarks.
+
+    with StubWeatherServer(latency=0.05) as stub:
+        with override_settings(WEATHER_API_BASE_URL=stub.base_url):
+            ...
+
+Serves /weather and /forecast in OpenWeather's response format, counts the
+requests per (endpoint, city) and answers 404 for the cities in
+unknown_cities.
+"""
+import json
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+def current_payload(city):
+    return {
+        'name': city,
+        'main': {'temp': 27.5, 'feels_like': 29.1, 'humidity': 64},
+        'weather': [{'description': 'scattered clouds', 'icon': '03d'}],
+        'wind': {'speed': 3.2},
+    }
+
+
+def forecast_payload(city):
+    start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    return {
+        'city': {'name': city, 'country': 'IN'},
+        'list': [
+            {
+                'dt_txt': (start + timedelta(hours=3 * step)).strftime('%Y-%m-%d %H:%M:%S'),
+                'main': {'temp': 24 + step % 8, 'feels_like': 25 + step % 8, 'humidity': 60 + step % 20},
+                'weather': [{'description': 'light rain' if step % 5 == 0 else 'clear sky', 'icon': '01d'}],
+                'wind': {'speed': 2.5},
+            }
+            for step in range(40)
+        ],
+    }
+
+
+class StubWeatherServer:
+
+    def __init__(self, latency=0.0, unknown_cities=()):
+        self.latency = latency
+        self.unknown_cities = {city.lower() for city in unknown_cities}
+        self.calls = Counter()
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self.handler_class())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address
+        return f'http://{host}:{port}'
+
+    @property
+    def total_calls(self):
+        with self.lock:
+            return sum(self.calls.values())
+
+    def handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                endpoint = url.path.rstrip('/').rsplit('/', 1)[-1]
+                city = parse_qs(url.query).get('q', [''])[0]
+                with stub.lock:
+                    stub.calls[(endpoint, city)] += 1
+                if stub.latency:
+                    time.sleep(stub.latency)
+
+                if endpoint not in ('weather', 'forecast'):
+                    status, payload = 404, {'cod': '404', 'message': 'Internal error'}
+                elif city.lower() in stub.unknown_cities:
+                    status, payload = 404, {'cod': '404', 'message': 'city not found'}
+                elif endpoint == 'weather':
+                    status, payload = 200, current_payload(city)
+                else:
+                    status, payload = 200, forecast_payload(city)
+
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
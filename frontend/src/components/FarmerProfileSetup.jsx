@@ -459,6 +459,9 @@ const FarmerProfileSetup = ({ existingProfile, onComplete }) => {
           console.log("Preserving existing ID from localStorage:", parsedData.id);
           updatedApiData = { ...apiData, id: parsedData.id };
         }
+        if (parsedData.externalId) {
+          updatedApiData = { ...updatedApiData, externalId: parsedData.externalId };
+        }
       } catch (e) {
         console.error("Error parsing existing profile data:", e);
       }
@@ -468,6 +471,16 @@ const FarmerProfileSetup = ({ existingProfile, onComplete }) => {
     if (existingProfile && existingProfile.id) {
       console.log("Preserving ID from existingProfile prop:", existingProfile.id);
       updatedApiData = { ...updatedApiData, id: existingProfile.id };
+      if (existingProfile.externalId) {
+        updatedApiData = { ...updatedApiData, externalId: existingProfile.externalId };
+      }
+    }
+
+    // A farmer with an id is saved by its id. A new one gets a stable key to
+    // be created under, so a repeated save updates that farmer instead of
+    // creating another one.
+    if (!updatedApiData.id && !updatedApiData.externalId) {
+      updatedApiData = { ...updatedApiData, externalId: crypto.randomUUID() };
     }
     
     console.log("Saving to localStorage:", updatedApiData);
@@ -495,7 +508,8 @@ const FarmerProfileSetup = ({ existingProfile, onComplete }) => {
             // Add ID to the profile data for onComplete callback
             const profileWithId = {
               ...updatedApiData,
-              id: response.data.farmer_id
+              id: response.data.farmer_id,
+              externalId: response.data.external_id
             };
             
             // Update localStorage with the ID included
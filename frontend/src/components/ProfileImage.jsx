@@ -0,0 +1,39 @@
+import React, { useState, useEffect } from 'react';
+import axios from 'axios';
+import { getAuthHeader } from '../config/api';
+
+// Profile images are served to their owner only, so an <img> cannot load
+// them by URL; fetch them with the auth token and show the blob instead.
+// Previews (data: and blob: URLs) are shown as they are.
+const ProfileImage = ({ src, ...props }) => {
+  const isLocal = !src || src.startsWith('data:') || src.startsWith('blob:');
+  const [objectUrl, setObjectUrl] = useState(null);
+
+  useEffect(() => {
+    if (isLocal) {
+      return undefined;
+    }
+    let url = null;
+    let cancelled = false;
+    axios.get(src, { responseType: 'blob', headers: getAuthHeader() })
+      .then((response) => {
+        if (!cancelled) {
+          url = URL.createObjectURL(response.data);
+          setObjectUrl(url);
+        }
+      })
+      .catch((error) => console.error('Error loading profile image:', error));
+    return () => {
+      cancelled = true;
+      if (url) {
+        URL.revokeObjectURL(url);
+      }
+      setObjectUrl(null);
+    };
+  }, [src, isLocal]);
+
+  const shown = isLocal ? src : objectUrl;
+  return shown ? <img src={shown} {...props} /> : null;
+};
+
+export default ProfileImage;
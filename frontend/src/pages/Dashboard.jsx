@@ -7,6 +7,7 @@ import { useCity } from '../context/CityContext';
 import LoanDetails from '../components/LoanDetails';
 import EMICalculator from '../components/EMICalculator';
 import TaskManager from '../components/TaskManager';
+import ProfileImage from '../components/ProfileImage';
 import { 
   Calendar, Cloud, BarChart2, Home, Leaf, 
   Droplet, Thermometer, User, Settings, Menu, 
@@ -337,6 +338,8 @@ const ProfileComponent = () => {
       };
       setUserData(updatedUserData);
       localStorage.setItem('userData', JSON.stringify(updatedUserData));
+          // Show the stored image from now on instead of the uploaded data URL
+          setImagePreview(data.profile_image);
       setSuccessMessage('Profile image updated successfully!');
         } else {
           setError(message || 'Failed to update profile image. Please try again.');
@@ -459,7 +462,7 @@ const ProfileComponent = () => {
             onClick={triggerFileInput}
           >
             {imagePreview || userData.profile_image ? (
-              <img
+              <ProfileImage
                 className="h-full w-full object-cover"
                 src={imagePreview || userData.profile_image}
                 alt="User profile"
@@ -714,9 +717,9 @@ const MobileHeader = ({ sidebarOpen, setSidebarOpen, notifications, activeNav, w
           {/* Profile icon */}
           <div className="relative">
             {userData && userData.profile_image ? (
-              <img 
+              <ProfileImage 
                 className="h-8 w-8 rounded-full object-cover border-2 border-green-300" 
-                src={userData.profile_image}
+                src={userData.profile_image_thumbnail || userData.profile_image}
                 alt="User profile" 
               />
             ) : (
@@ -2465,9 +2468,9 @@ const Dashboard = () => {
             <div className="p-4 border-t border-green-700">
               <div className="flex items-center">
                 {userData && userData.profile_image ? (
-                  <img 
+                  <ProfileImage 
                     className="h-8 w-8 rounded-full object-cover" 
-                    src={userData.profile_image}
+                    src={userData.profile_image_thumbnail || userData.profile_image}
                     alt="User profile" 
                   />
                 ) : (
@@ -2567,7 +2570,7 @@ const Dashboard = () => {
                 >
                   <div className="h-8 w-8 rounded-full bg-green-100 flex items-center justify-center overflow-hidden border-2 border-green-300">
                     {userData && userData.profile_image ? (
-                      <img src={userData.profile_image} alt="Profile" className="h-full w-full object-cover" />
+                      <ProfileImage src={userData.profile_image_thumbnail || userData.profile_image} alt="Profile" className="h-full w-full object-cover" />
                     ) : (
                       <User className="h-5 w-5 text-green-600" />
                     )}
@@ -49,7 +49,8 @@ const Login = () => {
           is_verified: response.data.is_verified,
           date_joined: response.data.date_joined,
           is_admin: response.data.is_staff,  // Store admin status
-          profile_image: response.data.profile_image // Include profile image
+          profile_image: response.data.profile_image, // Include profile image
+          profile_image_thumbnail: response.data.profile_image_thumbnail
         };
         
         // Handle remember me
@@ -57,6 +57,9 @@ const AdminDashboard = () => {
   const [schemes, setSchemes] = useState([]);
   const [loans, setLoans] = useState([]);
   const [users, setUsers] = useState([]);
+  // Cursor of the next page and row count of the list in the active section
+  const [listPage, setListPage] = useState({ nextCursor: null, totalCount: 0 });
+  const [loadingMore, setLoadingMore] = useState(false);
   
   const menuItems = [
     { id: 'dashboard', label: 'Dashboard', icon: '📊' },
@@ -161,8 +164,9 @@ const AdminDashboard = () => {
     const fetchCrops = async () => {
       try {
         setLoading(true);
-        const data = await getCrops(searchQuery);
-        setCrops(data);
+        const page = await getCrops(searchQuery);
+        setCrops(page.rows);
+        setListPage(page);
       } catch (err) {
         console.error('Error fetching crops:', err);
         setError('Failed to load crops data');
@@ -181,8 +185,9 @@ const AdminDashboard = () => {
     const fetchTechnologies = async () => {
       try {
         setLoading(true);
-        const data = await getTechnologies(searchQuery);
-        setTechnologies(data);
+        const page = await getTechnologies(searchQuery);
+        setTechnologies(page.rows);
+        setListPage(page);
       } catch (err) {
         console.error('Error fetching technologies:', err);
         setError('Failed to load technology data');
@@ -201,8 +206,9 @@ const AdminDashboard = () => {
     const fetchSchemes = async () => {
       try {
         setLoading(true);
-        const data = await getSchemes(searchQuery);
-        setSchemes(data);
+        const page = await getSchemes(searchQuery);
+        setSchemes(page.rows);
+        setListPage(page);
       } catch (err) {
         console.error('Error fetching schemes:', err);
         setError('Failed to load government scheme data');
@@ -221,8 +227,9 @@ const AdminDashboard = () => {
     const fetchLoans = async () => {
       try {
         setLoading(true);
-        const data = await getLoans(searchQuery);
-        setLoans(data);
+        const page = await getLoans(searchQuery);
+        setLoans(page.rows);
+        setListPage(page);
       } catch (err) {
         console.error('Error fetching loans:', err);
         setError('Failed to load loan data');
@@ -241,8 +248,9 @@ const AdminDashboard = () => {
     const fetchUsers = async () => {
       try {
         setLoading(true);
-        const data = await getUsers(searchQuery);
-        setUsers(data);
+        const page = await getUsers(searchQuery);
+        setUsers(page.rows);
+        setListPage(page);
       } catch (err) {
         console.error('Error fetching users:', err);
         setError('Failed to load user data');
@@ -256,6 +264,47 @@ const AdminDashboard = () => {
     }
   }, [activeSection, searchQuery]);
 
+  // Load the next page of the list in the active section
+  const listLoaders = {
+    crops: [getCrops, setCrops],
+    technologies: [getTechnologies, setTechnologies],
+    schemes: [getSchemes, setSchemes],
+    loans: [getLoans, setLoans],
+    users: [getUsers, setUsers],
+  };
+
+  const handleLoadMore = async () => {
+    const [load, setRows] = listLoaders[activeSection];
+    try {
+      setLoadingMore(true);
+      const page = await load(searchQuery, listPage.nextCursor);
+      setRows(rows => [...rows, ...page.rows]);
+      setListPage(page);
+    } catch (err) {
+      console.error(`Error loading more ${activeSection}:`, err);
+      setError(`Failed to load more ${activeSection}`);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  const renderListFooter = (shown) => (
+    shown > 0 && (
+      <div className="flex justify-between items-center mt-4">
+        <p className="text-sm text-gray-600">Showing {shown} of {listPage.totalCount}</p>
+        {listPage.nextCursor && (
+          <button
+            className="px-4 py-2 text-green-700 border border-green-600 rounded-lg hover:bg-green-50 disabled:opacity-50"
+            onClick={handleLoadMore}
+            disabled={loadingMore}
+          >
+            {loadingMore ? 'Loading...' : 'Load more'}
+          </button>
+        )}
+      </div>
+    )
+  );
+
   // Handle search input change
   const handleSearch = (e) => {
     setSearchQuery(e.target.value);
@@ -298,6 +347,7 @@ const AdminDashboard = () => {
         default:
           break;
       }
+      setListPage(page => ({ ...page, totalCount: Math.max(page.totalCount - 1, 0) }));
       setConfirmDelete(null);
     } catch (err) {
       console.error(`Error deleting ${type}:`, err);
@@ -751,6 +801,7 @@ const AdminDashboard = () => {
                 </div>
               )}
             </div>
+            {!loading && renderListFooter(crops.length)}
           </div>
         )}
 
@@ -830,6 +881,7 @@ const AdminDashboard = () => {
                 </div>
               )}
             </div>
+            {!loading && renderListFooter(technologies.length)}
           </div>
         )}
 
@@ -907,6 +959,7 @@ const AdminDashboard = () => {
                 </div>
               )}
             </div>
+            {!loading && renderListFooter(schemes.length)}
           </div>
         )}
 
@@ -986,6 +1039,7 @@ const AdminDashboard = () => {
                 </div>
               )}
             </div>
+            {!loading && renderListFooter(loans.length)}
           </div>
         )}
 
@@ -1087,6 +1141,7 @@ const AdminDashboard = () => {
                 </div>
               )}
             </div>
+            {!loading && renderListFooter(users.length)}
           </div>
         )}
       </div>
@@ -81,15 +81,34 @@ export const getDashboardStats = async () => {
   }
 };
 
+// The admin lists come a page at a time: X-Next-Cursor holds the cursor of
+// the next page and X-Total-Count the number of matching rows. The dashboard
+// tables show the first page and load the next one when the admin asks for it.
+const LIST_PAGE_SIZE = 50;
+
+export const EMPTY_PAGE = { rows: [], nextCursor: null, totalCount: 0 };
+
+const getPage = async (url, params, cursor) => {
+  const response = await adminApi.get(url, {
+    params: { ...params, limit: LIST_PAGE_SIZE, ...(cursor ? { cursor } : {}) },
+  });
+  return {
+    rows: response.data,
+    nextCursor: response.headers['x-next-cursor'] || null,
+    totalCount: Number(response.headers['x-total-count'] ?? response.data.length),
+  };
+};
+
 // Crop Management APIs
-export const getCrops = async (searchQuery = '') => {
+// The list calls ask only for the columns the dashboard tables show; the
+// forms load the whole record with the get...ById calls.
+export const getCrops = async (searchQuery = '', cursor = null) => {
   try {
-    const params = searchQuery ? { search: searchQuery } : {};
-    const response = await adminApi.get('/api/admin/crops/', { params });
-    return response.data;
+    const params = { fields: 'id,name,growing_season,water_requirement_mm', ...(searchQuery ? { search: searchQuery } : {}) };
+    return await getPage('/api/admin/crops/', params, cursor);
   } catch (error) {
     console.error('Error fetching crops:', error);
-    return [];
+    return EMPTY_PAGE;
   }
 };
 
@@ -134,14 +153,13 @@ export const deleteCrop = async (id) => {
 };
 
 // Technology Management APIs
-export const getTechnologies = async (searchQuery = '') => {
+export const getTechnologies = async (searchQuery = '', cursor = null) => {
   try {
-    const params = searchQuery ? { search: searchQuery } : {};
-    const response = await adminApi.get('/api/admin/technologies/', { params });
-    return response.data;
+    const params = { fields: 'id,name,category,roi_percentage', ...(searchQuery ? { search: searchQuery } : {}) };
+    return await getPage('/api/admin/technologies/', params, cursor);
   } catch (error) {
     console.error('Error fetching technologies:', error);
-    return [];
+    return EMPTY_PAGE;
   }
 };
 
@@ -186,14 +204,13 @@ export const deleteTechnology = async (id) => {
 };
 
 // Government Scheme Management APIs
-export const getSchemes = async (searchQuery = '') => {
+export const getSchemes = async (searchQuery = '', cursor = null) => {
   try {
-    const params = searchQuery ? { search: searchQuery } : {};
-    const response = await adminApi.get('/api/admin/schemes/', { params });
-    return response.data;
+    const params = { fields: 'id,name,implementing_agency,district_availability', ...(searchQuery ? { search: searchQuery } : {}) };
+    return await getPage('/api/admin/schemes/', params, cursor);
   } catch (error) {
     console.error('Error fetching schemes:', error);
-    return [];
+    return EMPTY_PAGE;
   }
 };
 
@@ -238,14 +255,13 @@ export const deleteScheme = async (id) => {
 };
 
 // Loan Management APIs
-export const getLoans = async (searchQuery = '') => {
+export const getLoans = async (searchQuery = '', cursor = null) => {
   try {
-    const params = searchQuery ? { search: searchQuery } : {};
-    const response = await adminApi.get('/api/admin/loans/', { params });
-    return response.data;
+    const params = { fields: 'id,name,provider,interest_rate,loan_type', ...(searchQuery ? { search: searchQuery } : {}) };
+    return await getPage('/api/admin/loans/', params, cursor);
   } catch (error) {
     console.error('Error fetching loans:', error);
-    return [];
+    return EMPTY_PAGE;
   }
 };
 
@@ -290,14 +306,13 @@ export const deleteLoan = async (id) => {
 };
 
 // User Management APIs
-export const getUsers = async (searchQuery = '') => {
+export const getUsers = async (searchQuery = '', cursor = null) => {
   try {
     const params = searchQuery ? { search: searchQuery } : {};
-    const response = await adminApi.get('/api/admin/users/', { params });
-    return response.data;
+    return await getPage('/api/admin/users/', params, cursor);
   } catch (error) {
     console.error('Error fetching users:', error);
-    return [];
+    return EMPTY_PAGE;
   }
 };
 
@@ -341,4 +356,22 @@ export const deleteUser = async (id) => {
   }
 };
 
+// Farmer onboarding
+export const importFarmers = async (file, { dryRun = false } = {}) => {
+  try {
+    const formData = new FormData();
+    formData.append('file', file);
+    if (dryRun) {
+      formData.append('dry_run', 'true');
+    }
+    const response = await adminApi.post('/api/admin/farmers/import/', formData, {
+      headers: { 'Content-Type': 'multipart/form-data' },
+    });
+    return response.data;
+  } catch (error) {
+    console.error('Error importing farmers:', error);
+    throw error;
+  }
+};
+
 export default adminApi; 
\ No newline at end of file